@@ -11,6 +11,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from error_handler import create_success, create_error, ErrorCode
+from agents.shared.error_fingerprint import PatternSet, get_fingerprinter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +32,10 @@ class ErrorDiagnoser:
     def __init__(self):
         """Initialize ErrorDiagnoser"""
         self.error_patterns = self._load_common_patterns()
+        self._pattern_set = PatternSet(
+            {error_type: info['pattern'] for error_type, info in self.error_patterns.items()},
+            flags=re.IGNORECASE
+        )
 
     def _load_common_patterns(self) -> Dict[str, Dict[str, Any]]:
         """Load common error patterns and their fixes"""
@@ -223,19 +228,22 @@ class ErrorDiagnoser:
         suggestions: List[FixSuggestion] = []
         detected_error_type = 'Unknown'
 
-        for error_type, pattern_info in self.error_patterns.items():
-            if re.search(pattern_info['pattern'], error_message, re.IGNORECASE):
-                detected_error_type = error_type
-                suggestions.append(FixSuggestion(
-                    error_type=error_type,
-                    description=f"Common {error_type} error",
-                    suggested_fix=pattern_info['fix_template'],
-                    confidence=0.8
-                ))
+        for error_type in self._pattern_set.matches(error_message):
+            detected_error_type = error_type
+            suggestions.append(FixSuggestion(
+                error_type=error_type,
+                description=f"Common {error_type} error",
+                suggested_fix=self.error_patterns[error_type]['fix_template'],
+                confidence=0.8
+            ))
+
+        fingerprint = get_fingerprinter().fingerprint(error_message)
 
         return create_success(
             error_type=detected_error_type,
             error_message=error_message,
+            fingerprint=fingerprint.key,
+            error_template=fingerprint.template,
             suggestions=suggestions,
             total_suggestions=len(suggestions)
         )
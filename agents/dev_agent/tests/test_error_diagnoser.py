@@ -160,6 +160,15 @@ AttributeError: 'MyClass' object has no attribute 'missing_attr'"""
         assert result['error_type'] == 'AttributeError'
         assert len(result['suggestions']) > 0
 
+    
+    def test_diagnose_fingerprint_ignores_variable_parts(self, diagnoser):
+        """Test errors differing only by ids share a fingerprint"""
+        first = diagnoser.diagnose_error("FileNotFoundError: No such file or directory: /tmp/run-1/out.json")
+        second = diagnoser.diagnose_error("FileNotFoundError: No such file or directory: /tmp/run-2/out.json")
+        
+        assert first['fingerprint'] == second['fingerprint']
+        assert first['error_template'] == "FileNotFoundError: No such file or directory: <path>"
+
 
 class TestErrorPatternLibrary:
     """Test the error pattern library"""
@@ -30,6 +30,7 @@ else
 fi
 
 psql "$DB_CONNECTION" -f migrations/001_create_faq_tables.sql
+psql "$DB_CONNECTION" -f migrations/002_faq_stats_aggregate.sql
 
 echo "✅ Database migration completed"
 
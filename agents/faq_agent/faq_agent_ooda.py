@@ -571,6 +571,10 @@ class FAQAgentOODA:
                 'decision_trace': []
             }
 
+    async def close(self) -> None:
+        """Write pending search history"""
+        await self.search_tool.close()
+
     def _infer_task_type(self, task: str) -> str:
         """Infer task type from task description"""
         task_lower = task.lower()
@@ -0,0 +1,47 @@
+
+CREATE OR REPLACE FUNCTION faq_stats(
+    top_n INT DEFAULT 5
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_faqs', (SELECT COUNT(*) FROM faqs),
+        'by_category', COALESCE((
+            SELECT jsonb_object_agg(category_name, category_count)
+            FROM (
+                SELECT COALESCE(category, 'uncategorized') AS category_name,
+                       COUNT(*) AS category_count
+                FROM faqs
+                GROUP BY COALESCE(category, 'uncategorized')
+            ) AS grouped
+        ), '{}'::jsonb),
+        'most_viewed', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('question', question, 'view_count', view_count)
+                ORDER BY view_count DESC
+            )
+            FROM (
+                SELECT question, view_count
+                FROM faqs
+                ORDER BY view_count DESC
+                LIMIT top_n
+            ) AS viewed
+        ), '[]'::jsonb),
+        'most_helpful', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('question', question, 'helpful_count', helpful_count)
+                ORDER BY helpful_count DESC
+            )
+            FROM (
+                SELECT question, helpful_count
+                FROM faqs
+                ORDER BY helpful_count DESC
+                LIMIT top_n
+            ) AS helpful
+        ), '[]'::jsonb)
+    );
+$$;
+
+COMMENT ON FUNCTION faq_stats IS 'FAQ Agent - 統計彙總函數 (GROUP BY 分類計數與熱門 FAQ)';
@@ -232,7 +232,10 @@ class TestCreateFAQEndpoint:
             'answer': 'Test'
         })
         
-        mock_redis.scan_iter.assert_called()
+        mock_redis.incr.assert_any_call('faq:gen:search')
+        mock_redis.incr.assert_any_call('faq:gen:categories')
+        assert mock_redis.publish.call_count == 2
+        mock_redis.scan_iter.assert_not_called()
 
 
 class TestUpdateFAQEndpoint:
@@ -4,6 +4,7 @@ Tests that CRUD operations properly invalidate cached search results
 """
 import pytest
 import asyncio
+import json
 from unittest.mock import Mock, patch, AsyncMock
 import sys
 import os
@@ -13,6 +14,8 @@ api_backend_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ha
 sys.path.insert(0, os.path.join(api_backend_path, 'src'))
 sys.path.insert(0, api_backend_path)
 
+from routes.faq import generate_cache_key
+
 @pytest.fixture
 def app():
     """Create test Flask app"""
@@ -38,6 +41,7 @@ def mock_redis():
         mock.setex.return_value = True
         mock.delete.return_value = 1
         mock.scan_iter.return_value = []
+        mock.incr.return_value = 1
         yield mock
 
 @pytest.fixture
@@ -52,6 +56,14 @@ def user_token():
     from middleware.auth_middleware import create_user_token
     return create_user_token()
 
+def assert_generation_bumped(mock_redis, *namespaces):
+    """Each namespace's shared generation was incremented and the new value published"""
+    for namespace in namespaces:
+        mock_redis.incr.assert_any_call(f'faq:gen:{namespace}')
+    published = [json.loads(call.args[1]).get('generations', {}) for call in mock_redis.publish.call_args_list]
+    assert all({namespace: 1} in published for namespace in namespaces)
+    mock_redis.scan_iter.assert_not_called()
+
 def test_create_faq_invalidates_search_cache(client, mock_redis, admin_token):
     """Test that creating FAQ invalidates search cache"""
     with patch('src.routes.faq.FAQManagementTool') as mock_tool_class:
@@ -74,8 +86,7 @@ def test_create_faq_invalidates_search_cache(client, mock_redis, admin_token):
         
         assert response.status_code == 201
         
-        mock_redis.scan_iter.assert_any_call('faq:search:*')
-        mock_redis.scan_iter.assert_any_call('faq:categories:*')
+        assert_generation_bumped(mock_redis, 'search', 'categories')
 
 def test_update_faq_invalidates_caches(client, mock_redis, admin_token):
     """Test that updating FAQ invalidates both search and item caches"""
@@ -94,8 +105,8 @@ def test_update_faq_invalidates_caches(client, mock_redis, admin_token):
         
         assert response.status_code == 200
         
-        mock_redis.scan_iter.assert_any_call('faq:search:*')
-        mock_redis.scan_iter.assert_any_call('faq:item:*')
+        assert_generation_bumped(mock_redis, 'search', 'categories')
+        mock_redis.delete.assert_called_once_with(generate_cache_key('item', id='test-id-123'))
 
 def test_delete_faq_invalidates_caches(client, mock_redis, admin_token):
     """Test that deleting FAQ invalidates both search and item caches"""
@@ -113,8 +124,8 @@ def test_delete_faq_invalidates_caches(client, mock_redis, admin_token):
         
         assert response.status_code == 200
         
-        mock_redis.scan_iter.assert_any_call('faq:search:*')
-        mock_redis.scan_iter.assert_any_call('faq:item:*')
+        assert_generation_bumped(mock_redis, 'search', 'categories')
+        mock_redis.delete.assert_called_once_with(generate_cache_key('item', id='test-id-123'))
 
 def test_search_caches_results(client, mock_redis, user_token):
     """Test that search results are cached"""
@@ -4,6 +4,7 @@ Tests for FAQ Agent Tools
 
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
+from postgrest.exceptions import APIError
 import sys
 import os
 
@@ -278,6 +279,131 @@ class TestFAQManagementTool:
             assert result['created_count'] == 2
             assert result['failed_count'] == 0
 
+    
+    def _stats_tool(self, **kwargs):
+        tool = FAQManagementTool(embedding_tool=Mock(), **kwargs)
+        rpc_response = Mock()
+        rpc_response.data = {
+            'total_faqs': 3,
+            'by_category': {'general': 2, 'ops_agent': 1},
+            'most_viewed': [{'question': 'Q1', 'view_count': 10}],
+            'most_helpful': []
+        }
+        tool.client = Mock()
+        tool.client.rpc = Mock(return_value=Mock(execute=Mock(return_value=rpc_response)))
+        return tool
+    
+    @pytest.mark.asyncio
+    async def test_get_stats_uses_aggregate_rpc(self):
+        """Test stats come from a single aggregate RPC"""
+        tool = self._stats_tool()
+        
+        result = await tool.get_stats()
+        
+        assert result['success'] is True
+        assert result['cached'] is False
+        assert result['stats']['total_faqs'] == 3
+        assert result['stats']['by_category'] == {'general': 2, 'ops_agent': 1}
+        assert result['stats']['category_count'] == 2
+        tool.client.rpc.assert_called_once_with('faq_stats', {'top_n': 5})
+        tool.client.table.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_get_stats_cached_within_ttl(self):
+        """Test repeated stats calls are served from cache"""
+        tool = self._stats_tool(stats_cache_ttl=60)
+        
+        await tool.get_stats()
+        result = await tool.get_stats()
+        
+        assert result['cached'] is True
+        assert tool.client.rpc.call_count == 1
+        
+        await tool.get_stats(use_cache=False)
+        assert tool.client.rpc.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_stats_cache_expires(self):
+        """Test cache is bypassed after the TTL"""
+        tool = self._stats_tool(stats_cache_ttl=0)
+        
+        await tool.get_stats()
+        await tool.get_stats()
+        
+        assert tool.client.rpc.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_stats_cache(self):
+        """Test create, update and delete drop cached stats"""
+        tool = self._stats_tool()
+        tool.embedding_tool.generate_embedding = AsyncMock(return_value={
+            'success': True,
+            'embedding': [0.1] * 1536
+        })
+        write_response = Mock()
+        write_response.data = [{'id': '123'}]
+        table = Mock()
+        table.insert.return_value.execute.return_value = write_response
+        table.update.return_value.eq.return_value.execute.return_value = write_response
+        table.delete.return_value.eq.return_value.execute.return_value = write_response
+        tool.client.table = Mock(return_value=table)
+        
+        await tool.get_stats()
+        await tool.create_faq(question="Q", answer="A")
+        await tool.get_stats()
+        await tool.update_faq('123', answer="B")
+        await tool.get_stats()
+        await tool.delete_faq('123')
+        await tool.get_stats()
+        
+        assert tool.client.rpc.call_count == 4
+    
+    @pytest.mark.asyncio
+    async def test_get_stats_falls_back_without_rpc(self):
+        """Test stats fall back to table queries when the RPC is missing"""
+        tool = self._stats_tool()
+        tool.client.rpc = Mock(side_effect=APIError({'code': 'PGRST202', 'message': 'Could not find the function'}))
+        
+        count_response = Mock(count=2, data=[])
+        category_response = Mock(data=[{'category': 'general'}, {'category': None}])
+        top_response = Mock(data=[])
+        top_query = Mock()
+        top_query.order.return_value.limit.return_value.execute.return_value = top_response
+        queries = {
+            'id': Mock(execute=Mock(return_value=count_response)),
+            'category': Mock(execute=Mock(return_value=category_response)),
+        }
+        table = Mock()
+        table.select.side_effect = lambda columns, **kwargs: queries.get(columns, top_query)
+        tool.client.table = Mock(return_value=table)
+        
+        result = await tool.get_stats()
+        await tool.get_stats(use_cache=False)
+        
+        assert result['success'] is True
+        assert result['stats']['total_faqs'] == 2
+        assert result['stats']['by_category'] == {'general': 1, 'uncategorized': 1}
+        assert tool.client.rpc.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_stats_retries_rpc_after_transient_error(self):
+        """Test a failing RPC call does not disable the RPC for later calls"""
+        tool = self._stats_tool()
+        rpc_response = Mock(data={'total_faqs': 3, 'by_category': {'general': 3},
+                                  'most_viewed': [], 'most_helpful': []})
+        tool.client.rpc = Mock(return_value=Mock(execute=Mock(
+            side_effect=[APIError({'code': '57014', 'message': 'statement timeout'}), rpc_response]
+        )))
+        tool._fetch_stats_queries = Mock(return_value={'total_faqs': 3, 'by_category': {'general': 3},
+                                                       'most_viewed': [], 'most_helpful': []})
+        
+        await tool.get_stats(use_cache=False)
+        result = await tool.get_stats(use_cache=False)
+        
+        assert result['stats']['total_faqs'] == 3
+        assert tool.client.rpc.call_count == 2
+        assert tool._fetch_stats_queries.call_count == 1
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,165 @@
+"""
+Tests for cached, coalesced and micro-batched query embeddings
+"""
+
+import asyncio
+import statistics
+import time
+
+import pytest
+from unittest.mock import Mock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from tools.faq_search_tool import FAQSearchTool
+from tools.query_embedding_cache import QueryEmbeddingCache, normalize_query
+
+
+class FakeEmbeddingTool:
+    """Embedding tool with a fixed round-trip latency that records its calls"""
+
+    model = 'fake-embedding'
+
+    def __init__(self, latency=0.02, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = []
+
+    def _vector(self, text):
+        return [float(len(text)), float(sum(map(ord, text)) % 997)]
+
+    async def generate_embedding(self, text):
+        self.calls.append([text])
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            return {'success': False, 'error': 'rate limited'}
+        return {'success': True, 'embedding': self._vector(text)}
+
+    async def generate_embeddings_batch(self, texts, batch_size=100):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            return {'success': False, 'embeddings': [None] * len(texts), 'error': 'rate limited'}
+        return {'success': True, 'embeddings': [self._vector(t) for t in texts]}
+
+
+class TestQueryEmbeddingCache:
+    """Test QueryEmbeddingCache"""
+
+    def test_normalize_query(self):
+        """Test whitespace, width and case differences normalize together"""
+        assert normalize_query('  How do I   Reset\tmy password? ') == 'how do i reset my password?'
+        assert normalize_query('ＡＢＣ') == 'abc'
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_after_first_request(self):
+        """Test repeated queries are served from the cache"""
+        tool = FakeEmbeddingTool()
+        cache = QueryEmbeddingCache(tool)
+
+        first = await cache.generate_embedding('Reset password')
+        second = await cache.generate_embedding('reset   PASSWORD')
+
+        assert first['cached'] is False
+        assert second['cached'] is True
+        assert second['embedding'] == first['embedding']
+        assert len(tool.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_share_one_request(self):
+        """Test single-flight for identical in-flight queries"""
+        tool = FakeEmbeddingTool()
+        cache = QueryEmbeddingCache(tool)
+
+        results = await asyncio.gather(*(cache.generate_embedding('pricing') for _ in range(20)))
+
+        assert all(r['success'] for r in results)
+        assert tool.calls == [['pricing']]
+        assert cache.stats['coalesced'] == 19
+
+    @pytest.mark.asyncio
+    async def test_distinct_concurrent_queries_are_batched(self):
+        """Test distinct queries in the same window go out as one multi-input call"""
+        tool = FakeEmbeddingTool()
+        cache = QueryEmbeddingCache(tool, batch_window=0.005)
+
+        results = await asyncio.gather(*(cache.generate_embedding(f'question {i}') for i in range(10)))
+
+        assert len(tool.calls) == 1
+        assert sorted(tool.calls[0]) == sorted(f'question {i}' for i in range(10))
+        assert [r['embedding'] for r in results] == [tool._vector(f'question {i}') for i in range(10)]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_without_waiting(self):
+        """Test a batch is split at max_batch_size"""
+        tool = FakeEmbeddingTool()
+        cache = QueryEmbeddingCache(tool, batch_window=0.005, max_batch_size=4)
+
+        await asyncio.gather(*(cache.generate_embedding(f'q{i}') for i in range(10)))
+
+        assert sorted(len(call) for call in tool.calls) == [2, 4, 4]
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        """Test an error reaches all waiters and the next request retries"""
+        tool = FakeEmbeddingTool(fail=True)
+        cache = QueryEmbeddingCache(tool)
+
+        results = await asyncio.gather(*(cache.generate_embedding('pricing') for _ in range(3)))
+        assert all(not r['success'] and r['error'] == 'rate limited' for r in results)
+
+        tool.fail = False
+        assert (await cache.generate_embedding('pricing'))['success'] is True
+        assert len(tool.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test the cache stays within max_entries"""
+        cache = QueryEmbeddingCache(FakeEmbeddingTool(latency=0), max_entries=2)
+        for query in ('a', 'b', 'c'):
+            await cache.generate_embedding(query)
+
+        assert list(cache._cache) == ['b', 'c']
+
+
+class TestSearchUnderLoad:
+    """Test the search path uses the embedding layer"""
+
+    def _search_tool(self, embedding_tool):
+        tool = FAQSearchTool(embedding_tool=embedding_tool)
+        response = Mock()
+        response.data = [{'id': '1', 'similarity': 0.9}]
+        tool.client.rpc = Mock(return_value=Mock(execute=Mock(return_value=response)))
+        tool.client.table = Mock()
+        return tool
+
+    @pytest.mark.asyncio
+    async def test_search_p50_drops_under_load(self):
+        """Test concurrent popular questions mostly avoid the embedding round trip"""
+        queries = [f'popular question {i % 5}' for i in range(100)]
+
+        async def timed(tool, query):
+            started = time.perf_counter()
+            result = await tool.search(query)
+            assert result['success'] is True
+            return time.perf_counter() - started
+
+        async def run(tool):
+            latencies = []
+            for wave in range(0, len(queries), 20):
+                latencies += await asyncio.gather(*(timed(tool, q) for q in queries[wave:wave + 20]))
+            return statistics.median(latencies)
+
+        uncached_embeddings = FakeEmbeddingTool()
+        uncached = self._search_tool(uncached_embeddings)
+        uncached.query_embeddings.generate_embedding = uncached_embeddings.generate_embedding
+        baseline_p50 = await run(uncached)
+
+        embeddings = FakeEmbeddingTool()
+        cached_p50 = await run(self._search_tool(embeddings))
+
+        assert len(uncached_embeddings.calls) == 100
+        assert len(embeddings.calls) == 1
+        assert cached_p50 < baseline_p50 / 5
@@ -0,0 +1,205 @@
+"""
+Tests for non-blocking Supabase access and batched search logging
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from tools.faq_search_tool import FAQSearchTool
+from tools import supabase_executor
+from tools.supabase_executor import SearchLogWriter, SupabaseExecutor
+
+DB_LATENCY = 0.05
+
+
+class BlockingQuery:
+    """Query builder whose execute() blocks like supabase-py's HTTP call"""
+
+    def __init__(self, data=None, error=None, on_execute=None):
+        self.data = data
+        self.error = error
+        self.on_execute = on_execute
+
+    def execute(self):
+        time.sleep(DB_LATENCY)
+        if self.on_execute:
+            self.on_execute()
+        if self.error:
+            raise self.error
+        return Mock(data=self.data)
+
+
+class RecordingTable:
+    """Stand-in for client.table(...) that records inserted batches"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.inserted = []
+        self.lock = threading.Lock()
+
+    def insert(self, rows):
+        def record():
+            with self.lock:
+                self.inserted.append(rows)
+        return BlockingQuery(error=self.error, on_execute=record)
+
+
+def search_tool(executor, table=None, log_interval=0.01):
+    embeddings = Mock()
+
+    async def embed(text):
+        return {'success': True, 'embedding': [0.1, 0.2]}
+
+    async def embed_batch(texts, batch_size=100):
+        return {'success': True, 'embeddings': [[0.1, 0.2] for _ in texts]}
+
+    embeddings.generate_embedding = embed
+    embeddings.generate_embeddings_batch = embed_batch
+    tool = FAQSearchTool(embedding_tool=embeddings, db_executor=executor, search_log_interval=log_interval)
+    tool.client.rpc = Mock(side_effect=lambda name, params: BlockingQuery(data=[{'id': 'faq-1', 'similarity': 0.9}]))
+    table = table or RecordingTable()
+    tool.client.table = Mock(return_value=table)
+    return tool, table
+
+
+class TestSupabaseExecutor:
+    """Test SupabaseExecutor"""
+
+    @pytest.mark.asyncio
+    async def test_execute_does_not_block_event_loop(self):
+        """Test the event loop keeps running while a query is in flight"""
+        executor = SupabaseExecutor(max_workers=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.ensure_future(ticker())
+        await executor.execute(BlockingQuery(data=[]))
+        task.cancel()
+        executor.shutdown()
+
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_searches_scale_with_pool(self):
+        """Test concurrent searches overlap their database round trips"""
+        executor = SupabaseExecutor(max_workers=16)
+        tool, _ = search_tool(executor)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(tool.search(f'question {i}') for i in range(16)))
+        elapsed = time.perf_counter() - started
+        await tool.close()
+        executor.shutdown()
+
+        assert all(r['success'] for r in results)
+        # Serialized, 16 searches would take 16 * DB_LATENCY
+        assert elapsed < 16 * DB_LATENCY / 4
+
+
+class TestSearchLogWriter:
+    """Test fire-and-forget search history writes"""
+
+    @pytest.mark.asyncio
+    async def test_search_does_not_wait_for_history_write(self):
+        """Test searches return before their history rows are written, in one batch"""
+        executor = SupabaseExecutor(max_workers=4)
+        tool, table = search_tool(executor, log_interval=10)
+
+        await asyncio.gather(*(tool.search(f'question {i}') for i in range(30)))
+        assert table.inserted == []
+
+        await tool.close()
+        executor.shutdown()
+
+        assert len(table.inserted) == 1
+        assert len(table.inserted[0]) == 30
+        assert table.inserted[0][0]['matched_faq_id'] == 'faq-1'
+
+    @pytest.mark.asyncio
+    async def test_background_flush_after_interval(self):
+        """Test buffered rows are written without an explicit flush"""
+        executor = SupabaseExecutor(max_workers=1)
+        table = RecordingTable()
+        writer = SearchLogWriter(Mock(table=Mock(return_value=table)), executor, flush_interval=0.01)
+
+        writer.log({'query': 'a'})
+        writer.log({'query': 'b'})
+        await asyncio.sleep(0.01 + DB_LATENCY * 2)
+
+        assert table.inserted == [[{'query': 'a'}, {'query': 'b'}]]
+        await writer.close()
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_write_failures_are_counted_not_raised(self):
+        """Test a failing insert is logged and counted"""
+        executor = SupabaseExecutor(max_workers=1)
+        table = RecordingTable(error=RuntimeError('db down'))
+        writer = SearchLogWriter(Mock(table=Mock(return_value=table)), executor, flush_interval=10)
+
+        writer.log({'query': 'a'})
+        await writer.close()
+        executor.shutdown()
+
+        assert writer.stats['failed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_buffer_is_bounded(self):
+        """Test the oldest rows are dropped once max_buffer is reached"""
+        writer = SearchLogWriter(Mock(), SupabaseExecutor(max_workers=1), flush_interval=10, max_buffer=3)
+        for i in range(5):
+            writer.log({'query': str(i)})
+
+        assert [row['query'] for row in writer._buffer] == ['2', '3', '4']
+        assert writer.stats['dropped'] == 2
+        writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_close_after_pool_shutdown(self):
+        """Test close still writes pending rows once the pool is shut down (interpreter exit)"""
+        executor = SupabaseExecutor(max_workers=1)
+        table = RecordingTable()
+        writer = SearchLogWriter(Mock(table=Mock(return_value=table)), executor, flush_interval=10)
+        writer.log({'query': 'a'})
+        executor.shutdown()
+
+        await writer.close()
+
+        assert table.inserted == [[{'query': 'a'}]]
+
+    def test_rows_survive_short_lived_event_loop(self):
+        """Test history logged under asyncio.run is written after the loop is gone"""
+        executor = SupabaseExecutor(max_workers=1)
+        tool, table = search_tool(executor, log_interval=0.01)
+
+        assert asyncio.run(tool.search('hello'))['success']
+        time.sleep(0.01 + DB_LATENCY * 3)
+
+        assert [row['query'] for batch in table.inserted for row in batch] == ['hello']
+        tool.search_log.stop()
+        executor.shutdown()
+
+    def test_pending_rows_flushed_at_exit(self):
+        """Test rows still buffered when the interpreter exits are written"""
+        table = RecordingTable()
+        writer = SearchLogWriter(Mock(table=Mock(return_value=table)), SupabaseExecutor(max_workers=1),
+                                 flush_interval=10)
+        writer.log({'query': 'a'})
+
+        supabase_executor._flush_open_writers()
+
+        assert table.inserted == [[{'query': 'a'}]]
+        assert writer not in supabase_executor._open_writers
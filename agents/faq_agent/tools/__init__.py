@@ -5,6 +5,8 @@ FAQ Agent Tools
 from .faq_search_tool import FAQSearchTool, create_faq_search_tool
 from .faq_management_tool import FAQManagementTool, create_faq_management_tool
 from .embedding_tool import EmbeddingTool, create_embedding_tool
+from .query_embedding_cache import QueryEmbeddingCache
+from .supabase_executor import SupabaseExecutor, SearchLogWriter
 
 __all__ = [
     'FAQSearchTool',
@@ -13,4 +15,7 @@ __all__ = [
     'create_faq_management_tool',
     'EmbeddingTool',
     'create_embedding_tool',
+    'QueryEmbeddingCache',
+    'SupabaseExecutor',
+    'SearchLogWriter',
 ]
@@ -3,10 +3,18 @@ FAQ Management Tool - Create, update, and delete FAQs
 """
 
 import os
+import time
+import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from supabase import create_client, Client
 from .embedding_tool import EmbeddingTool
+from .supabase_executor import SupabaseExecutor, get_shared_executor
+
+logger = logging.getLogger(__name__)
+
+# PostgREST / Postgres error codes for a function that is not deployed
+MISSING_FUNCTION_CODES = ('PGRST202', '42883')
 
 
 class FAQManagementTool:
@@ -16,7 +24,9 @@ class FAQManagementTool:
         self,
         supabase_url: str = None,
         supabase_key: str = None,
-        embedding_tool: EmbeddingTool = None
+        embedding_tool: EmbeddingTool = None,
+        stats_cache_ttl: float = 60.0,
+        db_executor: SupabaseExecutor = None
     ):
         """
         Initialize FAQ management tool
@@ -25,6 +35,8 @@ class FAQManagementTool:
             supabase_url: Supabase project URL
             supabase_key: Supabase service role key
             embedding_tool: EmbeddingTool instance (creates new if None)
+            stats_cache_ttl: Seconds to serve cached stats (0 disables caching)
+            db_executor: Pool that runs blocking Supabase calls (shared pool if None)
         """
         self.supabase_url = supabase_url or os.getenv('SUPABASE_URL')
         self.supabase_key = supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -33,7 +45,17 @@ class FAQManagementTool:
             raise ValueError("Supabase URL and key are required")
         
         self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        self.db = db_executor or get_shared_executor()
         self.embedding_tool = embedding_tool or EmbeddingTool()
+        
+        self.stats_cache_ttl = stats_cache_ttl
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_cached_at = 0.0
+        self._stats_rpc_available = True
+    
+    def invalidate_stats_cache(self):
+        """Drop cached stats so the next get_stats call hits the database"""
+        self._stats_cache = None
     
     async def create_faq(
         self,
@@ -88,7 +110,8 @@ class FAQManagementTool:
             if created_by:
                 faq_data['created_by'] = created_by
             
-            response = self.client.table('faqs').insert(faq_data).execute()
+            response = await self.db.execute(self.client.table('faqs').insert(faq_data))
+            self.invalidate_stats_cache()
             
             return {
                 'success': True,
@@ -155,10 +178,11 @@ class FAQManagementTool:
             if metadata is not None:
                 update_data['metadata'] = metadata
             
-            response = self.client.table('faqs') \
-                .update(update_data) \
-                .eq('id', faq_id) \
-                .execute()
+            response = await self.db.execute(
+                self.client.table('faqs')
+                .update(update_data)
+                .eq('id', faq_id)
+            )
             
             if not response.data:
                 return {
@@ -166,6 +190,8 @@ class FAQManagementTool:
                     'error': f'FAQ with ID {faq_id} not found'
                 }
             
+            self.invalidate_stats_cache()
+            
             return {
                 'success': True,
                 'faq': response.data[0],
@@ -194,10 +220,11 @@ class FAQManagementTool:
             }
         """
         try:
-            response = self.client.table('faqs') \
-                .select('*') \
-                .eq('id', faq_id) \
-                .execute()
+            response = await self.db.execute(
+                self.client.table('faqs')
+                .select('*')
+                .eq('id', faq_id)
+            )
             
             if not response.data:
                 return {
@@ -232,10 +259,11 @@ class FAQManagementTool:
             }
         """
         try:
-            response = self.client.table('faqs') \
-                .delete() \
-                .eq('id', faq_id) \
-                .execute()
+            response = await self.db.execute(
+                self.client.table('faqs')
+                .delete()
+                .eq('id', faq_id)
+            )
             
             if not response.data:
                 return {
@@ -243,6 +271,8 @@ class FAQManagementTool:
                     'error': f'FAQ with ID {faq_id} not found'
                 }
             
+            self.invalidate_stats_cache()
+            
             return {
                 'success': True,
                 'message': 'FAQ deleted successfully',
@@ -323,12 +353,15 @@ class FAQManagementTool:
                 batch = faq_data_list[i:i + batch_size]
                 
                 try:
-                    response = self.client.table('faqs').insert(batch).execute()
+                    response = await self.db.execute(self.client.table('faqs').insert(batch))
                     created_count += len(response.data) if response.data else 0
                 except Exception as e:
                     for j in range(len(batch)):
                         failed_indices.append(i + j)
             
+            if created_count:
+                self.invalidate_stats_cache()
+            
             return {
                 'success': len(failed_indices) == 0,
                 'created_count': created_count,
@@ -356,9 +389,10 @@ class FAQManagementTool:
             }
         """
         try:
-            response = self.client.table('faq_categories') \
-                .select('*') \
-                .execute()
+            response = await self.db.execute(
+                self.client.table('faq_categories')
+                .select('*')
+            )
             
             return {
                 'success': True,
@@ -404,9 +438,10 @@ class FAQManagementTool:
             if parent_category_id:
                 category_data['parent_category_id'] = parent_category_id
             
-            response = self.client.table('faq_categories') \
-                .insert(category_data) \
-                .execute()
+            response = await self.db.execute(
+                self.client.table('faq_categories')
+                .insert(category_data)
+            )
             
             return {
                 'success': True,
@@ -420,51 +455,54 @@ class FAQManagementTool:
                 'error': str(e)
             }
     
-    async def get_stats(self) -> Dict[str, Any]:
+    async def get_stats(self, use_cache: bool = True) -> Dict[str, Any]:
         """
         Get FAQ statistics
         
+        Stats come from the ``faq_stats`` aggregate RPC (one round trip that
+        groups by category in the database) and are cached for
+        ``stats_cache_ttl`` seconds. Writes through this tool invalidate the
+        cache. Databases without the RPC fall back to per-query reads.
+        
+        Args:
+            use_cache: Serve cached stats if still fresh
+        
         Returns:
             {
                 'success': bool,
                 'stats': Dict,
+                'cached': bool,
                 'error': str
             }
         """
+        if (
+            use_cache
+            and self._stats_cache is not None
+            and time.monotonic() - self._stats_cached_at < self.stats_cache_ttl
+        ):
+            return {
+                'success': True,
+                'stats': self._stats_cache,
+                'cached': True
+            }
+        
         try:
-            total_response = self.client.table('faqs') \
-                .select('id', count='exact') \
-                .execute()
-            
-            category_response = self.client.table('faqs') \
-                .select('category') \
-                .execute()
-            
-            categories = {}
-            for faq in category_response.data:
-                cat = faq.get('category', 'uncategorized')
-                categories[cat] = categories.get(cat, 0) + 1
-            
-            popular_response = self.client.table('faqs') \
-                .select('question, view_count') \
-                .order('view_count', desc=True) \
-                .limit(5) \
-                .execute()
-            
-            helpful_response = self.client.table('faqs') \
-                .select('question, helpful_count') \
-                .order('helpful_count', desc=True) \
-                .limit(5) \
-                .execute()
+            stats = None
+            if self._stats_rpc_available:
+                stats = await self.db.run(self._fetch_stats_rpc)
+            if stats is None:
+                stats = await self.db.run(self._fetch_stats_queries)
+            
+            stats['category_count'] = len(stats['by_category'])
+            
+            if self.stats_cache_ttl > 0:
+                self._stats_cache = stats
+                self._stats_cached_at = time.monotonic()
             
             return {
                 'success': True,
-                'stats': {
-                    'total_faqs': total_response.count,
-                    'by_category': categories,
-                    'most_viewed': popular_response.data,
-                    'most_helpful': helpful_response.data
-                }
+                'stats': stats,
+                'cached': False
             }
             
         except Exception as e:
@@ -472,12 +510,70 @@ class FAQManagementTool:
                 'success': False,
                 'error': str(e)
             }
+    
+    def _fetch_stats_rpc(self) -> Optional[Dict[str, Any]]:
+        """Read stats from the faq_stats RPC, or None if it is not deployed or failed"""
+        try:
+            response = self.client.rpc('faq_stats', {'top_n': 5}).execute()
+        except Exception as e:
+            if getattr(e, 'code', None) in MISSING_FUNCTION_CODES:
+                logger.warning(f"faq_stats RPC not deployed, using table queries from now on: {e}")
+                self._stats_rpc_available = False
+            else:
+                logger.warning(f"faq_stats RPC failed, falling back to table queries: {e}")
+            return None
+        
+        data = response.data
+        if not isinstance(data, dict):
+            return None
+        return {
+            'total_faqs': data.get('total_faqs', 0),
+            'by_category': data.get('by_category') or {},
+            'most_viewed': data.get('most_viewed') or [],
+            'most_helpful': data.get('most_helpful') or []
+        }
+    
+    def _fetch_stats_queries(self) -> Dict[str, Any]:
+        """Read stats with separate table queries (pre-002 migration schemas)"""
+        total_response = self.client.table('faqs') \
+            .select('id', count='exact') \
+            .execute()
+        
+        category_response = self.client.table('faqs') \
+            .select('category') \
+            .execute()
+        
+        categories = {}
+        for faq in category_response.data:
+            cat = faq.get('category') or 'uncategorized'
+            categories[cat] = categories.get(cat, 0) + 1
+        
+        popular_response = self.client.table('faqs') \
+            .select('question, view_count') \
+            .order('view_count', desc=True) \
+            .limit(5) \
+            .execute()
+        
+        helpful_response = self.client.table('faqs') \
+            .select('question, helpful_count') \
+            .order('helpful_count', desc=True) \
+            .limit(5) \
+            .execute()
+        
+        return {
+            'total_faqs': total_response.count,
+            'by_category': categories,
+            'most_viewed': popular_response.data,
+            'most_helpful': helpful_response.data
+        }
 
 
 def create_faq_management_tool(
     supabase_url: str = None,
     supabase_key: str = None,
-    embedding_tool: EmbeddingTool = None
+    embedding_tool: EmbeddingTool = None,
+    stats_cache_ttl: float = 60.0,
+    db_executor: SupabaseExecutor = None
 ) -> FAQManagementTool:
     """
     Factory function to create a FAQManagementTool instance
@@ -486,6 +582,8 @@ def create_faq_management_tool(
         supabase_url: Supabase project URL
         supabase_key: Supabase service role key
         embedding_tool: EmbeddingTool instance
+        stats_cache_ttl: Seconds to serve cached stats
+        db_executor: Pool that runs blocking Supabase calls
     
     Returns:
         FAQManagementTool instance
@@ -493,5 +591,7 @@ def create_faq_management_tool(
     return FAQManagementTool(
         supabase_url=supabase_url,
         supabase_key=supabase_key,
-        embedding_tool=embedding_tool
+        embedding_tool=embedding_tool,
+        stats_cache_ttl=stats_cache_ttl,
+        db_executor=db_executor
     )
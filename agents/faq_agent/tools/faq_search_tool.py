@@ -6,6 +6,8 @@ import os
 from typing import Dict, Any, List, Optional
 from supabase import create_client, Client
 from .embedding_tool import EmbeddingTool
+from .query_embedding_cache import QueryEmbeddingCache
+from .supabase_executor import SearchLogWriter, SupabaseExecutor, get_shared_executor
 
 
 class FAQSearchTool:
@@ -15,7 +17,11 @@ class FAQSearchTool:
         self,
         supabase_url: str = None,
         supabase_key: str = None,
-        embedding_tool: EmbeddingTool = None
+        embedding_tool: EmbeddingTool = None,
+        embedding_cache_size: int = 1000,
+        embedding_batch_window: float = 0.005,
+        db_executor: SupabaseExecutor = None,
+        search_log_interval: float = 1.0
     ):
         """
         Initialize FAQ search tool
@@ -24,6 +30,10 @@ class FAQSearchTool:
             supabase_url: Supabase project URL
             supabase_key: Supabase service role key
             embedding_tool: EmbeddingTool instance (creates new if None)
+            embedding_cache_size: Number of query embeddings kept in the LRU cache
+            embedding_batch_window: Seconds to collect concurrent queries into one embeddings call
+            db_executor: Pool that runs blocking Supabase calls (shared pool if None)
+            search_log_interval: Seconds between batched search history writes
         """
         self.supabase_url = supabase_url or os.getenv('SUPABASE_URL')
         self.supabase_key = supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -32,7 +42,14 @@ class FAQSearchTool:
             raise ValueError("Supabase URL and key are required")
         
         self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        self.db = db_executor or get_shared_executor()
+        self.search_log = SearchLogWriter(self.client, self.db, flush_interval=search_log_interval)
         self.embedding_tool = embedding_tool or EmbeddingTool()
+        self.query_embeddings = QueryEmbeddingCache(
+            self.embedding_tool,
+            max_entries=embedding_cache_size,
+            batch_window=embedding_batch_window
+        )
     
     async def search(
         self,
@@ -62,7 +79,7 @@ class FAQSearchTool:
             }
         """
         try:
-            emb_result = await self.embedding_tool.generate_embedding(query)
+            emb_result = await self.query_embeddings.generate_embedding(query)
             
             if not emb_result['success']:
                 return {
@@ -81,7 +98,7 @@ class FAQSearchTool:
             if category:
                 rpc_params['filter_category'] = category
             
-            response = self.client.rpc('match_faqs', rpc_params).execute()
+            response = await self.db.execute(self.client.rpc('match_faqs', rpc_params))
             
             results = response.data if response.data else []
             
@@ -140,7 +157,7 @@ class FAQSearchTool:
             if category:
                 query = query.eq('category', category)
             
-            response = query.execute()
+            response = await self.db.execute(query)
             
             results = response.data if response.data else []
             
@@ -174,16 +191,18 @@ class FAQSearchTool:
             }
         """
         try:
-            response = self.client.table('faqs') \
-                .select('*') \
-                .eq('id', faq_id) \
-                .single() \
-                .execute()
+            response = await self.db.execute(
+                self.client.table('faqs')
+                .select('*')
+                .eq('id', faq_id)
+                .single()
+            )
             
-            self.client.table('faqs') \
-                .update({'view_count': response.data['view_count'] + 1}) \
-                .eq('id', faq_id) \
-                .execute()
+            await self.db.execute(
+                self.client.table('faqs')
+                .update({'view_count': response.data['view_count'] + 1})
+                .eq('id', faq_id)
+            )
             
             return {
                 'success': True,
@@ -221,7 +240,7 @@ class FAQSearchTool:
             if category:
                 query = query.eq('category', category)
             
-            response = query.execute()
+            response = await self.db.execute(query)
             
             return {
                 'success': True,
@@ -263,7 +282,7 @@ class FAQSearchTool:
             if category:
                 query = query.eq('category', category)
             
-            response = query.execute()
+            response = await self.db.execute(query)
             
             return {
                 'success': True,
@@ -306,24 +325,27 @@ class FAQSearchTool:
                     'error': 'Invalid feedback value. Use "helpful" or "not_helpful"'
                 }
             
-            faq_response = self.client.table('faqs') \
-                .select('helpful_count, not_helpful_count') \
-                .eq('id', faq_id) \
-                .single() \
-                .execute()
+            faq_response = await self.db.execute(
+                self.client.table('faqs')
+                .select('helpful_count, not_helpful_count')
+                .eq('id', faq_id)
+                .single()
+            )
             
             if feedback == 'helpful':
                 new_count = faq_response.data['helpful_count'] + 1
-                self.client.table('faqs') \
-                    .update({'helpful_count': new_count}) \
-                    .eq('id', faq_id) \
-                    .execute()
+                await self.db.execute(
+                    self.client.table('faqs')
+                    .update({'helpful_count': new_count})
+                    .eq('id', faq_id)
+                )
             else:
                 new_count = faq_response.data['not_helpful_count'] + 1
-                self.client.table('faqs') \
-                    .update({'not_helpful_count': new_count}) \
-                    .eq('id', faq_id) \
-                    .execute()
+                await self.db.execute(
+                    self.client.table('faqs')
+                    .update({'not_helpful_count': new_count})
+                    .eq('id', faq_id)
+                )
             
             return {
                 'success': True,
@@ -345,34 +367,37 @@ class FAQSearchTool:
         results: List[Dict]
     ) -> None:
         """
-        Log search query to history
+        Queue search query for the search history (written in background batches)
         
         Args:
             query: User query
             query_embedding: Query embedding vector
             results: Search results
         """
-        try:
-            log_data = {
-                'query': query,
-                'query_embedding': query_embedding,
-                'result_count': len(results)
-            }
-            
-            if results:
-                log_data['matched_faq_id'] = results[0].get('id')
-                log_data['similarity_score'] = results[0].get('similarity', 0)
-            
-            self.client.table('faq_search_history').insert(log_data).execute()
-            
-        except Exception:
-            pass
+        log_data = {
+            'query': query,
+            'query_embedding': query_embedding,
+            'result_count': len(results)
+        }
+        
+        if results:
+            log_data['matched_faq_id'] = results[0].get('id')
+            log_data['similarity_score'] = results[0].get('similarity', 0)
+        
+        self.search_log.log(log_data)
+    
+    async def close(self) -> None:
+        """Write pending search history"""
+        await self.search_log.close()
 
 
 def create_faq_search_tool(
     supabase_url: str = None,
     supabase_key: str = None,
-    embedding_tool: EmbeddingTool = None
+    embedding_tool: EmbeddingTool = None,
+    embedding_cache_size: int = 1000,
+    embedding_batch_window: float = 0.005,
+    db_executor: SupabaseExecutor = None
 ) -> FAQSearchTool:
     """
     Factory function to create a FAQSearchTool instance
@@ -381,6 +406,9 @@ def create_faq_search_tool(
         supabase_url: Supabase project URL
         supabase_key: Supabase service role key
         embedding_tool: EmbeddingTool instance
+        embedding_cache_size: Number of cached query embeddings
+        embedding_batch_window: Micro-batching window in seconds
+        db_executor: Pool that runs blocking Supabase calls
     
     Returns:
         FAQSearchTool instance
@@ -388,5 +416,8 @@ def create_faq_search_tool(
     return FAQSearchTool(
         supabase_url=supabase_url,
         supabase_key=supabase_key,
-        embedding_tool=embedding_tool
+        embedding_tool=embedding_tool,
+        embedding_cache_size=embedding_cache_size,
+        embedding_batch_window=embedding_batch_window,
+        db_executor=db_executor
     )
@@ -0,0 +1,182 @@
+"""
+Query Embedding Cache - Cached, coalesced and micro-batched query embeddings
+"""
+
+import asyncio
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from .embedding_tool import EmbeddingTool
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query so trivially different spellings share one embedding"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Embedding layer for search queries
+
+    Wraps an EmbeddingTool with three layers:
+    - an LRU cache keyed by normalized query text
+    - single-flight: concurrent identical queries share one request
+    - a micro-batcher: distinct queries arriving within ``batch_window``
+      seconds are embedded with one multi-input call
+
+    ``generate_embedding`` returns the same result shape as
+    EmbeddingTool.generate_embedding, plus a ``cached`` flag. Failures are
+    returned to every waiter and are not cached.
+    """
+
+    def __init__(
+        self,
+        embedding_tool: EmbeddingTool,
+        max_entries: int = 1000,
+        batch_window: float = 0.005,
+        max_batch_size: int = 64
+    ):
+        """
+        Initialize query embedding cache
+
+        Args:
+            embedding_tool: EmbeddingTool used for cache misses
+            max_entries: Maximum number of cached query embeddings
+            batch_window: Seconds to wait for more queries before sending a batch
+            max_batch_size: Send a batch immediately once it has this many queries
+        """
+        self.embedding_tool = embedding_tool
+        self.max_entries = max_entries
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: List[str] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_tasks = set()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'batches': 0,
+            'batched_queries': 0
+        }
+
+    async def generate_embedding(self, text: str) -> Dict[str, Any]:
+        """
+        Get the embedding for a query
+
+        Args:
+            text: Query text
+
+        Returns:
+            {
+                'success': bool,
+                'embedding': List[float],
+                'cached': bool,  # True if no embedding request was needed
+                'error': str  # if success=False
+            }
+        """
+        if not text or not text.strip():
+            return {
+                'success': False,
+                'error': 'Empty text provided'
+            }
+
+        key = normalize_query(text)
+        embedding = self._cache.get(key)
+        if embedding is not None:
+            self._cache.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._result(embedding, cached=True)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            result = await asyncio.shield(future)
+            return {**result, 'cached': True} if result['success'] else result
+
+        self.stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._enqueue(key)
+        return await asyncio.shield(future)
+
+    def invalidate(self, text: Optional[str] = None):
+        """Drop one cached query, or the whole cache"""
+        if text is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(normalize_query(text), None)
+
+    def _enqueue(self, key: str):
+        self._pending.append(key)
+        if len(self._pending) >= self.max_batch_size:
+            batch, self._pending = self._pending, []
+            task = asyncio.ensure_future(self._embed_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.batch_window)
+        batch, self._pending = self._pending, []
+        if batch:
+            await self._embed_batch(batch)
+
+    async def _embed_batch(self, keys: List[str]):
+        self.stats['batches'] += 1
+        self.stats['batched_queries'] += len(keys)
+        try:
+            outcomes = await self._request(keys)
+        except Exception as e:
+            outcomes = [(None, str(e))] * len(keys)
+        if len(outcomes) != len(keys):
+            outcomes = [(None, 'Embedding count mismatch')] * len(keys)
+
+        for key, (embedding, error) in zip(keys, outcomes):
+            future = self._inflight.pop(key)
+            if embedding is not None:
+                self._store(key, embedding)
+                future.set_result(self._result(embedding, cached=False))
+            else:
+                future.set_result({
+                    'success': False,
+                    'error': error or 'Embedding request failed'
+                })
+
+    async def _request(self, keys: List[str]) -> List[Tuple[Optional[List[float]], Optional[str]]]:
+        if len(keys) == 1:
+            result = await self.embedding_tool.generate_embedding(keys[0])
+            if result.get('success'):
+                return [(result['embedding'], None)]
+            return [(None, result.get('error'))]
+
+        result = await self.embedding_tool.generate_embeddings_batch(keys, batch_size=self.max_batch_size)
+        embeddings = result.get('embeddings') or [None] * len(keys)
+        return [
+            (embedding, None if embedding is not None else result.get('error'))
+            for embedding in embeddings
+        ]
+
+    def _store(self, key: str, embedding: List[float]):
+        self._cache[key] = embedding
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _result(self, embedding: List[float], cached: bool) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'embedding': embedding,
+            'model': getattr(self.embedding_tool, 'model', None),
+            'dimensions': len(embedding),
+            'cached': cached
+        }
@@ -0,0 +1,182 @@
+"""
+Supabase Executor - Run blocking supabase-py calls off the event loop
+"""
+
+import asyncio
+import atexit
+import functools
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SupabaseExecutor:
+    """
+    Bounded thread pool for the synchronous supabase ``Client``
+
+    supabase-py's ``.execute()`` does blocking HTTP, so the async FAQ tools
+    build their queries on the event loop and hand the round trip to this
+    pool. ``max_workers`` bounds how many requests hit the database at once.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize executor
+
+        Args:
+            max_workers: Pool size (defaults to FAQ_DB_MAX_WORKERS, then 16)
+        """
+        self.max_workers = max_workers or int(os.getenv('FAQ_DB_MAX_WORKERS', '16'))
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='faq-db'
+        )
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    async def execute(self, query) -> Any:
+        """Execute a supabase query builder in the pool"""
+        return await self.run(query.execute)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool"""
+        self._pool.shutdown(wait=wait)
+
+
+_shared_executor: Optional[SupabaseExecutor] = None
+
+
+def get_shared_executor() -> SupabaseExecutor:
+    """Executor shared by FAQ tools that are not given their own"""
+    global _shared_executor
+    if _shared_executor is None:
+        _shared_executor = SupabaseExecutor()
+    return _shared_executor
+
+
+class SearchLogWriter:
+    """
+    Fire-and-forget, batched writer for ``faq_search_history``
+
+    ``log`` only appends to a buffer; a daemon thread inserts buffered rows
+    in one request every ``flush_interval`` seconds, or as soon as
+    ``max_batch_size`` rows are waiting. The thread is independent of the
+    caller's event loop, so rows logged under a short-lived ``asyncio.run``
+    are still written, and anything left when the interpreter exits is
+    flushed by an ``atexit`` hook. If the database falls behind, the oldest
+    rows beyond ``max_buffer`` are dropped rather than growing memory.
+    Write failures are logged and counted, never raised.
+    """
+
+    def __init__(
+        self,
+        client,
+        executor: SupabaseExecutor,
+        table: str = 'faq_search_history',
+        flush_interval: float = 1.0,
+        max_batch_size: int = 100,
+        max_buffer: int = 10000
+    ):
+        self.client = client
+        self.executor = executor
+        self.table = table
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_buffer = max_buffer
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {'written': 0, 'batches': 0, 'failed': 0, 'dropped': 0}
+
+    def log(self, row: Dict[str, Any]):
+        """Queue a row for the next batch"""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.pop(0)
+                self.stats['dropped'] += 1
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.max_batch_size
+        self._ensure_running()
+        if full:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write everything buffered now"""
+        await self.executor.run(self.write_pending)
+
+    async def close(self):
+        """Stop the background thread and write what is left"""
+        try:
+            await self.executor.run(self.stop)
+        except RuntimeError:
+            # The pool no longer takes work; at interpreter exit thread pools
+            # are shut down before atexit hooks (and the async runtime's
+            # shutdown callbacks) run, so finish on this thread
+            self.stop()
+
+    def write_pending(self):
+        """Write everything buffered now, blocking the calling thread"""
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = self._buffer[:self.max_batch_size]
+                    del self._buffer[:self.max_batch_size]
+                if not batch:
+                    return
+                try:
+                    self.client.table(self.table).insert(batch).execute()
+                    self.stats['written'] += len(batch)
+                    self.stats['batches'] += 1
+                except Exception as e:
+                    self.stats['failed'] += len(batch)
+                    logger.warning(f"Failed to write {len(batch)} search log rows: {e}")
+
+    def stop(self):
+        """Stop the background thread and write what is left (blocking)"""
+        self._stopping.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.write_pending()
+        _open_writers.discard(self)
+
+    def _ensure_running(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            _open_writers.add(self)
+            self._thread = threading.Thread(target=self._run, name='faq-search-log', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.write_pending()
+
+
+_open_writers: 'weakref.WeakSet[SearchLogWriter]' = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_writers():
+    """Write search history still buffered when the interpreter exits"""
+    for writer in list(_open_writers):
+        writer.stop()
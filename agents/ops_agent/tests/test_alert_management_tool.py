@@ -3,7 +3,9 @@
 Tests for Alert Management Tool
 """
 import pytest
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, MagicMock
 import sys
 import os
 
@@ -16,6 +18,7 @@ from tools.alert_management_tool import (
     AlertStatus,
     create_alert_management_tool
 )
+from tools.notification_batcher import NotificationBatcher, TokenBucket
 
 
 class TestAlertManagementTool:
@@ -294,5 +297,226 @@ class TestAlertManagementToolEdgeCases:
         assert result['alerts'] == []
 
 
+class TestAlertDeduplicationAndBatching:
+    """Tests for alert deduplication, grouping and notification batching"""
+    
+    @pytest.fixture
+    def notification_service(self):
+        service = MagicMock()
+        service.send_notification = AsyncMock(return_value={'success': True})
+        return service
+    
+    @pytest.fixture
+    def alert_tool(self, notification_service):
+        return AlertManagementTool(
+            notification_service=notification_service,
+            batch_window=0.05,
+            suppression_window=300
+        )
+    
+    @pytest.mark.asyncio
+    async def test_repeat_trigger_is_deduplicated(self, alert_tool, notification_service):
+        """Test a flapping alert folds into one open alert and notifies once"""
+        rule = await alert_tool.create_alert_rule("cpu", "cpu > 90", "high", channels=["slack"])
+        rule_id = rule['rule']['id']
+        
+        first = await alert_tool.trigger_alert(rule_id, "CPU high on web-1")
+        for _ in range(4):
+            repeat = await alert_tool.trigger_alert(rule_id, "CPU high on web-1")
+        await alert_tool.close()
+        
+        assert first['deduplicated'] is False
+        assert repeat['deduplicated'] is True
+        assert repeat['suppressed'] is True
+        assert repeat['alert']['id'] == first['alert']['id']
+        assert repeat['alert']['occurrences'] == 5
+        assert len(alert_tool.alerts) == 1
+        assert notification_service.send_notification.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_dedup_key_metadata(self, alert_tool):
+        """Test metadata dedup_key overrides the message for deduplication"""
+        rule = await alert_tool.create_alert_rule("disk", "disk > 90")
+        rule_id = rule['rule']['id']
+        
+        await alert_tool.trigger_alert(rule_id, "Disk 91%", {"dedup_key": "disk:/dev/sda"})
+        result = await alert_tool.trigger_alert(rule_id, "Disk 93%", {"dedup_key": "disk:/dev/sda"})
+        await alert_tool.close()
+        
+        assert result['deduplicated'] is True
+        assert len(alert_tool.alerts) == 1
+    
+    @pytest.mark.asyncio
+    async def test_renotify_after_suppression_window(self, alert_tool, notification_service):
+        """Test an open alert is re-notified once the suppression window has passed"""
+        rule = await alert_tool.create_alert_rule("cpu", "cpu > 90", channels=["slack"])
+        rule_id = rule['rule']['id']
+        
+        first = await alert_tool.trigger_alert(rule_id, "CPU high")
+        await alert_tool.flush_notifications()
+        alert = alert_tool.alerts[first['alert']['id']]
+        alert.notified_at -= timedelta(seconds=301)
+        
+        result = await alert_tool.trigger_alert(rule_id, "CPU high")
+        await alert_tool.close()
+        
+        assert result['suppressed'] is False
+        assert notification_service.send_notification.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_resolved_alert_retriggers_new_alert(self, alert_tool):
+        """Test a resolved alert does not absorb new triggers"""
+        rule = await alert_tool.create_alert_rule("cpu", "cpu > 90")
+        rule_id = rule['rule']['id']
+        
+        first = await alert_tool.trigger_alert(rule_id, "CPU high")
+        await alert_tool.resolve_alert(first['alert']['id'])
+        second = await alert_tool.trigger_alert(rule_id, "CPU high")
+        await alert_tool.close()
+        
+        assert second['deduplicated'] is False
+        assert second['alert']['id'] != first['alert']['id']
+    
+    @pytest.mark.asyncio
+    async def test_related_alerts_grouped_into_one_notification(self, alert_tool, notification_service):
+        """Test alerts in one batch window are sent as a single digest"""
+        rule = await alert_tool.create_alert_rule("latency", "p95 > 1s", "critical", channels=["slack"])
+        rule_id = rule['rule']['id']
+        
+        for i in range(5):
+            await alert_tool.trigger_alert(rule_id, f"p95 latency {1000 + i}ms on api-{i}")
+        await asyncio.sleep(0.2)
+        
+        assert notification_service.send_notification.await_count == 1
+        kwargs = notification_service.send_notification.await_args.kwargs
+        assert kwargs['channel'] == "slack"
+        assert kwargs['message'].startswith("5 alerts in 1 groups")
+        assert "(x5)" in kwargs['message']
+        await alert_tool.close()
+    
+    @pytest.mark.asyncio
+    async def test_trigger_does_not_wait_for_delivery(self, notification_service):
+        """Test trigger_alert returns before a slow channel delivers"""
+        delivered = asyncio.Event()
+        
+        async def slow_send(**kwargs):
+            await asyncio.sleep(0.2)
+            delivered.set()
+            return {'success': True}
+        
+        notification_service.send_notification = AsyncMock(side_effect=slow_send)
+        alert_tool = AlertManagementTool(notification_service=notification_service, batch_window=0)
+        rule = await alert_tool.create_alert_rule("test", "test", channels=["email"])
+        
+        await alert_tool.trigger_alert(rule['rule']['id'], "Test")
+        
+        assert not delivered.is_set()
+        await alert_tool.close()
+        assert delivered.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_resolved_alerts_evicted(self):
+        """Test resolved alerts are evicted past the cap and retention"""
+        alert_tool = AlertManagementTool(max_resolved_alerts=2, resolved_retention=3600)
+        rule = await alert_tool.create_alert_rule("test", "test")
+        rule_id = rule['rule']['id']
+        
+        for i in range(5):
+            result = await alert_tool.trigger_alert(rule_id, f"Alert {i}")
+            await alert_tool.resolve_alert(result['alert']['id'])
+        open_alert = await alert_tool.trigger_alert(rule_id, "Still open")
+        
+        assert len(alert_tool.alerts) == 3
+        assert open_alert['alert']['id'] in alert_tool.alerts
+        
+        later = datetime.now(timezone.utc) + timedelta(hours=2)
+        alert_tool._evict_resolved(later)
+        assert list(alert_tool.alerts) == [open_alert['alert']['id']]
+
+
+class TestNotificationBatcher:
+    """Tests for NotificationBatcher"""
+    
+    @pytest.mark.asyncio
+    async def test_batches_by_channel(self):
+        """Test items are delivered per channel in batches"""
+        sent = []
+        
+        async def send_batch(channel, items):
+            sent.append((channel, list(items)))
+        
+        batcher = NotificationBatcher(send_batch, batch_window=0.05, max_batch_size=3)
+        for i in range(4):
+            batcher.enqueue("slack", i)
+        batcher.enqueue("email", "x")
+        await asyncio.sleep(0.2)
+        await batcher.close()
+        
+        assert ("slack", [0, 1, 2]) in sent
+        assert ("slack", [3]) in sent
+        assert ("email", ["x"]) in sent
+        assert batcher.pending() == 0
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_coalesces_items(self):
+        """Test items arriving while rate limited go out together"""
+        sent = []
+        
+        async def send_batch(channel, items):
+            sent.append(list(items))
+        
+        batcher = NotificationBatcher(
+            send_batch,
+            batch_window=0,
+            max_batch_size=100,
+            rate_limit_per_minute=600,
+            burst=1
+        )
+        batcher.enqueue("slack", 0)
+        await asyncio.sleep(0.01)
+        for i in range(1, 6):
+            batcher.enqueue("slack", i)
+        await asyncio.sleep(0.2)
+        await batcher.close()
+        
+        assert sent == [[0], [1, 2, 3, 4, 5]]
+    
+    @pytest.mark.asyncio
+    async def test_buffer_limit_drops(self):
+        """Test the per-channel buffer is bounded"""
+        batcher = NotificationBatcher(AsyncMock(), batch_window=10, max_batch_size=100, max_buffer_size=2)
+        
+        assert batcher.enqueue("slack", 1) is True
+        assert batcher.enqueue("slack", 2) is True
+        assert batcher.enqueue("slack", 3) is False
+        assert batcher.dropped == 1
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_close_finishes_in_flight_batch(self):
+        """Test closing while a batch is being sent still delivers it"""
+        sent = []
+
+        async def send_batch(channel, items):
+            await asyncio.sleep(0.1)
+            sent.append(list(items))
+
+        batcher = NotificationBatcher(send_batch, batch_window=0)
+        batcher.enqueue("slack", 1)
+        await asyncio.sleep(0.05)
+        await batcher.close()
+
+        assert sent == [[1]]
+        assert batcher.pending() == 0
+
+    def test_token_bucket(self):
+        """Test token bucket availability"""
+        bucket = TokenBucket(rate_per_minute=60, burst=1)
+        
+        assert bucket.time_until_available() == 0
+        bucket.consume()
+        assert 0 < bucket.time_until_available() <= 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '--tb=short'])
@@ -94,6 +94,22 @@ class TestLogAnalysisTool:
         assert result['unique_patterns'] > 0
         assert len(result['patterns']) > 0
     
+    @pytest.mark.asyncio
+    async def test_analyze_error_patterns_groups_variable_parts(self, log_tool):
+        """Test errors differing only by ids and numbers are grouped together"""
+        await log_tool.add_log_entry("Failed to connect to 10.0.0.1:5432 after 3 retries", "error")
+        await log_tool.add_log_entry("Failed to connect to 10.0.0.2:5432 after 5 retries", "error")
+        await log_tool.add_log_entry("TimeoutError: job 8812 exceeded 30s", "critical")
+        
+        result = await log_tool.analyze_error_patterns(time_range="1h")
+        
+        assert result['unique_patterns'] == 2
+        top = result['patterns'][0]
+        assert top['count'] == 2
+        assert top['pattern'] == "Failed to connect to <ip> after <num> retries"
+        assert top['error_type'] == "Failed to connect"
+        assert len(top['fingerprint']) == 16
+    
     @pytest.mark.asyncio
     async def test_detect_anomalies_no_spike(self, log_tool):
         """Test anomaly detection with normal error rate"""
@@ -206,7 +222,7 @@ class TestLogAnalysisToolEdgeCases:
         ]
         
         for message, expected_pattern in patterns:
-            pattern = log_tool._extract_error_pattern(message)
+            pattern = log_tool.fingerprinter.fingerprint(message).template
             assert expected_pattern in pattern or pattern == message[:50]
     
     @pytest.mark.asyncio
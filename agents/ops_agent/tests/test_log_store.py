@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tests for Log Store
+"""
+import json
+import pytest
+from datetime import datetime, timezone, timedelta
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.log_analysis_tool import LogAnalysisTool, LogEntry, LogLevel
+from tools.log_store import LogStore, parse_structured_record
+
+
+def make_entry(message, level=LogLevel.INFO, timestamp=None):
+    return LogEntry(
+        timestamp=timestamp or datetime.now(timezone.utc),
+        level=level,
+        message=message,
+        source="test",
+        metadata={}
+    )
+
+
+class TestLogStore:
+    """Tests for LogStore"""
+
+    def test_add_assigns_sequence_ids(self):
+        """Test entries get monotonic ids"""
+        store = LogStore()
+
+        assert store.add(make_entry("first")) == 0
+        assert store.add(make_entry("second")) == 1
+        assert len(store) == 2
+
+    def test_max_entries_evicts_oldest(self):
+        """Test memory cap evicts oldest entries and their index postings"""
+        store = LogStore(max_entries=3)
+        for i in range(5):
+            store.add(make_entry(f"message number{i}"))
+
+        assert len(store) == 3
+        assert [e.message for e in store] == [
+            "message number2", "message number3", "message number4"
+        ]
+        assert store.search("number0") == []
+        assert store.evicted == 2
+
+    def test_retention_drops_old_buckets(self):
+        """Test buckets older than the retention window are dropped"""
+        store = LogStore(retention_minutes=60)
+        now = datetime.now(timezone.utc)
+        store.add(make_entry("old", timestamp=now - timedelta(hours=3)))
+        store.add(make_entry("new", timestamp=now))
+
+        assert [e.message for e in store] == ["new"]
+
+    def test_out_of_order_entries_are_bucketed(self):
+        """Test late entries land in their own minute bucket"""
+        store = LogStore()
+        now = datetime.now(timezone.utc)
+        store.add(make_entry("late", timestamp=now))
+        store.add(make_entry("early", timestamp=now - timedelta(minutes=10)))
+
+        assert [e.message for e in store] == ["early", "late"]
+
+    def test_search_substring_matches_plain_scan(self):
+        """Test indexed search returns the same result as a substring scan"""
+        store = LogStore()
+        messages = [
+            "Failed to connect to database",
+            "Connection reset by peer",
+            "KeyError: 'user_id'",
+            "user login ok",
+            "disconnected",
+        ]
+        for message in messages:
+            store.add(make_entry(message))
+
+        for query in ["conn", "user_", "ERROR: 'us", "to data", ":", "missing"]:
+            expected = [m for m in messages if query.lower() in m.lower()]
+            assert [e.message for e in store.search(query)] == expected
+
+    def test_search_with_high_cardinality_tokens(self):
+        """Test id-heavy logs: whole words use exact postings, partial words the trigram index"""
+        store = LogStore(max_entries=300)
+        messages = [f"request {i} user u{i * 7} done" for i in range(300)]
+        for message in messages:
+            store.add(make_entry(message))
+
+        for query in ["request 79 user", "quest 79", "ser u55", "u553 do", "79", "one", "request 1000 user"]:
+            expected = [m for m in messages if query in m]
+            assert [e.message for e in store.search(query)] == expected
+
+        for _ in range(300):
+            store.add(make_entry("evicted"))
+        assert set(store._gram_index) == {"evi", "vic", "ict", "cte", "ted"}
+
+    def test_search_filters_level_and_limit(self):
+        """Test search honours level and limit"""
+        store = LogStore()
+        for i in range(5):
+            store.add(make_entry(f"event {i}", LogLevel.ERROR))
+            store.add(make_entry(f"event {i}", LogLevel.INFO))
+
+        results = store.search("event", level=LogLevel.ERROR, limit=3)
+
+        assert len(results) == 3
+        assert all(e.level == LogLevel.ERROR for e in results)
+
+    def test_count_uses_level_counters(self):
+        """Test level counts with and without a cutoff"""
+        store = LogStore()
+        now = datetime.now(timezone.utc)
+        store.add(make_entry("a", LogLevel.ERROR, now - timedelta(hours=2)))
+        store.add(make_entry("b", LogLevel.ERROR, now))
+        store.add(make_entry("c", LogLevel.CRITICAL, now))
+        store.add(make_entry("d", LogLevel.INFO, now))
+
+        levels = (LogLevel.ERROR, LogLevel.CRITICAL)
+        assert store.count(levels) == 3
+        assert store.count(levels, since=now - timedelta(hours=1)) == 2
+
+    def test_ingest_stream_skips_malformed_lines(self):
+        """Test streaming ingestion of JSON lines"""
+        store = LogStore()
+        lines = [
+            json.dumps({"timestamp": "2025-01-01T00:00:00Z", "level": "ERROR", "msg": "boom", "request_id": "r1"}),
+            "not json",
+            json.dumps({"level": "info"}),
+            "",
+            json.dumps({"ts": 1735689600, "severity": "warn", "message": "slow"}),
+        ]
+
+        ingested, skipped = store.ingest_stream(lines, LogAnalysisTool._make_entry)
+
+        assert (ingested, skipped) == (2, 2)
+        entries = store.entries()
+        assert entries[0].level == LogLevel.ERROR
+        assert entries[0].metadata == {"request_id": "r1"}
+        assert entries[1].level == LogLevel.WARNING
+
+    def test_parse_structured_record_defaults(self):
+        """Test structured record normalization defaults"""
+        timestamp, level, message, source, metadata = parse_structured_record({"message": "hi"})
+
+        assert timestamp.tzinfo is not None
+        assert (level, message, source, metadata) == ("info", "hi", "system", {})
+
+
+class TestLogAnalysisToolStore:
+    """Tests for LogAnalysisTool backed by LogStore"""
+
+    @pytest.mark.asyncio
+    async def test_ingest_log_file(self, tmp_path):
+        """Test ingesting a structured log file"""
+        path = tmp_path / "app.log"
+        now = datetime.now(timezone.utc).isoformat()
+        path.write_text("\n".join([
+            json.dumps({"timestamp": now, "level": "error", "message": "ValueError: bad"}),
+            json.dumps({"timestamp": now, "level": "info", "message": "ok"}),
+        ]))
+        tool = LogAnalysisTool()
+
+        result = await tool.ingest_log_file(str(path))
+
+        assert result['success'] is True
+        assert result['ingested'] == 2
+        patterns = await tool.analyze_error_patterns(time_range="1h")
+        assert patterns['total_errors'] == 1
+
+    @pytest.mark.asyncio
+    async def test_ingest_missing_file(self):
+        """Test ingesting a file that does not exist"""
+        tool = LogAnalysisTool()
+
+        result = await tool.ingest_log_file("/nonexistent/app.log")
+
+        assert result['success'] is False
+
+    @pytest.mark.asyncio
+    async def test_add_log_entry_outside_retention(self):
+        """Test an entry dropped by retention is reported as a failure"""
+        tool = LogAnalysisTool(retention_minutes=60)
+        tool.store.add(make_entry("future", timestamp=datetime.now(timezone.utc) + timedelta(hours=3)))
+
+        result = await tool.add_log_entry("now", "info")
+
+        assert result['success'] is False
+        assert 'retention' in result['error']
+
+    @pytest.mark.asyncio
+    async def test_bounded_tool(self):
+        """Test the tool respects its memory cap"""
+        tool = LogAnalysisTool(max_entries=10)
+        for i in range(25):
+            await tool.add_log_entry(f"Log {i}", "info")
+
+        assert len(tool.logs) == 10
+        assert tool.logs[0].message == "Log 15"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -3,14 +3,22 @@
 Tests for Notification Service
 """
 import pytest
+import asyncio
 import os
-from unittest.mock import AsyncMock, patch
+import smtplib
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 import sys
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tools.notification_service import NotificationService, create_notification_service
+from tools.notification_service import (
+    NotificationService,
+    SMTPConnectionPool,
+    create_notification_service
+)
+from tools.notification_dispatcher import NotificationDispatcher
 
 
 class TestNotificationService:
@@ -176,6 +184,255 @@ class TestNotificationService:
         assert 'Invalid channel' in result['error']
 
 
+class TestNotificationServicePooling:
+    """Tests for connection reuse, retries and concurrent fan-out"""
+    
+    @pytest.mark.asyncio
+    async def test_http_session_is_reused(self):
+        """Test HTTP sends share one pooled session"""
+        service = NotificationService(slack_webhook_url="https://hooks.slack.com/test")
+        
+        first = await service._get_session()
+        second = await service._get_session()
+        
+        assert first is second
+        await service.close()
+        assert first.closed
+    
+    @pytest.mark.asyncio
+    async def test_retry_transient_status_with_jitter(self):
+        """Test 5xx responses are retried and the final status returned"""
+        service = NotificationService(
+            slack_webhook_url="https://hooks.slack.com/test",
+            retry_base_delay=0.001
+        )
+        statuses = iter([503, 502, 200])
+        
+        def make_response(*args, **kwargs):
+            response = AsyncMock()
+            response.status = next(statuses)
+            response.__aenter__.return_value = response
+            return response
+        
+        with patch('aiohttp.ClientSession.post', side_effect=make_response) as mock_post:
+            result = await service.send_slack_message(message="Test")
+        await service.close()
+        
+        assert result['success'] is True
+        assert mock_post.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_retry_gives_up(self):
+        """Test retries stop after max_retries"""
+        service = NotificationService(
+            slack_webhook_url="https://hooks.slack.com/test",
+            max_retries=1,
+            retry_base_delay=0.001
+        )
+        
+        with patch('aiohttp.ClientSession.post') as mock_post:
+            response = AsyncMock()
+            response.status = 503
+            response.__aenter__.return_value = response
+            mock_post.return_value = response
+            result = await service.send_slack_message(message="Test")
+        await service.close()
+        
+        assert result['success'] is False
+        assert mock_post.call_count == 2
+    
+    def test_backoff_delay_is_bounded(self):
+        """Test full-jitter backoff stays within the cap"""
+        service = NotificationService(retry_base_delay=0.5, retry_max_delay=2.0)
+        
+        delays = [service._backoff_delay(attempt) for attempt in range(10) for _ in range(20)]
+        
+        assert all(0 <= delay <= 2.0 for delay in delays)
+    
+    @pytest.mark.asyncio
+    async def test_smtp_connection_reused(self):
+        """Test SMTP sends reuse one authenticated connection"""
+        with patch('tools.notification_service.smtplib.SMTP') as mock_smtp:
+            server = MagicMock()
+            mock_smtp.return_value = server
+            service = NotificationService(smtp_user="user", smtp_password="pass")
+            
+            for i in range(3):
+                result = await service.send_email_smtp(to="a@test.com", subject=f"S{i}", body="B")
+                assert result['success'] is True
+            await service.close()
+        
+        assert mock_smtp.call_count == 1
+        assert server.login.call_count == 1
+        assert server.send_message.call_count == 3
+        server.quit.assert_called_once()
+    
+    def test_smtp_reconnects_after_disconnect(self):
+        """Test a dropped pooled SMTP connection is replaced"""
+        with patch('tools.notification_service.smtplib.SMTP') as mock_smtp:
+            stale, fresh = MagicMock(), MagicMock()
+            stale.send_message.side_effect = smtplib.SMTPServerDisconnected()
+            mock_smtp.side_effect = [stale, fresh]
+            pool = SMTPConnectionPool("smtp.test.com", 587, "user", "pass")
+            
+            pool._send_blocking(MagicMock())
+        
+        fresh.send_message.assert_called_once()
+        assert pool.connections_opened == 2
+    
+    @pytest.mark.asyncio
+    async def test_send_to_channels_concurrently(self):
+        """Test a hung channel does not delay the others"""
+        service = NotificationService()
+        
+        async def hung_email(**kwargs):
+            await asyncio.sleep(10)
+        
+        with patch.object(service, 'send_email_smtp', side_effect=hung_email), \
+                patch.object(service, 'send_slack_message', new_callable=AsyncMock) as mock_slack:
+            mock_slack.return_value = {'success': True}
+            start = time.perf_counter()
+            results = await service.send_to_channels(["email", "slack"], "Test", timeout=0.1, to="a@test.com")
+            elapsed = time.perf_counter() - start
+        
+        assert results['slack']['success'] is True
+        assert results['email']['success'] is False
+        assert 'Timed out' in results['email']['error']
+        assert elapsed < 1
+
+
+class TestNotificationDispatcher:
+    """Tests for NotificationDispatcher"""
+    
+    @pytest.mark.asyncio
+    async def test_send_many_preserves_order(self):
+        """Test results come back in input order across channels"""
+        service = NotificationService()
+        
+        async def fake_send(channel, message, **kwargs):
+            await asyncio.sleep(0.01 if channel == "email" else 0)
+            return {'success': True, 'echo': f"{channel}:{message}"}
+        
+        with patch.object(service, 'send_notification', side_effect=fake_send):
+            dispatcher = NotificationDispatcher(service)
+            results = await dispatcher.send_many([
+                ("email", "a", {}), ("slack", "b", {}), ("webhook", "c", {"url": "http://x"})
+            ])
+            await dispatcher.close()
+        
+        assert [r['echo'] for r in results] == ["email:a", "slack:b", "webhook:c"]
+        assert dispatcher.stats['email']['sent'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_slow_channel_does_not_block_others(self):
+        """Test the email outbox backing up leaves Slack unaffected"""
+        service = NotificationService()
+        
+        async def fake_send(channel, message, **kwargs):
+            if channel == "email":
+                await asyncio.sleep(0.2)
+            return {'success': True}
+        
+        with patch.object(service, 'send_notification', side_effect=fake_send):
+            dispatcher = NotificationDispatcher(service, concurrency={'email': 1})
+            email_futures = [dispatcher.submit("email", str(i)) for i in range(3)]
+            start = time.perf_counter()
+            await dispatcher.send("slack", "fast")
+            slack_elapsed = time.perf_counter() - start
+            await asyncio.gather(*email_futures)
+            await dispatcher.close()
+        
+        assert slack_elapsed < 0.2
+    
+    @pytest.mark.asyncio
+    async def test_delivery_timeout(self):
+        """Test deliveries are bounded by the dispatcher timeout"""
+        service = NotificationService()
+        
+        async def hung(channel, message, **kwargs):
+            await asyncio.sleep(10)
+        
+        with patch.object(service, 'send_notification', side_effect=hung):
+            dispatcher = NotificationDispatcher(service, timeout=0.05)
+            result = await dispatcher.send("slack", "x")
+            await dispatcher.close()
+        
+        assert result['success'] is False
+        assert dispatcher.stats['slack']['failed'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_full_outbox_rejects(self):
+        """Test a full outbox rejects instead of growing"""
+        service = NotificationService()
+        
+        async def slow(channel, message, **kwargs):
+            await asyncio.sleep(0.05)
+            return {'success': True}
+        
+        with patch.object(service, 'send_notification', side_effect=slow):
+            dispatcher = NotificationDispatcher(service, concurrency={'slack': 1}, max_outbox_size=1)
+            futures = [dispatcher.submit("slack", str(i)) for i in range(3)]
+            results = await asyncio.gather(*futures)
+            await dispatcher.close()
+        
+        assert results[-1]['success'] is False
+        assert 'outbox is full' in results[-1]['error']
+
+
+@pytest.mark.benchmark
+class TestNotificationDispatcherPerformance:
+    """Performance benchmarks against a local HTTP stub"""
+    
+    @pytest.mark.asyncio
+    async def test_1000_alerts_to_3_channels(self):
+        """Test 1,000 alerts to email, Slack and webhook (target: <10s with 20ms stub latency)"""
+        from aiohttp import web
+        
+        connections = set()
+        
+        async def handler(request):
+            connections.add(request.transport.get_extra_info('peername'))
+            await asyncio.sleep(0.02)
+            return web.json_response({'ok': True})
+        
+        app = web.Application()
+        app.router.add_post('/{tail:.*}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+        
+        service = NotificationService(
+            mailtrap_token="test_token",
+            slack_webhook_url=f"{base_url}/slack"
+        )
+        service.MAILTRAP_API_URL = f"{base_url}/mailtrap"
+        dispatcher = NotificationDispatcher(service, concurrency={'email': 20, 'slack': 20, 'webhook': 20})
+        
+        notifications = []
+        for i in range(1000):
+            notifications.append(("email", f"Alert {i}", {"to": "ops@test.com", "subject": f"Alert {i}"}))
+            notifications.append(("slack", f"Alert {i}", {}))
+            notifications.append(("webhook", f"Alert {i}", {"url": f"{base_url}/hook"}))
+        
+        try:
+            start = time.perf_counter()
+            results = await dispatcher.send_many(notifications)
+            elapsed = time.perf_counter() - start
+        finally:
+            await dispatcher.close()
+            await service.close()
+            await runner.cleanup()
+        
+        print(f"\nDelivered {len(results)} notifications in {elapsed:.2f}s over {len(connections)} connections")
+        
+        assert all(r['success'] for r in results)
+        assert elapsed < 10, f"Delivery took {elapsed:.2f}s"
+        assert len(connections) <= 60
+
+
 class TestNotificationServiceIntegration:
     """Integration tests with real services"""
     
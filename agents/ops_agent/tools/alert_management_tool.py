@@ -2,13 +2,17 @@
 """
 Alert Management Tool - Alert Rules and Notifications
 """
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
+from collections import OrderedDict
 import asyncio
+from agents.shared.error_fingerprint import get_fingerprinter
 from .notification_service import NotificationService
+from .notification_batcher import NotificationBatcher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,6 +67,25 @@ class Alert:
     acknowledged_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
+    fingerprint: Optional[str] = None
+    occurrences: int = 1
+    last_seen_at: Optional[datetime] = None
+    notified_at: Optional[datetime] = None
+
+
+SEVERITY_RANK = {
+    AlertSeverity.LOW: 0,
+    AlertSeverity.MEDIUM: 1,
+    AlertSeverity.HIGH: 2,
+    AlertSeverity.CRITICAL: 3
+}
+
+SEVERITY_EMOJI = {
+    AlertSeverity.CRITICAL: "🔴",
+    AlertSeverity.HIGH: "🟠",
+    AlertSeverity.MEDIUM: "🟡",
+    AlertSeverity.LOW: "🟢"
+}
 
 
 class AlertManagementTool:
@@ -72,7 +95,14 @@ class AlertManagementTool:
         self,
         notification_service: Optional[NotificationService] = None,
         default_email_recipient: Optional[str] = None,
-        default_slack_channel: Optional[str] = None
+        default_slack_channel: Optional[str] = None,
+        suppression_window: float = 300.0,
+        batch_window: float = 2.0,
+        max_batch_size: int = 20,
+        rate_limit_per_minute: float = 30.0,
+        resolved_retention: float = 3600.0,
+        max_resolved_alerts: int = 1000,
+        eviction_interval: float = 60.0
     ):
         """
         Initialize Alert Management Tool
@@ -81,6 +111,13 @@ class AlertManagementTool:
             notification_service: NotificationService instance
             default_email_recipient: Default email for notifications
             default_slack_channel: Default Slack channel
+            suppression_window: Seconds during which a repeat of an open alert is not re-notified
+            batch_window: Seconds notifications are buffered per channel before sending
+            max_batch_size: Maximum alerts per notification batch
+            rate_limit_per_minute: Notification batches allowed per channel per minute
+            resolved_retention: Seconds resolved alerts are kept before eviction
+            max_resolved_alerts: Maximum number of resolved alerts kept
+            eviction_interval: Minimum seconds between resolved-alert sweeps
         """
         self.alert_rules: Dict[str, AlertRule] = {}
         self.alerts: Dict[str, Alert] = {}
@@ -89,6 +126,20 @@ class AlertManagementTool:
         self.notification_service = notification_service
         self.default_email_recipient = default_email_recipient
         self.default_slack_channel = default_slack_channel
+        self.suppression_window = suppression_window
+        self.resolved_retention = resolved_retention
+        self.max_resolved_alerts = max_resolved_alerts
+        self.eviction_interval = eviction_interval
+        self.notifier = NotificationBatcher(
+            self._deliver_batch,
+            batch_window=batch_window,
+            max_batch_size=max_batch_size,
+            rate_limit_per_minute=rate_limit_per_minute
+        )
+        self._open_alerts: Dict[str, str] = {}
+        self._resolved: "OrderedDict[str, datetime]" = OrderedDict()
+        self._last_eviction = datetime.now(timezone.utc)
+        self.suppressed_count = 0
     
     async def create_alert_rule(
         self,
@@ -186,6 +237,14 @@ class AlertManagementTool:
                     'error': f'Rule {rule_id} is disabled'
                 }
             
+            now = datetime.now(timezone.utc)
+            self._evict_resolved(now)
+            
+            fingerprint = self._alert_fingerprint(rule_id, message, metadata)
+            existing = self.alerts.get(self._open_alerts.get(fingerprint, ''))
+            if existing is not None:
+                return self._record_repeat(existing, rule, now)
+            
             self.alert_counter += 1
             alert_id = f"alert_{self.alert_counter}"
             
@@ -195,13 +254,16 @@ class AlertManagementTool:
                 severity=rule.severity,
                 status=AlertStatus.ACTIVE,
                 message=message,
-                triggered_at=datetime.now(timezone.utc),
-                metadata=metadata
+                triggered_at=now,
+                metadata=metadata,
+                fingerprint=fingerprint,
+                last_seen_at=now
             )
             
             self.alerts[alert_id] = alert
+            self._open_alerts[fingerprint] = alert_id
             
-            await self._send_notifications(alert, rule)
+            self._queue_notifications(alert, rule, now)
             
             return {
                 'success': True,
@@ -210,8 +272,10 @@ class AlertManagementTool:
                     'rule_id': rule_id,
                     'severity': rule.severity.value,
                     'message': message,
-                    'triggered_at': alert.triggered_at.isoformat()
-                }
+                    'triggered_at': alert.triggered_at.isoformat(),
+                    'occurrences': alert.occurrences
+                },
+                'deduplicated': False
             }
         
         except Exception as e:
@@ -252,7 +316,8 @@ class AlertManagementTool:
                         'severity': alert.severity.value,
                         'status': alert.status.value,
                         'message': alert.message,
-                        'triggered_at': alert.triggered_at.isoformat()
+                        'triggered_at': alert.triggered_at.isoformat(),
+                        'occurrences': alert.occurrences
                     }
                     for alert in active_alerts
                 ],
@@ -322,6 +387,12 @@ class AlertManagementTool:
             alert.status = AlertStatus.RESOLVED
             alert.resolved_at = datetime.now(timezone.utc)
             
+            if self._open_alerts.get(alert.fingerprint) == alert_id:
+                del self._open_alerts[alert.fingerprint]
+            self._resolved[alert_id] = alert.resolved_at
+            self._resolved.move_to_end(alert_id)
+            self._evict_resolved(alert.resolved_at)
+            
             return {
                 'success': True,
                 'alert_id': alert_id,
@@ -370,6 +441,7 @@ class AlertManagementTool:
                         'status': alert.status.value,
                         'message': alert.message,
                         'triggered_at': alert.triggered_at.isoformat(),
+                        'occurrences': alert.occurrences,
                         'acknowledged_at': alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
                         'resolved_at': alert.resolved_at.isoformat() if alert.resolved_at else None
                     }
@@ -472,13 +544,141 @@ class AlertManagementTool:
                 'error': str(e)
             }
     
-    async def _send_notifications(self, alert: Alert, rule: AlertRule):
-        """Send notifications for an alert"""
+    async def flush_notifications(self):
+        """Deliver all buffered notifications immediately"""
+        await self.notifier.flush()
+    
+    async def close(self):
+        """Stop background notification delivery, flushing anything buffered"""
+        await self.notifier.close()
+    
+    def _alert_fingerprint(
+        self,
+        rule_id: str,
+        message: str,
+        metadata: Optional[Dict[str, Any]]
+    ) -> str:
+        """Identity used to deduplicate repeats of the same alert"""
+        dedup_key = (metadata or {}).get('dedup_key') or message
+        return hashlib.blake2b(f"{rule_id}\0{dedup_key}".encode('utf-8'), digest_size=12).hexdigest()
+    
+    def _record_repeat(self, alert: Alert, rule: AlertRule, now: datetime) -> Dict[str, Any]:
+        """Fold a repeated trigger into its open alert, re-notifying only outside the suppression window"""
+        alert.occurrences += 1
+        alert.last_seen_at = now
+        
+        suppressed = (
+            alert.status == AlertStatus.ACKNOWLEDGED
+            or (
+                alert.notified_at is not None
+                and (now - alert.notified_at).total_seconds() < self.suppression_window
+            )
+        )
+        if suppressed:
+            self.suppressed_count += 1
+        else:
+            self._queue_notifications(alert, rule, now)
+        
+        return {
+            'success': True,
+            'alert': {
+                'id': alert.id,
+                'rule_id': alert.rule_id,
+                'severity': alert.severity.value,
+                'message': alert.message,
+                'triggered_at': alert.triggered_at.isoformat(),
+                'occurrences': alert.occurrences
+            },
+            'deduplicated': True,
+            'suppressed': suppressed
+        }
+    
+    def _queue_notifications(self, alert: Alert, rule: AlertRule, now: datetime):
+        """Hand an alert to the per-channel notification queue"""
+        alert.notified_at = now
+        
+        if not self.notification_service:
+            logger.debug(f"Notification service not configured, skipping notifications for {alert.id}")
+            return
+        
         for channel in rule.channels:
-            try:
+            self.notifier.enqueue(channel, (alert, rule))
+    
+    def _evict_resolved(self, now: datetime):
+        """Drop resolved alerts past retention or over the cap, at most once per eviction interval"""
+        over_cap = len(self._resolved) > self.max_resolved_alerts
+        if not over_cap and (now - self._last_eviction).total_seconds() < self.eviction_interval:
+            return
+        
+        self._last_eviction = now
+        while self._resolved:
+            alert_id, resolved_at = next(iter(self._resolved.items()))
+            expired = (now - resolved_at).total_seconds() >= self.resolved_retention
+            if not expired and len(self._resolved) <= self.max_resolved_alerts:
+                break
+            self._resolved.popitem(last=False)
+            alert = self.alerts.get(alert_id)
+            if alert is not None and alert.status == AlertStatus.RESOLVED:
+                del self.alerts[alert_id]
+    
+    async def _deliver_batch(
+        self,
+        channel: NotificationChannel,
+        items: List[Tuple[Alert, AlertRule]]
+    ):
+        """Send one notification per group of related alerts in a batch"""
+        if channel == NotificationChannel.WEBHOOK:
+            by_url: Dict[Optional[str], List[Tuple[Alert, AlertRule]]] = {}
+            for alert, rule in items:
+                url = alert.metadata.get('webhook_url') if alert.metadata else None
+                by_url.setdefault(url, []).append((alert, rule))
+            batches = list(by_url.values())
+        else:
+            batches = [items]
+        
+        for batch in batches:
+            if len(batch) == 1:
+                alert, rule = batch[0]
                 await self._send_notification(channel, alert, rule)
-            except Exception as e:
-                logger.error(f"Failed to send notification via {channel.value}: {e}")
+            else:
+                await self._send_digest(channel, batch)
+    
+    async def _send_digest(
+        self,
+        channel: NotificationChannel,
+        items: List[Tuple[Alert, AlertRule]]
+    ):
+        """Send a single notification summarizing several alerts"""
+        fingerprinter = get_fingerprinter()
+        groups: Dict[Tuple[str, str], List[Tuple[Alert, AlertRule]]] = {}
+        for alert, rule in items:
+            key = (rule.id, fingerprinter.fingerprint(alert.message).template)
+            groups.setdefault(key, []).append((alert, rule))
+        
+        severity = max((alert.severity for alert, _ in items), key=SEVERITY_RANK.get)
+        lines = []
+        for group in groups.values():
+            alert, rule = group[-1]
+            emoji = SEVERITY_EMOJI.get(alert.severity, "⚠️")
+            count = sum(a.occurrences for a, _ in group)
+            suffix = f" (x{count})" if count > 1 else ""
+            lines.append(f"{emoji} [{alert.severity.value.upper()}] {rule.name}{suffix}: {alert.message}")
+        
+        formatted_message = f"{len(items)} alerts in {len(groups)} groups\n\n" + "\n".join(lines)
+        subject = f"[{severity.value.upper()}] Ops Agent Alert digest: {len(items)} alerts"
+        first_alert = items[0][0]
+        
+        logger.info(f"Sending {severity.value} alert digest via {channel.value}: {len(items)} alerts")
+        await self._dispatch(
+            channel,
+            formatted_message,
+            subject,
+            webhook_url=first_alert.metadata.get('webhook_url') if first_alert.metadata else None,
+            payload={
+                'severity': severity.value,
+                'alerts': [self._webhook_payload(alert) for alert, _ in items]
+            }
+        )
     
     async def _send_notification(
         self,
@@ -489,27 +689,49 @@ class AlertManagementTool:
         """Send notification via specific channel"""
         logger.info(f"Sending {alert.severity.value} alert via {channel.value}: {alert.message}")
         
+        emoji = SEVERITY_EMOJI.get(alert.severity, "⚠️")
+        formatted_message = f"{emoji} [{alert.severity.value.upper()}] {rule.name}\n\n{alert.message}"
+        
+        await self._dispatch(
+            channel,
+            formatted_message,
+            f"[{alert.severity.value.upper()}] Ops Agent Alert: {rule.name}",
+            webhook_url=alert.metadata.get('webhook_url') if alert.metadata else None,
+            payload=self._webhook_payload(alert)
+        )
+    
+    @staticmethod
+    def _webhook_payload(alert: Alert) -> Dict[str, Any]:
+        """Webhook representation of an alert"""
+        return {
+            'alert_id': alert.id,
+            'rule_id': alert.rule_id,
+            'severity': alert.severity.value,
+            'message': alert.message,
+            'triggered_at': alert.triggered_at.isoformat(),
+            'occurrences': alert.occurrences
+        }
+    
+    async def _dispatch(
+        self,
+        channel: NotificationChannel,
+        formatted_message: str,
+        subject: str,
+        webhook_url: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None
+    ):
+        """Deliver a formatted notification through the notification service"""
         if not self.notification_service:
             logger.warning(f"Notification service not configured, skipping {channel.value} notification")
             return
         
-        severity_emoji = {
-            AlertSeverity.CRITICAL: "🔴",
-            AlertSeverity.HIGH: "🟠",
-            AlertSeverity.MEDIUM: "🟡",
-            AlertSeverity.LOW: "🟢"
-        }
-        
-        emoji = severity_emoji.get(alert.severity, "⚠️")
-        formatted_message = f"{emoji} [{alert.severity.value.upper()}] {rule.name}\n\n{alert.message}"
-        
         try:
             if channel == NotificationChannel.EMAIL:
                 result = await self.notification_service.send_notification(
                     channel="email",
                     message=formatted_message,
                     to=self.default_email_recipient or "admin@morningai.com",
-                    subject=f"[{alert.severity.value.upper()}] Ops Agent Alert: {rule.name}"
+                    subject=subject
                 )
                 if result['success']:
                     logger.info(f"✅ Email notification sent successfully")
@@ -528,19 +750,12 @@ class AlertManagementTool:
                     logger.error(f"❌ Slack notification failed: {result.get('error')}")
             
             elif channel == NotificationChannel.WEBHOOK:
-                webhook_url = alert.metadata.get('webhook_url') if alert.metadata else None
                 if webhook_url:
                     result = await self.notification_service.send_notification(
                         channel="webhook",
                         message=formatted_message,
                         url=webhook_url,
-                        payload={
-                            'alert_id': alert.id,
-                            'rule_id': alert.rule_id,
-                            'severity': alert.severity.value,
-                            'message': alert.message,
-                            'triggered_at': alert.triggered_at.isoformat()
-                        }
+                        payload=payload
                     )
                     if result['success']:
                         logger.info(f"✅ Webhook notification sent successfully")
@@ -559,11 +774,13 @@ class AlertManagementTool:
 def create_alert_management_tool(
     notification_service: Optional[NotificationService] = None,
     default_email_recipient: Optional[str] = None,
-    default_slack_channel: Optional[str] = None
+    default_slack_channel: Optional[str] = None,
+    **kwargs
 ) -> AlertManagementTool:
     """Factory function to create AlertManagementTool instance"""
     return AlertManagementTool(
         notification_service=notification_service,
         default_email_recipient=default_email_recipient,
-        default_slack_channel=default_slack_channel
+        default_slack_channel=default_slack_channel,
+        **kwargs
     )
@@ -10,6 +10,9 @@ from datetime import datetime, timezone, timedelta
 from enum import Enum
 from collections import defaultdict
 
+from agents.shared.error_fingerprint import ErrorFingerprinter, get_fingerprinter
+from .log_store import LogStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -46,11 +49,31 @@ class ErrorPattern:
 class LogAnalysisTool:
     """Tool for log analysis and pattern detection"""
     
-    def __init__(self):
-        """Initialize Log Analysis Tool"""
-        self.logs: List[LogEntry] = []
+    ERROR_LEVELS = (LogLevel.ERROR, LogLevel.CRITICAL)
+    
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        retention_minutes: int = 7 * 24 * 60,
+        fingerprinter: Optional[ErrorFingerprinter] = None
+    ):
+        """
+        Initialize Log Analysis Tool
+        
+        Args:
+            max_entries: Maximum number of log entries kept in memory
+            retention_minutes: Maximum age of retained entries, in minutes
+            fingerprinter: Error fingerprinter (defaults to the shared instance)
+        """
+        self.store = LogStore(max_entries=max_entries, retention_minutes=retention_minutes)
+        self.fingerprinter = fingerprinter or get_fingerprinter()
         self.error_patterns: Dict[str, ErrorPattern] = {}
     
+    @property
+    def logs(self) -> List[LogEntry]:
+        """Snapshot of retained log entries, oldest first"""
+        return self.store.entries()
+    
     async def search_logs(
         self,
         query: str,
@@ -72,22 +95,14 @@ class LogAnalysisTool:
         """
         try:
             cutoff_time = self._parse_time_range(time_range) if time_range else None
+            level = LogLevel(severity) if severity else None
             
-            filtered_logs = []
-            for log in self.logs:
-                if cutoff_time and log.timestamp < cutoff_time:
-                    continue
-                
-                if severity and log.level.value != severity:
-                    continue
-                
-                if query and query.lower() not in log.message.lower():
-                    continue
-                
-                filtered_logs.append(log)
-                
-                if len(filtered_logs) >= limit:
-                    break
+            filtered_logs = self.store.search(
+                query,
+                since=cutoff_time,
+                level=level,
+                limit=limit
+            )
             
             return {
                 'success': True,
@@ -124,21 +139,19 @@ class LogAnalysisTool:
         try:
             cutoff_time = self._parse_time_range(time_range)
             
-            error_logs = [
-                log for log in self.logs
-                if log.level in [LogLevel.ERROR, LogLevel.CRITICAL]
-                and log.timestamp >= cutoff_time
-            ]
+            error_logs = list(self.store.iter_entries(since=cutoff_time, levels=self.ERROR_LEVELS))
             
             patterns = defaultdict(list)
             for log in error_logs:
-                pattern = self._extract_error_pattern(log.message)
-                patterns[pattern].append(log)
+                fingerprint = self.fingerprinter.fingerprint(log.message)
+                patterns[fingerprint].append(log)
             
             pattern_summaries = []
-            for pattern, logs in patterns.items():
+            for fingerprint, logs in patterns.items():
                 pattern_summaries.append({
-                    'pattern': pattern,
+                    'pattern': fingerprint.template,
+                    'fingerprint': fingerprint.key,
+                    'error_type': fingerprint.error_type,
                     'count': len(logs),
                     'first_seen': min(log.timestamp for log in logs).isoformat(),
                     'last_seen': max(log.timestamp for log in logs).isoformat(),
@@ -173,17 +186,8 @@ class LogAnalysisTool:
             last_hour = now - timedelta(hours=1)
             last_day = now - timedelta(days=1)
             
-            recent_errors = sum(
-                1 for log in self.logs
-                if log.level in [LogLevel.ERROR, LogLevel.CRITICAL]
-                and log.timestamp >= last_hour
-            )
-            
-            day_errors = sum(
-                1 for log in self.logs
-                if log.level in [LogLevel.ERROR, LogLevel.CRITICAL]
-                and log.timestamp >= last_day
-            )
+            recent_errors = self.store.count(self.ERROR_LEVELS, since=last_hour)
+            day_errors = self.store.count(self.ERROR_LEVELS, since=last_day)
             avg_errors_per_hour = day_errors / 24 if day_errors > 0 else 0
             
             anomalies = []
@@ -236,11 +240,16 @@ class LogAnalysisTool:
                 metadata=metadata or {}
             )
             
-            self.logs.append(log_entry)
+            log_id = self.store.add(log_entry)
+            if log_id < 0:
+                return {
+                    'success': False,
+                    'error': 'Log entry is older than the retention window'
+                }
             
             return {
                 'success': True,
-                'log_id': len(self.logs) - 1
+                'log_id': log_id
             }
         
         except Exception as e:
@@ -250,6 +259,50 @@ class LogAnalysisTool:
                 'error': str(e)
             }
     
+    async def ingest_log_file(self, path: str) -> Dict[str, Any]:
+        """
+        Stream a structured (JSON lines) log file into the store
+        
+        Args:
+            path: Path to the log file
+        
+        Returns:
+            Dict with ingested and skipped line counts
+        """
+        try:
+            ingested, skipped = self.store.ingest_file(path, self._make_entry)
+            
+            return {
+                'success': True,
+                'ingested': ingested,
+                'skipped': skipped,
+                'total_logs': len(self.store)
+            }
+        
+        except Exception as e:
+            logger.error(f"Failed to ingest log file {path}: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    @staticmethod
+    def _make_entry(
+        timestamp: datetime,
+        level: str,
+        message: str,
+        source: str,
+        metadata: Dict[str, Any]
+    ) -> LogEntry:
+        """Build a LogEntry from parsed structured log fields"""
+        return LogEntry(
+            timestamp=timestamp,
+            level=LogLevel(level),
+            message=message,
+            source=source,
+            metadata=metadata
+        )
+    
     def _parse_time_range(self, time_range: str) -> datetime:
         """Parse time range string (e.g., '1h', '24h', '7d')"""
         match = re.match(r'(\d+)([hmd])', time_range)
@@ -270,22 +323,6 @@ class LogAnalysisTool:
         
         return datetime.now(timezone.utc) - delta
     
-    def _extract_error_pattern(self, message: str) -> str:
-        """Extract error pattern from message"""
-        patterns = [
-            (r'(\w+Error):', r'\1'),
-            (r'(\w+Exception):', r'\1'),
-            (r'Failed to (\w+)', r'Failed to \1'),
-            (r'Cannot (\w+)', r'Cannot \1'),
-        ]
-        
-        for pattern, replacement in patterns:
-            match = re.search(pattern, message)
-            if match:
-                return re.sub(pattern, replacement, message)
-        
-        return message[:50]
-
 
 def create_log_analysis_tool() -> LogAnalysisTool:
     """Factory function to create LogAnalysisTool instance"""
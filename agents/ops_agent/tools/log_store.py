@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Log Store - Bounded, time-partitioned log storage with incremental indexes
+"""
+import bisect
+import json
+import logging
+import re
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+')
+_GRAM = 3
+# Above len(store) // _SCAN_FRACTION candidates a scan is cheaper than the index
+_SCAN_FRACTION = 4
+
+_TIMESTAMP_FIELDS = ('timestamp', 'ts', 'time', '@timestamp')
+_LEVEL_FIELDS = ('level', 'severity', 'levelname')
+_MESSAGE_FIELDS = ('message', 'msg', 'event')
+_SOURCE_FIELDS = ('source', 'logger', 'name', 'service')
+
+
+def _minute_of(ts: datetime) -> int:
+    """Return the epoch minute a timestamp falls into"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() // 60)
+
+
+def tokenize(text: str) -> Set[str]:
+    """Split lowercased text into the word tokens used by the inverted index"""
+    return set(_TOKEN_RE.findall(text))
+
+
+def _grams(token: str) -> Set[str]:
+    return {token[i:i + _GRAM] for i in range(len(token) - _GRAM + 1)}
+
+
+class _StoredEntry:
+    """Log entry plus the derived fields needed for indexing and eviction"""
+
+    __slots__ = ('seq', 'entry', 'minute', 'message_lower', 'tokens')
+
+    def __init__(self, seq: int, entry: Any, minute: int, message_lower: str, tokens: Set[str]):
+        self.seq = seq
+        self.entry = entry
+        self.minute = minute
+        self.message_lower = message_lower
+        self.tokens = tokens
+
+
+class _MinuteBucket:
+    """All entries that fall into a single minute, with per-level counters"""
+
+    __slots__ = ('minute', 'entries', 'level_counts')
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.entries: Deque[_StoredEntry] = deque()
+        self.level_counts: Counter = Counter()
+
+
+class LogStore:
+    """
+    Ring store for log entries, partitioned into minute buckets.
+
+    Memory is bounded by ``max_entries`` (oldest entries are evicted first)
+    and by ``retention_minutes`` (buckets older than the newest bucket minus
+    the retention window are dropped). Per-level counters are maintained per
+    bucket so counting queries cost O(buckets), and an inverted token index
+    (plus a trigram index over the token vocabulary for partial words)
+    narrows keyword and substring searches to candidate entries instead of
+    scanning every message.
+
+    Entries only need ``timestamp``, ``level`` (an Enum) and ``message``
+    attributes, so the store is independent of the ``LogEntry`` type.
+    """
+
+    def __init__(self, max_entries: int = 100_000, retention_minutes: int = 7 * 24 * 60):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if retention_minutes <= 0:
+            raise ValueError("retention_minutes must be positive")
+
+        self.max_entries = max_entries
+        self.retention_minutes = retention_minutes
+
+        self._buckets: Dict[int, _MinuteBucket] = {}
+        self._minutes: List[int] = []
+        self._by_seq: Dict[int, _StoredEntry] = {}
+        self._index: Dict[str, Set[int]] = {}
+        self._gram_index: Dict[str, Set[str]] = {}
+        self._level_totals: Counter = Counter()
+        self._next_seq = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._by_seq)
+
+    def __iter__(self) -> Iterator[Any]:
+        for minute in self._minutes:
+            for stored in self._buckets[minute].entries:
+                yield stored.entry
+
+    def entries(self) -> List[Any]:
+        """Return all retained entries, oldest bucket first"""
+        return list(self)
+
+    def add(self, entry: Any) -> int:
+        """
+        Add an entry and return its sequence id
+
+        Args:
+            entry: Log entry with ``timestamp``, ``level`` and ``message``
+
+        Returns:
+            Monotonic sequence id assigned to the entry
+        """
+        minute = _minute_of(entry.timestamp)
+        if self._minutes and minute < self._minutes[-1] - self.retention_minutes:
+            self.evicted += 1
+            return -1
+
+        message_lower = entry.message.lower()
+        stored = _StoredEntry(
+            seq=self._next_seq,
+            entry=entry,
+            minute=minute,
+            message_lower=message_lower,
+            tokens=tokenize(message_lower),
+        )
+        self._next_seq += 1
+
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            bucket = _MinuteBucket(minute)
+            self._buckets[minute] = bucket
+            if not self._minutes or minute > self._minutes[-1]:
+                self._minutes.append(minute)
+            else:
+                bisect.insort(self._minutes, minute)
+
+        bucket.entries.append(stored)
+        bucket.level_counts[entry.level] += 1
+        self._level_totals[entry.level] += 1
+        self._by_seq[stored.seq] = stored
+        for token in stored.tokens:
+            postings = self._index.get(token)
+            if postings is None:
+                self._index[token] = {stored.seq}
+                for gram in _grams(token):
+                    self._gram_index.setdefault(gram, set()).add(token)
+            else:
+                postings.add(stored.seq)
+
+        self._enforce_limits()
+        return stored.seq
+
+    def extend(self, entries: Iterable[Any]) -> int:
+        """Add many entries, returning how many were retained"""
+        added = 0
+        for entry in entries:
+            if self.add(entry) >= 0:
+                added += 1
+        return added
+
+    def count(self, levels: Iterable[Any], since: Optional[datetime] = None) -> int:
+        """
+        Count entries with one of the given levels, optionally since a cutoff
+
+        Whole buckets are answered from their counters; only the bucket the
+        cutoff falls into is inspected entry by entry.
+        """
+        levels = tuple(levels)
+        if since is None:
+            return sum(self._level_totals[level] for level in levels)
+
+        cutoff_minute = _minute_of(since)
+        start = bisect.bisect_left(self._minutes, cutoff_minute)
+        total = 0
+        for minute in self._minutes[start:]:
+            bucket = self._buckets[minute]
+            if minute == cutoff_minute:
+                total += sum(
+                    1 for stored in bucket.entries
+                    if stored.entry.level in levels and stored.entry.timestamp >= since
+                )
+            else:
+                total += sum(bucket.level_counts[level] for level in levels)
+        return total
+
+    def iter_entries(
+        self,
+        since: Optional[datetime] = None,
+        levels: Optional[Iterable[Any]] = None
+    ) -> Iterator[Any]:
+        """Yield entries in insertion order per bucket, skipping buckets with no matching levels"""
+        levels = tuple(levels) if levels is not None else None
+        start = bisect.bisect_left(self._minutes, _minute_of(since)) if since else 0
+        for minute in self._minutes[start:]:
+            bucket = self._buckets[minute]
+            if levels is not None and not any(bucket.level_counts[level] for level in levels):
+                continue
+            for stored in bucket.entries:
+                entry = stored.entry
+                if levels is not None and entry.level not in levels:
+                    continue
+                if since is not None and entry.timestamp < since:
+                    continue
+                yield entry
+
+    def search(
+        self,
+        query: str,
+        since: Optional[datetime] = None,
+        level: Optional[Any] = None,
+        limit: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Case-insensitive substring search
+
+        A query word with a separator on both sides must be a whole token of
+        any matching message, so it is answered from the exact postings. When
+        the query has no such word, its partial words (the first may be a
+        token suffix, the last a prefix) are resolved through the trigram
+        index over the vocabulary. Queries with no word of trigram length, or
+        whose candidates are a large share of the store, are scanned instead.
+        Candidates are then confirmed against the pre-lowercased message so
+        the result is identical to a plain ``query in message`` scan.
+        """
+        query_lower = query.lower() if query else ''
+        exact: List[str] = []
+        partial: List[Tuple[str, bool, bool]] = []
+        for match in _TOKEN_RE.finditer(query_lower):
+            bounded_left = match.start() > 0
+            bounded_right = match.end() < len(query_lower)
+            if bounded_left and bounded_right:
+                exact.append(match.group())
+            else:
+                partial.append((match.group(), bounded_left, bounded_right))
+
+        max_candidates = len(self) // _SCAN_FRACTION
+        if exact:
+            postings = [self._index.get(token, set()) for token in exact]
+        else:
+            postings = [
+                self._postings_containing(token, is_prefix, is_suffix, max_candidates)
+                for token, is_prefix, is_suffix in partial if len(token) >= _GRAM
+            ]
+            postings = [matches for matches in postings if matches is not None]
+
+        postings.sort(key=len)
+        if not postings or len(postings[0]) > max_candidates:
+            return self._scan(query_lower, since, level, limit)
+        candidates = set(postings[0])
+        for matches in postings[1:]:
+            if not candidates:
+                break
+            candidates &= matches
+        if not candidates:
+            return []
+
+        results = []
+        for seq in sorted(candidates):
+            stored = self._by_seq[seq]
+            if not self._matches(stored, query_lower, since, level):
+                continue
+            results.append(stored.entry)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def ingest_stream(self, lines: Iterable[str], entry_factory) -> Tuple[int, int]:
+        """
+        Ingest structured (JSON lines) logs from an iterable of lines
+
+        Args:
+            lines: Iterable of text lines, e.g. an open file
+            entry_factory: Callable ``(timestamp, level, message, source, metadata)``
+                returning an entry; raising ``ValueError`` skips the line
+
+        Returns:
+            Tuple of (ingested, skipped) line counts
+        """
+        ingested = 0
+        skipped = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("log record is not an object")
+                entry = entry_factory(*parse_structured_record(record))
+            except (ValueError, TypeError) as e:
+                logger.debug(f"Skipping malformed log line: {e}")
+                skipped += 1
+                continue
+            if self.add(entry) >= 0:
+                ingested += 1
+            else:
+                skipped += 1
+        return ingested, skipped
+
+    def ingest_file(self, path: str, entry_factory) -> Tuple[int, int]:
+        """Stream a JSON-lines log file into the store without loading it whole"""
+        with open(path, 'r', encoding='utf-8', errors='replace') as handle:
+            return self.ingest_stream(handle, entry_factory)
+
+    def clear(self):
+        """Drop every entry and index"""
+        self._buckets.clear()
+        self._minutes.clear()
+        self._by_seq.clear()
+        self._index.clear()
+        self._gram_index.clear()
+        self._level_totals.clear()
+
+    def _postings_containing(
+        self, token: str, is_prefix: bool, is_suffix: bool, max_candidates: int
+    ) -> Optional[Set[int]]:
+        """
+        Postings of vocabulary tokens that contain (or start/end with) ``token``
+
+        Returns None once the postings exceed ``max_candidates``.
+        """
+        gram_sets = [self._gram_index.get(gram, ()) for gram in _grams(token)]
+        vocabulary = min(gram_sets, key=len)
+        matches: Set[int] = set()
+        for indexed_token in vocabulary:
+            if is_prefix:
+                found = indexed_token.startswith(token)
+            elif is_suffix:
+                found = indexed_token.endswith(token)
+            else:
+                found = token in indexed_token
+            if found:
+                matches |= self._index[indexed_token]
+                if len(matches) > max_candidates:
+                    return None
+        return matches
+
+    def _scan(self, query_lower: str, since, level, limit) -> List[Any]:
+        results = []
+        start = bisect.bisect_left(self._minutes, _minute_of(since)) if since else 0
+        for minute in self._minutes[start:]:
+            bucket = self._buckets[minute]
+            if level is not None and not bucket.level_counts[level]:
+                continue
+            if since is None and level is None and limit is None:
+                results.extend(stored.entry for stored in bucket.entries if query_lower in stored.message_lower)
+                continue
+            for stored in bucket.entries:
+                if query_lower not in stored.message_lower:
+                    continue
+                if not self._matches(stored, query_lower, since, level):
+                    continue
+                results.append(stored.entry)
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    @staticmethod
+    def _matches(stored: _StoredEntry, query_lower: str, since, level) -> bool:
+        entry = stored.entry
+        if since is not None and entry.timestamp < since:
+            return False
+        if level is not None and entry.level != level:
+            return False
+        return not query_lower or query_lower in stored.message_lower
+
+    def _enforce_limits(self):
+        oldest_allowed = self._minutes[-1] - self.retention_minutes
+        while self._minutes and self._minutes[0] < oldest_allowed:
+            self._drop_bucket(self._minutes[0])
+
+        while len(self._by_seq) > self.max_entries:
+            bucket = self._buckets[self._minutes[0]]
+            self._evict(bucket.entries.popleft(), bucket)
+            if not bucket.entries:
+                del self._buckets[bucket.minute]
+                self._minutes.pop(0)
+
+    def _drop_bucket(self, minute: int):
+        bucket = self._buckets.pop(minute)
+        self._minutes.pop(0)
+        for stored in bucket.entries:
+            self._evict(stored, bucket)
+
+    def _evict(self, stored: _StoredEntry, bucket: _MinuteBucket):
+        level = stored.entry.level
+        bucket.level_counts[level] -= 1
+        self._level_totals[level] -= 1
+        del self._by_seq[stored.seq]
+        for token in stored.tokens:
+            postings = self._index.get(token)
+            if postings is not None:
+                postings.discard(stored.seq)
+                if not postings:
+                    del self._index[token]
+                    for gram in _grams(token):
+                        tokens = self._gram_index.get(gram)
+                        if tokens is not None:
+                            tokens.discard(token)
+                            if not tokens:
+                                del self._gram_index[gram]
+        self.evicted += 1
+
+
+def parse_structured_record(record: Dict[str, Any]) -> Tuple[datetime, str, str, str, Dict[str, Any]]:
+    """
+    Normalize a structured log record into entry fields
+
+    Returns:
+        Tuple of (timestamp, level, message, source, metadata)
+    """
+    record = dict(record)
+
+    raw_ts = _pop_first(record, _TIMESTAMP_FIELDS)
+    if raw_ts is None:
+        timestamp = datetime.now(timezone.utc)
+    elif isinstance(raw_ts, (int, float)):
+        timestamp = datetime.fromtimestamp(raw_ts, tz=timezone.utc)
+    else:
+        timestamp = datetime.fromisoformat(str(raw_ts).replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    level = str(_pop_first(record, _LEVEL_FIELDS) or 'info').lower()
+    if level == 'warn':
+        level = 'warning'
+    message = _pop_first(record, _MESSAGE_FIELDS)
+    if message is None:
+        raise ValueError("log record has no message")
+    source = str(_pop_first(record, _SOURCE_FIELDS) or 'system')
+
+    return timestamp, level, str(message), source, record
+
+
+def _pop_first(record: Dict[str, Any], fields: Tuple[str, ...]) -> Any:
+    for field in fields:
+        if field in record:
+            return record.pop(field)
+    return None
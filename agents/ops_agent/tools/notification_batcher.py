@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Notification Batcher - Asynchronous per-channel batching with rate limits
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket rate limiter"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def time_until_available(self) -> float:
+        """Seconds until a token can be consumed (0 if one is available now)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        if self.rate_per_second <= 0:
+            return float('inf')
+        return (1 - self.tokens) / self.rate_per_second
+
+    def consume(self):
+        """Take one token (may go negative when forced)"""
+        self._refill()
+        self.tokens -= 1
+
+
+class NotificationBatcher:
+    """
+    Buffers notifications per channel and delivers them in batches
+
+    ``enqueue`` never blocks the caller. A background task per channel
+    waits up to ``batch_window`` seconds (or until ``max_batch_size`` items
+    are buffered), takes a token from the channel's rate limiter and hands
+    the batch to ``send_batch``. While a channel is rate limited, new items
+    keep accumulating so they go out together in the next batch.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[Any, List[Any]], Awaitable[None]],
+        batch_window: float = 2.0,
+        max_batch_size: int = 20,
+        rate_limit_per_minute: float = 30.0,
+        burst: int = 5,
+        max_buffer_size: int = 1000
+    ):
+        """
+        Initialize Notification Batcher
+
+        Args:
+            send_batch: Coroutine called with (channel, items) for each batch
+            batch_window: Seconds to wait for more items before sending
+            max_batch_size: Maximum items per batch
+            rate_limit_per_minute: Sustained batches per minute per channel
+            burst: Batches per channel that may be sent back to back
+            max_buffer_size: Items buffered per channel before new ones are dropped
+        """
+        self.send_batch = send_batch
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.burst = burst
+        self.max_buffer_size = max_buffer_size
+
+        self._buffers: Dict[Any, List[Any]] = {}
+        self._pending: Dict[Any, asyncio.Event] = {}
+        self._full: Dict[Any, asyncio.Event] = {}
+        self._workers: Dict[Any, asyncio.Task] = {}
+        self._limiters: Dict[Any, TokenBucket] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.batches_sent = 0
+
+    def enqueue(self, channel: Any, item: Any) -> bool:
+        """
+        Buffer an item for a channel without waiting for delivery
+
+        Must be called from a running event loop.
+
+        Returns:
+            False if the channel buffer is full and the item was dropped
+        """
+        buffer = self._buffers.setdefault(channel, [])
+        if len(buffer) >= self.max_buffer_size:
+            self.dropped += 1
+            logger.warning(f"Notification buffer for {channel} is full, dropping item")
+            return False
+
+        buffer.append(item)
+        self.enqueued += 1
+        self._pending.setdefault(channel, asyncio.Event()).set()
+        if len(buffer) >= self.max_batch_size:
+            self._full.setdefault(channel, asyncio.Event()).set()
+        self._ensure_worker(channel)
+        return True
+
+    def pending(self, channel: Optional[Any] = None) -> int:
+        """Number of buffered items, for one channel or all of them"""
+        if channel is not None:
+            return len(self._buffers.get(channel, []))
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    async def flush(self):
+        """Send everything buffered right away, ignoring the batch window and rate limit"""
+        for channel in list(self._buffers):
+            while self._buffers[channel]:
+                batch = self._take_batch(channel)
+                await self._send(channel, batch)
+
+    async def close(self):
+        """Stop the background workers, finish batches being sent and flush remaining items"""
+        workers = list(self._workers.values())
+        self._workers.clear()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        await self.flush()
+
+    def _ensure_worker(self, channel: Any):
+        worker = self._workers.get(channel)
+        if worker is None or worker.done():
+            self._workers[channel] = asyncio.get_running_loop().create_task(self._run(channel))
+
+    async def _run(self, channel: Any):
+        pending = self._pending[channel]
+        full = self._full.setdefault(channel, asyncio.Event())
+        limiter = self._limiters.setdefault(
+            channel, TokenBucket(self.rate_limit_per_minute, self.burst)
+        )
+
+        while True:
+            await pending.wait()
+
+            if not full.is_set():
+                try:
+                    await asyncio.wait_for(full.wait(), timeout=self.batch_window)
+                except asyncio.TimeoutError:
+                    pass
+
+            delay = limiter.time_until_available()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            batch = self._take_batch(channel)
+            if not batch:
+                continue
+
+            limiter.consume()
+            # Shielded so stopping the worker mid-send does not lose the batch
+            send = asyncio.ensure_future(self._send(channel, batch))
+            self._in_flight.add(send)
+            send.add_done_callback(self._in_flight.discard)
+            await asyncio.shield(send)
+
+    def _take_batch(self, channel: Any) -> List[Any]:
+        buffer = self._buffers.get(channel, [])
+        batch = buffer[:self.max_batch_size]
+        del buffer[:self.max_batch_size]
+
+        if len(buffer) < self.max_batch_size and channel in self._full:
+            self._full[channel].clear()
+        if not buffer and channel in self._pending:
+            self._pending[channel].clear()
+        return batch
+
+    async def _send(self, channel: Any, batch: List[Any]):
+        try:
+            await self.send_batch(channel, batch)
+            self.batches_sent += 1
+        except Exception as e:
+            logger.error(f"Failed to deliver notification batch via {channel}: {e}")
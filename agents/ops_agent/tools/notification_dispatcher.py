@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Notification Dispatcher - Per-channel outboxes with concurrent delivery
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = {
+    'email': 4,
+    'slack': 10,
+    'webhook': 20,
+}
+
+
+class NotificationDispatcher:
+    """
+    Delivers notifications through per-channel outboxes
+
+    Every channel has its own bounded queue drained by a fixed number of
+    workers, so a slow SMTP server only backs up the email outbox while
+    Slack and webhook deliveries keep flowing. Each delivery is bounded by a
+    timeout; transport-level pooling and retries live in NotificationService.
+    """
+
+    def __init__(
+        self,
+        service: NotificationService,
+        concurrency: Optional[Dict[str, int]] = None,
+        timeout: float = 15.0,
+        max_outbox_size: int = 10_000
+    ):
+        """
+        Initialize Notification Dispatcher
+
+        Args:
+            service: NotificationService used for delivery
+            concurrency: Workers per channel (defaults to DEFAULT_CONCURRENCY)
+            timeout: Seconds allowed per delivery
+            max_outbox_size: Queued notifications per channel before rejecting
+        """
+        self.service = service
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.timeout = timeout
+        self.max_outbox_size = max_outbox_size
+
+        self._outboxes: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, List[asyncio.Task]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def submit(self, channel: str, message: str, **kwargs) -> asyncio.Future:
+        """
+        Queue a notification and return a future for its result
+
+        Args:
+            channel: Channel type (email, slack, webhook)
+            message: Message content
+            **kwargs: Channel-specific parameters for NotificationService.send_notification
+
+        Returns:
+            Future resolving to the send result dict
+        """
+        future = asyncio.get_running_loop().create_future()
+        outbox = self._outbox(channel)
+        try:
+            outbox.put_nowait((message, kwargs, future))
+        except asyncio.QueueFull:
+            self._count(channel, 'rejected')
+            future.set_result({
+                'success': False,
+                'error': f'{channel} outbox is full'
+            })
+        return future
+
+    async def send(self, channel: str, message: str, **kwargs) -> Dict[str, Any]:
+        """Queue a notification and wait for its result"""
+        return await self.submit(channel, message, **kwargs)
+
+    async def send_many(
+        self,
+        notifications: Iterable[Tuple[str, str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Send many notifications concurrently
+
+        Args:
+            notifications: Iterable of (channel, message, kwargs) tuples
+
+        Returns:
+            Results in the same order as the input
+        """
+        futures = [
+            self.submit(channel, message, **kwargs)
+            for channel, message, kwargs in notifications
+        ]
+        return list(await asyncio.gather(*futures))
+
+    def pending(self) -> Dict[str, int]:
+        """Queued notifications per channel"""
+        return {channel: outbox.qsize() for channel, outbox in self._outboxes.items()}
+
+    async def drain(self):
+        """Wait until every queued notification has been delivered"""
+        await asyncio.gather(*(outbox.join() for outbox in self._outboxes.values()))
+
+    async def close(self):
+        """Deliver what is queued, then stop the workers"""
+        await self.drain()
+        workers = [task for tasks in self._workers.values() for task in tasks]
+        self._workers.clear()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def _outbox(self, channel: str) -> asyncio.Queue:
+        outbox = self._outboxes.get(channel)
+        if outbox is None:
+            outbox = asyncio.Queue(maxsize=self.max_outbox_size)
+            self._outboxes[channel] = outbox
+
+        workers = self._workers.setdefault(channel, [])
+        workers[:] = [task for task in workers if not task.done()]
+        loop = asyncio.get_running_loop()
+        while len(workers) < self.concurrency.get(channel, 1):
+            workers.append(loop.create_task(self._run(channel, outbox)))
+        return outbox
+
+    async def _run(self, channel: str, outbox: asyncio.Queue):
+        while True:
+            message, kwargs, future = await outbox.get()
+            try:
+                result = await asyncio.wait_for(
+                    self.service.send_notification(channel=channel, message=message, **kwargs),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Notification via {channel} timed out after {self.timeout}s")
+                result = {
+                    'success': False,
+                    'error': f'Timed out after {self.timeout}s'
+                }
+            except Exception as e:
+                logger.error(f"Notification via {channel} failed: {e}")
+                result = {
+                    'success': False,
+                    'error': str(e)
+                }
+            finally:
+                outbox.task_done()
+
+            self._count(channel, 'sent' if result.get('success') else 'failed')
+            if not future.done():
+                future.set_result(result)
+
+    def _count(self, channel: str, key: str):
+        counters = self.stats.setdefault(channel, {'sent': 0, 'failed': 0, 'rejected': 0})
+        counters[key] += 1
@@ -2,12 +2,16 @@
 """
 Notification Service - Email, Slack, and Webhook notifications
 """
+import asyncio
 import logging
+import random
+import threading
+import time
 import aiohttp
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 
 logging.basicConfig(level=logging.INFO)
@@ -22,9 +26,114 @@ class NotificationChannel(Enum):
     SMS = "sms"
 
 
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP connections reused across sends"""
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        size: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0
+    ):
+        """
+        Initialize SMTP Connection Pool
+        
+        Args:
+            host: SMTP server host
+            port: SMTP server port
+            user: SMTP username
+            password: SMTP password
+            size: Maximum concurrent connections
+            idle_timeout: Seconds an idle connection is kept before being replaced
+            timeout: Socket timeout for SMTP operations
+        """
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._semaphore = asyncio.Semaphore(size)
+    
+    async def send_message(self, msg: MIMEMultipart):
+        """Send a message on a pooled connection without blocking the event loop"""
+        async with self._semaphore:
+            await asyncio.to_thread(self._send_blocking, msg)
+    
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
+    
+    def _send_blocking(self, msg: MIMEMultipart):
+        server = self._checkout()
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._quit(server)
+            server = self._connect()
+            server.send_message(msg)
+        except Exception:
+            self._quit(server)
+            raise
+        self._checkin(server)
+    
+    def _checkout(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        stale = []
+        server = None
+        with self._lock:
+            while self._idle:
+                candidate, last_used = self._idle.pop()
+                if now - last_used < self.idle_timeout:
+                    server = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            self._quit(candidate)
+        return server or self._connect()
+    
+    def _checkin(self, server: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+    
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            self._quit(server)
+            raise
+        self.connections_opened += 1
+        return server
+    
+    @staticmethod
+    def _quit(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+
 class NotificationService:
     """Service for sending notifications through various channels"""
     
+    MAILTRAP_API_URL = "https://send.api.mailtrap.io/api/send"
+    
     def __init__(
         self,
         mailtrap_token: Optional[str] = None,
@@ -32,7 +141,14 @@ class NotificationService:
         smtp_host: Optional[str] = None,
         smtp_port: Optional[int] = None,
         smtp_user: Optional[str] = None,
-        smtp_password: Optional[str] = None
+        smtp_password: Optional[str] = None,
+        request_timeout: float = 10.0,
+        max_connections: int = 100,
+        max_connections_per_host: int = 20,
+        max_retries: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 5.0,
+        smtp_pool_size: int = 4
     ):
         """
         Initialize Notification Service
@@ -44,6 +160,13 @@ class NotificationService:
             smtp_port: SMTP server port
             smtp_user: SMTP username
             smtp_password: SMTP password
+            request_timeout: Total timeout per HTTP request, in seconds
+            max_connections: Size of the shared HTTP connection pool
+            max_connections_per_host: Pooled HTTP connections per host
+            max_retries: Retries for transient HTTP failures (5xx, 429, network errors)
+            retry_base_delay: Base delay for exponential backoff with full jitter
+            retry_max_delay: Maximum backoff delay
+            smtp_pool_size: Maximum concurrent SMTP connections
         """
         self.mailtrap_token = mailtrap_token
         self.slack_webhook_url = slack_webhook_url
@@ -51,6 +174,88 @@ class NotificationService:
         self.smtp_port = smtp_port or 587
         self.smtp_user = smtp_user
         self.smtp_password = smtp_password
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.smtp_pool_size = smtp_pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._smtp_pool: Optional[SMTPConnectionPool] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use in this event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    def _get_smtp_pool(self) -> SMTPConnectionPool:
+        """Return the SMTP connection pool, creating it on first use"""
+        if self._smtp_pool is None:
+            self._smtp_pool = SMTPConnectionPool(
+                host=self.smtp_host,
+                port=self.smtp_port,
+                user=self.smtp_user,
+                password=self.smtp_password,
+                size=self.smtp_pool_size,
+                timeout=self.request_timeout
+            )
+        return self._smtp_pool
+    
+    async def close(self):
+        """Close pooled HTTP and SMTP connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._smtp_pool is not None:
+            await asyncio.to_thread(self._smtp_pool.close)
+            self._smtp_pool = None
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+    
+    async def _post(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, str]:
+        """
+        POST JSON on the shared session, retrying transient failures
+        
+        Returns:
+            Tuple of (status code, response text for error statuses)
+        """
+        session = await self._get_session()
+        attempt = 0
+        while True:
+            try:
+                async with session.post(url, json=payload, headers=headers) as response:
+                    status = response.status
+                    error_text = await response.text() if status >= 400 else ''
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    return status, error_text
+            
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
     
     async def send_email_mailtrap(
         self,
@@ -78,7 +283,6 @@ class NotificationService:
             }
         
         try:
-            url = "https://send.api.mailtrap.io/api/send"
             headers = {
                 "Authorization": f"Bearer {self.mailtrap_token}",
                 "Content-Type": "application/json"
@@ -92,22 +296,20 @@ class NotificationService:
                 "category": "ops-agent-alerts"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        logger.info(f"Email sent successfully to {to}")
-                        return {
-                            'success': True,
-                            'message': 'Email sent via Mailtrap'
-                        }
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Mailtrap API error: {response.status} - {error_text}")
-                        return {
-                            'success': False,
-                            'error': f'Mailtrap API error: {response.status}',
-                            'details': error_text
-                        }
+            status, error_text = await self._post(self.MAILTRAP_API_URL, payload, headers)
+            if status == 200:
+                logger.info(f"Email sent successfully to {to}")
+                return {
+                    'success': True,
+                    'message': 'Email sent via Mailtrap'
+                }
+            else:
+                logger.error(f"Mailtrap API error: {status} - {error_text}")
+                return {
+                    'success': False,
+                    'error': f'Mailtrap API error: {status}',
+                    'details': error_text
+                }
         
         except Exception as e:
             logger.error(f"Failed to send email via Mailtrap: {e}")
@@ -148,10 +350,7 @@ class NotificationService:
             msg['Subject'] = subject
             msg.attach(MIMEText(body, 'plain'))
             
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            await self._get_smtp_pool().send_message(msg)
             
             logger.info(f"Email sent successfully to {to} via SMTP")
             return {
@@ -201,22 +400,20 @@ class NotificationService:
             if channel:
                 payload["channel"] = channel
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.slack_webhook_url, json=payload) as response:
-                    if response.status == 200:
-                        logger.info("Slack message sent successfully")
-                        return {
-                            'success': True,
-                            'message': 'Slack message sent'
-                        }
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Slack API error: {response.status} - {error_text}")
-                        return {
-                            'success': False,
-                            'error': f'Slack API error: {response.status}',
-                            'details': error_text
-                        }
+            status, error_text = await self._post(self.slack_webhook_url, payload)
+            if status == 200:
+                logger.info("Slack message sent successfully")
+                return {
+                    'success': True,
+                    'message': 'Slack message sent'
+                }
+            else:
+                logger.error(f"Slack API error: {status} - {error_text}")
+                return {
+                    'success': False,
+                    'error': f'Slack API error: {status}',
+                    'details': error_text
+                }
         
         except Exception as e:
             logger.error(f"Failed to send Slack message: {e}")
@@ -245,23 +442,21 @@ class NotificationService:
         try:
             request_headers = headers or {"Content-Type": "application/json"}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=request_headers) as response:
-                    if response.status < 400:
-                        logger.info(f"Webhook sent successfully to {url}")
-                        return {
-                            'success': True,
-                            'message': 'Webhook sent',
-                            'status_code': response.status
-                        }
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Webhook error: {response.status} - {error_text}")
-                        return {
-                            'success': False,
-                            'error': f'Webhook error: {response.status}',
-                            'details': error_text
-                        }
+            status, error_text = await self._post(url, payload, request_headers)
+            if status < 400:
+                logger.info(f"Webhook sent successfully to {url}")
+                return {
+                    'success': True,
+                    'message': 'Webhook sent',
+                    'status_code': status
+                }
+            else:
+                logger.error(f"Webhook error: {status} - {error_text}")
+                return {
+                    'success': False,
+                    'error': f'Webhook error: {status}',
+                    'details': error_text
+                }
         
         except Exception as e:
             logger.error(f"Failed to send webhook: {e}")
@@ -346,6 +541,47 @@ class NotificationService:
                 'error': str(e)
             }
 
+    
+    async def send_to_channels(
+        self,
+        channels: List[str],
+        message: str,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send the same notification to several channels concurrently
+        
+        A slow or hung channel does not delay the others; each channel is
+        bounded by its own timeout.
+        
+        Args:
+            channels: Channel types (email, slack, webhook)
+            message: Message content
+            timeout: Per-channel timeout in seconds (defaults to request_timeout)
+            **kwargs: Channel-specific parameters, passed to every channel
+        
+        Returns:
+            Dict mapping channel to its result
+        """
+        timeout = timeout or self.request_timeout
+        
+        async def send_one(channel: str) -> Dict[str, Any]:
+            try:
+                return await asyncio.wait_for(
+                    self.send_notification(channel=channel, message=message, **kwargs),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Notification via {channel} timed out after {timeout}s")
+                return {
+                    'success': False,
+                    'error': f'Timed out after {timeout}s'
+                }
+        
+        results = await asyncio.gather(*(send_one(channel) for channel in channels))
+        return dict(zip(channels, results))
+
 
 def create_notification_service(
     mailtrap_token: Optional[str] = None,
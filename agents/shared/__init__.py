@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Shared Agent Utilities
+Building blocks used by more than one agent
+"""
+from .error_fingerprint import (
+    ErrorFingerprinter,
+    Fingerprint,
+    PatternSet,
+    extract_error_type,
+    get_fingerprinter,
+    mask_message
+)
+
+__all__ = [
+    'ErrorFingerprinter',
+    'Fingerprint',
+    'PatternSet',
+    'extract_error_type',
+    'get_fingerprinter',
+    'mask_message'
+]
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Error Fingerprinting - Precompiled error classification and message grouping
+
+Shared by the Ops Agent log analysis and the Dev Agent error diagnosis so
+both group and classify errors the same way.
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Shapes of variable tokens, tried in order against a whole token with
+# surrounding punctuation stripped. More specific shapes (URL, UUID, IP) come
+# before the generic ones (number, hex, path, id) that would also match.
+_TOKEN_KINDS: Tuple[Tuple[str, str], ...] = (
+    ('url', r'[a-zA-Z][a-zA-Z0-9+.-]*://\S+'),
+    ('email', r'[\w.+-]+@[\w-]+\.[\w.-]+'),
+    ('uuid', r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'),
+    ('ip', r'\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?'),
+    ('num', r'[-+]?\d+(?:[.,]\d+)*(?:ms|s|m|h|kb|mb|gb|%)?'),
+    ('hex', r'0x[0-9a-fA-F]+|(?=[a-fA-F]*\d)[0-9a-fA-F]{8,}'),
+    ('path', r'(?:[A-Za-z]:\\|~?/|\.{1,2}/)\S*|\w[\w.-]*(?:[/\\][\w.-]+)+'),
+    ('id', r'(?=[A-Za-z_-]*\d)(?=[\w-]*[A-Za-z])[\w-]{8,}'),
+)
+
+_TOKEN_KIND_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in _TOKEN_KINDS))
+
+# Only whitespace-delimited tokens containing a digit, slash, backslash or
+# "@" can be variable, so the message is scanned once for those and every
+# other token is left untouched without further regex work.
+_CANDIDATE_RE = re.compile(r'(?<!\S)[^\s\d/\\@]*[\d/\\@]\S*')
+_INNER_NUMBER_RE = re.compile(r'(?<![A-Za-z])\d+(?![A-Za-z])')
+_QUOTED_RE = re.compile(r'(?<!\w)(?:\'[^\'\n]*\'|"[^"\n]*")(?!\w)')
+
+_LEADING_PUNCTUATION = '([{<'
+_TRAILING_PUNCTUATION = ')]}>,;:.!?'
+
+# Error type heads; the earliest match in the message wins
+_ERROR_TYPE_RE = re.compile(
+    r'\b(?P<exc>\w+(?:Error|Exception))\b'
+    r'|\b(?P<failed>Failed to \w+)'
+    r'|\b(?P<cannot>Cannot \w+)'
+)
+
+_TOKEN_CACHE_SIZE = 50_000
+_token_cache: Dict[str, str] = {}
+
+
+def _mask_token(token: str) -> str:
+    core = token.lstrip(_LEADING_PUNCTUATION)
+    lead = token[:len(token) - len(core)]
+    stripped = core.rstrip(_TRAILING_PUNCTUATION)
+    trail = core[len(stripped):]
+
+    match = _TOKEN_KIND_RE.fullmatch(stripped)
+    if match is not None:
+        return f'{lead}<{match.lastgroup}>{trail}'
+    return _INNER_NUMBER_RE.sub('<num>', token)
+
+
+def _replace_candidate(match: re.Match) -> str:
+    token = match.group()
+    masked = _token_cache.get(token)
+    if masked is None:
+        masked = _mask_token(token)
+        if len(_token_cache) >= _TOKEN_CACHE_SIZE:
+            _token_cache.clear()
+        _token_cache[token] = masked
+    return masked
+
+
+def mask_message(message: str) -> str:
+    """Replace variable parts (ids, numbers, paths, quoted values) with placeholders"""
+    if "'" in message or '"' in message:
+        message = _QUOTED_RE.sub('<str>', message)
+    return ' '.join(_CANDIDATE_RE.sub(_replace_candidate, message).split())
+
+
+def extract_error_type(message: str) -> Optional[str]:
+    """Return the exception name or failure phrase heading a message, if any"""
+    match = _ERROR_TYPE_RE.search(message)
+    return match.group(match.lastgroup) if match else None
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Stable identity of an error message with its variable parts removed"""
+    key: str
+    error_type: Optional[str]
+    template: str
+
+
+class ErrorFingerprinter:
+    """
+    Computes error fingerprints with a bounded LRU cache
+
+    Repeated messages (the common case in logs) are served from the cache;
+    new messages cost a single scan for variable-looking tokens, with the
+    classification of each distinct token cached as well.
+    """
+
+    def __init__(self, cache_size: int = 10_000, max_template_length: int = 200):
+        self.cache_size = cache_size
+        self.max_template_length = max_template_length
+        self._cache: "OrderedDict[str, Fingerprint]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, message: str) -> Fingerprint:
+        """Return the fingerprint for a message"""
+        cached = self._cache.get(message)
+        if cached is not None:
+            self._cache.move_to_end(message)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        template = mask_message(message)[:self.max_template_length]
+        result = Fingerprint(
+            key=hashlib.blake2b(template.encode('utf-8'), digest_size=8).hexdigest(),
+            error_type=extract_error_type(message),
+            template=template,
+        )
+        self._cache[message] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def group(self, messages: List[str]) -> Dict[str, List[str]]:
+        """Group messages by fingerprint template, preserving first-seen order"""
+        groups: Dict[str, List[str]] = {}
+        for message in messages:
+            groups.setdefault(self.fingerprint(message).template, []).append(message)
+        return groups
+
+    def clear_cache(self):
+        """Drop all cached fingerprints"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class PatternSet:
+    """
+    A named set of regexes compiled once and matched together
+
+    ``matches`` returns every rule that matches, in declaration order, the
+    same as searching each pattern in turn. A combined alternation of all
+    patterns is used as a prefilter so text matching none of the rules costs
+    a single scan, and results are cached per input text.
+    """
+
+    def __init__(self, rules: Dict[str, str], flags: int = 0, cache_size: int = 4096):
+        self.names = list(rules)
+        self._compiled = [(name, re.compile(pattern, flags)) for name, pattern in rules.items()]
+        self._any = re.compile('|'.join(f'(?:{pattern})' for pattern in rules.values()), flags)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+
+    def matches(self, text: str) -> Tuple[str, ...]:
+        """Return names of all rules matching text"""
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+
+        if self._any.search(text) is None:
+            result: Tuple[str, ...] = ()
+        else:
+            result = tuple(name for name, regex in self._compiled if regex.search(text))
+
+        self._cache[text] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+
+_default_fingerprinter: Optional[ErrorFingerprinter] = None
+
+
+def get_fingerprinter() -> ErrorFingerprinter:
+    """Return the process-wide fingerprinter"""
+    global _default_fingerprinter
+    if _default_fingerprinter is None:
+        _default_fingerprinter = ErrorFingerprinter()
+    return _default_fingerprinter
@@ -0,0 +1 @@
+"""Shared Agent Utilities Tests"""
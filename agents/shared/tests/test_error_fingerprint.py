@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for Error Fingerprinting
+"""
+import re
+import time
+import pytest
+
+from agents.shared.error_fingerprint import (
+    ErrorFingerprinter,
+    PatternSet,
+    extract_error_type,
+    mask_message
+)
+
+
+class TestMaskMessage:
+    """Tests for variable-part masking"""
+
+    @pytest.mark.parametrize("message,expected", [
+        ("KeyError: 'user_id'", "KeyError: <str>"),
+        ("Failed to connect to db-01 at 10.0.0.5:5432 after 3 retries",
+         "Failed to connect to db-<num> at <ip> after <num> retries"),
+        ("No such file or directory: /var/log/app/x.log", "No such file or directory: <path>"),
+        ("Request 3fa85f64-5717-4562-b3fc-2c963f66afa6 timed out after 30.5s",
+         "Request <uuid> timed out after <num>"),
+        ("GET https://api.example.com/v1/users/42 returned 503", "GET <url> returned <num>"),
+        ("Cannot allocate 0x7ffe1234 for req_8f3a9c12", "Cannot allocate <hex> for <id>"),
+        ("notify alice@example.com failed", "notify <email> failed"),
+        ("utf8 codec can't decode byte 0xff", "utf8 codec can't decode byte <hex>"),
+        ("took 1234ms (limit 1000ms).", "took <num> (limit <num>)."),
+    ])
+    def test_masks_variable_parts(self, message, expected):
+        """Test ids, numbers, paths and quoted values are masked"""
+        assert mask_message(message) == expected
+
+    def test_collapses_whitespace(self):
+        """Test whitespace runs are normalized"""
+        assert mask_message("  ValueError:\tbad   input \n") == "ValueError: bad input"
+
+
+class TestExtractErrorType:
+    """Tests for error type extraction"""
+
+    @pytest.mark.parametrize("message,expected", [
+        ("KeyError: 'user_id'", "KeyError"),
+        ("Unhandled RuntimeException in worker", "RuntimeException"),
+        ("Failed to connect to database", "Failed to connect"),
+        ("Cannot open file", "Cannot open"),
+        ("all good", None),
+    ])
+    def test_extract_error_type(self, message, expected):
+        """Test error type heads are recognized"""
+        assert extract_error_type(message) == expected
+
+
+class TestErrorFingerprinter:
+    """Tests for ErrorFingerprinter"""
+
+    def test_same_fingerprint_for_variable_messages(self):
+        """Test messages differing only in variable parts share a fingerprint"""
+        fingerprinter = ErrorFingerprinter()
+
+        first = fingerprinter.fingerprint("Timeout calling /api/orders/123 after 5000ms")
+        second = fingerprinter.fingerprint("Timeout calling /api/orders/456 after 3000ms")
+
+        assert first == second
+        assert len(first.key) == 16
+
+    def test_different_fingerprint_for_different_errors(self):
+        """Test unrelated errors get different fingerprints"""
+        fingerprinter = ErrorFingerprinter()
+
+        assert fingerprinter.fingerprint("KeyError: 'a'").key != fingerprinter.fingerprint("ValueError: 'a'").key
+
+    def test_cache_is_bounded(self):
+        """Test the LRU cache evicts beyond its size and counts hits"""
+        fingerprinter = ErrorFingerprinter(cache_size=2)
+        for message in ["a 1", "b 2", "c 3", "c 3"]:
+            fingerprinter.fingerprint(message)
+
+        assert len(fingerprinter._cache) == 2
+        assert fingerprinter.hits == 1
+        assert fingerprinter.misses == 3
+
+    def test_group(self):
+        """Test grouping messages by template"""
+        groups = ErrorFingerprinter().group(["user 1 not found", "user 2 not found", "disk full"])
+
+        assert groups == {
+            "user <num> not found": ["user 1 not found", "user 2 not found"],
+            "disk full": ["disk full"],
+        }
+
+
+class TestPatternSet:
+    """Tests for PatternSet"""
+
+    def test_matches_equal_individual_search(self):
+        """Test matches returns all matching rules in declaration order"""
+        rules = {
+            'ValueError': r'ValueError:|invalid literal',
+            'KeyError': r'KeyError:',
+            'Conversion': r'could not convert|invalid literal',
+        }
+        pattern_set = PatternSet(rules, flags=re.IGNORECASE)
+
+        for text in ["ValueError: invalid literal for int()", "keyerror: x", "nothing here"]:
+            expected = tuple(
+                name for name, pattern in rules.items() if re.search(pattern, text, re.IGNORECASE)
+            )
+            assert pattern_set.matches(text) == expected
+
+
+def legacy_extract_error_pattern(message):
+    """LogAnalysisTool._extract_error_pattern as it was before fingerprinting"""
+    patterns = [
+        (r'(\w+Error):', r'\1'),
+        (r'(\w+Exception):', r'\1'),
+        (r'Failed to (\w+)', r'Failed to \1'),
+        (r'Cannot (\w+)', r'Cannot \1'),
+    ]
+
+    for pattern, replacement in patterns:
+        match = re.search(pattern, message)
+        if match:
+            return re.sub(pattern, replacement, message)
+
+    return message[:50]
+
+
+def lines_per_second(function, lines):
+    start = time.perf_counter()
+    for line in lines:
+        function(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+# Pure-Python fingerprinting of mostly unique lines runs at roughly 40k-150k
+# lines/s depending on the machine, so the floor sits well below that range.
+MIN_LINES_PER_SECOND = 20_000
+
+
+@pytest.mark.benchmark
+class TestErrorFingerprinterPerformance:
+    """Performance benchmarks for ErrorFingerprinter"""
+
+    def test_throughput_production_like_stream(self):
+        """Test fingerprinting mostly unique lines keeps an absolute rate and the old grouping's pace"""
+        templates = [
+            "ConnectionError: Connection refused to 10.0.{a}.{b}:5432",
+            "KeyError: 'field_{a}' while handling request {c}",
+            "TimeoutError: upstream https://api.example.com/v1/items/{c} timed out after {b}ms",
+            "Failed to write /var/data/shard{a}/segment-{c}.log: disk quota exceeded",
+            "ValueError: invalid literal for int() with base 10: '{c}'",
+            "Cannot acquire lock for job {c} held by worker-{a}",
+            "Database query failed after 3 retries",
+            "Worker heartbeat missed",
+        ]
+        lines = [
+            templates[i % len(templates)].format(a=i % 16, b=i % 250, c=i)
+            for i in range(20_000)
+        ]
+
+        rate = lines_per_second(ErrorFingerprinter().fingerprint, lines)
+        legacy_rate = lines_per_second(legacy_extract_error_pattern, lines)
+
+        assert rate >= MIN_LINES_PER_SECOND
+        assert rate * 2 >= legacy_rate
@@ -7,8 +7,10 @@ AI 治理模組
 
 import json
 import logging
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
+from urllib.parse import urlsplit
 from dataclasses import dataclass, asdict
 from enum import Enum
 from flask import Flask, request, jsonify, render_template_string
@@ -148,12 +150,182 @@ class PermissionManager:
             return [user.tenant_id] if user.tenant_id else []
         return []
 
+class KeywordMasker:
+    """關鍵字遮罩器（Aho-Corasick 自動機）
+    
+    所有關鍵字編譯成一個自動機，單次掃描即可找出全部命中，
+    每次請求的成本只與內容長度相關，與關鍵字數量無關。
+    命中的字元以 '*' 取代；重疊的命中會合併遮罩。
+    """
+    
+    def __init__(self, keywords: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._match_len: List[int] = [0]  # 在此狀態結束的最長關鍵字長度（含失敗鏈）
+        
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_failure_links()
+    
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+    
+    def _add(self, keyword: str):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._match_len.append(0)
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._match_len[state] = max(self._match_len[state], len(keyword))
+    
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._match_len[child] = max(self._match_len[child], self._match_len[self._fail[child]])
+                queue.append(child)
+    
+    def mask(self, content: str) -> str:
+        """遮罩內容中所有關鍵字"""
+        goto, fail, match_len = self._goto, self._fail, self._match_len
+        spans: List[List[int]] = []
+        state = 0
+        for i, ch in enumerate(content):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            length = match_len[state]
+            if length:
+                start = i - length + 1
+                while spans and start <= spans[-1][1]:
+                    start = min(start, spans.pop()[0])
+                spans.append([start, i + 1])
+        
+        if not spans:
+            return content
+        
+        parts = []
+        last = 0
+        for start, end in spans:
+            parts.append(content[last:start])
+            parts.append('*' * (end - start))
+            last = end
+        parts.append(content[last:])
+        return ''.join(parts)
+
+class DomainSuffixIndex:
+    """網域後綴索引
+    
+    'facebook.com' 命中 'facebook.com' 及其所有子網域（如 'm.facebook.com'），
+    但不命中 'notfacebook.com'。查詢成本與主機名稱的層級數相關，與網域數量無關。
+    """
+    
+    def __init__(self):
+        self._owners: Dict[str, Set[int]] = {}
+    
+    def __bool__(self) -> bool:
+        return bool(self._owners)
+    
+    def add(self, domain: str, owner: int):
+        host = self.hostname(domain)
+        if host:
+            self._owners.setdefault(host, set()).add(owner)
+    
+    def lookup(self, url: str) -> Set[int]:
+        """返回後綴命中請求主機名稱的所有 owner"""
+        host = self.hostname(url)
+        owners: Set[int] = set()
+        while host:
+            owners |= self._owners.get(host, set())
+            _, _, host = host.partition('.')
+        return owners
+    
+    @staticmethod
+    def hostname(value: str) -> str:
+        """從 URL 或網域取出小寫主機名稱"""
+        value = (value or '').strip()
+        if '://' not in value:
+            value = '//' + value
+        try:
+            host = urlsplit(value).hostname or ''
+        except ValueError:
+            return ''
+        return host.lstrip('*.').rstrip('.')
+
+class CompiledRuleSet:
+    """單一租戶已編譯的治理規則"""
+    
+    def __init__(self, rules: List[GovernanceRule]):
+        self.rules = [rule for rule in rules if rule.enabled]
+        self.blacklist = DomainSuffixIndex()
+        self.whitelist = DomainSuffixIndex()
+        self.usage_limits: List[Tuple[int, float]] = []
+        self.has_content_filter = False
+        keywords: List[str] = []
+        
+        for position, rule in enumerate(self.rules):
+            if rule.rule_type == GovernanceRuleType.BLACKLIST:
+                for domain in rule.config.get('domains', []):
+                    self.blacklist.add(domain, position)
+            elif rule.rule_type == GovernanceRuleType.WHITELIST:
+                for domain in rule.config.get('domains', []):
+                    self.whitelist.add(domain, position)
+            elif rule.rule_type == GovernanceRuleType.CONTENT_FILTER:
+                self.has_content_filter = True
+                keywords.extend(rule.config.get('keywords', []))
+            elif rule.rule_type == GovernanceRuleType.USAGE_LIMIT:
+                self.usage_limits.append((position, rule.config.get('max_tokens', float('inf'))))
+        
+        self.whitelist_positions = {
+            position for position, rule in enumerate(self.rules)
+            if rule.rule_type == GovernanceRuleType.WHITELIST
+        }
+        self.masker = KeywordMasker(keywords)
+    
+    def apply(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """應用已編譯的規則"""
+        result = {
+            'allowed': True,
+            'blocked_by': [],
+            'modified_request': request_data.copy()
+        }
+        
+        blocked = set()
+        url = request_data.get('url', '')
+        if self.blacklist or self.whitelist_positions:
+            blocked |= self.blacklist.lookup(url)
+            blocked |= self.whitelist_positions - self.whitelist.lookup(url)
+        
+        request_tokens = request_data.get('estimated_tokens', 0)
+        blocked.update(position for position, max_tokens in self.usage_limits if request_tokens > max_tokens)
+        
+        if blocked:
+            result['allowed'] = False
+            result['blocked_by'] = [self.rules[position].name for position in sorted(blocked)]
+        
+        if self.has_content_filter:
+            result['modified_request']['content'] = self.masker.mask(request_data.get('content', ''))
+        
+        return result
+
 class GovernanceRuleManager:
     """治理規則管理器"""
     
     def __init__(self):
         self.rules: Dict[str, GovernanceRule] = {}
         self.tenant_rules: Dict[str, List[str]] = {}  # tenant_id -> rule_ids
+        self._compiled: Dict[str, CompiledRuleSet] = {}  # tenant_id -> 已編譯規則
     
     def create_rule(self, tenant_id: str, rule_type: GovernanceRuleType, name: str, 
                    description: str, config: Dict[str, Any]) -> GovernanceRule:
@@ -172,6 +344,7 @@ class GovernanceRuleManager:
         if tenant_id not in self.tenant_rules:
             self.tenant_rules[tenant_id] = []
         self.tenant_rules[tenant_id].append(rule_id)
+        self.invalidate_compiled_rules(tenant_id)
         
         logger.info(f"Created governance rule: {name} for tenant {tenant_id}")
         return rule
@@ -187,6 +360,8 @@ class GovernanceRuleManager:
                 setattr(rule, key, value)
         
         rule.updated_at = datetime.now()
+        for tenant_id in self._tenants_with_rule(rule_id):
+            self.invalidate_compiled_rules(tenant_id)
         logger.info(f"Updated governance rule: {rule_id}")
         return True
     
@@ -198,6 +373,7 @@ class GovernanceRuleManager:
         for tenant_id, rule_ids in self.tenant_rules.items():
             if rule_id in rule_ids:
                 rule_ids.remove(rule_id)
+                self.invalidate_compiled_rules(tenant_id)
         
         del self.rules[rule_id]
         logger.info(f"Deleted governance rule: {rule_id}")
@@ -222,65 +398,25 @@ class GovernanceRuleManager:
     
     def apply_rules(self, tenant_id: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """應用治理規則"""
-        rules = self.get_tenant_rules(tenant_id)
-        result = {
-            'allowed': True,
-            'blocked_by': [],
-            'modified_request': request_data.copy()
-        }
-        
-        for rule in rules:
-            if not rule.enabled:
-                continue
-            
-            if rule.rule_type == GovernanceRuleType.BLACKLIST:
-                if self._check_blacklist(rule.config, request_data):
-                    result['allowed'] = False
-                    result['blocked_by'].append(rule.name)
-            
-            elif rule.rule_type == GovernanceRuleType.WHITELIST:
-                if not self._check_whitelist(rule.config, request_data):
-                    result['allowed'] = False
-                    result['blocked_by'].append(rule.name)
-            
-            elif rule.rule_type == GovernanceRuleType.CONTENT_FILTER:
-                result['modified_request'] = self._apply_content_filter(rule.config, result['modified_request'])
-            
-            elif rule.rule_type == GovernanceRuleType.USAGE_LIMIT:
-                if not self._check_usage_limit(rule.config, request_data):
-                    result['allowed'] = False
-                    result['blocked_by'].append(rule.name)
-        
-        return result
+        return self.get_compiled_rules(tenant_id).apply(request_data)
     
-    def _check_blacklist(self, config: Dict[str, Any], request_data: Dict[str, Any]) -> bool:
-        """檢查黑名單"""
-        domains = config.get('domains', [])
-        request_url = request_data.get('url', '')
-        return any(domain in request_url for domain in domains)
-    
-    def _check_whitelist(self, config: Dict[str, Any], request_data: Dict[str, Any]) -> bool:
-        """檢查白名單"""
-        domains = config.get('domains', [])
-        request_url = request_data.get('url', '')
-        return any(domain in request_url for domain in domains)
-    
-    def _apply_content_filter(self, config: Dict[str, Any], request_data: Dict[str, Any]) -> Dict[str, Any]:
-        """應用內容過濾"""
-        keywords = config.get('keywords', [])
-        content = request_data.get('content', '')
-        
-        for keyword in keywords:
-            content = content.replace(keyword, '*' * len(keyword))
-        
-        request_data['content'] = content
-        return request_data
+    def get_compiled_rules(self, tenant_id: str) -> CompiledRuleSet:
+        """獲取租戶已編譯的規則（按租戶快取）"""
+        compiled = self._compiled.get(tenant_id)
+        if compiled is None:
+            compiled = CompiledRuleSet(self.get_tenant_rules(tenant_id))
+            self._compiled[tenant_id] = compiled
+        return compiled
     
-    def _check_usage_limit(self, config: Dict[str, Any], request_data: Dict[str, Any]) -> bool:
-        """檢查使用量限制"""
-        max_tokens = config.get('max_tokens', float('inf'))
-        request_tokens = request_data.get('estimated_tokens', 0)
-        return request_tokens <= max_tokens
+    def invalidate_compiled_rules(self, tenant_id: Optional[str] = None):
+        """使租戶（或全部）已編譯的規則失效"""
+        if tenant_id is None:
+            self._compiled.clear()
+        else:
+            self._compiled.pop(tenant_id, None)
+    
+    def _tenants_with_rule(self, rule_id: str) -> List[str]:
+        return [tenant_id for tenant_id, rule_ids in self.tenant_rules.items() if rule_id in rule_ids]
 
 class AIGovernanceModule:
     """AI 治理模組主類"""
@@ -60,6 +60,12 @@ def post_fork(server, worker):
     """Called just after a worker has been forked."""
     server.log.info(f"Worker spawned (pid: {worker.pid})")
 
+def post_worker_init(worker):
+    """Called just after a worker has initialized the application."""
+    from src.routes.faq import start_cache_invalidation_listener
+    start_cache_invalidation_listener()
+    worker.log.info(f"FAQ cache invalidation listener started (pid: {worker.pid})")
+
 def pre_exec(server):
     """Called just before a new master process is forked."""
     server.log.info("Forking new master process")
@@ -68,6 +74,11 @@ def worker_int(worker):
     """Called just after a worker received INT or QUIT signal."""
     worker.log.info(f"Worker {worker.pid} received INT or QUIT signal")
 
+def worker_exit(server, worker):
+    """Called just after a worker has been exited, in the worker process."""
+    from src.utils.async_runtime import shutdown_async_runtime
+    shutdown_async_runtime()
+
 def worker_abort(worker):
     """Called when a worker received SIGABRT signal."""
     worker.log.info(f"Worker {worker.pid} received SIGABRT signal")
@@ -1,7 +1,6 @@
 import os
 import sys
 import datetime
-import asyncio
 import re
 import logging
 
@@ -22,12 +21,14 @@ from src.routes.faq import bp as faq_bp
 from src.routes.vectors import bp as vectors_bp
 from src.routes.governance import bp as governance_bp
 
-from flask import Flask, send_from_directory, jsonify, request, send_file, Response
+from flask import Flask, send_from_directory, jsonify, request, send_file, Response, stream_with_context
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.dashboard import dashboard_bp
 from src.middleware.auth_middleware import jwt_required, admin_required, analyst_required
+from src.utils.async_runtime import run_async
+from src.utils.health_prober import HealthProber
 from flask_cors import CORS
 import sys
 import os
@@ -85,6 +86,7 @@ try:
     from src.persistence.state_manager import PersistentStateManager
     from src.services.monitoring_dashboard import monitoring_dashboard
     from src.services.report_generator import report_generator
+    from src.services.report_jobs import get_report_jobs
     from src.utils.env_schema_validator import validate_environment
     from src.routes.mock_api import mock_api
     BACKEND_SERVICES_AVAILABLE = True
@@ -214,6 +216,23 @@ def get_health_payload():
             "timestamp": datetime.datetime.now().isoformat()
         }
 
+def _probe_health():
+    with app.app_context():
+        return get_health_payload()
+
+health_prober = HealthProber(
+    _probe_health,
+    interval=float(os.environ.get('HEALTH_PROBE_INTERVAL', '10')),
+    stale_after=float(os.environ.get('HEALTH_STALE_AFTER', '30'))
+)
+
+def get_cached_health_payload():
+    """Latest background probe result plus staleness metadata"""
+    snapshot = health_prober.snapshot()
+    payload = dict(snapshot.payload)
+    payload.update(snapshot.metadata())
+    return payload, snapshot
+
 @app.route('/health', methods=['GET', 'HEAD'])
 @app.route('/healthz', methods=['GET', 'HEAD'])
 @app.route('/api/health', methods=['GET', 'HEAD'])
@@ -223,12 +242,36 @@ def health_check():
     
     Supports both GET and HEAD methods for compatibility with various
     health check systems (e.g., Render, Kubernetes, load balancers).
+    Served from the background health prober's snapshot.
     """
-    health_payload = get_health_payload()
+    health_payload, _ = get_cached_health_payload()
     if health_payload.get("status") == "unhealthy":
         return jsonify(health_payload), 500
     return jsonify(health_payload)
 
+@app.route('/livez', methods=['GET', 'HEAD'])
+def liveness_check():
+    """Liveness probe: the process is up and serving, no dependency checks"""
+    return jsonify({"status": "alive"})
+
+@app.route('/readyz', methods=['GET', 'HEAD'])
+def readiness_check():
+    """Readiness probe from the cached dependency snapshot
+    
+    503 when the last probe was not healthy or is older than HEALTH_STALE_AFTER.
+    """
+    health_payload, snapshot = get_cached_health_payload()
+    ready = health_payload.get("status") == "healthy" and not snapshot.stale
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "checks": {
+            "database": health_payload.get("database"),
+            "redis": health_payload.get("redis", {}).get("status")
+        },
+        **snapshot.metadata()
+    }
+    return jsonify(body), 200 if ready else 503
+
 db_dir = os.path.join(os.path.dirname(__file__), 'database')
 os.makedirs(db_dir, exist_ok=True)
 
@@ -396,11 +439,29 @@ def get_monitoring_dashboard():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/phase7/monitoring/series')
+def get_monitoring_series():
+    """Get downsampled metric history for charts"""
+    try:
+        if not BACKEND_SERVICES_AVAILABLE:
+            return jsonify({"error": "Backend services not available"}), 500
+        
+        hours = float(request.args.get('hours', 1))
+        points = min(int(request.args.get('points', 360)), 2000)
+        
+        return jsonify(monitoring_dashboard.get_metric_series(hours=hours, max_points=points))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/phase7/monitoring/metrics')
 def get_resilience_metrics():
-    """Get resilience pattern metrics"""
+    """Get resilience pattern metrics (?format=prometheus for breaker and bulkhead counters as text)"""
     try:
         from resilience_patterns import resilience_manager
+        if request.args.get('format') == 'prometheus':
+            return Response(resilience_manager.export_prometheus(), mimetype='text/plain; version=0.0.4')
+        
         persistent_state_manager = PersistentStateManager()
         from saga_orchestrator import saga_orchestrator
         
@@ -563,24 +624,84 @@ def generate_report():
             return send_file(pdf_path, as_attachment=True, 
                            download_name=f'report_{report_type}_{time_range}.pdf')
         elif format_type == 'csv':
-            csv_data = report_generator.export_csv(report_data)
-            return Response(csv_data, mimetype='text/csv', 
+            return Response(stream_with_context(report_generator.iter_csv(report_data)), mimetype='text/csv', 
                           headers={'Content-Disposition': f'attachment; filename=report_{report_type}_{time_range}.csv'})
         else:
-            from dataclasses import asdict
-            report_dict = asdict(report_data)
-            
-            def serialize_datetime(obj):
-                if isinstance(obj, datetime.datetime):
-                    return obj.isoformat()
-                elif isinstance(obj, dict):
-                    return {k: serialize_datetime(v) for k, v in obj.items()}
-                elif isinstance(obj, list):
-                    return [serialize_datetime(item) for item in obj]
-                return obj
+            return Response(report_data.to_json(), mimetype='application/json')
             
-            report_dict = serialize_datetime(report_dict)
-            return jsonify(report_dict)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/jobs', methods=['POST'])
+def create_report_job():
+    """Queue report generation; returns the cached result's job when one exists"""
+    try:
+        if not BACKEND_SERVICES_AVAILABLE:
+            return jsonify({"error": "Backend services not available"}), 500
+        
+        data = request.get_json(silent=True) or {}
+        report_type = data.get('type', 'performance')
+        time_range = data.get('time_range', '24h')
+        
+        try:
+            job = get_report_jobs().submit(report_type, time_range)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        status = get_report_jobs().status(job)
+        status['links'] = {
+            'status': f'/api/reports/jobs/{job.id}',
+            'download': f'/api/reports/jobs/{job.id}/download'
+        }
+        return jsonify(status), 200 if status['status'] == 'finished' else 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/jobs/<job_id>')
+def get_report_job(job_id):
+    """Get report job status"""
+    try:
+        if not BACKEND_SERVICES_AVAILABLE:
+            return jsonify({"error": "Backend services not available"}), 500
+        
+        job = get_report_jobs().fetch(job_id)
+        if job is None:
+            return jsonify({'error': 'Report job not found'}), 404
+        return jsonify(get_report_jobs().status(job))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/jobs/<job_id>/download')
+def download_report_job(job_id):
+    """Download a finished report as JSON, streamed CSV, or PDF (with range support)"""
+    try:
+        if not BACKEND_SERVICES_AVAILABLE:
+            return jsonify({"error": "Backend services not available"}), 500
+        
+        jobs = get_report_jobs()
+        job = jobs.fetch(job_id)
+        if job is None:
+            return jsonify({'error': 'Report job not found'}), 404
+        
+        result = jobs.result_json(job)
+        if result is None:
+            return jsonify(jobs.status(job)), 409
+        
+        report_type, time_range = job.args[:2]
+        format_type = request.args.get('format', 'json')
+        
+        if format_type == 'pdf':
+            pdf_path = jobs.pdf_path(job, report_generator)
+            return send_file(pdf_path, mimetype='application/pdf', as_attachment=True, conditional=True,
+                           download_name=f'report_{report_type}_{time_range}.pdf')
+        elif format_type == 'csv':
+            report_data = jobs.report(job)
+            return Response(stream_with_context(report_generator.iter_csv(report_data)), mimetype='text/csv', 
+                          headers={'Content-Disposition': f'attachment; filename=report_{report_type}_{time_range}.csv'})
+        else:
+            return Response(result, mimetype='application/json')
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -666,11 +787,7 @@ def meta_agent_ooda_cycle():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_meta_agent_ooda_cycle())
-        loop.close()
+        result = run_async(api_meta_agent_ooda_cycle())
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -681,11 +798,7 @@ def create_langgraph_workflow():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_create_langgraph_workflow(request.json or {}))
-        loop.close()
+        result = run_async(api_create_langgraph_workflow(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -696,11 +809,7 @@ def execute_workflow(workflow_id):
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_execute_workflow(workflow_id, request.json or {}))
-        loop.close()
+        result = run_async(api_execute_workflow(workflow_id, request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -711,11 +820,7 @@ def governance_status():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_governance_status())
-        loop.close()
+        result = run_async(api_governance_status())
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -726,11 +831,7 @@ def create_governance_policy():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_create_governance_policy(request.json or {}))
-        loop.close()
+        result = run_async(api_create_governance_policy(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -741,11 +842,7 @@ def create_quicksight_dashboard():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_create_quicksight_dashboard(request.json or {}))
-        loop.close()
+        result = run_async(api_create_quicksight_dashboard(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -756,11 +853,7 @@ def get_dashboard_insights(dashboard_id):
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_get_dashboard_insights(dashboard_id))
-        loop.close()
+        result = run_async(api_get_dashboard_insights(dashboard_id))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -771,11 +864,7 @@ def generate_automated_report():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_generate_automated_report(request.json or {}))
-        loop.close()
+        result = run_async(api_generate_automated_report(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -786,11 +875,7 @@ def create_referral_program():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_create_referral_program(request.json or {}))
-        loop.close()
+        result = run_async(api_create_referral_program(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -801,11 +886,7 @@ def get_referral_analytics(program_id):
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_get_referral_analytics(program_id))
-        loop.close()
+        result = run_async(api_get_referral_analytics(program_id))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -816,11 +897,7 @@ def generate_marketing_content():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_generate_marketing_content(request.json or {}))
-        loop.close()
+        result = run_async(api_generate_marketing_content(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -831,11 +908,7 @@ def get_business_intelligence():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_get_business_intelligence())
-        loop.close()
+        result = run_async(api_get_business_intelligence())
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -848,11 +921,7 @@ def evaluate_access_request():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_evaluate_access_request(request.json or {}))
-        loop.close()
+        result = run_async(api_evaluate_access_request(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -864,11 +933,7 @@ def review_security_event():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_review_security_event(request.json or {}))
-        loop.close()
+        result = run_async(api_review_security_event(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -880,12 +945,8 @@ def submit_hitl_review():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
         data = request.json or {}
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_submit_hitl_review(data))
-        loop.close()
+        result = run_async(api_submit_hitl_review(data))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -897,11 +958,7 @@ def get_pending_reviews():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_get_pending_reviews())
-        loop.close()
+        result = run_async(api_get_pending_reviews())
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -914,11 +971,7 @@ def perform_security_audit():
     if not PHASE_456_AVAILABLE:
         return jsonify({'error': 'Phase 4-6 APIs not available'}), 503
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_perform_security_audit(request.json or {}))
-        loop.close()
+        result = run_async(api_perform_security_audit(request.json or {}))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -932,9 +985,7 @@ def get_pending_security_reviews():
             return jsonify({"error": "Phase 4-6 APIs not available"}), 503
             
         from phase6_security_governance_api import api_get_pending_reviews
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(api_get_pending_reviews())
+        result = run_async(api_get_pending_reviews())
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
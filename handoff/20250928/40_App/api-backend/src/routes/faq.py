@@ -3,19 +3,21 @@ import json
 import hashlib
 import logging
 import ssl
+import threading
 from datetime import datetime, timezone
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from redis import Redis, ConnectionError as RedisConnectionError
 from redis.retry import Retry
 from redis.backoff import ExponentialBackoff
 from pydantic import BaseModel, Field, ValidationError, field_validator
 from typing import Optional
 import sys
-import asyncio
 from functools import wraps
 from src.middleware.auth_middleware import jwt_required, admin_required
 from src.middleware.rate_limit import rate_limit
 from src.utils.redis_config import get_secure_redis_url
+from src.utils.local_cache import LocalTTLCache
+from src.utils.async_runtime import get_async_runtime, run_async
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', '..'))
 
@@ -61,6 +63,18 @@ if redis_url.startswith("rediss://"):
 redis_client = Redis.from_url(redis_url, **redis_kwargs)
 
 CACHE_TTL = int(os.getenv("FAQ_CACHE_TTL", "300"))
+L1_CACHE_TTL = int(os.getenv("FAQ_L1_CACHE_TTL", "30"))
+L1_CACHE_MAX_ENTRIES = int(os.getenv("FAQ_L1_CACHE_MAX_ENTRIES", "1024"))
+
+# Namespaces invalidated by bumping a generation counter instead of deleting keys
+CACHE_GENERATION_NAMESPACES = ("search", "categories")
+CACHE_INVALIDATION_CHANNEL = "faq:cache:invalidate"
+ITEM_CACHE_PREFIX = "faq:item:"
+
+_cache_generations = {namespace: 0 for namespace in CACHE_GENERATION_NAMESPACES}
+_generation_lock = threading.Lock()
+_item_cache = LocalTTLCache(max_entries=L1_CACHE_MAX_ENTRIES, ttl=L1_CACHE_TTL)
+_invalidation_listener = None
 OPENAI_MAX_DAILY_COST = float(os.getenv("OPENAI_MAX_DAILY_COST", "20.0"))
 
 class FAQSearchRequest(BaseModel):
@@ -112,37 +126,96 @@ class FAQUpdateRequest(BaseModel):
     tags: list = Field(None, description="FAQ tags")
 
 def async_route(f):
-    """Decorator to run async functions in Flask routes"""
+    """Decorator to run async functions in Flask routes
+    
+    The coroutine runs on the worker's persistent background event loop,
+    so async clients and tasks created by one request survive into the next.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(f(*args, **kwargs))
-        finally:
-            loop.close()
+        return run_async(f(*args, **kwargs))
     return decorated_function
 
+_faq_tools_lock = threading.Lock()
+
+def get_faq_tool(tool_class):
+    """Per-worker FAQ tool instance, kept on the app
+    
+    The tools hold long-lived async clients (OpenAI, Supabase executor,
+    search log writer) bound to the background event loop, so they are
+    built once and closed when the loop shuts down.
+    """
+    tools = current_app.extensions.setdefault("faq_tools", {})
+    tool = tools.get(tool_class)
+    if tool is None:
+        with _faq_tools_lock:
+            tool = tools.get(tool_class)
+            if tool is None:
+                tool = tool_class()
+                tools[tool_class] = tool
+                close = getattr(tool, "close", None)
+                if close is not None:
+                    get_async_runtime().add_shutdown_callback(close)
+    return tool
+
 def generate_cache_key(prefix: str, **params) -> str:
     """Generate Redis cache key from parameters
     
     Key naming convention:
-    - faq:search:{hash} for search queries
-    - faq:item:{id} for individual FAQ items
-    - faq:categories for category list
-    - faq:stats for statistics
+    - faq:search:g{generation}:{hash} for search queries
+    - faq:item:{hash} for individual FAQ items
+    - faq:categories:g{generation}:{hash} for category list
+    - faq:stats:{hash} for statistics
+    
+    Namespaces in CACHE_GENERATION_NAMESPACES carry the current generation,
+    so bump_cache_generation() retires every key in the namespace at once and
+    the old entries simply expire. Reading the generation is local, no Redis I/O.
     """
     param_str = json.dumps(params, sort_keys=True)
     param_hash = hashlib.md5(param_str.encode()).hexdigest()
+    generation = _cache_generations.get(prefix)
+    if generation is not None:
+        return f"faq:{prefix}:g{generation}:{param_hash}"
     return f"faq:{prefix}:{param_hash}"
 
+def generation_key(namespace: str) -> str:
+    """Redis key holding the shared generation counter of a namespace"""
+    return f"faq:gen:{namespace}"
+
+def _observe_generation(namespace: str, generation: int, client=None):
+    """Adopt a newer generation; an older one means the shared counter was reset
+    
+    Generations arrive out of order (two workers INCR, then publish in the
+    other order), so a lower value alone is not trusted: the shared counter
+    is re-read and adopted as is. After a Redis flush or restart that moves
+    this worker back onto the live counter instead of staying pinned above it.
+    """
+    with _generation_lock:
+        if generation >= _cache_generations.get(namespace, 0):
+            _cache_generations[namespace] = generation
+            return
+    _resync_generation(namespace, client or redis_client)
+
+def _resync_generation(namespace: str, client):
+    value = client.get(generation_key(namespace))
+    with _generation_lock:
+        _cache_generations[namespace] = int(value) if value is not None else 0
+
 def get_cached_result(cache_key: str):
-    """Get cached result from Redis"""
+    """Get cached result, from the in-process L1 for faq:item:* keys, else Redis"""
+    use_l1 = cache_key.startswith(ITEM_CACHE_PREFIX)
+    if use_l1:
+        cached = _item_cache.get(cache_key)
+        if cached is not None:
+            return cached
     try:
         cached = redis_client.get(cache_key)
         if cached:
             logger.info(f"Cache hit: {cache_key}")
-            return json.loads(cached)
+            result = json.loads(cached)
+            if use_l1:
+                _item_cache.set(cache_key, result)
+            return result
         return None
     except RedisConnectionError as e:
         logger.warning(f"Redis connection error, skipping cache: {e}")
@@ -152,7 +225,9 @@ def get_cached_result(cache_key: str):
         return None
 
 def set_cached_result(cache_key: str, result: dict, ttl: int = CACHE_TTL):
-    """Set cached result in Redis"""
+    """Set cached result in Redis (and the L1 for faq:item:* keys)"""
+    if cache_key.startswith(ITEM_CACHE_PREFIX):
+        _item_cache.set(cache_key, result, ttl=ttl)
     try:
         redis_client.setex(cache_key, ttl, json.dumps(result))
         logger.info(f"Cached result: {cache_key} (TTL: {ttl}s)")
@@ -161,9 +236,124 @@ def set_cached_result(cache_key: str, result: dict, ttl: int = CACHE_TTL):
     except Exception as e:
         logger.error(f"Cache set error: {e}")
 
+def bump_cache_generation(namespace: str):
+    """Invalidate a whole namespace with one INCR
+    
+    Keys built under the previous generation are never read again and age
+    out through their TTL. The new generation is published so other workers
+    switch over without waiting for their next resync.
+    """
+    try:
+        generation = int(redis_client.incr(generation_key(namespace)))
+        _observe_generation(namespace, generation)
+        redis_client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps({"generations": {namespace: generation}}))
+        logger.info(f"Cache namespace faq:{namespace} moved to generation {generation}")
+        if sentry_sdk:
+            sentry_sdk.add_breadcrumb(
+                category='cache',
+                message=f'Cache generation bump: {namespace}',
+                level='info',
+                data={'namespace': namespace, 'generation': generation}
+            )
+    except Exception as e:
+        logger.error(f"Cache generation bump error: {e}")
+
+def invalidate_cached_item(faq_id: str):
+    """Drop one FAQ item from Redis and from every worker's L1"""
+    cache_key = generate_cache_key("item", id=faq_id)
+    _item_cache.delete(cache_key)
+    try:
+        redis_client.delete(cache_key)
+        redis_client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps({"evict": [cache_key]}))
+    except Exception as e:
+        logger.error(f"Cache item invalidation error: {e}")
+
+def sync_cache_generations(client=None):
+    """Adopt the shared generation counters from Redis as they are (raises on Redis errors)
+    
+    A missing counter (flushed Redis) reads as generation 0.
+    """
+    client = client or redis_client
+    namespaces = list(CACHE_GENERATION_NAMESPACES)
+    values = client.mget([generation_key(namespace) for namespace in namespaces])
+    with _generation_lock:
+        for namespace, value in zip(namespaces, values):
+            _cache_generations[namespace] = int(value) if value is not None else 0
+
+def apply_cache_invalidation(message: str, client=None):
+    """Apply an invalidation message published by any worker"""
+    payload = json.loads(message)
+    for namespace, generation in payload.get("generations", {}).items():
+        _observe_generation(namespace, int(generation), client)
+    for cache_key in payload.get("evict", []):
+        _item_cache.delete(cache_key)
+
+class CacheInvalidationListener(threading.Thread):
+    """Background subscriber keeping this worker's generations and L1 in step
+    
+    Messages published while disconnected are lost, so on every (re)subscribe
+    the generations are resynced and the L1 is cleared.
+    """
+    
+    def __init__(self, client, reconnect_delay: float = 1.0, poll_timeout: float = 1.0):
+        super().__init__(name="faq-cache-invalidation", daemon=True)
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.poll_timeout = poll_timeout
+        self.subscribed = threading.Event()
+        self._stopping = threading.Event()
+    
+    def run(self):
+        while not self._stopping.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                sync_cache_generations(self.client)
+                _item_cache.clear()
+                self.subscribed.set()
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=self.poll_timeout)
+                    if message and message.get("type") == "message":
+                        try:
+                            apply_cache_invalidation(message["data"], self.client)
+                        except (ValueError, TypeError, AttributeError) as e:
+                            logger.warning(f"Ignoring malformed cache invalidation message: {e}")
+            except Exception as e:
+                self.subscribed.clear()
+                logger.warning(f"Cache invalidation listener disconnected, retrying: {e}")
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+    
+    def stop(self, timeout: Optional[float] = None):
+        self._stopping.set()
+        self.join(timeout)
+
+def start_cache_invalidation_listener():
+    """Start the per-worker invalidation listener (called from gunicorn post_worker_init)
+    
+    The current generations are read before the worker serves anything, so a
+    recycled worker does not use generation 0 until the listener subscribes.
+    """
+    global _invalidation_listener
+    try:
+        sync_cache_generations()
+    except Exception as e:
+        logger.warning(f"Initial cache generation sync failed, the listener will retry: {e}")
+    if _invalidation_listener is None or not _invalidation_listener.is_alive():
+        _invalidation_listener = CacheInvalidationListener(redis_client)
+        _invalidation_listener.start()
+    return _invalidation_listener
+
 def invalidate_cache_pattern(pattern: str):
     """Invalidate cache keys matching pattern
     
+    Full SCAN of the keyspace; the write routes use bump_cache_generation()
+    and invalidate_cached_item() instead. Kept for manual/maintenance sweeps.
+    
     Examples:
     - invalidate_cache_pattern("search") -> deletes all faq:search:* keys
     - invalidate_cache_pattern("item") -> deletes all faq:item:* keys
@@ -269,7 +459,7 @@ async def search_faqs():
         return jsonify({"data": cached_result, "cached": True}), 200
     
     try:
-        search_tool = FAQSearchTool()
+        search_tool = get_faq_tool(FAQSearchTool)
         limit = validated.page_size
         offset = (validated.page - 1) * validated.page_size
         
@@ -385,7 +575,7 @@ async def get_faq(faq_id):
         return jsonify({"data": cached_result, "cached": True}), 200
     
     try:
-        mgmt_tool = FAQManagementTool()
+        mgmt_tool = get_faq_tool(FAQManagementTool)
         result = await mgmt_tool.get_faq(faq_id)
         
         if not result.get('success'):
@@ -468,7 +658,7 @@ async def create_faq():
         }), 422
     
     try:
-        mgmt_tool = FAQManagementTool()
+        mgmt_tool = get_faq_tool(FAQManagementTool)
         result = await mgmt_tool.create_faq(
             question=validated.question,
             answer=validated.answer,
@@ -484,8 +674,8 @@ async def create_faq():
                 }
             }), 500
         
-        invalidate_cache_pattern("search:")
-        invalidate_cache_pattern("categories:")
+        bump_cache_generation("search")
+        bump_cache_generation("categories")
         
         faq = result.get('faq', {})
         faq_id = faq.get('id') if faq else None
@@ -582,7 +772,7 @@ async def update_faq(faq_id):
         }), 400
     
     try:
-        mgmt_tool = FAQManagementTool()
+        mgmt_tool = get_faq_tool(FAQManagementTool)
         result = await mgmt_tool.update_faq(faq_id, **updates)
         
         if not result.get('success'):
@@ -602,8 +792,9 @@ async def update_faq(faq_id):
                     }
                 }), 500
         
-        invalidate_cache_pattern("search:")
-        invalidate_cache_pattern("item:")
+        bump_cache_generation("search")
+        bump_cache_generation("categories")
+        invalidate_cached_item(faq_id)
         
         response_data = {
             "faq_id": faq_id,
@@ -657,7 +848,7 @@ async def delete_faq(faq_id):
         }), 503
     
     try:
-        mgmt_tool = FAQManagementTool()
+        mgmt_tool = get_faq_tool(FAQManagementTool)
         result = await mgmt_tool.delete_faq(faq_id)
         
         if not result.get('success'):
@@ -677,8 +868,9 @@ async def delete_faq(faq_id):
                     }
                 }), 500
         
-        invalidate_cache_pattern("search:")
-        invalidate_cache_pattern("item:")
+        bump_cache_generation("search")
+        bump_cache_generation("categories")
+        invalidate_cached_item(faq_id)
         
         response_data = {
             "faq_id": faq_id,
@@ -734,7 +926,7 @@ async def get_categories():
         return jsonify({"data": cached_result, "cached": True}), 200
     
     try:
-        mgmt_tool = FAQManagementTool()
+        mgmt_tool = get_faq_tool(FAQManagementTool)
         result = await mgmt_tool.get_categories()
         
         if not result.get('success'):
@@ -799,8 +991,7 @@ async def health_check():
     
     if FAQ_AGENT_AVAILABLE:
         try:
-            from agents.faq_agent.tools import FAQSearchTool
-            search_tool = FAQSearchTool()
+            search_tool = get_faq_tool(FAQSearchTool)
             
             test_result = await search_tool.search(query="test", limit=1, threshold=0.0)
             
@@ -871,7 +1062,7 @@ async def get_stats():
         return jsonify({"data": cached_result, "cached": True}), 200
     
     try:
-        mgmt_tool = FAQManagementTool()
+        mgmt_tool = get_faq_tool(FAQManagementTool)
         result = await mgmt_tool.get_stats()
         
         if not result.get('success'):
@@ -4,6 +4,7 @@ Vector Visualization API Routes
 Provides endpoints for pgvector space visualization and memory drift analysis.
 """
 import os
+import inspect
 import logging
 from flask import Blueprint, jsonify, request
 import psycopg2
@@ -11,6 +12,10 @@ from psycopg2.extras import RealDictCursor
 from psycopg2.pool import ThreadedConnectionPool
 from src.middleware.auth_middleware import jwt_required
 from src.utils.i18n import i18n, translate
+from src.services.vector_projection import (
+    Projection, ProjectionKey, ProjectionUnavailable, VectorProjectionService, VectorSnapshot,
+    decode_vectors, get_projection_service, warm_start_layout
+)
 
 logger = logging.getLogger(__name__)
 
@@ -62,12 +67,183 @@ def release_db_connection(conn):
             pass
 
 
+PROJECTION_WAIT = float(os.getenv("VECTOR_PROJECTION_WAIT", "2.0"))
+PROJECTION_TTL = float(os.getenv("VECTOR_PROJECTION_TTL", "600"))
+INCREMENTAL_MIN_OVERLAP = 0.8
+TSNE_PCA_COMPONENTS = 50
+TSNE_WARM_START_ITERATIONS = 400
+
+VECTOR_QUERY = """
+    SELECT 
+        id,
+        vector_send(embedding) AS embedding,
+        source,
+        category,
+        text_preview,
+        query_count,
+        created_at
+    FROM vector_visualization
+"""
+
+
+def fetch_vector_snapshot(source, limit):
+    """Fetch embeddings in pgvector's binary format plus display metadata"""
+    conn = get_db_connection()
+    cursor = None
+    try:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        
+        query = VECTOR_QUERY
+        params = []
+        if source:
+            query += " WHERE source = %s"
+            params.append(source)
+        
+        query += " ORDER BY query_count DESC LIMIT %s"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        results = cursor.fetchall()
+    finally:
+        if cursor is not None:
+            cursor.close()
+        release_db_connection(conn)
+    
+    if len(results) == 0:
+        raise ProjectionUnavailable("no_vectors")
+    
+    rows = [row for row in results if row['embedding']]
+    if len(rows) < 2:
+        raise ProjectionUnavailable("insufficient", count=len(rows))
+    
+    metadata = [{
+        'id': row['id'],
+        'source': row['source'] or 'unknown',
+        'category': row['category'] or 'uncategorized',
+        'text': (row['text_preview'] or '')[:100],
+        'query_count': row['query_count'] or 0,
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None
+    } for row in rows]
+    
+    return VectorSnapshot(
+        ids=[m['id'] for m in metadata],
+        embeddings=decode_vectors([row['embedding'] for row in rows]),
+        metadata=metadata
+    )
+
+
+def _tsne_iterations_param():
+    """TSNE's iteration-count keyword: 'max_iter' from scikit-learn 1.5, 'n_iter' before"""
+    try:
+        params = inspect.signature(TSNE).parameters
+    except (TypeError, ValueError):
+        return 'max_iter'
+    return 'n_iter' if 'n_iter' in params and 'max_iter' not in params else 'max_iter'
+
+
+def _reduce(method, dimensions, snapshot, previous):
+    """(coords, fitted model, incremental) for a snapshot, reusing the previous layout when most ids are unchanged"""
+    embeddings = snapshot.embeddings
+    warm = previous is not None and snapshot.overlap(previous) >= INCREMENTAL_MIN_OVERLAP
+    
+    if method == 'pca':
+        if warm and previous.model is not None:
+            return previous.model.transform(embeddings), previous.model, True
+        reducer = PCA(n_components=dimensions, random_state=42)
+        return reducer.fit_transform(embeddings), reducer, False
+    
+    features = embeddings
+    if features.shape[1] > TSNE_PCA_COMPONENTS and len(features) > TSNE_PCA_COMPONENTS:
+        # Standard t-SNE preprocessing; the neighbour search on 1536 dims dominates otherwise
+        features = PCA(n_components=TSNE_PCA_COMPONENTS, random_state=42).fit_transform(features)
+    
+    params = {}
+    if warm:
+        params = {'init': warm_start_layout(snapshot, previous), _tsne_iterations_param(): TSNE_WARM_START_ITERATIONS}
+    reducer = TSNE(n_components=dimensions, random_state=42, perplexity=min(30, len(snapshot) - 1), **params)
+    return reducer.fit_transform(features), None, warm
+
+
+def _render_figure(method, dimensions, reduced, metadata):
+    df = pd.DataFrame({
+        'x': reduced[:, 0],
+        'y': reduced[:, 1],
+        'source': [m['source'] for m in metadata],
+        'category': [m['category'] for m in metadata],
+        'text': [m['text'] for m in metadata],
+        'query_count': [m['query_count'] for m in metadata],
+        'id': [m['id'] for m in metadata]
+    })
+    
+    if dimensions == 3:
+        df['z'] = reduced[:, 2]
+    
+    if dimensions == 2:
+        fig = px.scatter(
+            df,
+            x='x',
+            y='y',
+            color='source',
+            size='query_count',
+            hover_data=['text', 'category', 'id'],
+            title=f'Vector Space Visualization ({method.upper()}, {len(metadata)} vectors)',
+            labels={'x': f'{method.upper()} 1', 'y': f'{method.upper()} 2'}
+        )
+    else:
+        fig = px.scatter_3d(
+            df,
+            x='x',
+            y='y',
+            z='z',
+            color='source',
+            size='query_count',
+            hover_data=['text', 'category', 'id'],
+            title=f'Vector Space Visualization ({method.upper()}, {len(metadata)} vectors)',
+            labels={'x': f'{method.upper()} 1', 'y': f'{method.upper()} 2', 'z': f'{method.upper()} 3'}
+        )
+    
+    fig.update_layout(
+        height=600,
+        hovermode='closest'
+    )
+    return fig.to_json()
+
+
+def compute_projection(key, snapshot, previous):
+    """Projection job body: reduce and render one snapshot"""
+    reduced, model, incremental = _reduce(key.method, key.dimensions, snapshot, previous)
+    reduced = np.asarray(reduced)
+    return Projection(
+        key=key,
+        version=snapshot.version,
+        ids=snapshot.ids,
+        coords=reduced,
+        figure=_render_figure(key.method, key.dimensions, reduced, snapshot.metadata),
+        model=model,
+        incremental=incremental
+    )
+
+
+def get_vector_projections():
+    return get_projection_service(lambda: VectorProjectionService(
+        fetch=lambda source, limit: fetch_vector_snapshot(source, limit),
+        project=lambda key, snapshot, previous: compute_projection(key, snapshot, previous),
+        ttl=PROJECTION_TTL
+    ))
+
+
 @bp.route('/visualize', methods=['GET'])
 @jwt_required
 def visualize_vectors():
     """
     Generate vector space visualization using t-SNE or PCA
     
+    Layouts are computed by a background job and cached per
+    (source, method, dimensions, limit) and data version. A cached layout
+    is returned immediately (a stale one is returned while it refreshes);
+    a cold request waits up to VECTOR_PROJECTION_WAIT seconds and then
+    returns 202 with a job id to poll.
+    
     Query params:
         - method: 'tsne' or 'pca' (default: tsne)
         - limit: number of vectors to visualize (default: 1000)
@@ -91,134 +267,60 @@ def visualize_vectors():
     if dimensions not in [2, 3]:
         return jsonify({"error": "Dimensions must be 2 or 3"}), 400
     
+    if method not in ['tsne', 'pca']:
+        return jsonify({"error": "Method must be 'tsne' or 'pca'"}), 400
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        projections = get_vector_projections()
+        projection, job = projections.request(ProjectionKey(source, method, dimensions, limit))
+        cached = projection is not None
         
-        query = """
-            SELECT 
-                id,
-                embedding,
-                source,
-                category,
-                text_preview,
-                query_count,
-                created_at
-            FROM vector_visualization
-        """
+        if projection is None:
+            projection = projections.wait(job, PROJECTION_WAIT)
         
-        params = []
-        if source:
-            query += " WHERE source = %s"
-            params.append(source)
-        
-        query += " ORDER BY query_count DESC LIMIT %s"
-        params.append(limit)
+        if projection is None:
+            return jsonify({
+                "data": job.to_dict(),
+                "cached": False
+            }), 202
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        return jsonify({
+            "data": projection.to_response(cached=cached, stale=cached and job is not None),
+            "cached": cached
+        })
         
-        if len(results) == 0:
+    except ProjectionUnavailable as e:
+        if e.reason == "no_vectors":
             return i18n.error_response(
                 "not_found",
                 404,
                 message=translate("vector.no_vectors")
             )
-        
-        vectors = []
-        metadata = []
-        
-        for row in results:
-            if row['embedding']:
-                vectors.append(row['embedding'])
-                metadata.append({
-                    'id': row['id'],
-                    'source': row['source'] or 'unknown',
-                    'category': row['category'] or 'uncategorized',
-                    'text': (row['text_preview'] or '')[:100],
-                    'query_count': row['query_count'] or 0,
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None
-                })
-        
-        if len(vectors) < 2:
-            return i18n.error_response(
-                "invalid_parameter",
-                400,
-                message=translate("vector.insufficient", count=2)
-            )
-        
-        embeddings_array = np.array(vectors)
-        
-        if method == 'tsne':
-            reducer = TSNE(n_components=dimensions, random_state=42, perplexity=min(30, len(vectors) - 1))
-            reduced = reducer.fit_transform(embeddings_array)
-        elif method == 'pca':
-            reducer = PCA(n_components=dimensions, random_state=42)
-            reduced = reducer.fit_transform(embeddings_array)
-        else:
-            return jsonify({"error": "Method must be 'tsne' or 'pca'"}), 400
-        
-        df = pd.DataFrame({
-            'x': reduced[:, 0],
-            'y': reduced[:, 1],
-            'source': [m['source'] for m in metadata],
-            'category': [m['category'] for m in metadata],
-            'text': [m['text'] for m in metadata],
-            'query_count': [m['query_count'] for m in metadata],
-            'id': [m['id'] for m in metadata]
-        })
-        
-        if dimensions == 3:
-            df['z'] = reduced[:, 2]
-        
-        if dimensions == 2:
-            fig = px.scatter(
-                df,
-                x='x',
-                y='y',
-                color='source',
-                size='query_count',
-                hover_data=['text', 'category', 'id'],
-                title=f'Vector Space Visualization ({method.upper()}, {len(vectors)} vectors)',
-                labels={'x': f'{method.upper()} 1', 'y': f'{method.upper()} 2'}
-            )
-        else:
-            fig = px.scatter_3d(
-                df,
-                x='x',
-                y='y',
-                z='z',
-                color='source',
-                size='query_count',
-                hover_data=['text', 'category', 'id'],
-                title=f'Vector Space Visualization ({method.upper()}, {len(vectors)} vectors)',
-                labels={'x': f'{method.upper()} 1', 'y': f'{method.upper()} 2', 'z': f'{method.upper()} 3'}
-            )
-        
-        fig.update_layout(
-            height=600,
-            hovermode='closest'
+        return i18n.error_response(
+            "invalid_parameter",
+            400,
+            message=translate("vector.insufficient", count=2)
         )
-        
-        cursor.close()
-        release_db_connection(conn)
-        
-        return jsonify({
-            "data": {
-                "figure": fig.to_json(),
-                "vector_count": len(vectors),
-                "method": method,
-                "dimensions": dimensions,
-                "cached": False
-            },
-            "cached": False
-        })
-        
     except Exception as e:
         logger.error(f"Failed to visualize vectors: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route('/visualize/jobs/<job_id>', methods=['GET'])
+@jwt_required
+def get_projection_job(job_id):
+    """
+    Get the status of a background projection job
+    
+    Returns:
+        Job status; once done, request /visualize again for the cached figure
+    """
+    job = get_vector_projections().get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Projection job not found"}), 404
+    return jsonify({"data": job.to_dict(), "cached": False})
+
+
 @bp.route('/clusters', methods=['GET'])
 @jwt_required
 def get_clusters():
@@ -382,10 +484,14 @@ def refresh_visualization():
         cursor.close()
         release_db_connection(conn)
         
+        # Cached layouts are served as stale and refreshed on their next request
+        invalidated = get_vector_projections().invalidate(recompute=False) if VISUALIZATION_AVAILABLE else 0
+        
         return jsonify({
             "data": {
                 "status": "success",
-                "message": "Vector visualization refreshed"
+                "message": "Vector visualization refreshed",
+                "projections_invalidated": invalidated
             },
             "cached": False
         })
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Metrics Time Series
+Columnar ring buffers with 1m/5m/1h rollups for the monitoring dashboard
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (name, bucket seconds, capacity); resolution 0 keeps every sample
+DEFAULT_LEVELS: Tuple[Tuple[str, int, int], ...] = (
+    ('raw', 0, 720),
+    ('1m', 60, 1440),      # 24 hours
+    ('5m', 300, 2016),     # 7 days
+    ('1h', 3600, 2160),    # 90 days
+)
+
+
+class RollupLevel:
+    """
+    One resolution of a series: a fixed-size ring of buckets
+
+    Each bucket holds count, sum, min and max per metric in preallocated
+    NumPy columns, so memory is fixed at construction. A sample falling in
+    the newest bucket is folded into it; anything later starts a new
+    bucket and overwrites the oldest once the ring is full.
+    """
+
+    def __init__(self, name: str, resolution: int, capacity: int, metrics: Sequence[str]):
+        self.name = name
+        self.resolution = resolution
+        self.capacity = capacity
+        self.metrics = list(metrics)
+        self._column = {metric: i for i, metric in enumerate(self.metrics)}
+
+        width = len(self.metrics)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.counts = np.zeros(capacity, dtype=np.uint32)
+        self.sums = np.zeros((capacity, width), dtype=np.float64)
+        self.mins = np.zeros((capacity, width), dtype=np.float32)
+        self.maxs = np.zeros((capacity, width), dtype=np.float32)
+        self.size = 0
+        self._head = 0  # slot the next bucket goes into
+
+    def add(self, timestamp: float, values: np.ndarray):
+        bucket = timestamp - timestamp % self.resolution if self.resolution else timestamp
+        last = (self._head - 1) % self.capacity
+        if self.resolution and self.size and self.times[last] == bucket:
+            self.counts[last] += 1
+            self.sums[last] += values
+            np.minimum(self.mins[last], values, out=self.mins[last])
+            np.maximum(self.maxs[last], values, out=self.maxs[last])
+            return
+
+        slot = self._head
+        self.times[slot] = bucket
+        self.counts[slot] = 1
+        self.sums[slot] = values
+        self.mins[slot] = values
+        self.maxs[slot] = values
+        self._head = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    @property
+    def oldest(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return float(self.times[(self._head - self.size) % self.capacity])
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.counts.nbytes + self.sums.nbytes + self.mins.nbytes + self.maxs.nbytes
+
+    def covers(self, start: float) -> bool:
+        """Whether this level still holds data from ``start`` (or has never wrapped)"""
+        return self.size < self.capacity or (self.oldest is not None and self.oldest <= start)
+
+    def slots(self, start: float, end: float) -> np.ndarray:
+        """Ring indices of buckets in [start, end], oldest first"""
+        if not self.size:
+            return np.empty(0, dtype=np.int64)
+        order = (self._head - self.size + np.arange(self.size)) % self.capacity
+        times = self.times[order]
+        first = np.searchsorted(times, start - self.resolution, side='right') if self.resolution \
+            else np.searchsorted(times, start, side='left')
+        last = np.searchsorted(times, end, side='right')
+        return order[first:last]
+
+    def column(self, metric: str) -> int:
+        return self._column[metric]
+
+
+@dataclass
+class SeriesWindow:
+    """Buckets read from one level for a range query"""
+    level: str
+    resolution: int
+    times: np.ndarray
+    counts: np.ndarray
+    means: Dict[str, np.ndarray]
+    mins: Dict[str, np.ndarray]
+    maxs: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def to_dict(self) -> Dict:
+        return {
+            'level': self.level,
+            'resolution_seconds': self.resolution,
+            'timestamps': self.times.tolist(),
+            'samples': self.counts.tolist(),
+            'metrics': {
+                metric: {
+                    'mean': self.means[metric].tolist(),
+                    'min': self.mins[metric].tolist(),
+                    'max': self.maxs[metric].tolist()
+                }
+                for metric in self.means
+            }
+        }
+
+
+class MetricTimeSeries:
+    """
+    Fixed-width numeric samples written to every rollup level at once
+
+    Range queries pick a single level: the finest one that still covers the
+    start of the range without returning more than ``max_points`` buckets.
+    """
+
+    def __init__(self, metrics: Sequence[str], levels: Sequence[Tuple[str, int, int]] = DEFAULT_LEVELS):
+        self.metrics = list(metrics)
+        self.levels: List[RollupLevel] = [
+            RollupLevel(name, resolution, capacity, self.metrics) for name, resolution, capacity in levels
+        ]
+        self.latest_time: Optional[float] = None
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        row = np.array([float(values.get(metric, 0.0) or 0.0) for metric in self.metrics], dtype=np.float64)
+        for level in self.levels:
+            level.add(timestamp, row)
+        self.latest_time = timestamp
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+    def select_level(self, start: float, end: float, max_points: int) -> RollupLevel:
+        span = max(end - start, 0.0)
+        for level in self.levels:
+            if not level.covers(start):
+                continue
+            if level.resolution:
+                points = span / level.resolution
+            else:
+                points = len(level.slots(start, end))
+            if points <= max_points:
+                return level
+        return self.levels[-1]
+
+    def query(self, start: float, end: float, max_points: int = 500,
+              metrics: Optional[Sequence[str]] = None) -> SeriesWindow:
+        level = self.select_level(start, end, max_points)
+        slots = level.slots(start, end)
+        counts = level.counts[slots]
+        columns = [level.column(m) for m in (metrics or self.metrics)]
+        sums = level.sums[slots][:, columns]
+        names = list(metrics or self.metrics)
+        means = sums / np.maximum(counts, 1)[:, None]
+        return SeriesWindow(
+            level=level.name,
+            resolution=level.resolution,
+            times=level.times[slots].copy(),
+            counts=counts.copy(),
+            means={name: means[:, i] for i, name in enumerate(names)},
+            mins={name: level.mins[slots, col].astype(np.float64) for name, col in zip(names, columns)},
+            maxs={name: level.maxs[slots, col].astype(np.float64) for name, col in zip(names, columns)}
+        )
@@ -12,6 +12,20 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 import time
 
+import numpy as np
+
+from .metrics_timeseries import MetricTimeSeries
+
+# Numeric columns kept in the time-series buffer for every snapshot
+SERIES_METRICS = (
+    'error_rate',
+    'open_circuit_breakers',
+    'rejected_requests',
+    'total_requests',
+    'failed_requests',
+    'active_sagas',
+)
+
 @dataclass
 class DashboardMetrics:
     """Dashboard metrics snapshot"""
@@ -25,9 +39,14 @@ class DashboardMetrics:
 class MonitoringDashboard:
     """Real-time monitoring dashboard for resilience patterns"""
     
+    TREND_POINTS = 60
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.metrics_history: List[DashboardMetrics] = []
+        self.series = MetricTimeSeries(SERIES_METRICS)
+        self._state_manager = None
+        self._state_manager_class = None
         self.alert_thresholds = {
             'error_rate': 0.05,      # 5%
             'latency_p95': 1000,     # 1000ms
@@ -39,10 +58,9 @@ class MonitoringDashboard:
         """Collect comprehensive metrics from all resilience components"""
         try:
             from resilience_patterns import resilience_manager
-            from src.persistence.state_manager import PersistentStateManager
             from saga_orchestrator import saga_orchestrator
             
-            persistent_state_manager = PersistentStateManager()
+            persistent_state_manager = self._get_state_manager()
             
             resilience_metrics = resilience_manager.get_all_metrics()
             
@@ -61,16 +79,45 @@ class MonitoringDashboard:
                 system_health=system_health
             )
             
-            self.metrics_history.append(metrics)
-            if len(self.metrics_history) > 1000:
-                self.metrics_history = self.metrics_history[-500:]
-                
+            self.record(metrics)
             return metrics
             
         except Exception as e:
             self.logger.error(f"Failed to collect metrics: {e}")
             return None
             
+    def _get_state_manager(self):
+        """Long-lived state manager; its constructor re-runs the schema DDL"""
+        from src.persistence.state_manager import PersistentStateManager
+        
+        if self._state_manager is None or self._state_manager_class is not PersistentStateManager:
+            self._state_manager = PersistentStateManager()
+            self._state_manager_class = PersistentStateManager
+        return self._state_manager
+        
+    def record(self, metrics: DashboardMetrics):
+        """Keep the snapshot for detail views and its numbers in the time series"""
+        self.metrics_history.append(metrics)
+        if len(self.metrics_history) > 1000:
+            self.metrics_history = self.metrics_history[-500:]
+            
+        try:
+            self.series.append(metrics.timestamp.timestamp(), self._series_values(metrics))
+        except Exception as e:
+            self.logger.error(f"Failed to record metric series: {e}")
+            
+    def _series_values(self, metrics: DashboardMetrics) -> Dict[str, float]:
+        health = metrics.system_health or {}
+        breakers = (metrics.circuit_breakers or {}).values()
+        return {
+            'error_rate': health.get('error_rate', 0),
+            'open_circuit_breakers': health.get('open_circuit_breakers', 0),
+            'rejected_requests': health.get('rejected_requests', 0),
+            'total_requests': sum(cb.get('total_requests', 0) or 0 for cb in breakers),
+            'failed_requests': sum(cb.get('failed_requests', 0) or 0 for cb in breakers),
+            'active_sagas': (metrics.saga_orchestrator or {}).get('active_sagas', 0)
+        }
+            
     async def _calculate_system_health(self, resilience_metrics: Dict) -> Dict:
         """Calculate overall system health indicators"""
         health = {
@@ -123,9 +170,9 @@ class MonitoringDashboard:
     def get_dashboard_data(self, hours: int = 1) -> Dict:
         """Get dashboard data for specified time period"""
         cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_metrics = [m for m in self.metrics_history if m.timestamp >= cutoff_time]
+        latest_metrics = self.metrics_history[-1] if self.metrics_history else None
         
-        if not recent_metrics:
+        if latest_metrics is None or latest_metrics.timestamp < cutoff_time:
             # Return default dashboard structure when no metrics available
             return {
                 'timestamp': datetime.now().isoformat(),
@@ -138,9 +185,7 @@ class MonitoringDashboard:
                 'alerts': []
             }
             
-        latest_metrics = recent_metrics[-1]
-        
-        trends = self._calculate_trends(recent_metrics)
+        trends = self._calculate_series_trends(cutoff_time.timestamp(), latest_metrics.timestamp.timestamp())
         
         return {
             'timestamp': latest_metrics.timestamp.isoformat(),
@@ -226,17 +271,46 @@ class MonitoringDashboard:
         try:
             first_error_rate = first.system_health.get('error_rate', 0)
             last_error_rate = last.system_health.get('error_rate', 0)
-            
-            if last_error_rate > first_error_rate * 1.1:
-                trends['error_rate_trend'] = 'increasing'
-            elif last_error_rate < first_error_rate * 0.9:
-                trends['error_rate_trend'] = 'decreasing'
+            trends['error_rate_trend'] = self._trend_direction(first_error_rate, last_error_rate)
                 
         except Exception as e:
             self.logger.error(f"Failed to calculate trends: {e}")
             
         return trends
         
+    def _calculate_series_trends(self, start: float, end: float) -> Dict:
+        """Trends from the first and last buckets of the time series in range"""
+        try:
+            window = self.series.query(start, end, max_points=self.TREND_POINTS)
+            if len(window) < 2:
+                return {}
+                
+            error_rate = window.means['error_rate']
+            volume = window.means['total_requests']
+            open_breakers = window.maxs['open_circuit_breakers']
+            return {
+                'error_rate_trend': self._trend_direction(error_rate[0], error_rate[-1]),
+                'request_volume_trend': self._trend_direction(volume[0], volume[-1]),
+                'circuit_breaker_changes': int(np.count_nonzero(np.diff(open_breakers))),
+                'resolution': window.level
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Failed to calculate trends: {e}")
+            return {}
+            
+    def _trend_direction(self, first: float, last: float) -> str:
+        if last > first * 1.1:
+            return 'increasing'
+        elif last < first * 0.9:
+            return 'decreasing'
+        return 'stable'
+        
+    def get_metric_series(self, hours: float = 1, max_points: int = 360) -> Dict:
+        """Metric history for charts, read from the one rollup level that fits ``max_points``"""
+        end = time.time()
+        return self.series.query(end - hours * 3600, end, max_points=max_points).to_dict()
+        
     def _generate_alerts(self, metrics: DashboardMetrics) -> List[Dict]:
         """Generate alerts based on current metrics"""
         alerts = []
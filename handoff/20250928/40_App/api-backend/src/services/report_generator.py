@@ -12,7 +12,7 @@ import io
 import os
 import tempfile
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from dataclasses import dataclass, asdict
 
 try:
@@ -42,6 +42,29 @@ class ReportData:
     metrics: Dict
     charts: List[Dict]
     summary: Dict
+    
+    def to_json(self) -> str:
+        """Serialize in one encoder pass (datetimes become ISO strings)"""
+        return json.dumps(asdict(self), default=_json_default, ensure_ascii=False)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReportData':
+        generated_at = data.get('generated_at')
+        if isinstance(generated_at, str):
+            generated_at = datetime.fromisoformat(generated_at)
+        return cls(
+            title=data.get('title', ''),
+            generated_at=generated_at or datetime.now(),
+            time_range=data.get('time_range', ''),
+            metrics=data.get('metrics') or {},
+            charts=data.get('charts') or [],
+            summary=data.get('summary') or {}
+        )
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
 
 class ReportGenerator:
     """Generate various types of reports for dashboard"""
@@ -49,26 +72,35 @@ class ReportGenerator:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
-    def generate_report(self, report_type: str, time_range: str) -> ReportData:
-        """Generate report based on type and time range"""
+    def generate_report(self, report_type: str, time_range: str, dashboard_data: Optional[Dict] = None) -> ReportData:
+        """
+        Generate report based on type and time range
+        
+        ``dashboard_data`` is a ``MonitoringDashboard.get_dashboard_data``
+        snapshot; without it this process's dashboard is read, which is only
+        meaningful in the process that collects the metrics.
+        """
         if report_type == 'performance':
-            return self._generate_performance_report(time_range)
+            return self._generate_performance_report(time_range, dashboard_data)
         elif report_type == 'task_tracking':
-            return self._generate_task_tracking_report(time_range)
+            return self._generate_task_tracking_report(time_range, dashboard_data)
         elif report_type == 'resilience':
-            return self._generate_resilience_report(time_range)
+            return self._generate_resilience_report(time_range, dashboard_data)
         elif report_type == 'financial':
             return self._generate_financial_report(time_range)
         else:
             raise ValueError(f"Unsupported report type: {report_type}")
+    
+    def _dashboard_data(self, time_range: str, dashboard_data: Optional[Dict]) -> Dict:
+        if dashboard_data is not None:
+            return dashboard_data
+        from .monitoring_dashboard import monitoring_dashboard
+        return monitoring_dashboard.get_dashboard_data(hours=self._parse_time_range(time_range))
             
-    def _generate_performance_report(self, time_range: str) -> ReportData:
+    def _generate_performance_report(self, time_range: str, dashboard_data: Optional[Dict] = None) -> ReportData:
         """Generate system performance report"""
         try:
-            from services.monitoring_dashboard import monitoring_dashboard
-            
-            hours = self._parse_time_range(time_range)
-            dashboard_data = monitoring_dashboard.get_dashboard_data(hours=hours)
+            dashboard_data = self._dashboard_data(time_range, dashboard_data)
             
             metrics = {
                 'avg_response_time': self._calculate_avg_response_time(dashboard_data),
@@ -101,13 +133,10 @@ class ReportGenerator:
             summary=summary
         )
     
-    def _generate_task_tracking_report(self, time_range: str) -> ReportData:
+    def _generate_task_tracking_report(self, time_range: str, dashboard_data: Optional[Dict] = None) -> ReportData:
         """Generate task tracking and AI agent performance report"""
         try:
-            from services.monitoring_dashboard import monitoring_dashboard
-            
-            hours = self._parse_time_range(time_range)
-            dashboard_data = monitoring_dashboard.get_dashboard_data(hours=hours)
+            dashboard_data = self._dashboard_data(time_range, dashboard_data)
             
             metrics = {
                 'total_tasks_executed': 156,
@@ -149,13 +178,10 @@ class ReportGenerator:
             summary=summary
         )
     
-    def _generate_resilience_report(self, time_range: str) -> ReportData:
+    def _generate_resilience_report(self, time_range: str, dashboard_data: Optional[Dict] = None) -> ReportData:
         """Generate resilience patterns and system stability report"""
         try:
-            from services.monitoring_dashboard import monitoring_dashboard
-            
-            hours = self._parse_time_range(time_range)
-            dashboard_data = monitoring_dashboard.get_dashboard_data(hours=hours)
+            dashboard_data = self._dashboard_data(time_range, dashboard_data)
             
             circuit_breakers = dashboard_data.get('circuit_breakers', [])
             bulkheads = dashboard_data.get('bulkheads', [])
@@ -215,14 +241,15 @@ class ReportGenerator:
             summary=summary
         )
     
-    def export_pdf(self, report_data: ReportData, report_type: str) -> str:
-        """Export report as PDF"""
+    def export_pdf(self, report_data: ReportData, report_type: str, filepath: Optional[str] = None) -> str:
+        """Export report as PDF (to a temp file unless ``filepath`` is given)"""
         if not REPORTLAB_AVAILABLE:
             raise ImportError("ReportLab not available for PDF generation")
         
-        temp_dir = tempfile.gettempdir()
-        filename = f"report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        filepath = os.path.join(temp_dir, filename)
+        if filepath is None:
+            temp_dir = tempfile.gettempdir()
+            filename = f"report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            filepath = os.path.join(temp_dir, filename)
         
         doc = SimpleDocTemplate(filepath, pagesize=letter)
         styles = getSampleStyleSheet()
@@ -274,28 +301,36 @@ class ReportGenerator:
     
     def export_csv(self, report_data: ReportData) -> str:
         """Export report as CSV"""
+        return ''.join(self.iter_csv(report_data))
+    
+    def iter_csv(self, report_data: ReportData) -> Iterator[str]:
+        """Yield the CSV export one row at a time, for streaming responses"""
         output = io.StringIO()
         writer = csv.writer(output)
         
-        writer.writerow(['Report Title', report_data.title])
-        writer.writerow(['Generated At', report_data.generated_at.strftime('%Y-%m-%d %H:%M:%S')])
-        writer.writerow(['Time Range', report_data.time_range])
-        writer.writerow([])  # Empty row
+        def row(values: List) -> str:
+            output.seek(0)
+            output.truncate()
+            writer.writerow(values)
+            return output.getvalue()
+        
+        yield row(['Report Title', report_data.title])
+        yield row(['Generated At', report_data.generated_at.strftime('%Y-%m-%d %H:%M:%S')])
+        yield row(['Time Range', report_data.time_range])
+        yield row([])  # Empty row
         
-        writer.writerow(['Metric', 'Value'])
+        yield row(['Metric', 'Value'])
         for key, value in report_data.metrics.items():
             if isinstance(value, dict):
-                writer.writerow([key, json.dumps(value)])
+                yield row([key, json.dumps(value)])
             else:
-                writer.writerow([key, value])
+                yield row([key, value])
         
         if report_data.summary:
-            writer.writerow([])  # Empty row
-            writer.writerow(['Summary'])
+            yield row([])  # Empty row
+            yield row(['Summary'])
             for key, value in report_data.summary.items():
-                writer.writerow([key, value])
-        
-        return output.getvalue()
+                yield row([key, value])
     
     def _parse_time_range(self, time_range: str) -> int:
         """Parse time range string to hours"""
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Report Jobs
+Queue report generation on the orchestrator RQ queue and cache results per data version
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from .report_generator import ReportData
+
+logger = logging.getLogger(__name__)
+
+REPORT_TYPES = ('performance', 'task_tracking', 'resilience', 'financial')
+REPORT_JOB_FUNC = 'src.services.report_jobs.run_report_job'
+REPORT_JOB_PREFIX = 'report-'
+
+REPORT_RESULT_TTL = int(os.getenv('REPORT_RESULT_TTL', '3600'))
+REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', '300'))
+REPORT_STORAGE_DIR = os.getenv('REPORT_STORAGE_DIR', os.path.join(tempfile.gettempdir(), 'morningai-reports'))
+
+# A report is reused for 1/VERSION_STEPS of its range (at least MIN_VERSION_SECONDS)
+VERSION_STEPS = 100
+MIN_VERSION_SECONDS = 60
+
+
+def parse_time_range(time_range: str) -> int:
+    """Hours in a '24h' / '7d' / '2w' range (ValueError if malformed)"""
+    from .report_generator import report_generator
+    hours = report_generator._parse_time_range(time_range)
+    if hours <= 0:
+        raise ValueError(f"Invalid time range: {time_range}")
+    return hours
+
+
+def data_version(report_type: str, time_range: str) -> str:
+    """
+    Version of the data a report over ``time_range`` is built from
+
+    Derived from the wall clock alone, so every web worker computes the same
+    job id for the same request; per-process dashboard state would not.
+    """
+    granularity = max(MIN_VERSION_SECONDS, parse_time_range(time_range) * 3600 / VERSION_STEPS)
+    return str(int(time.time() // granularity))
+
+
+def dashboard_snapshot(time_range: str) -> Dict[str, Any]:
+    """This process's dashboard data for ``time_range``, JSON-safe for the job arguments"""
+    from .monitoring_dashboard import monitoring_dashboard
+    from .report_generator import _json_default
+
+    data = monitoring_dashboard.get_dashboard_data(hours=parse_time_range(time_range))
+    return json.loads(json.dumps(data, default=_json_default))
+
+
+def run_report_job(report_type: str, time_range: str, dashboard_data: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Worker entry point: the report as JSON text, kept by RQ as the job result
+
+    The worker collects no metrics of its own, so reports are built from the
+    dashboard snapshot the submitting web process put in the job arguments.
+    """
+    from .report_generator import report_generator
+
+    started = time.perf_counter()
+    report = report_generator.generate_report(report_type, time_range, dashboard_data)
+    logger.info(f"Generated {report_type} report ({time_range}) in {time.perf_counter() - started:.2f}s")
+    return report.to_json()
+
+
+class ReportJobs:
+    """
+    Report generation jobs keyed by (type, time_range, data version)
+
+    The job id is derived from that key, so identical requests share one
+    queued job and a finished job's stored result is the cache entry until
+    RQ expires it (``result_ttl``). The submitting process's dashboard
+    snapshot travels in the job arguments for the worker to report on. PDFs are rendered from the cached result
+    once per job and kept on disk for ``send_file``.
+    """
+
+    def __init__(
+        self,
+        queue,
+        storage_dir: str = REPORT_STORAGE_DIR,
+        result_ttl: int = REPORT_RESULT_TTL,
+        job_timeout: int = REPORT_JOB_TIMEOUT,
+        version: Callable[[str, str], str] = data_version,
+        snapshot: Callable[[str], Dict[str, Any]] = dashboard_snapshot
+    ):
+        self.queue = queue
+        self.storage_dir = storage_dir
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        self.version = version
+        self.snapshot = snapshot
+        self._render_lock = threading.Lock()
+
+    def job_id(self, report_type: str, time_range: str) -> str:
+        key = f"{report_type}|{time_range}|{self.version(report_type, time_range)}"
+        return REPORT_JOB_PREFIX + hashlib.sha1(key.encode()).hexdigest()[:24]
+
+    def submit(self, report_type: str, time_range: str) -> Job:
+        """The cached or in-flight job for this report, enqueueing one if needed"""
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unsupported report type: {report_type}")
+        parse_time_range(time_range)
+
+        job_id = self.job_id(report_type, time_range)
+        job = self.fetch(job_id)
+        if job is not None and job.get_status(refresh=False) not in ('failed', 'stopped', 'canceled'):
+            return job
+
+        return self.queue.enqueue(
+            REPORT_JOB_FUNC,
+            report_type,
+            time_range,
+            self.snapshot(time_range),
+            job_id=job_id,
+            job_timeout=self.job_timeout,
+            result_ttl=self.result_ttl,
+            failure_ttl=self.result_ttl,
+            description=f"{report_type} report ({time_range})"
+        )
+
+    def fetch(self, job_id: str) -> Optional[Job]:
+        if not job_id.startswith(REPORT_JOB_PREFIX):
+            return None
+        try:
+            return Job.fetch(job_id, connection=self.queue.connection, serializer=self.queue.serializer)
+        except NoSuchJobError:
+            return None
+
+    def status(self, job: Job) -> Dict[str, Any]:
+        status = str(job.get_status(refresh=False).value)
+        report_type, time_range = job.args[:2]
+        error = None
+        if status == 'failed' and job.exc_info:
+            error = job.exc_info.strip().splitlines()[-1]
+        return {
+            'job_id': job.id,
+            'status': status,
+            'type': report_type,
+            'time_range': time_range,
+            'enqueued_at': job.enqueued_at.isoformat() if job.enqueued_at else None,
+            'ended_at': job.ended_at.isoformat() if job.ended_at else None,
+            'error': error
+        }
+
+    def result_json(self, job: Job) -> Optional[str]:
+        """The report JSON if the job has finished"""
+        if job.get_status(refresh=False) != 'finished':
+            return None
+        return job.return_value()
+
+    def report(self, job: Job) -> Optional[ReportData]:
+        result = self.result_json(job)
+        return ReportData.from_dict(json.loads(result)) if result is not None else None
+
+    def pdf_path(self, job: Job, generator) -> Optional[str]:
+        """Path of the job's PDF, rendering it the first time it is asked for"""
+        path = os.path.join(self.storage_dir, f"{job.id}.pdf")
+        if os.path.exists(path):
+            return path
+
+        report = self.report(job)
+        if report is None:
+            return None
+
+        with self._render_lock:
+            if not os.path.exists(path):
+                os.makedirs(self.storage_dir, exist_ok=True)
+                self._prune()
+                partial = f"{path}.{os.getpid()}.tmp"
+                generator.export_pdf(report, job.args[0], filepath=partial)
+                os.replace(partial, path)
+        return path
+
+    def _prune(self):
+        """Remove PDFs whose job results have expired"""
+        cutoff = time.time() - self.result_ttl
+        for name in os.listdir(self.storage_dir):
+            path = os.path.join(self.storage_dir, name)
+            try:
+                if name.startswith(REPORT_JOB_PREFIX) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+_report_jobs: Optional[ReportJobs] = None
+_report_jobs_lock = threading.Lock()
+
+
+def get_report_jobs() -> ReportJobs:
+    """Report jobs on the orchestrator queue used by the agent routes"""
+    global _report_jobs
+    with _report_jobs_lock:
+        if _report_jobs is None:
+            from src.routes.agent import q
+            _report_jobs = ReportJobs(q)
+        return _report_jobs
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Vector Space Projections
+Background PCA/t-SNE layouts for /api/vectors/visualize, cached per data version
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectionKey(NamedTuple):
+    """What a layout is computed for; the data version is tracked per entry"""
+    source: Optional[str]
+    method: str
+    dimensions: int
+    limit: int
+
+
+class ProjectionUnavailable(Exception):
+    """Not enough vectors to project (reason: 'no_vectors' or 'insufficient')"""
+
+    def __init__(self, reason: str, count: int = 0):
+        super().__init__(reason)
+        self.reason = reason
+        self.count = count
+
+
+def decode_vectors(values: List[Any]) -> np.ndarray:
+    """
+    Stack embeddings into an (n, d) float32 array
+
+    Values fetched with ``vector_send(embedding)`` are pgvector's binary
+    format: a big-endian int16 dimension, an unused int16, then big-endian
+    float4s. When every row has the same dimension the buffers are joined
+    and decoded in one ``frombuffer`` call; the 4-byte header lines up with
+    one float column that is dropped. Lists (text protocol) also work.
+    """
+    if not values:
+        return np.empty((0, 0), dtype=np.float32)
+
+    if all(isinstance(v, (bytes, bytearray, memoryview)) for v in values):
+        buffers = [bytes(v) for v in values]
+        width = len(buffers[0])
+        if all(len(b) == width for b in buffers):
+            dim = int.from_bytes(buffers[0][:2], 'big')
+            raw = np.frombuffer(b''.join(buffers), dtype='>f4').reshape(len(buffers), dim + 1)
+            return raw[:, 1:].astype(np.float32)
+        return np.vstack([
+            np.frombuffer(b, dtype='>f4', count=int.from_bytes(b[:2], 'big'), offset=4).astype(np.float32)
+            for b in buffers
+        ])
+
+    return np.asarray(values, dtype=np.float32)
+
+
+@dataclass
+class VectorSnapshot:
+    """Embeddings and display metadata for one (source, limit) fetch"""
+    ids: List[Any]
+    embeddings: np.ndarray
+    metadata: List[Dict[str, Any]]
+    version: str = ''
+
+    def __post_init__(self):
+        if not self.version:
+            digest = hashlib.md5()
+            for m in self.metadata:
+                digest.update(f"{m['id']}|{m['query_count']}|{m['created_at']}\n".encode())
+            self.version = digest.hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def overlap(self, projection: 'Projection') -> float:
+        """Fraction of this snapshot's ids already laid out in ``projection``"""
+        if not self.ids:
+            return 0.0
+        known = projection.positions
+        return sum(1 for i in self.ids if i in known) / len(self.ids)
+
+
+@dataclass
+class Projection:
+    """A computed layout plus the rendered figure"""
+    key: ProjectionKey
+    version: str
+    ids: List[Any]
+    coords: np.ndarray
+    figure: str
+    model: Any = None
+    incremental: bool = False
+    computed_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    refreshed_at: float = field(default_factory=time.monotonic)
+    invalidated: bool = False
+    _positions: Optional[Dict[Any, int]] = field(default=None, init=False, repr=False)
+
+    @property
+    def positions(self) -> Dict[Any, int]:
+        """vector id -> row in ``coords``"""
+        if self._positions is None:
+            self._positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+        return self._positions
+
+    def to_response(self, cached: bool, stale: bool = False) -> Dict[str, Any]:
+        return {
+            "figure": self.figure,
+            "vector_count": len(self.ids),
+            "method": self.key.method,
+            "dimensions": self.key.dimensions,
+            "cached": cached,
+            "stale": stale,
+            "incremental": self.incremental,
+            "data_version": self.version,
+            "computed_at": self.computed_at.isoformat()
+        }
+
+
+def warm_start_layout(snapshot: VectorSnapshot, previous: Projection, scale: float = 1e-4) -> np.ndarray:
+    """
+    Initial positions for an incremental t-SNE run
+
+    Vectors already in ``previous`` start where they were; new ones start at
+    their nearest (cosine) already-placed neighbour. The layout is rescaled
+    like sklearn's own PCA initialisation so optimisation stays stable.
+    """
+    positions = previous.positions
+    dims = previous.coords.shape[1]
+    init = np.zeros((len(snapshot), dims), dtype=np.float64)
+    known = np.array([i in positions for i in snapshot.ids], dtype=bool)
+    init[known] = previous.coords[[positions[i] for i in snapshot.ids if i in positions]]
+
+    if (~known).any() and known.any():
+        unit = snapshot.embeddings / np.maximum(np.linalg.norm(snapshot.embeddings, axis=1, keepdims=True), 1e-12)
+        nearest = np.argmax(unit[~known] @ unit[known].T, axis=1)
+        jitter = np.random.default_rng(0).normal(scale=1e-3, size=(len(nearest), dims))
+        init[~known] = init[known][nearest] + jitter * max(float(init[known].std()), 1e-12)
+
+    init -= init.mean(axis=0)
+    std = float(init[:, 0].std())
+    return init / std * scale if std > 0 else init
+
+
+@dataclass
+class ProjectionJob:
+    """A queued or running layout computation"""
+    job_id: str
+    key: ProjectionKey
+    status: str = 'pending'
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    future: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "source": self.key.source,
+            "method": self.key.method,
+            "dimensions": self.key.dimensions,
+            "limit": self.key.limit,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class VectorProjectionService:
+    """
+    Cache of projections computed by background jobs
+
+    ``request`` never computes inline: a fresh layout is returned as-is, a
+    stale one is returned while a refresh job runs, and a missing one only
+    schedules a job. Refresh jobs re-fetch the vectors and skip the
+    reduction entirely when the data version is unchanged; otherwise they
+    reuse the previous layout (PCA basis or t-SNE warm start).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Optional[str], int], VectorSnapshot],
+        project: Callable[[ProjectionKey, VectorSnapshot, Optional[Projection]], Projection],
+        ttl: float = 600.0,
+        max_entries: int = 64,
+        max_workers: int = 1,
+        max_jobs: int = 256
+    ):
+        self.fetch = fetch
+        self.project = project
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_jobs = max_jobs
+
+        self._projections: "OrderedDict[ProjectionKey, Projection]" = OrderedDict()
+        self._jobs: "OrderedDict[str, ProjectionJob]" = OrderedDict()
+        self._active: Dict[ProjectionKey, ProjectionJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vector-projection')
+
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'computed': 0, 'unchanged': 0, 'failed': 0}
+
+    def request(self, key: ProjectionKey) -> Tuple[Optional[Projection], Optional[ProjectionJob]]:
+        """(projection, refresh job) - either may be None, not both"""
+        with self._lock:
+            projection = self._projections.get(key)
+            if projection is not None:
+                self._projections.move_to_end(key)
+                if not self._is_stale(projection):
+                    self.stats['hits'] += 1
+                    return projection, None
+                self.stats['stale_hits'] += 1
+            else:
+                self.stats['misses'] += 1
+            return projection, self._schedule(key)
+
+    def wait(self, job: ProjectionJob, timeout: float) -> Optional[Projection]:
+        """The job's projection if it finishes within ``timeout`` (job errors are raised)"""
+        try:
+            return job.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+
+    def get_job(self, job_id: str) -> Optional[ProjectionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def invalidate(self, source: Optional[str] = None, recompute: bool = True) -> int:
+        """Mark cached layouts stale (all, or one source) and optionally refresh them now"""
+        with self._lock:
+            keys = [k for k in self._projections if source is None or k.source == source]
+            for key in keys:
+                self._projections[key].invalidated = True
+            if recompute:
+                for key in keys:
+                    self._schedule(key)
+        return len(keys)
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _is_stale(self, projection: Projection) -> bool:
+        return projection.invalidated or time.monotonic() - projection.refreshed_at > self.ttl
+
+    def _schedule(self, key: ProjectionKey) -> ProjectionJob:
+        # Caller holds the lock; one job per key at a time
+        job = self._active.get(key)
+        if job is not None:
+            return job
+        job = ProjectionJob(job_id=uuid.uuid4().hex, key=key)
+        self._active[key] = job
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: ProjectionJob) -> Projection:
+        job.status = 'running'
+        try:
+            snapshot = self.fetch(job.key.source, job.key.limit)
+            with self._lock:
+                previous = self._projections.get(job.key)
+
+            if previous is not None and previous.version == snapshot.version:
+                previous.refreshed_at = time.monotonic()
+                previous.invalidated = False
+                projection = previous
+                self.stats['unchanged'] += 1
+            else:
+                started = time.perf_counter()
+                projection = self.project(job.key, snapshot, previous)
+                self.stats['computed'] += 1
+                logger.info(
+                    f"Projected {len(snapshot)} vectors ({job.key.method}, {job.key.dimensions}d, "
+                    f"incremental={projection.incremental}) in {time.perf_counter() - started:.2f}s"
+                )
+
+            with self._lock:
+                self._projections[job.key] = projection
+                self._projections.move_to_end(job.key)
+                while len(self._projections) > self.max_entries:
+                    self._projections.popitem(last=False)
+            job.status = 'done'
+            return projection
+        except Exception as e:
+            self.stats['failed'] += 1
+            job.status = 'failed'
+            job.error = str(e)
+            raise
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+
+_service: Optional[VectorProjectionService] = None
+_service_pid: Optional[int] = None
+_service_lock = threading.Lock()
+
+
+def get_projection_service(factory: Callable[[], VectorProjectionService]) -> VectorProjectionService:
+    """Per-process service (executor threads do not survive a gunicorn fork)"""
+    global _service, _service_pid
+    with _service_lock:
+        if _service is None or _service_pid != os.getpid():
+            _service = factory()
+            _service_pid = os.getpid()
+        return _service
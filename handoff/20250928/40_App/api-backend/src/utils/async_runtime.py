@@ -0,0 +1,139 @@
+import asyncio
+import atexit
+import contextvars
+import inspect
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundEventLoop:
+    """
+    One long-lived asyncio event loop running in a daemon thread
+
+    Sync Flask views submit coroutines with ``run`` and block for the
+    result. Because the loop outlives the request, async clients (OpenAI,
+    httpx, aiohttp) and background tasks created by one request keep their
+    connection pools and keep running for the next.
+    """
+
+    def __init__(self, name: str = "async-runtime"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._shutdown_callbacks: List[Callable[[], Any]] = []
+
+    def start(self) -> "BackgroundEventLoop":
+        if self._thread is not None:
+            return self
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._started.set()
+        self.loop.run_forever()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and wait for its result
+
+        The caller's context variables (e.g. Flask's request context) are
+        copied into the task.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BackgroundEventLoop.run() called from the loop thread; await instead")
+        context = contextvars.copy_context()
+        future = context.run(asyncio.run_coroutine_threadsafe, coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def add_shutdown_callback(self, callback: Callable[[], Any]):
+        """Register a callable (sync or async) run on the loop before it stops
+
+        At interpreter exit concurrent.futures has already shut its thread
+        pools down when this runs, so callbacks must not depend on handing
+        work to an executor (``run_in_executor`` raises RuntimeError).
+        """
+        self._shutdown_callbacks.append(callback)
+
+    def stop(self, timeout: float = 5.0):
+        """Run shutdown callbacks, cancel leftover tasks and stop the thread"""
+        if not self.running:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Async runtime shutdown incomplete: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+        self._thread = None
+
+    async def _shutdown(self):
+        callbacks, self._shutdown_callbacks = self._shutdown_callbacks, []
+        for callback in callbacks:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Async runtime shutdown callback failed: {e}")
+
+        current = asyncio.current_task()
+        pending = [task for task in asyncio.all_tasks() if task is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+_runtime: Optional[BackgroundEventLoop] = None
+_runtime_pid: Optional[int] = None
+_runtime_lock = threading.Lock()
+
+
+def get_async_runtime() -> BackgroundEventLoop:
+    """The process-wide background loop, started on first use
+
+    Threads do not survive fork, so a gunicorn worker forked from a master
+    that already had a runtime gets a fresh one.
+    """
+    global _runtime, _runtime_pid
+    if _runtime is not None and _runtime_pid == os.getpid() and _runtime.running:
+        return _runtime
+    with _runtime_lock:
+        if _runtime is None or _runtime_pid != os.getpid() or not _runtime.running:
+            _runtime = BackgroundEventLoop().start()
+            _runtime_pid = os.getpid()
+        return _runtime
+
+
+def run_async(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the process-wide background loop from sync code"""
+    return get_async_runtime().run(coro, timeout)
+
+
+def shutdown_async_runtime(timeout: float = 5.0):
+    """Stop the background loop (gunicorn worker_exit / interpreter exit)"""
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None and _runtime_pid == os.getpid():
+        runtime.stop(timeout)
+
+
+atexit.register(shutdown_async_runtime)
@@ -0,0 +1,96 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HealthSnapshot:
+    """The last probe result and how old it is"""
+    payload: Dict[str, Any]
+    checked_at: datetime.datetime
+    age_seconds: float
+    stale: bool
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "checked_at": self.checked_at.isoformat(),
+            "age_seconds": round(self.age_seconds, 3),
+            "stale": self.stale
+        }
+
+
+class HealthProber:
+    """
+    Probe dependencies on a fixed interval in a daemon thread
+
+    Health endpoints read ``snapshot()`` instead of touching Postgres and
+    Redis themselves, so dependency probe traffic is one probe per
+    ``interval`` per process however often the load balancer asks. A
+    snapshot older than ``stale_after`` (e.g. the probe is hanging) is
+    flagged as stale.
+    """
+
+    def __init__(self, probe: Callable[[], Dict[str, Any]], interval: float = 10.0,
+                 stale_after: Optional[float] = None, name: str = "health-prober"):
+        self.probe = probe
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self.name = name
+
+        self._snapshot: Optional[tuple] = None
+        self._probe_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.probe_count = 0
+
+    def refresh(self) -> Dict[str, Any]:
+        """Run the probe now and store the result"""
+        with self._probe_lock:
+            try:
+                payload = self.probe()
+            except Exception as e:
+                logger.warning(f"Health probe failed: {e}")
+                payload = {"status": "error", "error": str(e)[:200]}
+            self.probe_count += 1
+            self._snapshot = (payload, datetime.datetime.now(), time.monotonic())
+            return payload
+
+    def snapshot(self) -> HealthSnapshot:
+        """Latest snapshot; probes synchronously only if there has never been one"""
+        self.ensure_running()
+        if self._snapshot is None:
+            with self._start_lock:
+                if self._snapshot is None:
+                    self.refresh()
+        payload, checked_at, monotonic_at = self._snapshot
+        age = time.monotonic() - monotonic_at
+        return HealthSnapshot(payload, checked_at, age, age > self.stale_after)
+
+    def ensure_running(self):
+        """Start the probe thread (again after a fork or if it died)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.refresh()
@@ -0,0 +1,198 @@
+"""Tests for the persistent background event loop behind Flask async routes"""
+import asyncio
+import contextvars
+import statistics
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from aiohttp import web
+from flask import Flask, request
+
+from src.utils.async_runtime import BackgroundEventLoop, get_async_runtime, run_async
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.fixture
+def runtime():
+    loop = BackgroundEventLoop(name="test-runtime").start()
+    yield loop
+    loop.stop()
+
+
+class TestBackgroundEventLoop:
+    """Test BackgroundEventLoop"""
+
+    def test_calls_share_one_loop(self, runtime):
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        assert runtime.run(current_loop()) is runtime.run(current_loop()) is runtime.loop
+
+    def test_exceptions_propagate(self, runtime):
+        async def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            runtime.run(fail())
+
+    def test_caller_context_is_visible(self, runtime):
+        """Test context variables and the Flask request context reach the coroutine"""
+        app = Flask(__name__)
+
+        async def read_context():
+            return request_id.get(), request.args.get("q")
+
+        request_id.set("req-1")
+        with app.test_request_context("/?q=redis"):
+            assert runtime.run(read_context()) == ("req-1", "redis")
+
+    def test_background_tasks_outlive_the_call(self, runtime):
+        """Test a task spawned by one call is still running for the next"""
+        done = asyncio.Event()
+        seen = []
+
+        async def spawn():
+            async def worker():
+                await done.wait()
+                seen.append("finished")
+            return asyncio.get_running_loop().create_task(worker())
+
+        task = runtime.run(spawn())
+
+        async def finish():
+            done.set()
+            await task
+
+        runtime.run(finish())
+        assert seen == ["finished"]
+
+    def test_stop_awaits_shutdown_callbacks(self):
+        runtime = BackgroundEventLoop().start()
+        closed = []
+
+        async def close():
+            closed.append("async")
+
+        runtime.add_shutdown_callback(close)
+        runtime.add_shutdown_callback(lambda: closed.append("sync"))
+        runtime.stop()
+
+        assert closed == ["async", "sync"]
+        assert not runtime.running
+
+    def test_process_runtime_is_reused(self):
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        assert get_async_runtime() is get_async_runtime()
+        assert run_async(current_loop()) is get_async_runtime().loop
+
+
+class TestFAQToolRegistry:
+    """Test long-lived FAQ tools attached to the app"""
+
+    def test_tool_built_once_per_worker(self):
+        from src.main import app
+        from src.routes.faq import get_faq_tool
+
+        tool_class = MagicMock()
+        with app.app_context():
+            assert get_faq_tool(tool_class) is get_faq_tool(tool_class)
+        tool_class.assert_called_once_with()
+
+
+# Local stand-in for the embeddings API the FAQ search tool calls
+async def embeddings(stub_request):
+    payload = await stub_request.json()
+    return web.json_response({"data": [{"embedding": [0.1] * 8}], "input": payload["input"]})
+
+
+class StubSearchTool:
+    """FAQSearchTool lookalike holding an async HTTP client, like AsyncOpenAI"""
+
+    base_url = None
+
+    def __init__(self):
+        self.http = httpx.AsyncClient(base_url=self.base_url)
+
+    async def search(self, query, limit=5, category=None, threshold=0.7):
+        response = await self.http.post("/v1/embeddings", json={"input": query})
+        response.raise_for_status()
+        return {"success": True, "results": [{"id": "faq-1", "question": query, "similarity": 0.9}]}
+
+    async def close(self):
+        await self.http.aclose()
+
+
+def per_request_event_loop(coro):
+    """The previous async_route body: a fresh loop per request"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class TestSearchLatencyBenchmark:
+    """FAQ search latency with and without a persistent loop and reused clients"""
+
+    REQUESTS = 150
+
+    @pytest.fixture
+    def stub_server(self):
+        server_loop = BackgroundEventLoop(name="stub-server").start()
+        stub = web.Application()
+        stub.router.add_post("/v1/embeddings", embeddings)
+        runner = web.AppRunner(stub)
+
+        async def start():
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            return site._server.sockets[0].getsockname()[1]
+
+        port = server_loop.run(start())
+        yield f"http://127.0.0.1:{port}"
+        server_loop.run(runner.cleanup())
+        server_loop.stop()
+
+    def _latencies(self, client, token):
+        latencies = []
+        for i in range(self.REQUESTS):
+            started = time.perf_counter()
+            response = client.get(f"/api/faq/search?q=question{i}", headers={"Authorization": f"Bearer {token}"})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_json()
+        return latencies
+
+    def test_connection_reuse_lowers_search_latency(self, stub_server, user_token):
+        from src.main import app
+
+        StubSearchTool.base_url = stub_server
+        rate_limit_redis = MagicMock()
+        rate_limit_redis.pipeline.return_value.execute.return_value = [None, 1, None, None]
+        app.config["TESTING"] = True
+
+        with patch("src.routes.faq.FAQ_AGENT_AVAILABLE", True), \
+             patch("src.routes.faq.FAQSearchTool", StubSearchTool, create=True), \
+             patch("src.routes.faq.get_cached_result", return_value=None), \
+             patch("src.routes.faq.set_cached_result"), \
+             patch("src.middleware.rate_limit.redis_client", rate_limit_redis), \
+             app.test_client() as client:
+
+            with patch("src.routes.faq.run_async", per_request_event_loop), \
+                 patch("src.routes.faq.get_faq_tool", lambda tool_class: tool_class()):
+                before = self._latencies(client, user_token)
+
+            after = self._latencies(client, user_token)
+            tool = app.extensions["faq_tools"].pop(StubSearchTool)
+            run_async(tool.close())
+
+        before_p50, after_p50 = statistics.median(before), statistics.median(after)
+        print(f"\nFAQ search p50: per-request loop + client {before_p50 * 1000:.2f}ms, "
+              f"persistent loop + reused client {after_p50 * 1000:.2f}ms")
+        assert after_p50 < before_p50
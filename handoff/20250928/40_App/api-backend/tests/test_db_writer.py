@@ -147,6 +147,151 @@ def test_error_handling_graceful_failure(mock_get_client):
     
     print("✅ Error handling works correctly (graceful failure)")
 
+@patch('persistence.db_writer.get_client')
+def test_fetch_user_tenant_id_is_cached(mock_get_client):
+    """Test user->tenant lookups are served from the TTL cache after the first"""
+    from persistence.db_writer import fetch_user_tenant_id, invalidate_tenant_cache
+    
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    query = mock_client.table.return_value.select.return_value.eq.return_value.single.return_value
+    query.execute.return_value.data = {"tenant_id": "tenant-1"}
+    user_id = str(uuid.uuid4())
+    
+    assert [fetch_user_tenant_id(user_id) for _ in range(5)] == ["tenant-1"] * 5
+    assert query.execute.call_count == 1
+    
+    invalidate_tenant_cache(user_id)
+    fetch_user_tenant_id(user_id)
+    assert query.execute.call_count == 2
+
+def test_write_batcher_coalesces_per_task(tmp_path):
+    """Test transitions for one task collapse into one row per flush"""
+    from persistence.write_batcher import TaskWriteBatcher, TransitionJournal
+    
+    writes = []
+    batcher = TaskWriteBatcher(write=writes.append, journal=TransitionJournal(str(tmp_path)), flush_interval=60)
+    
+    for i in range(3):
+        batcher.submit({"task_id": f"t{i}", "status": "running", "started_at": "s"})
+    for i in range(3):
+        batcher.submit({"task_id": f"t{i}", "status": "done", "pr_url": "u", "finished_at": "f"})
+    assert batcher.flush() is True
+    
+    assert len(writes) == 1
+    assert sorted(row["task_id"] for row in writes[0]) == ["t0", "t1", "t2"]
+    assert writes[0][0] == {"task_id": "t0", "status": "done", "started_at": "s", "pr_url": "u", "finished_at": "f"}
+    assert open(batcher.journal.path).read() == ""
+    batcher.stop(flush=False)
+
+def test_write_batcher_groups_by_columns():
+    """Test rows with different columns go in separate bulk upserts"""
+    from persistence.write_batcher import TaskWriteBatcher
+    
+    writes = []
+    batcher = TaskWriteBatcher(write=writes.append, flush_interval=60)
+    batcher.submit({"task_id": "a", "status": "running"})
+    batcher.submit({"task_id": "b", "status": "error", "error_msg": "boom"})
+    batcher.flush()
+    
+    assert sorted(len(rows) for rows in writes) == [1, 1]
+    batcher.stop(flush=False)
+
+def test_write_batcher_flushes_on_size():
+    """Test a full batch is written without waiting for the interval"""
+    import time
+    from persistence.write_batcher import TaskWriteBatcher
+    
+    writes = []
+    batcher = TaskWriteBatcher(write=writes.append, max_batch=3, flush_interval=60)
+    for i in range(3):
+        batcher.submit({"task_id": f"t{i}", "status": "running"})
+    
+    deadline = time.monotonic() + 2
+    while not writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(writes[0]) == 3
+    batcher.stop(flush=False)
+
+def test_write_batcher_keeps_failed_rows(tmp_path):
+    """Test a failed flush stays pending and journaled"""
+    from persistence.write_batcher import TaskWriteBatcher, TransitionJournal
+    
+    write = MagicMock(side_effect=[Exception("db down"), None])
+    batcher = TaskWriteBatcher(write=write, journal=TransitionJournal(str(tmp_path)), flush_interval=60)
+    batcher.submit({"task_id": "t1", "status": "done"})
+    
+    assert batcher.flush() is False
+    assert batcher.pending() == 1
+    assert "t1" in open(batcher.journal.path).read()
+    
+    assert batcher.flush() is True
+    assert batcher.pending() == 0
+    batcher.stop(flush=False)
+
+def test_journal_replayed_after_crash(tmp_path):
+    """Test transitions journaled by a dead process are recovered and written"""
+    import json
+    from persistence.write_batcher import TaskWriteBatcher, TransitionJournal
+    
+    dead_pid = 2 ** 22 + 12345
+    with open(tmp_path / f"agent_tasks.{dead_pid}.jsonl", "w") as f:
+        f.write(json.dumps({"task_id": "t1", "status": "running", "started_at": "s"}) + "\n")
+        f.write(json.dumps({"task_id": "t1", "status": "done", "finished_at": "f"}) + "\n")
+        f.write('{"task_id": "t2", "sta')  # torn write
+    
+    writes = []
+    batcher = TaskWriteBatcher(write=writes.append, journal=TransitionJournal(str(tmp_path)), flush_interval=60)
+    
+    assert batcher.stats["recovered"] == 2
+    batcher.flush()
+    assert writes == [[{"task_id": "t1", "status": "done", "started_at": "s", "finished_at": "f"}]]
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(batcher.journal.path)]
+    batcher.stop(flush=False)
+
+def test_journal_with_own_pid_replayed(tmp_path):
+    """Test a journal left by an earlier process with our pid (restarted PID 1) is not truncated"""
+    import json
+    from persistence.write_batcher import TaskWriteBatcher, TransitionJournal
+    
+    with open(tmp_path / f"agent_tasks.{os.getpid()}.jsonl", "w") as f:
+        f.write(json.dumps({"task_id": "t1", "status": "done", "finished_at": "f"}) + "\n")
+    
+    writes = []
+    batcher = TaskWriteBatcher(write=writes.append, journal=TransitionJournal(str(tmp_path)), flush_interval=60)
+    
+    assert batcher.stats["recovered"] == 1
+    assert batcher.flush() is True
+    assert writes == [[{"task_id": "t1", "status": "done", "finished_at": "f"}]]
+    assert open(batcher.journal.path).read() == ""
+    batcher.stop(flush=False)
+
+@patch('persistence.db_writer.get_client')
+def test_write_behind_upserts(mock_get_client, tmp_path, monkeypatch):
+    """Test worker transitions are batched when write-behind is on but queued is not"""
+    from persistence import db_writer
+    
+    monkeypatch.setenv("AGENT_TASKS_WRITE_BEHIND", "true")
+    monkeypatch.setenv("AGENT_TASKS_JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setenv("AGENT_TASKS_FLUSH_INTERVAL", "60")
+    monkeypatch.setattr(db_writer, "_write_batcher", None)
+    upsert = mock_get_client.return_value.table.return_value.upsert
+    task_id = str(uuid.uuid4())
+    
+    assert db_writer.upsert_task_queued(task_id, task_id, "Q") is True
+    assert upsert.call_count == 1
+    
+    assert db_writer.upsert_task_running(task_id, task_id) is True
+    assert db_writer.upsert_task_done(task_id, task_id, "https://example.com/pr/1") is True
+    assert upsert.call_count == 1
+    
+    assert db_writer.flush_task_writes() is True
+    rows = upsert.call_args[0][0]
+    assert len(rows) == 1 and rows[0]["status"] == "done" and "started_at" in rows[0]
+    db_writer._write_batcher.stop(flush=False)
+    db_writer._write_batcher.journal.close()
+    monkeypatch.setattr(db_writer, "_write_batcher", None)
+
 if __name__ == "__main__":
     print("🧪 Running DB Writer Unit Tests")
     print("=" * 50)
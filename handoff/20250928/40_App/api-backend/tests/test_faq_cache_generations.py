@@ -0,0 +1,183 @@
+"""Tests for generation-based FAQ cache invalidation and the L1 item cache"""
+import json
+import time
+
+import fakeredis
+import pytest
+from unittest.mock import patch
+
+from src.routes import faq
+from src.utils.local_cache import LocalTTLCache
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def fake_redis(redis_server):
+    """Fresh fake Redis plus clean module-level cache state"""
+    client = fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+    generations = {namespace: 0 for namespace in faq.CACHE_GENERATION_NAMESPACES}
+    with patch.object(faq, 'redis_client', client), \
+         patch.object(faq, '_cache_generations', generations), \
+         patch.object(faq, '_item_cache', LocalTTLCache()):
+        yield client
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestLocalTTLCache:
+    """Test the in-process L1 cache"""
+
+    def test_lru_eviction(self):
+        cache = LocalTTLCache(max_entries=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.stats['evictions'] == 1
+
+    def test_entries_expire(self):
+        cache = LocalTTLCache(ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+
+class TestCacheGenerations:
+    """Test namespace generation counters"""
+
+    def test_bump_retires_namespace_without_scan(self, fake_redis):
+        """Test one INCR moves every search key to a new generation"""
+        before = faq.generate_cache_key("search", q="redis")
+        faq.set_cached_result(before, {"results": []})
+
+        with patch.object(fake_redis, 'scan_iter', side_effect=AssertionError("no SCAN on writes")):
+            faq.bump_cache_generation("search")
+
+        after = faq.generate_cache_key("search", q="redis")
+        assert before != after
+        assert after.startswith("faq:search:g1:")
+        assert faq.get_cached_result(after) is None
+        assert fake_redis.ttl(before) > 0
+        assert fake_redis.get(faq.generation_key("search")) == "1"
+
+    def test_unversioned_namespaces_unchanged(self, fake_redis):
+        """Test item keys carry no generation"""
+        faq.bump_cache_generation("search")
+
+        assert faq.generate_cache_key("item", id="faq-1") == faq.generate_cache_key("item", id="faq-1")
+        assert ":g" not in faq.generate_cache_key("item", id="faq-1")
+
+    def test_stale_message_does_not_go_backwards(self, fake_redis):
+        """Test an out-of-order older generation is checked against Redis, not adopted"""
+        fake_redis.set(faq.generation_key("categories"), 7)
+        faq.sync_cache_generations()
+        faq.apply_cache_invalidation(json.dumps({"generations": {"categories": 3}}))
+
+        assert faq.generate_cache_key("categories").startswith("faq:categories:g7:")
+
+    def test_resyncs_after_redis_flush(self, fake_redis):
+        """Test a worker pinned above a reset counter follows it back down"""
+        fake_redis.set(faq.generation_key("search"), 7)
+        faq.sync_cache_generations()
+        fake_redis.flushall()
+
+        faq.bump_cache_generation("search")
+        assert faq.generate_cache_key("search", q="x").startswith("faq:search:g1:")
+
+        faq._cache_generations["search"] = 7
+        faq.apply_cache_invalidation(json.dumps({"generations": {"search": 1}}))
+        assert faq._cache_generations["search"] == 1
+
+        fake_redis.flushall()
+        faq.sync_cache_generations()
+        assert faq._cache_generations["search"] == 0
+
+    def test_worker_start_reads_current_generation(self, fake_redis):
+        """Test a freshly started worker uses the shared generation before its listener subscribes"""
+        fake_redis.set(faq.generation_key("search"), 5)
+
+        with patch.object(faq, 'CacheInvalidationListener') as listener_class, \
+             patch.object(faq, '_invalidation_listener', None):
+            faq.start_cache_invalidation_listener()
+
+        listener_class.return_value.start.assert_called_once_with()
+        assert faq._cache_generations["search"] == 5
+
+
+class TestItemL1Cache:
+    """Test the L1 cache for faq:item:* keys"""
+
+    def test_item_read_served_from_l1(self, fake_redis):
+        """Test a second read of an item does not touch Redis"""
+        key = faq.generate_cache_key("item", id="faq-1")
+        fake_redis.set(key, json.dumps({"faq": {"id": "faq-1"}}), ex=60)
+
+        assert faq.get_cached_result(key) == {"faq": {"id": "faq-1"}}
+        with patch.object(fake_redis, 'get', side_effect=AssertionError("L1 miss")):
+            assert faq.get_cached_result(key) == {"faq": {"id": "faq-1"}}
+
+    def test_search_results_bypass_l1(self, fake_redis):
+        key = faq.generate_cache_key("search", q="redis")
+        faq.set_cached_result(key, {"results": []})
+
+        assert len(faq._item_cache) == 0
+
+    def test_invalidate_item_evicts_everywhere(self, fake_redis):
+        key = faq.generate_cache_key("item", id="faq-1")
+        faq.set_cached_result(key, {"faq": {"id": "faq-1"}})
+
+        faq.invalidate_cached_item("faq-1")
+
+        assert fake_redis.get(key) is None
+        assert faq.get_cached_result(key) is None
+
+
+class TestInvalidationListener:
+    """Test cross-worker invalidation over pub/sub"""
+
+    def test_listener_applies_other_workers_messages(self, fake_redis, redis_server):
+        """Test a bump and an eviction published by another worker reach this one"""
+        key = faq.generate_cache_key("item", id="faq-1")
+        listener = faq.CacheInvalidationListener(fake_redis, poll_timeout=0.01)
+        listener.start()
+        try:
+            assert listener.subscribed.wait(2)
+            faq._item_cache.set(key, {"faq": {"id": "faq-1"}})
+
+            other_worker = fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+            other_worker.incr(faq.generation_key("search"))
+            other_worker.publish(faq.CACHE_INVALIDATION_CHANNEL, json.dumps({
+                "generations": {"search": 1}, "evict": [key]
+            }))
+
+            assert wait_for(lambda: faq._cache_generations["search"] == 1)
+            assert wait_for(lambda: faq._item_cache.get(key) is None)
+        finally:
+            listener.stop(timeout=2)
+
+    def test_listener_resyncs_on_subscribe(self, fake_redis):
+        """Test bumps missed while disconnected are picked up on (re)subscribe"""
+        fake_redis.set(faq.generation_key("search"), 4)
+        listener = faq.CacheInvalidationListener(fake_redis, poll_timeout=0.01)
+        listener.start()
+        try:
+            assert listener.subscribed.wait(2)
+            assert faq.generate_cache_key("search", q="x").startswith("faq:search:g4:")
+        finally:
+            listener.stop(timeout=2)
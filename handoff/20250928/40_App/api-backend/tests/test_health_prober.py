@@ -0,0 +1,120 @@
+"""Tests for the background health prober and liveness/readiness endpoints"""
+import importlib
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.utils.health_prober import HealthProber
+
+HEALTHY = {"status": "healthy", "database": "connected", "redis": {"status": "connected"}}
+DEGRADED = {"status": "degraded", "database": "error: down", "redis": {"status": "connected"}}
+
+
+@pytest.fixture
+def main_module():
+    # Other tests reload src.main; use whichever module is current
+    return importlib.import_module('src.main')
+
+
+@pytest.fixture
+def client(main_module):
+    main_module.app.config['TESTING'] = True
+    with main_module.app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def prober(main_module):
+    """Install a prober with a counting probe in place of the app's"""
+    probe = MagicMock(return_value=dict(HEALTHY))
+    prober = HealthProber(probe, interval=60, stale_after=60)
+    with patch.object(main_module, 'health_prober', prober):
+        yield prober
+    prober.stop(timeout=1)
+
+
+class TestHealthProber:
+    """Test HealthProber"""
+
+    def test_snapshot_probes_once_then_serves_cache(self):
+        probe = MagicMock(return_value=HEALTHY)
+        prober = HealthProber(probe, interval=60)
+
+        for _ in range(100):
+            snapshot = prober.snapshot()
+
+        assert probe.call_count == 1
+        assert snapshot.payload == HEALTHY
+        assert snapshot.stale is False
+        prober.stop(timeout=1)
+
+    def test_background_refresh(self):
+        probe = MagicMock(return_value=HEALTHY)
+        prober = HealthProber(probe, interval=0.02)
+        prober.snapshot()
+        time.sleep(0.15)
+        prober.stop(timeout=1)
+
+        assert 3 <= probe.call_count <= 10
+
+    def test_probe_errors_become_error_payload(self):
+        prober = HealthProber(MagicMock(side_effect=RuntimeError("boom")), interval=60)
+
+        snapshot = prober.snapshot()
+
+        assert snapshot.payload["status"] == "error"
+        assert "boom" in snapshot.payload["error"]
+        prober.stop(timeout=1)
+
+    def test_old_snapshot_is_stale(self):
+        prober = HealthProber(MagicMock(return_value=HEALTHY), interval=60, stale_after=0.01)
+        prober.snapshot()
+        time.sleep(0.02)
+
+        assert prober.snapshot().stale is True
+        prober.stop(timeout=1)
+
+
+class TestHealthEndpoints:
+    """Test health endpoints are served from the snapshot"""
+
+    def test_probe_frequency_does_not_reach_dependencies(self, client, prober):
+        for _ in range(25):
+            for endpoint in ['/health', '/healthz', '/api/health', '/api/healthz', '/readyz']:
+                assert client.get(endpoint).status_code == 200
+
+        assert prober.probe.call_count == 1
+
+    def test_health_includes_staleness_metadata(self, client, prober):
+        data = client.get('/health').get_json()
+
+        assert data['status'] == 'healthy'
+        assert data['stale'] is False
+        assert 'checked_at' in data and 'age_seconds' in data
+
+    def test_livez_never_probes(self, client, prober):
+        response = client.get('/livez')
+
+        assert response.status_code == 200
+        assert response.get_json() == {"status": "alive"}
+        assert prober.probe.call_count == 0
+
+    def test_readyz_not_ready_when_degraded(self, client, prober):
+        prober.probe.return_value = dict(DEGRADED)
+
+        response = client.get('/readyz')
+
+        assert response.status_code == 503
+        assert response.get_json()['status'] == 'not_ready'
+        assert response.get_json()['checks']['database'] == 'error: down'
+
+    def test_readyz_not_ready_when_stale(self, client, prober):
+        prober.stale_after = 0.01
+        client.get('/readyz')
+        time.sleep(0.02)
+
+        response = client.get('/readyz')
+
+        assert response.status_code == 503
+        assert response.get_json()['stale'] is True
@@ -238,6 +238,18 @@ class TestPhase7Integration:
         
         data = response.get_json()
         assert 'error' in data or isinstance(data, dict)
+    
+    def test_get_resilience_metrics_prometheus(self, client):
+        """Test /api/phase7/monitoring/metrics?format=prometheus serves breaker counters as text"""
+        from resilience_patterns import resilience_manager
+        resilience_manager.get_circuit_breaker('prometheus-test')
+        
+        response = client.get('/api/phase7/monitoring/metrics?format=prometheus')
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        assert 'circuit_breaker_total_requests_total{service="prometheus-test"} 0' in body
 
 
 class TestSentryIntegration:
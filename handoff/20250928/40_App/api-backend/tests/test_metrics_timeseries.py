@@ -0,0 +1,124 @@
+"""Tests for the columnar metric time series behind the monitoring dashboard"""
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from src.services.metrics_timeseries import MetricTimeSeries, RollupLevel
+from src.services.monitoring_dashboard import DashboardMetrics, MonitoringDashboard
+
+METRICS = ('error_rate', 'total_requests')
+LEVELS = (('raw', 0, 10), ('1m', 60, 10), ('5m', 300, 10), ('1h', 3600, 10))
+
+
+def snapshot(timestamp, error_rate=0.01, total_requests=100):
+    return DashboardMetrics(
+        timestamp=timestamp,
+        circuit_breakers={'api': {'state': 'closed', 'total_requests': total_requests, 'failed_requests': 1}},
+        bulkheads={},
+        saga_orchestrator={'active_sagas': 1},
+        storage_stats={},
+        system_health={'overall_status': 'healthy', 'error_rate': error_rate,
+                       'open_circuit_breakers': 0, 'rejected_requests': 0}
+    )
+
+
+class TestRollupLevel:
+    """Test RollupLevel"""
+
+    def test_samples_fold_into_bucket(self):
+        level = RollupLevel('1m', 60, 4, METRICS)
+        for t, v in [(0, 1.0), (30, 3.0), (59, 2.0), (60, 10.0)]:
+            level.add(t, np.array([v, 0.0]))
+
+        slots = level.slots(0, 120)
+        assert level.times[slots].tolist() == [0, 60]
+        assert level.counts[slots].tolist() == [3, 1]
+        assert level.sums[slots[0], 0] == 6.0
+        assert (level.mins[slots[0], 0], level.maxs[slots[0], 0]) == (1.0, 3.0)
+
+    def test_ring_overwrites_oldest(self):
+        level = RollupLevel('raw', 0, 4, METRICS)
+        nbytes = level.nbytes
+        for t in range(10):
+            level.add(float(t), np.array([t, t]))
+
+        assert level.size == 4
+        assert level.oldest == 6.0
+        assert level.times[level.slots(0, 100)].tolist() == [6, 7, 8, 9]
+        assert level.nbytes == nbytes
+        assert not level.covers(5.0) and level.covers(6.0)
+
+
+class TestMetricTimeSeries:
+    """Test range queries read one level"""
+
+    def test_query_picks_finest_level_that_fits(self):
+        series = MetricTimeSeries(METRICS, levels=LEVELS)
+        for t in range(0, 3600, 30):
+            series.append(float(t), {'error_rate': 0.1, 'total_requests': t})
+
+        assert series.query(3300, 3599, max_points=10).level == 'raw'
+        assert series.query(3000, 3599, max_points=10).level == '1m'
+        assert series.query(1000, 3599, max_points=10).level == '5m'
+
+        window = series.query(1000, 3599, max_points=10)
+        assert window.counts.sum() == 3600 // 30 - 1000 // 300 * 10
+        np.testing.assert_allclose(window.means['error_rate'], 0.1)
+
+    def test_to_dict(self):
+        series = MetricTimeSeries(METRICS, levels=LEVELS)
+        series.append(60.0, {'error_rate': 0.5})
+
+        data = series.query(0, 120).to_dict()
+
+        assert data['level'] == 'raw'
+        assert data['timestamps'] == [60.0]
+        assert data['metrics']['error_rate']['mean'] == [0.5]
+        assert data['metrics']['total_requests']['max'] == [0.0]
+
+
+class TestDashboardSeries:
+    """Test MonitoringDashboard records into and reads from the series"""
+
+    def test_trends_from_series(self):
+        dashboard = MonitoringDashboard()
+        now = datetime.now()
+        for i in range(30):
+            dashboard.record(snapshot(now - timedelta(minutes=30 - i), error_rate=0.01 + i * 0.01,
+                                      total_requests=100))
+
+        data = dashboard.get_dashboard_data(hours=1)
+
+        assert data['trends']['error_rate_trend'] == 'increasing'
+        assert data['trends']['request_volume_trend'] == 'stable'
+        assert data['system_health']['error_rate'] == pytest.approx(0.30)
+
+    def test_metric_series(self):
+        dashboard = MonitoringDashboard()
+        dashboard.record(snapshot(datetime.now() - timedelta(seconds=5), total_requests=250))
+
+        series = dashboard.get_metric_series(hours=1)
+
+        assert series['level'] == 'raw'
+        assert series['metrics']['total_requests']['mean'] == [250.0]
+        assert series['metrics']['active_sagas']['mean'] == [1.0]
+
+    @pytest.mark.asyncio
+    async def test_state_manager_is_reused(self):
+        dashboard = MonitoringDashboard()
+        resilience = Mock()
+        resilience.resilience_manager.get_all_metrics.return_value = {'circuit_breakers': {}, 'bulkheads': {}}
+        saga = Mock()
+        saga.saga_orchestrator.get_orchestrator_metrics.return_value = {'active_sagas': 0}
+        state_manager_class = Mock()
+        state_manager_class.return_value.get_storage_stats.return_value = {}
+
+        with patch.dict('sys.modules', {'resilience_patterns': resilience, 'saga_orchestrator': saga}), \
+             patch('src.persistence.state_manager.PersistentStateManager', state_manager_class):
+            for _ in range(5):
+                assert await dashboard.collect_metrics() is not None
+
+        state_manager_class.assert_called_once_with()
+        assert len(dashboard.series.query(0, datetime.now().timestamp() + 1)) == 5
@@ -0,0 +1,231 @@
+"""Tests for queued report jobs, cached results and report downloads"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+from redis import Redis
+from rq import Queue
+from rq.serializers import JSONSerializer
+
+from src.services.report_generator import ReportData, ReportGenerator
+from src.services.report_jobs import ReportJobs, data_version
+
+API_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fresh interpreter with only the api-backend root importable, like the orchestrator RQ worker
+WORKER_SCRIPT = """
+import sys
+from redis import Redis
+from rq import Queue, Worker
+from rq.serializers import JSONSerializer
+from src.services.report_jobs import data_version
+
+connection = Redis(port=int(sys.argv[1]))
+queue = Queue('orchestrator', connection=connection, serializer=JSONSerializer())
+Worker([queue], connection=connection, serializer=JSONSerializer).work(burst=True)
+print(data_version('performance', '24h'))
+"""
+
+
+def make_jobs(tmp_path, is_async=False, version='v1'):
+    queue = Queue('orchestrator', connection=fakeredis.FakeRedis(), serializer=JSONSerializer(), is_async=is_async)
+    return ReportJobs(queue, storage_dir=str(tmp_path), version=lambda report_type, time_range: version)
+
+
+def fake_pdf(report, report_type, filepath=None):
+    with open(filepath, 'wb') as f:
+        f.write(b'%PDF-1.4 ' + b'x' * 2048)
+    return filepath
+
+
+class TestReportData:
+    """Test report serialization helpers"""
+
+    def test_json_round_trip(self):
+        report = ReportData(title='t', generated_at=datetime(2025, 1, 2, 3, 4, 5), time_range='24h',
+                            metrics={'when': datetime(2025, 1, 1), 'n': 1}, charts=[], summary={'s': 'ok'})
+
+        data = json.loads(report.to_json())
+
+        assert data['generated_at'] == '2025-01-02T03:04:05'
+        assert data['metrics']['when'] == '2025-01-01T00:00:00'
+        assert ReportData.from_dict(data).generated_at == report.generated_at
+
+    def test_iter_csv_matches_export(self):
+        generator = ReportGenerator()
+        report = generator.generate_report('financial', '24h')
+
+        rows = list(generator.iter_csv(report))
+
+        assert len(rows) > 5 and all(row.endswith('\r\n') for row in rows)
+        assert ''.join(rows) == generator.export_csv(report)
+
+
+class TestReportJobs:
+    """Test ReportJobs"""
+
+    def test_finished_job_is_the_cache(self, tmp_path):
+        jobs = make_jobs(tmp_path)
+
+        first = jobs.submit('financial', '24h')
+        with patch('src.services.report_generator.ReportGenerator.generate_report',
+                   side_effect=AssertionError('regenerated')):
+            second = jobs.submit('financial', '24h')
+
+        assert first.id == second.id
+        assert jobs.status(second)['status'] == 'finished'
+        assert json.loads(jobs.result_json(second))['time_range'] == '24h'
+
+    def test_new_data_version_is_a_new_job(self, tmp_path):
+        jobs = make_jobs(tmp_path)
+        first = jobs.submit('financial', '24h')
+
+        jobs.version = lambda report_type, time_range: 'v2'
+
+        assert jobs.submit('financial', '24h').id != first.id
+        assert jobs.submit('financial', '7d').id != first.id
+
+    def test_pending_requests_share_one_job(self, tmp_path):
+        jobs = make_jobs(tmp_path, is_async=True)
+
+        ids = {jobs.submit('performance', '24h').id for _ in range(5)}
+
+        assert len(ids) == 1
+        assert jobs.queue.count == 1
+        assert jobs.result_json(jobs.fetch(ids.pop())) is None
+
+    def test_invalid_requests(self, tmp_path):
+        jobs = make_jobs(tmp_path)
+
+        with pytest.raises(ValueError):
+            jobs.submit('nope', '24h')
+        with pytest.raises(ValueError):
+            jobs.submit('financial', 'xh')
+        assert jobs.fetch('not-a-report') is None
+
+    def test_pdf_rendered_once(self, tmp_path):
+        jobs = make_jobs(tmp_path)
+        job = jobs.submit('financial', '24h')
+        generator = MagicMock()
+        generator.export_pdf.side_effect = fake_pdf
+
+        paths = {jobs.pdf_path(job, generator) for _ in range(3)}
+
+        assert len(paths) == 1
+        assert generator.export_pdf.call_count == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == [f'{job.id}.pdf']
+
+
+class TestReportJobWorkerProcess:
+    """Test jobs run by a worker in another process"""
+
+    @pytest.fixture
+    def redis_port(self):
+        server = fakeredis.TcpFakeServer(('127.0.0.1', 0), server_type='redis')
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server.server_address[1]
+        server.shutdown()
+        server.server_close()
+
+    def test_worker_reports_on_submitted_snapshot(self, tmp_path, redis_port):
+        connection = Redis(port=redis_port)
+        queue = Queue('orchestrator', connection=connection, serializer=JSONSerializer())
+        snapshot = {
+            'system_health': {'error_rate': 0.2, 'avg_latency': 321.0, 'total_requests': 1000,
+                              'successful_requests': 800},
+            'circuit_breakers': [],
+            'bulkheads': []
+        }
+        jobs = ReportJobs(queue, storage_dir=str(tmp_path), snapshot=lambda time_range: snapshot)
+        before = data_version('performance', '24h')
+        job = jobs.submit('performance', '24h')
+
+        worker = subprocess.run(
+            [sys.executable, '-c', WORKER_SCRIPT, str(redis_port)],
+            cwd=str(tmp_path), env={**os.environ, 'PYTHONPATH': API_BACKEND_ROOT},
+            capture_output=True, text=True, timeout=60
+        )
+        assert worker.returncode == 0, worker.stderr
+
+        job.refresh()
+        report = jobs.report(job)
+        assert report.metrics['error_rate'] == 0.2
+        assert report.metrics['avg_response_time'] == 321.0
+        assert report.metrics['total_requests'] == 1000
+        assert report.summary.get('status') != 'error'
+        # Another process derives the same version, so it finds the same job
+        assert worker.stdout.split()[-1] in (before, data_version('performance', '24h'))
+
+
+class TestReportJobEndpoints:
+    """Test /api/reports/jobs"""
+
+    @pytest.fixture
+    def main_module(self):
+        return importlib.import_module('src.main')
+
+    @pytest.fixture
+    def jobs(self, main_module, tmp_path):
+        jobs = make_jobs(tmp_path)
+        with patch.object(main_module, 'get_report_jobs', return_value=jobs):
+            yield jobs
+
+    @pytest.fixture
+    def client(self, main_module):
+        main_module.app.config['TESTING'] = True
+        with main_module.app.test_client() as client:
+            yield client
+
+    def test_create_and_download(self, client, jobs):
+        response = client.post('/api/reports/jobs', json={'type': 'financial', 'time_range': '24h'})
+        assert response.status_code == 200
+        job = response.get_json()
+        assert job['status'] == 'finished'
+
+        assert client.get(job['links']['status']).get_json()['job_id'] == job['job_id']
+
+        report = client.get(job['links']['download'])
+        assert report.mimetype == 'application/json'
+        assert report.get_json()['metrics']['total_cost'] == 145.67
+
+        csv_response = client.get(job['links']['download'] + '?format=csv')
+        assert csv_response.is_streamed
+        assert csv_response.mimetype == 'text/csv'
+        assert 'total_cost,145.67' in csv_response.get_data(as_text=True)
+
+    def test_pending_job(self, client, main_module, tmp_path):
+        jobs = make_jobs(tmp_path, is_async=True)
+        with patch.object(main_module, 'get_report_jobs', return_value=jobs):
+            response = client.post('/api/reports/jobs', json={'type': 'performance', 'time_range': '1h'})
+            assert response.status_code == 202
+            job_id = response.get_json()['job_id']
+
+            assert client.get(f'/api/reports/jobs/{job_id}/download').status_code == 409
+
+    def test_pdf_supports_ranges(self, client, jobs):
+        job_id = client.post('/api/reports/jobs', json={'type': 'financial'}).get_json()['job_id']
+
+        with patch.object(ReportGenerator, 'export_pdf', side_effect=fake_pdf, autospec=False) as export:
+            full = client.get(f'/api/reports/jobs/{job_id}/download?format=pdf')
+            partial = client.get(f'/api/reports/jobs/{job_id}/download?format=pdf',
+                                 headers={'Range': 'bytes=0-99'})
+
+        assert full.status_code == 200 and full.data.startswith(b'%PDF')
+        assert partial.status_code == 206
+        assert partial.data == full.data[:100]
+        assert export.call_count == 1
+        full.close()
+        partial.close()
+
+    def test_errors(self, client, jobs):
+        assert client.post('/api/reports/jobs', json={'type': 'nope'}).status_code == 400
+        assert client.get('/api/reports/jobs/report-missing').status_code == 404
+        assert client.get('/api/reports/jobs/report-missing/download').status_code == 404
@@ -0,0 +1,267 @@
+"""Tests for cached background vector projections"""
+import json
+import struct
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.main import app
+from src.middleware.auth_middleware import create_admin_token
+from src.routes import vectors
+from src.services.vector_projection import (
+    Projection, ProjectionKey, ProjectionUnavailable, VectorProjectionService, VectorSnapshot,
+    decode_vectors, warm_start_layout
+)
+
+
+def pgvector_binary(values):
+    """Encode like pgvector's vector_send"""
+    return struct.pack('>hh', len(values), 0) + np.asarray(values, dtype='>f4').tobytes()
+
+
+def snapshot(ids, dim=16, seed=0, query_count=1):
+    rng = np.random.default_rng(seed)
+    metadata = [{'id': i, 'source': 'docs', 'category': 'c', 'text': str(i), 'query_count': query_count,
+                 'created_at': None} for i in ids]
+    return VectorSnapshot(ids=list(ids), embeddings=rng.normal(size=(len(ids), dim)).astype(np.float32),
+                          metadata=metadata)
+
+
+def fake_projection(key, snap, previous):
+    return Projection(key=key, version=snap.version, ids=snap.ids, coords=np.zeros((len(snap), key.dimensions)),
+                      figure='{}', incremental=previous is not None)
+
+
+KEY = ProjectionKey(None, 'pca', 2, 100)
+
+
+class TestDecodeVectors:
+    """Test pgvector binary decoding"""
+
+    def test_binary_rows_match_values(self):
+        rows = [[1.5, -2.0, 3.25], [0.0, 4.0, -1.0]]
+
+        decoded = decode_vectors([memoryview(pgvector_binary(r)) for r in rows])
+
+        assert decoded.dtype == np.float32
+        np.testing.assert_array_equal(decoded, np.array(rows, dtype=np.float32))
+
+    def test_mixed_dimensions_and_lists(self):
+        decoded = decode_vectors([pgvector_binary([1.0, 2.0]), pgvector_binary([3.0, 4.0])])
+        assert decoded.shape == (2, 2)
+        assert decode_vectors([[1, 2], [3, 4]]).tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+class TestVectorProjectionService:
+    """Test caching, refresh jobs and data versions"""
+
+    def _service(self, snapshots, project=fake_projection, **kwargs):
+        fetch = MagicMock(side_effect=lambda source, limit: snapshots[0])
+        project = MagicMock(side_effect=project)
+        service = VectorProjectionService(fetch=fetch, project=project, **kwargs)
+        return service, fetch, project
+
+    def test_miss_then_hit(self):
+        service, fetch, project = self._service([snapshot(range(5))])
+
+        projection, job = service.request(KEY)
+        assert projection is None
+        projection = service.wait(job, 5)
+
+        cached, refresh = service.request(KEY)
+        assert cached is projection and refresh is None
+        assert fetch.call_count == project.call_count == 1
+        service.shutdown()
+
+    def test_stale_layout_served_while_refreshing(self):
+        snapshots = [snapshot(range(5))]
+        service, fetch, project = self._service(snapshots)
+        first = service.wait(service.request(KEY)[1], 5)
+
+        service.invalidate(recompute=False)
+        snapshots[0] = snapshot(range(6))
+        stale, job = service.request(KEY)
+        assert stale is first and job is not None
+
+        refreshed = service.wait(job, 5)
+        assert refreshed.version != first.version
+        assert project.call_args[0][2] is first
+        service.shutdown()
+
+    def test_unchanged_data_skips_projection(self):
+        service, fetch, project = self._service([snapshot(range(5))], ttl=0)
+        service.wait(service.request(KEY)[1], 5)
+
+        stale, job = service.request(KEY)
+        service.wait(job, 5)
+
+        assert fetch.call_count == 2
+        assert project.call_count == 1
+        assert service.stats['unchanged'] == 1
+        service.shutdown()
+
+    def test_concurrent_requests_share_one_job(self):
+        release = threading.Event()
+
+        def slow_projection(key, snap, previous):
+            release.wait(5)
+            return fake_projection(key, snap, previous)
+
+        service, fetch, project = self._service([snapshot(range(5))], project=slow_projection)
+        jobs = {service.request(KEY)[1].job_id for _ in range(10)}
+        release.set()
+
+        assert len(jobs) == 1
+        assert service.get_job(jobs.pop()) is not None
+        service.shutdown(wait=True)
+        assert project.call_count == 1
+
+    def test_errors_are_not_cached(self):
+        fetch = MagicMock(side_effect=ProjectionUnavailable('no_vectors'))
+        service = VectorProjectionService(fetch=fetch, project=fake_projection)
+
+        for _ in range(2):
+            _, job = service.request(KEY)
+            with pytest.raises(ProjectionUnavailable):
+                service.wait(job, 5)
+
+        assert fetch.call_count == 2
+        assert job.status == 'failed'
+        service.shutdown()
+
+
+class TestIncrementalLayouts:
+    """Test layouts are reused when most vectors are unchanged"""
+
+    def test_warm_start_keeps_known_and_places_new_near_neighbour(self):
+        old = snapshot(['a', 'b', 'c'])
+        previous = Projection(key=KEY, version='v1', ids=['a', 'b', 'c'],
+                              coords=np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]]), figure='{}')
+        embeddings = np.vstack([old.embeddings, old.embeddings[1] * 1.01])
+        new = VectorSnapshot(ids=['a', 'b', 'c', 'd'], embeddings=embeddings,
+                             metadata=old.metadata + [dict(old.metadata[0], id='d')])
+
+        init = warm_start_layout(new, previous)
+
+        assert init.shape == (4, 2)
+        assert init[:, 0].std() == pytest.approx(1e-4)
+        assert np.linalg.norm(init[3] - init[1]) < np.linalg.norm(init[3] - init[0]) / 100
+
+    def test_pca_reuses_fitted_basis(self):
+        key = ProjectionKey(None, 'pca', 2, 100)
+        first = vectors.compute_projection(key, snapshot(range(40), seed=1), None)
+
+        grown = snapshot(list(range(40)) + [40, 41], seed=1)
+        second = vectors.compute_projection(key, grown, first)
+
+        assert not first.incremental and second.incremental
+        assert second.model is first.model
+        np.testing.assert_allclose(second.coords[:40], first.coords, rtol=1e-4, atol=1e-4)
+
+    @pytest.mark.parametrize('iterations_kwarg', ['max_iter', 'n_iter'])
+    def test_tsne_warm_start_iterations(self, iterations_kwarg):
+        """Test the warm start caps iterations on scikit-learn before and after 1.5"""
+        calls = []
+
+        class NewTSNE:
+            def __init__(self, n_components=2, perplexity=30.0, init='pca', random_state=None, max_iter=None):
+                calls.append(max_iter)
+
+            def fit_transform(self, x):
+                return np.zeros((len(x), 2))
+
+        class OldTSNE(NewTSNE):
+            def __init__(self, n_components=2, perplexity=30.0, init='pca', random_state=None, n_iter=None):
+                calls.append(n_iter)
+
+        key = ProjectionKey(None, 'tsne', 2, 100)
+        with patch('src.routes.vectors.TSNE', NewTSNE if iterations_kwarg == 'max_iter' else OldTSNE):
+            previous = vectors.compute_projection(key, snapshot(range(40)), None)
+            current = vectors.compute_projection(key, snapshot(list(range(40)) + [40]), previous)
+
+        assert current.incremental
+        assert calls == [None, vectors.TSNE_WARM_START_ITERATIONS]
+
+class TestVisualizeEndpoint:
+    """Test /api/vectors/visualize serves from the projection cache"""
+
+    @pytest.fixture
+    def client(self):
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def headers(self):
+        return {'Authorization': f'Bearer {create_admin_token()}'}
+
+    @pytest.fixture
+    def db_rows(self):
+        rows = [{
+            'id': f'vec-{i}',
+            'embedding': memoryview(pgvector_binary(np.random.default_rng(i).normal(size=64))),
+            'source': 'docs',
+            'category': 'general',
+            'text_preview': f'Doc {i}',
+            'query_count': i,
+            'created_at': datetime(2025, 1, 1)
+        } for i in range(60)]
+        conn = MagicMock()
+        conn.cursor.return_value.fetchall.return_value = rows
+        with patch('src.routes.vectors.get_db_connection', return_value=conn), \
+             patch('src.routes.vectors.release_db_connection'):
+            yield conn
+
+    @pytest.fixture
+    def service(self):
+        service = VectorProjectionService(
+            fetch=lambda source, limit: vectors.fetch_vector_snapshot(source, limit),
+            project=lambda key, snap, previous: vectors.compute_projection(key, snap, previous)
+        )
+        with patch('src.routes.vectors.get_vector_projections', return_value=service):
+            yield service
+        service.shutdown(wait=True)
+
+    def test_warm_request_skips_database_and_reduction(self, client, headers, db_rows, service):
+        url = '/api/vectors/visualize?method=pca&limit=60&source=docs'
+        first = client.get(url, headers=headers)
+        assert first.status_code == 200
+        assert first.get_json()['cached'] is False
+        assert 'vector_send(embedding)' in db_rows.cursor.return_value.execute.call_args[0][0]
+
+        started = time.perf_counter()
+        with patch('src.routes.vectors.PCA', side_effect=AssertionError('recomputed')):
+            second = client.get(url, headers=headers)
+        elapsed = time.perf_counter() - started
+
+        data = second.get_json()
+        assert data['cached'] is True
+        assert data['data']['vector_count'] == 60
+        assert data['data']['figure'] == first.get_json()['data']['figure']
+        assert db_rows.cursor.return_value.execute.call_count == 1
+        assert elapsed < 0.05
+
+    def test_cold_slow_projection_returns_job(self, client, headers, db_rows, service):
+        release = threading.Event()
+        slow_tsne = MagicMock()
+        slow_tsne.fit_transform.side_effect = lambda x: (release.wait(5), np.zeros((len(x), 2)))[1]
+
+        with patch('src.routes.vectors.TSNE', return_value=slow_tsne), \
+             patch('src.routes.vectors.PROJECTION_WAIT', 0.01):
+            response = client.get('/api/vectors/visualize?method=tsne&limit=60', headers=headers)
+            assert response.status_code == 202
+            job_id = response.get_json()['data']['job_id']
+
+            release.set()
+            service.get_job(job_id).future.result(5)
+
+        status = client.get(f'/api/vectors/visualize/jobs/{job_id}', headers=headers).get_json()
+        assert status['data']['status'] == 'done'
+        assert client.get('/api/vectors/visualize?method=tsne&limit=60', headers=headers).get_json()['cached'] is True
+
+    def test_unknown_job(self, client, headers, service):
+        assert client.get('/api/vectors/visualize/jobs/nope', headers=headers).status_code == 404
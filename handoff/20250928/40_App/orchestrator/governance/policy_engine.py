@@ -0,0 +1,285 @@
+"""Policy Engine - Compiled matchers and decision cache for governance checks"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import yaml
+
+
+class PolicyFile:
+    """policies.yaml on disk, re-read only when it changes"""
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._signature = None
+        self._next_check = 0.0
+
+    def read(self) -> Dict:
+        """Parse the file and remember its signature (raises on error)"""
+        signature = self._stat()
+        with open(self.path, 'r') as f:
+            policies = yaml.safe_load(f)
+        self._signature = signature
+        self._next_check = time.monotonic() + self.check_interval
+        return policies
+
+    def changed(self) -> bool:
+        """Whether the file changed since the last read (stats at most every check_interval)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        return self._stat() != self._signature
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+
+class _GlobNode:
+    __slots__ = ('literal', 'wildcards', 'globstar', 'rest', 'terminal')
+
+    def __init__(self):
+        self.literal: Dict[str, '_GlobNode'] = {}
+        self.wildcards: List[Tuple[Any, '_GlobNode']] = []
+        self.globstar: Optional['_GlobNode'] = None
+        self.rest: Optional[int] = None
+        self.terminal: Optional[int] = None
+
+
+class GlobTrie:
+    """
+    Match a path against many glob patterns in one walk
+
+    Patterns are split on '/' into a trie of segments. A '*' inside a
+    segment matches within that segment, a '**' segment matches zero or
+    more segments, and a trailing '**' matches one or more. ``match``
+    returns the first pattern in insertion order that matches.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self._root = _GlobNode()
+        self._wildcard_nodes: Dict[Tuple[int, str], _GlobNode] = {}
+        self.patterns: List[str] = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str) -> None:
+        index = len(self.patterns)
+        self.patterns.append(pattern)
+
+        node = self._root
+        segments = pattern.split('/')
+        for position, segment in enumerate(segments):
+            if segment == '**':
+                if position == len(segments) - 1:
+                    if node.rest is None:
+                        node.rest = index
+                    return
+                if node.globstar is None:
+                    node.globstar = _GlobNode()
+                node = node.globstar
+            elif '*' in segment:
+                key = (id(node), segment)
+                child = self._wildcard_nodes.get(key)
+                if child is None:
+                    child = _GlobNode()
+                    regex = re.compile('.*'.join(re.escape(part) for part in re.split(r'\*+', segment)))
+                    node.wildcards.append((regex, child))
+                    self._wildcard_nodes[key] = child
+                node = child
+            else:
+                node = node.literal.setdefault(segment, _GlobNode())
+
+        if node.terminal is None:
+            node.terminal = index
+
+    def match(self, path: str) -> Optional[str]:
+        """Return the first matching pattern, or None"""
+        index = self._walk(self._root, path.split('/'), 0, {})
+        return None if index is None else self.patterns[index]
+
+    def _walk(self, node: _GlobNode, segments: List[str], i: int, seen: Dict) -> Optional[int]:
+        key = (id(node), i)
+        if key in seen:
+            return seen[key]
+        seen[key] = None
+
+        best = None
+        if i == len(segments):
+            best = node.terminal
+        else:
+            if node.rest is not None:
+                best = node.rest
+            segment = segments[i]
+            child = node.literal.get(segment)
+            if child is not None:
+                best = _first(best, self._walk(child, segments, i + 1, seen))
+            for regex, child in node.wildcards:
+                if regex.fullmatch(segment):
+                    best = _first(best, self._walk(child, segments, i + 1, seen))
+
+        if node.globstar is not None:
+            for j in range(i, len(segments) + 1):
+                best = _first(best, self._walk(node.globstar, segments, j, seen))
+
+        seen[key] = best
+        return best
+
+
+def _first(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+class DomainSuffixTrie:
+    """
+    Match a domain against allow-list entries by walking labels right to left
+
+    'api.github.com' matches only itself; '*.supabase.co' matches
+    'supabase.co' and any subdomain of it, but not 'evilsupabase.co'.
+    Matching is case-insensitive and ignores a trailing dot.
+    """
+
+    _WILDCARD = '*'
+    _END = ''
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self._root: Dict[str, Any] = {}
+        self.patterns: List[str] = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str) -> None:
+        index = len(self.patterns)
+        self.patterns.append(pattern)
+
+        wildcard = pattern.startswith('*.')
+        labels = self._labels(pattern[2:] if wildcard else pattern)
+        node = self._root
+        for label in labels:
+            node = node.setdefault(label, {})
+        node.setdefault(self._END, index)
+        if wildcard:
+            node.setdefault(self._WILDCARD, index)
+
+    def match(self, domain: str) -> Optional[str]:
+        """Return the first matching pattern, or None"""
+        labels = self._labels(domain)
+        node = self._root
+        best = None
+        for position, label in enumerate(labels):
+            node = node.get(label)
+            if node is None:
+                break
+            if self._WILDCARD in node and position < len(labels) - 1:
+                best = _first(best, node[self._WILDCARD])
+        else:
+            best = _first(best, node.get(self._END))
+        return None if best is None else self.patterns[best]
+
+    @staticmethod
+    def _labels(domain: str) -> List[str]:
+        return domain.lower().rstrip('.').split('.')[::-1]
+
+
+class PatternSet:
+    """
+    Policy regexes combined into one alternation
+
+    ``search`` answers "does any rule match" with a single scan, so the
+    common no-violation case costs one regex search however many rules
+    there are. ``matches`` walks the individually compiled rules in order
+    for the rare case where something did match.
+    """
+
+    def __init__(self, rules: Iterable[Dict], flags: int = re.IGNORECASE):
+        self.rules: List[Tuple[str, Any, str]] = []
+        for rule in rules:
+            pattern = rule.get('pattern', '')
+            self.rules.append((pattern, re.compile(pattern, flags), rule.get('action', 'warn')))
+
+        try:
+            self._combined = re.compile('|'.join(f'(?:{pattern})' for pattern, _, _ in self.rules), flags)
+        except re.error:
+            # Rules with clashing group names or backreferences cannot share one regex
+            self._combined = None
+
+    def search(self, text: str) -> bool:
+        if not self.rules:
+            return False
+        if self._combined is not None:
+            return self._combined.search(text) is not None
+        return any(regex.search(text) for _, regex, _ in self.rules)
+
+    def matches(self, text: str) -> List[Tuple[str, str]]:
+        """(pattern, action) for every rule that matches, in rule order"""
+        return [(pattern, action) for pattern, regex, action in self.rules if regex.search(text)]
+
+
+class DecisionCache:
+    """
+    Bounded LRU of policy decisions keyed by (operation, target)
+
+    ``target`` is a string or a tuple of strings. String targets longer than
+    ``max_key_length`` are not cached. One cache is shared by every thread
+    using the global PolicyGuard, so inserts, evictions and clears are
+    serialized with a lock.
+    """
+
+    MISS = object()
+
+    def __init__(self, max_entries: int = 4096, max_key_length: int = 1024):
+        self.max_entries = max_entries
+        self.max_key_length = max_key_length
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _too_long(self, target: Hashable) -> bool:
+        if type(target) is tuple:
+            return sum(map(len, target)) > self.max_key_length
+        return len(target) > self.max_key_length
+
+    def get(self, operation: str, target: Hashable) -> Any:
+        # Reads stay off the lock: dict lookups and move_to_end are single
+        # C calls under the GIL, and a hit racing an eviction in put() only
+        # loses its recency bump. Every mutation of the key set is locked.
+        key = (operation, target)
+        value = self._entries.get(key, self.MISS)
+        if value is self.MISS:
+            self.stats['misses'] += 1
+            return value
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            pass
+        self.stats['hits'] += 1
+        return value
+
+    def put(self, operation: str, target: Hashable, value: Any) -> None:
+        if self._too_long(target):
+            return
+        key = (operation, target)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,10 +1,9 @@
 """Policy Guard - Constraint-based autonomy enforcement"""
 import os
-import yaml
-import re
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional
-from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .policy_engine import DecisionCache, DomainSuffixTrie, GlobTrie, PolicyFile
 
 
 class PolicyViolation(Exception):
@@ -13,9 +12,17 @@ class PolicyViolation(Exception):
 
 
 class PolicyGuard:
-    """Enforces governance policies from policies.yaml"""
+    """Enforces governance policies from policies.yaml
+    
+    Policies are compiled once into a glob trie per file-pattern list and a
+    suffix trie for allowed domains, recompiled when policies.yaml changes
+    on disk (checked at most every ``reload_interval`` seconds) or when
+    ``policies`` is assigned. A decision cache keyed by (operation, target)
+    sits in front of the compiled matchers.
+    """
     
-    def __init__(self, policies_path: Optional[str] = None):
+    def __init__(self, policies_path: Optional[str] = None, reload_interval: float = 1.0,
+                 cache_size: int = 4096):
         if policies_path is None:
             policies_path = os.getenv('POLICIES_PATH')
             if policies_path is None:
@@ -25,13 +32,39 @@ class PolicyGuard:
                 )
         
         self.policies_path = policies_path
+        self._policy_file = PolicyFile(policies_path, check_interval=reload_interval)
+        self.decisions = DecisionCache(max_entries=cache_size)
         self.policies = self._load_policies()
     
+    @property
+    def policies(self) -> Dict:
+        return self._policies
+    
+    @policies.setter
+    def policies(self, policies: Dict) -> None:
+        self._policies = policies
+        self._compile(policies or {})
+    
+    def _compile(self, policies: Dict) -> None:
+        sandbox = policies.get('resource_sandbox') or {}
+        file_access = sandbox.get('file_access') or {}
+        network = sandbox.get('network') or {}
+        file_patterns = ((policies.get('risk_routing') or {}).get('risk_scoring') or {}).get('file_patterns') or {}
+        
+        self._deny_files = GlobTrie(file_access.get('deny') or [])
+        self._allow_files = GlobTrie(file_access.get('allow') or [])
+        self._allow_domains = DomainSuffixTrie(network.get('allow_domains') or [])
+        self._high_risk_files = GlobTrie(file_patterns.get('high_risk') or [])
+        self._medium_risk_files = GlobTrie(file_patterns.get('medium_risk') or [])
+        self._tools: Dict[str, List[Dict]] = {}
+        for tool_config in (policies.get('capability_constraints') or {}).get('restricted_tools') or []:
+            self._tools.setdefault(tool_config['name'], []).append(tool_config)
+        self.decisions.clear()
+    
     def _load_policies(self) -> Dict:
         """Load policies from YAML file"""
         try:
-            with open(self.policies_path, 'r') as f:
-                return yaml.safe_load(f)
+            return self._policy_file.read()
         except FileNotFoundError:
             print(f"[PolicyGuard] Warning: policies.yaml not found at {self.policies_path}")
             return {}
@@ -39,101 +72,110 @@ class PolicyGuard:
             print(f"[PolicyGuard] Error loading policies: {e}")
             return {}
     
+    def reload_if_changed(self) -> bool:
+        """Recompile if policies.yaml changed on disk; keeps the current policies if it no longer parses"""
+        if not self._policy_file.changed():
+            return False
+        try:
+            self.policies = self._policy_file.read()
+        except Exception as e:
+            print(f"[PolicyGuard] Error reloading policies, keeping previous version: {e}")
+            return False
+        return True
+    
+    def _decide(self, operation: str, target: Hashable, evaluate: Callable[[], Optional[str]]) -> bool:
+        self.reload_if_changed()
+        violation = self.decisions.get(operation, target)
+        if violation is DecisionCache.MISS:
+            violation = evaluate()
+            self.decisions.put(operation, target, violation)
+        if violation is not None:
+            raise PolicyViolation(violation)
+        return True
+    
     def check_file_access(self, file_path: str) -> bool:
         """Check if file access is allowed"""
         if not self.policies:
             return True
+        return self._decide('file_access', file_path, lambda: self._evaluate_file_access(file_path))
+    
+    def _evaluate_file_access(self, file_path: str) -> Optional[str]:
+        pattern = self._deny_files.match(file_path)
+        if pattern is not None:
+            return f"File access denied: {file_path} (matches deny pattern: {pattern})"
         
-        sandbox = self.policies.get('resource_sandbox', {})
-        file_access = sandbox.get('file_access', {})
-        
-        deny_patterns = file_access.get('deny', [])
-        for pattern in deny_patterns:
-            if self._match_pattern(file_path, pattern):
-                raise PolicyViolation(f"File access denied: {file_path} (matches deny pattern: {pattern})")
-        
-        allow_patterns = file_access.get('allow', [])
-        if allow_patterns:
-            for pattern in allow_patterns:
-                if self._match_pattern(file_path, pattern):
-                    return True
-            raise PolicyViolation(f"File access denied: {file_path} (not in allow list)")
+        if self._allow_files.patterns and self._allow_files.match(file_path) is None:
+            return f"File access denied: {file_path} (not in allow list)"
         
-        return True
+        return None
     
     def check_network_access(self, domain: str) -> bool:
         """Check if network access to domain is allowed"""
         if not self.policies:
             return True
-        
-        sandbox = self.policies.get('resource_sandbox', {})
-        network = sandbox.get('network', {})
-        allow_domains = network.get('allow_domains', [])
-        
-        if not allow_domains:
-            return True
-        
-        for allowed in allow_domains:
-            if self._match_domain(domain, allowed):
-                return True
-        
-        raise PolicyViolation(f"Network access denied: {domain} (not in allow list)")
+        return self._decide('network_access', domain, lambda: self._evaluate_network_access(domain))
+    
+    def _evaluate_network_access(self, domain: str) -> Optional[str]:
+        if not self._allow_domains.patterns or self._allow_domains.match(domain) is not None:
+            return None
+        return f"Network access denied: {domain} (not in allow list)"
     
     def check_tool_permission(self, tool_name: str, operation: str, agent_permission_level: str) -> bool:
         """Check if agent has permission to use tool"""
         if not self.policies:
             return True
-        
-        constraints = self.policies.get('capability_constraints', {})
-        restricted_tools = constraints.get('restricted_tools', [])
-        
-        for tool_config in restricted_tools:
-            if tool_config['name'] == tool_name:
-                required_level = tool_config.get('permission_level', 'sandbox_only')
-                
-                if not self._has_permission_level(agent_permission_level, required_level):
-                    raise PolicyViolation(
-                        f"Tool access denied: {tool_name} requires {required_level}, "
-                        f"agent has {agent_permission_level}"
-                    )
-                
-                denied_ops = tool_config.get('denied_operations', [])
-                if operation in denied_ops:
-                    raise PolicyViolation(
-                        f"Operation denied: {tool_name}.{operation} is in denied list"
-                    )
-                
-                allowed_ops = tool_config.get('allowed_operations', [])
-                if allowed_ops and operation not in allowed_ops:
-                    raise PolicyViolation(
-                        f"Operation denied: {tool_name}.{operation} not in allowed list"
-                    )
-        
-        return True
+        return self._decide(
+            'tool_permission',
+            (tool_name, operation, agent_permission_level),
+            lambda: self._evaluate_tool_permission(tool_name, operation, agent_permission_level)
+        )
+    
+    def _evaluate_tool_permission(self, tool_name: str, operation: str, agent_permission_level: str) -> Optional[str]:
+        for tool_config in self._tools.get(tool_name, []):
+            required_level = tool_config.get('permission_level', 'sandbox_only')
+            
+            if not self._has_permission_level(agent_permission_level, required_level):
+                return (
+                    f"Tool access denied: {tool_name} requires {required_level}, "
+                    f"agent has {agent_permission_level}"
+                )
+            
+            denied_ops = tool_config.get('denied_operations', [])
+            if operation in denied_ops:
+                return f"Operation denied: {tool_name}.{operation} is in denied list"
+            
+            allowed_ops = tool_config.get('allowed_operations', [])
+            if allowed_ops and operation not in allowed_ops:
+                return f"Operation denied: {tool_name}.{operation} not in allowed list"
+        
+        return None
     
     def check_risk_level(self, file_paths: List[str]) -> str:
         """Determine risk level based on file patterns"""
         if not self.policies:
             return "low_risk"
         
-        risk_routing = self.policies.get('risk_routing', {})
-        risk_scoring = risk_routing.get('risk_scoring', {})
-        file_patterns = risk_scoring.get('file_patterns', {})
-        
-        high_risk_patterns = file_patterns.get('high_risk', [])
-        for file_path in file_paths:
-            for pattern in high_risk_patterns:
-                if self._match_pattern(file_path, pattern):
-                    return "high_risk"
-        
-        medium_risk_patterns = file_patterns.get('medium_risk', [])
-        for file_path in file_paths:
-            for pattern in medium_risk_patterns:
-                if self._match_pattern(file_path, pattern):
-                    return "medium_risk"
+        self.reload_if_changed()
+        levels = [self._file_risk_level(file_path) for file_path in file_paths]
         
+        if "high_risk" in levels:
+            return "high_risk"
+        if "medium_risk" in levels:
+            return "medium_risk"
         return "low_risk"
     
+    def _file_risk_level(self, file_path: str) -> str:
+        level = self.decisions.get('risk_level', file_path)
+        if level is DecisionCache.MISS:
+            if self._high_risk_files.match(file_path) is not None:
+                level = "high_risk"
+            elif self._medium_risk_files.match(file_path) is not None:
+                level = "medium_risk"
+            else:
+                level = "low_risk"
+            self.decisions.put('risk_level', file_path, level)
+        return level
+    
     def requires_human_approval(self, labels: List[str], risk_level: str) -> bool:
         """Check if human approval is required"""
         if not self.policies:
@@ -156,16 +198,11 @@ class PolicyGuard:
     
     def _match_pattern(self, path: str, pattern: str) -> bool:
         """Match file path against glob-like pattern"""
-        regex_pattern = pattern.replace('**', '.*').replace('*', '[^/]*')
-        regex_pattern = f"^{regex_pattern}$"
-        return bool(re.match(regex_pattern, path))
+        return GlobTrie([pattern]).match(path) is not None
     
     def _match_domain(self, domain: str, pattern: str) -> bool:
         """Match domain against pattern (supports wildcards)"""
-        if pattern.startswith('*.'):
-            base_domain = pattern[2:]
-            return domain.endswith(base_domain) or domain == base_domain
-        return domain == pattern
+        return DomainSuffixTrie([pattern]).match(domain) is not None
     
     def _has_permission_level(self, current_level: str, required_level: str) -> bool:
         """Check if current permission level meets requirement"""
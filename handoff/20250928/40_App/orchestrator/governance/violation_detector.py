@@ -1,6 +1,9 @@
 """Violation Detector - Detect and prevent policy violations"""
+import os
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Optional, Tuple
+
+from .policy_engine import DecisionCache, PatternSet, PolicyFile
 
 
 class ViolationError(Exception):
@@ -8,98 +11,154 @@ class ViolationError(Exception):
     pass
 
 
+_SECRET_FILE_PATTERNS = [
+    r'\.env',
+    r'secrets',
+    r'credentials',
+    r'\.key$',
+    r'\.pem$',
+    r'\.p12$'
+]
+
+# Equivalent to redacting KEY=value pairs, then Bearer tokens, then long
+# alphanumeric runs in three passes. The optional tails cover a Bearer
+# token or alphanumeric run that ends in a key name (or "Bearer"), whose
+# value the earlier passes would have redacted first.
+_KEY_TAIL = r'(?:(?<=SECRET)|(?<=PASSWORD)|(?<=TOKEN)|(?<=KEY))[\s=:]+[^\s]+'
+_BEARER_VALUE = r'\s+(?:[^\s]*?' + _KEY_TAIL + r'|[^\s]+)'
+_REDACT = re.compile(
+    r'(?P<key>SECRET|PASSWORD|TOKEN|KEY)[\s=:]+[^\s]+'
+    r'|(?P<bearer>Bearer' + _BEARER_VALUE + r')'
+    r'|[A-Za-z0-9]{32,}(?:(?P<key_tail>' + _KEY_TAIL + r')|(?P<bearer_tail>(?<=Bearer)' + _BEARER_VALUE + r'))?',
+    re.IGNORECASE
+)
+
+
+def _redact(match) -> str:
+    if match.group('key'):
+        return f"{match.group('key')}=<REDACTED>"
+    if match.group('bearer'):
+        return 'Bearer <REDACTED>'
+    if match.group('key_tail'):
+        return '<REDACTED_TOKEN>=<REDACTED>'
+    if match.group('bearer_tail'):
+        return '<REDACTED_TOKEN> <REDACTED>'
+    return '<REDACTED_TOKEN>'
+
+
 class ViolationDetector:
-    """Detect policy violations in agent operations"""
+    """Detect policy violations in agent operations
     
-    def __init__(self, policies=None):
+    Each pattern category is compiled once into a combined alternation, so a
+    clean check is a single regex search. Outcomes are cached per
+    (category, text). Policies loaded from policies.yaml are recompiled when
+    the file changes on disk.
+    """
+    
+    def __init__(self, policies=None, policies_path: Optional[str] = None,
+                 reload_interval: float = 1.0, cache_size: int = 4096):
+        self._policy_file = None
+        if not policies:
+            self._policy_file = PolicyFile(
+                policies_path or os.path.join(os.path.dirname(__file__), '../../../../config/policies.yaml'),
+                check_interval=reload_interval
+            )
+        self.decisions = DecisionCache(max_entries=cache_size)
         self.policies = policies or self._load_default_policies()
-        self.violation_patterns = self.policies.get('violation_detection', {}).get('patterns', {})
+    
+    @property
+    def policies(self) -> Dict:
+        return self._policies
+    
+    @policies.setter
+    def policies(self, policies: Dict) -> None:
+        self._policies = policies
+        self.violation_patterns = (policies or {}).get('violation_detection', {}).get('patterns', {})
+        self._pattern_sets = {
+            category: PatternSet(rules or [])
+            for category, rules in self.violation_patterns.items()
+        }
+        self._pattern_sets['secret_files'] = PatternSet(
+            {'pattern': pattern, 'action': 'block'} for pattern in _SECRET_FILE_PATTERNS
+        )
+        self.decisions.clear()
     
     def _load_default_policies(self) -> Dict:
         """Load default violation patterns"""
-        import os
-        import yaml
-        
-        policies_path = os.path.join(
-            os.path.dirname(__file__),
-            '../../../../config/policies.yaml'
-        )
-        
         try:
-            with open(policies_path, 'r') as f:
-                return yaml.safe_load(f)
+            return self._policy_file.read()
         except Exception as e:
             print(f"[ViolationDetector] Error loading policies: {e}")
             return {}
     
+    def reload_if_changed(self) -> bool:
+        """Recompile if policies.yaml changed on disk; keeps the current patterns if it no longer parses"""
+        if self._policy_file is None or not self._policy_file.changed():
+            return False
+        try:
+            self.policies = self._policy_file.read() or {}
+        except Exception as e:
+            print(f"[ViolationDetector] Error reloading policies, keeping previous version: {e}")
+            return False
+        return True
+    
+    def _check(self, category: str, text: str, describe: Callable[[str], str]) -> None:
+        """Print warnings and raise on block for rules of ``category`` matching ``text``"""
+        self.reload_if_changed()
+        outcome = self.decisions.get(category, text)
+        if outcome is DecisionCache.MISS:
+            outcome = self._evaluate(category, text)
+            self.decisions.put(category, text, outcome)
+        
+        for pattern, action in outcome:
+            message = describe(pattern)
+            if action == 'block':
+                raise ViolationError(message)
+            else:
+                print(f"[ViolationDetector] Warning: {message}")
+    
+    def _evaluate(self, category: str, text: str) -> Tuple[Tuple[str, str], ...]:
+        pattern_set = self._pattern_sets.get(category)
+        if pattern_set is None or not pattern_set.search(text):
+            return ()
+        
+        outcome = []
+        for pattern, action in pattern_set.matches(text):
+            outcome.append((pattern, action))
+            if action == 'block':
+                break
+        return tuple(outcome)
+    
     def check_secrets_access(self, content: str) -> None:
         """Check for attempts to access secrets"""
-        patterns = self.violation_patterns.get('secrets_access', [])
-        
-        for pattern_config in patterns:
-            pattern = pattern_config.get('pattern', '')
-            severity = pattern_config.get('severity', 'warning')
-            action = pattern_config.get('action', 'warn')
-            
-            if re.search(pattern, content, re.IGNORECASE):
-                message = f"Secrets access violation detected: pattern '{pattern}' matched"
-                
-                if action == 'block':
-                    raise ViolationError(message)
-                else:
-                    print(f"[ViolationDetector] Warning: {message}")
+        self._check(
+            'secrets_access', content,
+            lambda pattern: f"Secrets access violation detected: pattern '{pattern}' matched"
+        )
     
     def check_dangerous_operations(self, command: str) -> None:
         """Check for dangerous shell operations"""
-        patterns = self.violation_patterns.get('dangerous_operations', [])
-        
-        for pattern_config in patterns:
-            pattern = pattern_config.get('pattern', '')
-            severity = pattern_config.get('severity', 'warning')
-            action = pattern_config.get('action', 'warn')
-            
-            if re.search(pattern, command, re.IGNORECASE):
-                message = f"Dangerous operation detected: pattern '{pattern}' matched in command '{command}'"
-                
-                if action == 'block':
-                    raise ViolationError(message)
-                else:
-                    print(f"[ViolationDetector] Warning: {message}")
+        self._check(
+            'dangerous_operations', command,
+            lambda pattern: f"Dangerous operation detected: pattern '{pattern}' matched in command '{command}'"
+        )
     
     def check_unauthorized_api(self, api_call: str, args: Dict) -> None:
         """Check for unauthorized API access"""
-        patterns = self.violation_patterns.get('unauthorized_api', [])
-        
         args_str = str(args)
         full_call = f"{api_call} {args_str}"
         
-        for pattern_config in patterns:
-            pattern = pattern_config.get('pattern', '')
-            severity = pattern_config.get('severity', 'warning')
-            action = pattern_config.get('action', 'warn')
-            
-            if re.search(pattern, full_call, re.IGNORECASE):
-                message = f"Unauthorized API access detected: pattern '{pattern}' matched"
-                
-                if action == 'block':
-                    raise ViolationError(message)
-                else:
-                    print(f"[ViolationDetector] Warning: {message}")
+        self._check(
+            'unauthorized_api', full_call,
+            lambda pattern: f"Unauthorized API access detected: pattern '{pattern}' matched"
+        )
     
     def check_file_access(self, file_path: str) -> None:
         """Check if file access violates policies"""
-        secrets_patterns = [
-            r'\.env',
-            r'secrets',
-            r'credentials',
-            r'\.key$',
-            r'\.pem$',
-            r'\.p12$'
-        ]
-        
-        for pattern in secrets_patterns:
-            if re.search(pattern, file_path, re.IGNORECASE):
-                raise ViolationError(f"Attempted access to secrets file: {file_path}")
+        self._check(
+            'secret_files', file_path,
+            lambda pattern: f"Attempted access to secrets file: {file_path}"
+        )
     
     def check_all(self, operation: str, content: str, metadata: Optional[Dict] = None) -> None:
         """Run all violation checks"""
@@ -115,18 +174,8 @@ class ViolationDetector:
         self.check_secrets_access(content)
     
     def sanitize_content(self, content: str) -> str:
-        """Sanitize content by removing potential secrets"""
-        redact_patterns = [
-            (r'(SECRET|PASSWORD|TOKEN|KEY)[\s=:]+[^\s]+', r'\1=<REDACTED>'),
-            (r'Bearer\s+[^\s]+', 'Bearer <REDACTED>'),
-            (r'[A-Za-z0-9]{32,}', '<REDACTED_TOKEN>'),
-        ]
-        
-        sanitized = content
-        for pattern, replacement in redact_patterns:
-            sanitized = re.sub(pattern, replacement, sanitized, flags=re.IGNORECASE)
-        
-        return sanitized
+        """Sanitize content by removing potential secrets (single pass)"""
+        return _REDACT.sub(_redact, content)
 
 
 _violation_detector = None
@@ -6,7 +6,8 @@ from .db_writer import (
     upsert_task_queued,
     upsert_task_running,
     upsert_task_done,
-    upsert_task_error
+    upsert_task_error,
+    flush_task_writes
 )
 
 __all__ = [
@@ -15,5 +16,6 @@ __all__ = [
     'upsert_task_queued',
     'upsert_task_running',
     'upsert_task_done',
-    'upsert_task_error'
+    'upsert_task_error',
+    'flush_task_writes'
 ]
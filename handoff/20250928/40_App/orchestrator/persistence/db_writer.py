@@ -4,11 +4,18 @@ Database writer for agent_tasks table
 Implements write-through strategy for task state transitions
 
 Phase 3 Update: Automatic tenant_id resolution via user_profiles
+
+Set AGENT_TASKS_WRITE_BEHIND=true to batch worker transitions (running, done,
+error) through a journaled write-behind batcher instead; see write_batcher.py.
 """
+import atexit
 import logging
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, List, Optional
 from .db_client import get_client
+from .write_batcher import TaskWriteBatcher, TransitionJournal, default_journal_dir
 import sys
 import os
 
@@ -22,6 +29,47 @@ from exceptions import (
 
 logger = logging.getLogger(__name__)
 
+TENANT_CACHE_TTL = float(os.getenv("TENANT_CACHE_TTL", "300"))
+TENANT_CACHE_MAX_ENTRIES = 10000
+
+_tenant_cache: Dict[str, tuple] = {}
+_tenant_cache_lock = threading.Lock()
+
+_write_batcher: Optional[TaskWriteBatcher] = None
+_write_batcher_pid: Optional[int] = None
+_write_batcher_lock = threading.Lock()
+
+# Process that imported this module; forked RQ work horses inherit it
+_loaded_pid = os.getpid()
+
+def _cached_tenant_id(user_id: str) -> Optional[str]:
+    with _tenant_cache_lock:
+        entry = _tenant_cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _tenant_cache[user_id]
+            return None
+        return entry[1]
+
+def _cache_tenant_id(user_id: str, tenant_id: str) -> None:
+    with _tenant_cache_lock:
+        if len(_tenant_cache) >= TENANT_CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            for key in [k for k, (expires_at, _) in _tenant_cache.items() if expires_at <= now]:
+                del _tenant_cache[key]
+            if len(_tenant_cache) >= TENANT_CACHE_MAX_ENTRIES:
+                _tenant_cache.pop(next(iter(_tenant_cache)))
+        _tenant_cache[user_id] = (time.monotonic() + TENANT_CACHE_TTL, tenant_id)
+
+def invalidate_tenant_cache(user_id: Optional[str] = None) -> None:
+    """Forget a cached user->tenant mapping (all of them if user_id is None)"""
+    with _tenant_cache_lock:
+        if user_id is None:
+            _tenant_cache.clear()
+        else:
+            _tenant_cache.pop(user_id, None)
+
 def fetch_user_tenant_id(user_id: str) -> Optional[str]:
     """
     Fetch user's tenant_id from user_profiles table.
@@ -39,7 +87,14 @@ def fetch_user_tenant_id(user_id: str) -> Optional[str]:
         TenantResolutionError: If user_profile not found for the user
         DatabaseConnectionError: If database connection fails
         DatabaseReadError: If database query fails
+    
+    Successful lookups are cached per process for TENANT_CACHE_TTL seconds;
+    failures are not cached.
     """
+    tenant_id = _cached_tenant_id(user_id)
+    if tenant_id is not None:
+        return tenant_id
+    
     try:
         client = get_client()
         
@@ -59,6 +114,8 @@ def fetch_user_tenant_id(user_id: str) -> Optional[str]:
         
         tenant_id = response.data["tenant_id"]
         logger.info(f"Fetched tenant_id={tenant_id} for user={user_id}")
+        if tenant_id:
+            _cache_tenant_id(user_id, tenant_id)
         return tenant_id
         
     except TenantResolutionError:
@@ -68,6 +125,63 @@ def fetch_user_tenant_id(user_id: str) -> Optional[str]:
         logger.error(error_msg)
         raise DatabaseReadError(error_msg) from e
 
+def write_behind_enabled() -> bool:
+    return os.getenv("AGENT_TASKS_WRITE_BEHIND", "false").lower() == "true"
+
+def get_write_batcher() -> Optional[TaskWriteBatcher]:
+    """
+    Per-process write-behind batcher, or None when AGENT_TASKS_WRITE_BEHIND is off.
+    
+    Replaying journals left by crashed processes happens when it is created.
+    Transitions only coalesce across tasks in a process that runs many of
+    them, which is why the worker uses a non-forking SimpleWorker when
+    write-behind is on.
+    """
+    global _write_batcher, _write_batcher_pid
+    
+    if not write_behind_enabled():
+        return None
+    
+    with _write_batcher_lock:
+        if _write_batcher is None or _write_batcher_pid != os.getpid():
+            _write_batcher = TaskWriteBatcher(
+                write=_bulk_upsert,
+                journal=TransitionJournal(default_journal_dir()),
+                max_batch=int(os.getenv("AGENT_TASKS_BATCH_SIZE", "100")),
+                flush_interval=float(os.getenv("AGENT_TASKS_FLUSH_INTERVAL", "1.0"))
+            )
+            _write_batcher_pid = os.getpid()
+            atexit.register(_write_batcher.stop)
+        return _write_batcher
+
+def flush_task_writes(only_if_forked: bool = False) -> bool:
+    """
+    Write pending batched transitions now.
+    
+    A forking RQ worker runs each task in a work horse that exits without
+    running atexit hooks, so the worker calls this with only_if_forked=True
+    when a task finishes; in the process that loaded this module (a
+    SimpleWorker) that is a no-op and the batcher keeps coalescing. No-op
+    when write-behind is off.
+    """
+    if _write_batcher is None or _write_batcher_pid != os.getpid():
+        return True
+    if only_if_forked and os.getpid() == _loaded_pid:
+        return True
+    return _write_batcher.flush()
+
+def _bulk_upsert(rows: List[Dict]) -> None:
+    get_client().table("agent_tasks").upsert(rows, on_conflict="task_id").execute()
+
+def _write_task_row(data: Dict, write_behind: bool = True) -> str:
+    """Upsert one agent_tasks row now, or hand it to the batcher; returns 'success' or 'journaled'"""
+    batcher = get_write_batcher() if write_behind else None
+    if batcher is not None:
+        batcher.submit(data)
+        return "journaled"
+    get_client().table("agent_tasks").upsert(data, on_conflict="task_id").execute()
+    return "success"
+
 def upsert_task_queued(
     task_id: str,
     trace_id: str,
@@ -78,6 +192,10 @@ def upsert_task_queued(
     """
     Insert or update task when queued by API.
     
+    Always written through: the API and the worker are separate processes, and
+    a batched "queued" row flushed after the worker's "running" would move
+    the task backwards.
+    
     Args:
         task_id: UUID task identifier
         trace_id: UUID trace identifier (typically same as task_id)
@@ -89,7 +207,6 @@ def upsert_task_queued(
         True if successful, False otherwise
     """
     try:
-        client = get_client()
         now = datetime.now(timezone.utc).isoformat()
         
         data = {
@@ -109,9 +226,9 @@ def upsert_task_queued(
         else:
             data["tenant_id"] = "00000000-0000-0000-0000-000000000001"
         
-        client.table("agent_tasks").upsert(data, on_conflict="task_id").execute()
+        outcome = _write_task_row(data, write_behind=False)
         
-        logger.info(f"DB write success: task {task_id} status=queued tenant_id={data.get('tenant_id')}")
+        logger.info(f"DB write {outcome}: task {task_id} status=queued tenant_id={data.get('tenant_id')}")
         return True
         
     except Exception as e:
@@ -131,7 +248,6 @@ def upsert_task_running(task_id: str, trace_id: str, tenant_id: Optional[str] =
         True if successful, False otherwise
     """
     try:
-        client = get_client()
         now = datetime.now(timezone.utc).isoformat()
         
         data = {
@@ -143,9 +259,9 @@ def upsert_task_running(task_id: str, trace_id: str, tenant_id: Optional[str] =
             "tenant_id": tenant_id or "00000000-0000-0000-0000-000000000001"
         }
         
-        client.table("agent_tasks").upsert(data, on_conflict="task_id").execute()
+        outcome = _write_task_row(data)
         
-        logger.info(f"DB write success: task {task_id} status=running tenant_id={data['tenant_id']}")
+        logger.info(f"DB write {outcome}: task {task_id} status=running tenant_id={data['tenant_id']}")
         return True
         
     except Exception as e:
@@ -166,7 +282,6 @@ def upsert_task_done(task_id: str, trace_id: str, pr_url: str, tenant_id: Option
         True if successful, False otherwise
     """
     try:
-        client = get_client()
         now = datetime.now(timezone.utc).isoformat()
         
         data = {
@@ -179,9 +294,9 @@ def upsert_task_done(task_id: str, trace_id: str, pr_url: str, tenant_id: Option
             "tenant_id": tenant_id or "00000000-0000-0000-0000-000000000001"
         }
         
-        client.table("agent_tasks").upsert(data, on_conflict="task_id").execute()
+        outcome = _write_task_row(data)
         
-        logger.info(f"DB write success: task {task_id} status=done pr_url={pr_url} tenant_id={data['tenant_id']}")
+        logger.info(f"DB write {outcome}: task {task_id} status=done pr_url={pr_url} tenant_id={data['tenant_id']}")
         return True
         
     except Exception as e:
@@ -202,7 +317,6 @@ def upsert_task_error(task_id: str, trace_id: str, error_msg: str, tenant_id: Op
         True if successful, False otherwise
     """
     try:
-        client = get_client()
         now = datetime.now(timezone.utc).isoformat()
         
         data = {
@@ -215,9 +329,9 @@ def upsert_task_error(task_id: str, trace_id: str, error_msg: str, tenant_id: Op
             "tenant_id": tenant_id or "00000000-0000-0000-0000-000000000001"
         }
         
-        client.table("agent_tasks").upsert(data, on_conflict="task_id").execute()
+        outcome = _write_task_row(data)
         
-        logger.info(f"DB write success: task {task_id} status=error tenant_id={data['tenant_id']}")
+        logger.info(f"DB write {outcome}: task {task_id} status=error tenant_id={data['tenant_id']}")
         return True
         
     except Exception as e:
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Write-behind batching for agent_tasks state transitions
+
+Transitions are journaled locally, coalesced per task_id and flushed as bulk
+upserts when the batch is large enough or old enough.
+"""
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+class TransitionJournal:
+    """
+    Append-only local journal of transitions not yet written to the database
+
+    Each process writes its own ``agent_tasks.<pid>.jsonl`` and fsyncs every
+    record before the transition is acknowledged. After a successful flush
+    the file is rewritten with only what is still pending. Journals left by
+    processes that died (including forked RQ work horses, which exit without
+    running atexit hooks) are claimed by rename and replayed by the next
+    batcher that starts. That includes a journal under this process's own
+    pid, which is the usual case for a restarted container whose worker is
+    PID 1; it is claimed before this process opens its journal.
+
+    The journal only survives restarts if ``directory`` is on persistent
+    storage (see ``default_journal_dir``).
+    """
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"agent_tasks.{os.getpid()}{JOURNAL_SUFFIX}")
+        self._inherited = self._claim(self.path) if os.path.exists(self.path) else None
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, row: Dict):
+        self._file.write(json.dumps(row, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rewrite(self, rows: List[Dict]):
+        """Replace the journal with ``rows`` (atomically)"""
+        partial = f"{self.path}.tmp"
+        with open(partial, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._file.close()
+        os.replace(partial, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+
+    def recover(self) -> List[Dict]:
+        """Claim and read journals of processes that are no longer running"""
+        claimed_paths = []
+        if self._inherited is not None:
+            claimed_paths.append(self._inherited)
+            self._inherited = None
+        for path in sorted(glob.glob(os.path.join(self.directory, f"agent_tasks.*{JOURNAL_SUFFIX}"))):
+            if path == self.path or not self._is_orphaned(path):
+                continue
+            claimed = self._claim(path)
+            if claimed is not None:
+                claimed_paths.append(claimed)
+
+        rows = []
+        for claimed in claimed_paths:
+            rows.extend(self._read(claimed))
+            os.remove(claimed)
+        return rows
+
+    @staticmethod
+    def _claim(path: str) -> Optional[str]:
+        claimed = f"{path}.claimed.{os.getpid()}"
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            return None  # another process claimed it first
+        return claimed
+
+    def _is_orphaned(self, path: str) -> bool:
+        try:
+            pid = int(os.path.basename(path).split(".")[1])
+        except (IndexError, ValueError):
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    @staticmethod
+    def _read(path: str) -> List[Dict]:
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping torn journal record in {path}")
+        return rows
+
+
+class TaskWriteBatcher:
+    """
+    Coalesce agent_tasks upserts per task_id and write them in bulk
+
+    ``submit`` merges the row into the pending row for its task (later
+    fields win, earlier ones such as ``started_at`` are kept), journals it
+    and returns. A daemon thread flushes every ``flush_interval`` seconds,
+    or as soon as ``max_batch`` tasks are pending. Rows are grouped by
+    column set so a bulk upsert never nulls columns another row omitted.
+    Failed flushes stay pending (and journaled) for the next attempt.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Dict]], None],
+        journal: Optional[TransitionJournal] = None,
+        max_batch: int = 100,
+        flush_interval: float = 1.0
+    ):
+        self.write = write
+        self.journal = journal
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "flushes": 0, "rows_written": 0, "failures": 0, "recovered": 0}
+
+        if journal is not None:
+            recovered = journal.recover()
+            for row in recovered:
+                self._merge(row)
+            self.stats["recovered"] = len(recovered)
+            if recovered:
+                logger.info(f"Recovered {len(recovered)} journaled task transitions ({len(self._pending)} tasks)")
+                journal.rewrite(list(self._pending.values()))
+
+    def submit(self, row: Dict):
+        with self._lock:
+            if self.journal is not None:
+                self.journal.append(row)
+            self._merge(row)
+            self.stats["submitted"] += 1
+            full = len(self._pending) >= self.max_batch
+        self._ensure_running()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> bool:
+        """Write everything pending now; False if the database write failed"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return True
+
+            groups: Dict[tuple, List[Dict]] = {}
+            for row in batch.values():
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+
+            failed: Dict[str, Dict] = {}
+            for rows in groups.values():
+                try:
+                    self.write(rows)
+                    self.stats["rows_written"] += len(rows)
+                except Exception as e:
+                    logger.error(f"Batched agent_tasks upsert of {len(rows)} rows failed: {e}")
+                    self.stats["failures"] += 1
+                    failed.update((row["task_id"], row) for row in rows)
+            self.stats["flushes"] += 1
+
+            with self._lock:
+                # Anything submitted during the write is newer than the failed rows
+                for task_id, row in failed.items():
+                    self._pending[task_id] = {**row, **self._pending.get(task_id, {})}
+                if self.journal is not None:
+                    self.journal.rewrite(list(self._pending.values()))
+            return not failed
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def stop(self, flush: bool = True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if flush:
+            self.flush()
+
+    def _merge(self, row: Dict):
+        task_id = row["task_id"]
+        self._pending[task_id] = {**self._pending.get(task_id, {}), **row}
+
+    def _ensure_running(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="agent-tasks-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def default_journal_dir() -> str:
+    """
+    AGENT_TASKS_JOURNAL_DIR, or a directory under the system temp dir
+
+    The temp-dir fallback only covers crashes of the process itself: on
+    hosts that wipe ``/tmp`` on restart (Render, most containers) journaled
+    transitions are lost with it. Point AGENT_TASKS_JOURNAL_DIR at a
+    persistent disk wherever write-behind is enabled.
+    """
+    directory = os.getenv("AGENT_TASKS_JOURNAL_DIR")
+    if directory:
+        return directory
+    logger.warning("AGENT_TASKS_JOURNAL_DIR is not set; batched task transitions will not survive a host restart")
+    return os.path.join(tempfile.gettempdir(), "agent_tasks_journal")
@@ -7,6 +7,7 @@ Environment Variables:
 - RQ_QUEUE_NAME: Queue name to process (default: orchestrator)
 - SENTRY_DSN: Sentry DSN for error tracking (optional)
 - RENDER_INSTANCE_ID / HOSTNAME: Worker identifier
+- AGENT_TASKS_WRITE_BEHIND: Batch agent_tasks writes through a local journal (default: false)
 
 Signal Handling:
 - SIGTERM / SIGINT: Triggers graceful shutdown
@@ -49,7 +50,9 @@ import logging
 from persistence.db_writer import (
     upsert_task_running,
     upsert_task_done,
-    upsert_task_error
+    upsert_task_error,
+    flush_task_writes,
+    write_behind_enabled
 )
 
 logging.basicConfig(
@@ -98,6 +101,11 @@ else:
         logger.warning(f"⚠️ Redis URL does not use TLS: {redis_url[:30]}...")
 RQ_QUEUE_NAME = os.getenv("RQ_QUEUE_NAME", "orchestrator")
 
+# Report jobs enqueued by the API (src.services.report_jobs) run on this queue too
+_api_backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../api-backend'))
+if os.path.isdir(_api_backend_root) and _api_backend_root not in sys.path:
+    sys.path.append(_api_backend_root)
+
 redis_retry = RedisRetry(ExponentialBackoff(base=1, cap=10), retries=5)
 redis = Redis.from_url(
     redis_url, 
@@ -468,10 +476,25 @@ def run_orchestrator_task(task_id: str, question: str, repo: str):
             logger.error(f"DB write failed for task {task_id} (error): {db_error}")
         
         raise
+    finally:
+        # A forked work horse exits after this job; anything still batched is
+        # otherwise only written when a later process replays the journal
+        flush_task_writes(only_if_forked=True)
 
-if __name__ == "__main__":
-    from rq import Worker
+def create_worker(queues, connection, **kwargs):
+    """
+    RQ worker for ``queues``; SimpleWorker when agent_tasks writes are batched
     
+    A forking Worker runs every job in a fresh work horse, so each task would
+    get its own write batcher and journal and nothing would coalesce across
+    tasks. SimpleWorker runs jobs in this long-lived process instead.
+    """
+    from rq import SimpleWorker, Worker
+    
+    worker_class = SimpleWorker if write_behind_enabled() else Worker
+    return worker_class(queues, connection=connection, serializer=JSONSerializer, **kwargs)
+
+if __name__ == "__main__":
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     atexit.register(cleanup_heartbeat)
@@ -483,15 +506,14 @@ if __name__ == "__main__":
     logger.info(f"Heartbeat monitoring enabled", extra={"operation": "startup", "worker_id": WORKER_ID, "ttl": 120, "interval": 30})
     
     try:
-        worker = Worker(
+        worker = create_worker(
             [q],
             connection=redis_client_rq,
             name=WORKER_ID,
             default_worker_ttl=600,
-            default_result_ttl=86400,
-            serializer=JSONSerializer()
+            default_result_ttl=86400
         )
-        logger.info(f"Worker configuration complete", extra={"operation": "startup", "worker_id": WORKER_ID, "worker_ttl": 600, "result_ttl": 86400, "serializer": "JSONSerializer"})
+        logger.info(f"Worker configuration complete", extra={"operation": "startup", "worker_id": WORKER_ID, "worker_ttl": 600, "result_ttl": 86400, "serializer": "JSONSerializer", "worker_class": type(worker).__name__})
         worker.work()
     except KeyboardInterrupt:
         logger.info(f"KeyboardInterrupt received", extra={"operation": "shutdown", "worker_id": WORKER_ID})
@@ -501,5 +523,6 @@ if __name__ == "__main__":
             sentry_sdk.capture_exception(e)
         raise
     finally:
+        flush_task_writes()
         cleanup_heartbeat()
         logger.info(f"Worker shutdown complete", extra={"operation": "shutdown", "worker_id": WORKER_ID})
@@ -3,6 +3,8 @@ Tests for RQ Worker with heartbeat monitoring and graceful shutdown
 """
 import pytest
 import json
+import subprocess
+import textwrap
 import time
 import threading
 from unittest.mock import Mock, patch, MagicMock, call
@@ -12,6 +14,8 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+ORCHESTRATOR_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 from redis_queue.worker import (
     update_worker_heartbeat,
     cleanup_heartbeat,
@@ -19,6 +23,7 @@ from redis_queue.worker import (
     run_step,
     enqueue,
     run_orchestrator_task,
+    create_worker,
     WORKER_ID,
     shutdown_event,
     shutting_down
@@ -298,3 +303,99 @@ class TestWorkerConfiguration:
     def test_shutdown_event_initialized(self):
         """Test shutdown_event is a threading.Event"""
         assert isinstance(shutdown_event, threading.Event)
+
+
+class TestWriteBehindWorkers:
+    """Test batched agent_tasks writes across tasks and worker processes"""
+
+    # Job module for the worker processes: one task's running and done transitions
+    TASK_MODULE = textwrap.dedent("""
+        from persistence.db_writer import upsert_task_done, upsert_task_running
+
+        def complete_task(task_id):
+            upsert_task_running(task_id, task_id)
+            upsert_task_done(task_id, task_id, f"https://example.com/pr/{task_id}")
+    """)
+
+    # Worker process that records every agent_tasks upsert instead of writing it
+    WORKER_SCRIPT = textwrap.dedent("""
+        import json, os, sys
+        from redis import Redis
+        from rq import Queue
+        from rq.serializers import JSONSerializer
+        from persistence import db_writer
+        from redis_queue.worker import create_worker
+
+        class Table:
+            def upsert(self, rows, on_conflict=None):
+                with open(sys.argv[2], "a") as f:
+                    f.write(json.dumps({"pid": os.getpid(), "rows": rows}) + "\\n")
+                return self
+            def execute(self):
+                pass
+
+        db_writer.get_client = lambda: type("Client", (), {"table": lambda self, name: Table()})()
+        connection = Redis(port=int(sys.argv[1]))
+        queue = Queue("orchestrator", connection=connection, serializer=JSONSerializer())
+        worker = create_worker([queue], connection=connection)
+        print(type(worker).__name__)
+        worker.work(burst=True)
+    """)
+
+    @pytest.fixture
+    def redis_port(self):
+        import fakeredis
+        server = fakeredis.TcpFakeServer(('127.0.0.1', 0), server_type='redis')
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server.server_address[1]
+        server.shutdown()
+        server.server_close()
+
+    def test_simple_worker_when_write_behind(self, monkeypatch):
+        from rq import SimpleWorker, Worker
+        from fakeredis import FakeRedis
+
+        monkeypatch.setenv("AGENT_TASKS_WRITE_BEHIND", "true")
+        assert type(create_worker(["orchestrator"], connection=FakeRedis())) is SimpleWorker
+        monkeypatch.setenv("AGENT_TASKS_WRITE_BEHIND", "false")
+        assert type(create_worker(["orchestrator"], connection=FakeRedis())) is Worker
+
+    def test_transitions_coalesce_across_tasks(self, tmp_path, redis_port):
+        from redis import Redis
+        from rq import Queue
+        from rq.serializers import JSONSerializer
+
+        (tmp_path / "task_jobs.py").write_text(self.TASK_MODULE)
+        writes = tmp_path / "writes.jsonl"
+        queue = Queue("orchestrator", connection=Redis(port=redis_port), serializer=JSONSerializer())
+        task_ids = [f"task-{i}" for i in range(20)]
+        for task_id in task_ids:
+            queue.enqueue("task_jobs.complete_task", task_id)
+
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join([ORCHESTRATOR_ROOT, str(tmp_path)]),
+            "REDIS_URL": f"redis://localhost:{redis_port}",
+            "AGENT_TASKS_WRITE_BEHIND": "true",
+            "AGENT_TASKS_FLUSH_INTERVAL": "60",
+            "AGENT_TASKS_JOURNAL_DIR": str(tmp_path / "journal"),
+        }
+        workers = [
+            subprocess.Popen([sys.executable, "-c", self.WORKER_SCRIPT, str(redis_port), str(writes)],
+                             cwd=str(tmp_path), env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for _ in range(2)
+        ]
+        outputs = [worker.communicate(timeout=60) for worker in workers]
+        assert [worker.returncode for worker in workers] == [0, 0], [err for _, err in outputs]
+        assert all(out.split()[0] == "SimpleWorker" for out, _ in outputs)
+
+        upserts = [json.loads(line) for line in writes.read_text().splitlines()]
+        rows = {row["task_id"]: row for upsert in upserts for row in upsert["rows"]}
+
+        # One bulk upsert per worker process, not one per transition or per task
+        assert len(upserts) <= len(workers)
+        assert len({upsert["pid"] for upsert in upserts}) == len(upserts)
+        assert sorted(rows) == sorted(task_ids)
+        assert all(row["status"] == "done" and row["started_at"] and row["pr_url"] for row in rows.values())
+        assert all(journal.read_text() == "" for journal in (tmp_path / "journal").iterdir())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Idempotency Store - TTL-bounded storage of operation results by idempotency key
+In-memory LRU for a single process, Redis for sharing results across workers
+"""
+
+import abc
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_MISSING = (False, None)
+
+
+class IdempotencyStore(abc.ABC):
+    """
+    Interface of the result stores used by IdempotencyManager
+
+    The ``*_nowait`` methods, ``items`` and ``cleanup`` only touch results
+    held in this process; the async methods may go to a shared backend.
+    An execution claim is a lease: it lapses after ``lease_seconds`` unless
+    its holder renews it.
+    """
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Number of results held locally"""
+
+    @abc.abstractmethod
+    def items(self) -> Dict[str, Any]:
+        """Unexpired local results keyed by idempotency key"""
+
+    @abc.abstractmethod
+    def get_nowait(self, key: str) -> Tuple[bool, Any]:
+        """Look up a result in local memory only"""
+
+    @abc.abstractmethod
+    def set_nowait(self, key: str, result: Any):
+        """Store a result in local memory only"""
+
+    @abc.abstractmethod
+    def cleanup(self, max_age_seconds: Optional[float] = None) -> int:
+        """Drop local entries older than max_age_seconds (default: the TTL); returns how many"""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, result) for a key"""
+
+    @abc.abstractmethod
+    async def set(self, key: str, result: Any):
+        """Store the result for a key"""
+
+    @abc.abstractmethod
+    async def claim(self, key: str, lease_seconds: float) -> bool:
+        """Try to become the executor for a key"""
+
+    @abc.abstractmethod
+    async def renew(self, key: str, lease_seconds: float) -> bool:
+        """Extend a claim this store holds; False if it has been lost"""
+
+    @abc.abstractmethod
+    async def release(self, key: str):
+        """Give up the execution claim for a key"""
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """
+    LRU + TTL store of results, local to one process
+
+    Entries expire ``ttl_seconds`` after they were stored and the least
+    recently used entries are evicted beyond ``max_entries``. ``claim`` always
+    succeeds: within a process, concurrent callers are coalesced by the
+    IdempotencyManager before they reach the store.
+    """
+
+    def __init__(self, ttl_seconds: float = 24 * 3600, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> Dict[str, Any]:
+        """Unexpired results keyed by idempotency key"""
+        now = time.monotonic()
+        return {
+            key: result for key, (result, stored_at) in self._entries.items()
+            if now - stored_at < self.ttl_seconds
+        }
+
+    def get_nowait(self, key: str) -> Tuple[bool, Any]:
+        """Look up a result in local memory only"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        result, stored_at = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return True, result
+
+    def set_nowait(self, key: str, result: Any):
+        """Store a result in local memory only"""
+        self._entries[key] = (result, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, result) for a key"""
+        return self.get_nowait(key)
+
+    async def set(self, key: str, result: Any):
+        """Store the result for a key"""
+        self.set_nowait(key, result)
+
+    async def claim(self, key: str, lease_seconds: float) -> bool:
+        """Try to become the executor for a key"""
+        return True
+
+    async def renew(self, key: str, lease_seconds: float) -> bool:
+        """Extend the execution claim for a key"""
+        return True
+
+    async def release(self, key: str):
+        """Give up the execution claim for a key"""
+
+    def cleanup(self, max_age_seconds: Optional[float] = None) -> int:
+        """Drop entries older than max_age_seconds (default: the TTL); returns how many"""
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.monotonic() - max_age
+        removed = 0
+        # Entries are refreshed with move_to_end on access, not on age, so scan all
+        for key in [k for k, (_, stored_at) in self._entries.items() if stored_at <= cutoff]:
+            del self._entries[key]
+            removed += 1
+        return removed
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """
+    Results shared across workers through Redis, with a local LRU in front
+
+    Results are stored as JSON under ``{prefix}{key}`` with the TTL as
+    expiry (values that are not JSON-serializable are stored as strings).
+    ``claim`` takes a ``SET NX PX`` lease holding a random token, so only
+    one worker executes a key at a time; if that worker dies, the lease
+    expires and another worker takes over. Renewing and releasing compare
+    the token in a Lua script, so a worker never extends or deletes a
+    lease another worker has taken over in the meantime.
+    """
+
+    RENEW_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    RELEASE_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, redis_client, prefix: str = "idempotency:",
+                 ttl_seconds: float = 24 * 3600, max_entries: int = 10_000):
+        self.local = InMemoryIdempotencyStore(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self._lease_tokens: Dict[str, str] = {}
+
+    @classmethod
+    def from_url(cls, redis_url: str, **kwargs) -> "RedisIdempotencyStore":
+        """Create a store backed by a redis.asyncio client for the given URL"""
+        import redis.asyncio as redis_asyncio
+        return cls(redis_asyncio.from_url(redis_url, decode_responses=True), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    def items(self) -> Dict[str, Any]:
+        return self.local.items()
+
+    def get_nowait(self, key: str) -> Tuple[bool, Any]:
+        return self.local.get_nowait(key)
+
+    def set_nowait(self, key: str, result: Any):
+        self.local.set_nowait(key, result)
+
+    def cleanup(self, max_age_seconds: Optional[float] = None) -> int:
+        return self.local.cleanup(max_age_seconds)
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        found, result = self.local.get_nowait(key)
+        if found:
+            return found, result
+        raw = await self.redis.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        result = json.loads(raw)['result']
+        self.local.set_nowait(key, result)
+        return True, result
+
+    async def set(self, key: str, result: Any):
+        self.local.set_nowait(key, result)
+        await self.redis.set(
+            self.prefix + key,
+            json.dumps({'result': result}, default=str),
+            px=int(self.ttl_seconds * 1000)
+        )
+
+    async def claim(self, key: str, lease_seconds: float) -> bool:
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(
+            self._lease_key(key), token, nx=True, px=int(lease_seconds * 1000)
+        )
+        if acquired:
+            self._lease_tokens[key] = token
+        return bool(acquired)
+
+    async def renew(self, key: str, lease_seconds: float) -> bool:
+        token = self._lease_tokens.get(key)
+        if token is None:
+            return False
+        renewed = await self.redis.eval(
+            self.RENEW_SCRIPT, 1, self._lease_key(key), token, int(lease_seconds * 1000)
+        )
+        return bool(renewed)
+
+    async def release(self, key: str):
+        token = self._lease_tokens.pop(key, None)
+        if token is None:
+            return
+        await self.redis.eval(self.RELEASE_SCRIPT, 1, self._lease_key(key), token)
+
+    def _lease_key(self, key: str) -> str:
+        return f"{self.prefix}{key}:lease"
@@ -16,9 +16,9 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import aiohttp
-import statistics
 from collections import defaultdict, deque
 import redis
+import redis.asyncio as aioredis
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -122,22 +122,96 @@ class DecisionResult:
     execution_timeline: str
     rollback_plan: Optional[str] = None
 
+class MetricStats:
+    """單一指標的串流統計 (每次觀察 O(1) 更新)
+    
+    - EWMA 平均值與變異數：近期基準，供異常檢測使用
+    - Welford 平均值與變異數：全期統計
+    - 最近 window 個值：供趨勢分析使用
+    """
+    
+    def __init__(self, span: int = 10, window: int = 5):
+        self.alpha = 2 / (span + 1)
+        self.count = 0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+        self.baseline = 0.0  # 最近一次更新前的 EWMA
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.recent = deque(maxlen=window)
+    
+    def update(self, value: float):
+        """加入一個觀察值"""
+        self.count += 1
+        self.recent.append(value)
+        self.baseline = self.ewma
+        
+        if self.count == 1:
+            self.ewma = value
+            self.baseline = value
+        else:
+            diff = value - self.ewma
+            increment = self.alpha * diff
+            self.ewma += increment
+            self.ewm_var = (1 - self.alpha) * (self.ewm_var + diff * increment)
+        
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+    
+    @property
+    def variance(self) -> float:
+        """全期樣本變異數"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    def zscore(self, value: float) -> float:
+        """相對於 EWMA 基準的標準分數"""
+        std = self.ewm_var ** 0.5
+        return (value - self.ewma) / std if std > 0 else 0.0
+
 class OODALoop:
     """OODA 循環實現 (Observe, Orient, Decide, Act)"""
     
+    TRACKED_METRICS = ('api_latency_p95', 'api_error_rate', 'cpu_usage', 'memory_usage')
+    
     def __init__(self, redis_client: redis.Redis, db_connection):
+        # 建議使用 redis.asyncio 客戶端；同步客戶端會在執行緒中調用，不阻塞事件循環
         self.redis = redis_client
         self.db = db_connection
         self.observations = deque(maxlen=1000)
         self.orientations = deque(maxlen=100)
         self.decisions = deque(maxlen=100)
         self.actions = deque(maxlen=100)
+        self.metric_stats: Dict[str, MetricStats] = {
+            name: MetricStats() for name in self.TRACKED_METRICS + ('health_score',)
+        }
+    
+    async def _fetch_current_metrics(self) -> Dict[str, str]:
+        """從 Redis 讀取實時指標"""
+        if isinstance(self.redis, aioredis.Redis):
+            data = await self.redis.hgetall("system:metrics:current")
+        else:
+            data = await asyncio.to_thread(self.redis.hgetall, "system:metrics:current")
+        
+        if isinstance(data, dict):
+            return {
+                (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                for k, v in data.items()
+            }
+        return data
+    
+    def _record_observation(self, metrics: SystemMetrics, health_score: float):
+        """更新各指標的串流統計"""
+        self.observations.append(metrics)
+        for name in self.TRACKED_METRICS:
+            self.metric_stats[name].update(getattr(metrics, name))
+        self.metric_stats['health_score'].update(health_score)
     
     async def observe(self) -> SystemMetrics:
         """觀察階段：收集系統狀態和環境信息"""
         try:
             # 從 Redis 獲取實時指標
-            metrics_data = self.redis.hgetall("system:metrics:current")
+            metrics_data = await self._fetch_current_metrics()
             
             if not metrics_data:
                 metrics_data = {
@@ -164,8 +238,9 @@ class OODALoop:
                 revenue_mrr=float(metrics_data.get('revenue_mrr', 0))
             )
             
-            self.observations.append(metrics)
-            logger.info(f"Observed system metrics: health_score={metrics.health_score():.2f}")
+            health_score = metrics.health_score()
+            self._record_observation(metrics, health_score)
+            logger.info(f"Observed system metrics: health_score={health_score:.2f}")
             return metrics
             
         except Exception as e:
@@ -224,11 +299,8 @@ class OODALoop:
         try:
             logger.info(f"Executing decision: {decision.decision_id}")
             
-            # 執行具體行動
-            execution_results = []
-            for action in decision.actions:
-                result = await self._execute_action(action)
-                execution_results.append(result)
+            # 執行具體行動：互不依賴的行動並行執行
+            execution_results = await self._execute_actions(decision.actions)
             
             action_record = {
                 'decision_id': decision.decision_id,
@@ -249,13 +321,15 @@ class OODALoop:
         """檢測系統異常"""
         anomalies = []
         
-        if len(self.observations) < 10:
+        latency_stats = self.metric_stats['api_latency_p95']
+        error_stats = self.metric_stats['api_error_rate']
+        if latency_stats.count < 10:
             return anomalies
         
-        # 計算歷史平均值
-        recent_metrics = list(self.observations)[-10:]
-        avg_latency = statistics.mean([m.api_latency_p95 for m in recent_metrics])
-        avg_error_rate = statistics.mean([m.api_error_rate for m in recent_metrics])
+        # 近期基準 (EWMA)；若 current_metrics 即最新觀察，使用其加入前的基準
+        is_latest = bool(self.observations) and self.observations[-1] is current_metrics
+        avg_latency = latency_stats.baseline if is_latest else latency_stats.ewma
+        avg_error_rate = error_stats.baseline if is_latest else error_stats.ewma
         
         # 檢測延遲異常
         if current_metrics.api_latency_p95 > avg_latency * 2:
@@ -276,10 +350,11 @@ class OODALoop:
     
     def _analyze_trends(self) -> Dict[str, str]:
         """分析趨勢"""
-        if len(self.observations) < 5:
+        health_stats = self.metric_stats['health_score']
+        if health_stats.count < 5:
             return {'trend': 'insufficient_data'}
         
-        recent_health_scores = [obs.health_score() for obs in list(self.observations)[-5:]]
+        recent_health_scores = list(health_stats.recent)
         
         if len(recent_health_scores) >= 2:
             if recent_health_scores[-1] > recent_health_scores[0]:
@@ -314,7 +389,7 @@ class OODALoop:
                     'name': 'emergency_scale_up',
                     'actions': [
                         {'type': 'scale_resources', 'parameters': {'service': 'api', 'replicas': 5}},
-                        {'type': 'send_notification', 'parameters': {'channel': 'slack', 'message': '緊急擴容執行中'}}
+                        {'type': 'send_notification', 'parameters': {'channel': 'slack', 'message': '緊急擴容執行中'}, 'depends_on': []}
                     ],
                     'expected_outcome': '提高系統容量，緩解高負載',
                     'risk': 0.3,
@@ -381,6 +456,52 @@ class OODALoop:
         
         return best_strategy or strategies[0]
     
+    def _action_dependencies(self, actions: List[Dict[str, Any]]) -> List[List[int]]:
+        """推導行動之間的依賴關係
+        
+        行動可用 'depends_on' (先前行動的索引列表) 明確聲明依賴；否則：
+        - 通知在先前所有非通知行動完成後發送 (回報其結果)
+        - 作用於同一服務的行動依序執行
+        - 其餘行動互不依賴，並行執行
+        """
+        dependencies = []
+        for index, action in enumerate(actions):
+            if 'depends_on' in action:
+                dependencies.append([i for i in action['depends_on'] if 0 <= i < index])
+                continue
+            
+            if action.get('type') == 'send_notification':
+                dependencies.append([
+                    i for i in range(index) if actions[i].get('type') != 'send_notification'
+                ])
+                continue
+            
+            target = self._action_target(action)
+            dependencies.append([
+                i for i in range(index)
+                if target is not None and self._action_target(actions[i]) == target
+            ])
+        return dependencies
+    
+    @staticmethod
+    def _action_target(action: Dict[str, Any]) -> Optional[str]:
+        parameters = action.get('parameters', {})
+        return parameters.get('service') or parameters.get('service_name')
+    
+    async def _execute_actions(self, actions: List[Dict[str, Any]]) -> List[bool]:
+        """按依賴關係並行執行行動，結果順序與 actions 相同"""
+        dependencies = self._action_dependencies(actions)
+        tasks: List[asyncio.Task] = []
+        
+        async def run(index: int) -> bool:
+            if dependencies[index]:
+                await asyncio.gather(*(tasks[i] for i in dependencies[index]))
+            return await self._execute_action(actions[index])
+        
+        for index in range(len(actions)):
+            tasks.append(asyncio.ensure_future(run(index)))
+        return list(await asyncio.gather(*tasks))
+    
     async def _execute_action(self, action: Dict[str, Any]) -> bool:
         """執行單個行動"""
         action_type = action.get('type')
@@ -438,7 +559,7 @@ class MetaAgentDecisionHub:
         try:
             if not redis_url:
                 redis_url = get_secure_redis_url(allow_local=os.getenv("TESTING") == "true")
-            self.redis = redis.from_url(redis_url)
+            self.redis = aioredis.from_url(redis_url, decode_responses=True)
             self.db = None  # 暫時不使用數據庫連接
             self.ooda_loop = OODALoop(self.redis, self.db)
             self.decision_history = []
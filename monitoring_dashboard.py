@@ -303,6 +303,7 @@ class MonitoringDashboard:
             lines.append(f'circuit_breaker_total_requests{{service="{name}"}} {cb_metrics.get("total_requests", 0)} {timestamp}')
             lines.append(f'circuit_breaker_failed_requests{{service="{name}"}} {cb_metrics.get("failed_requests", 0)} {timestamp}')
             lines.append(f'circuit_breaker_failure_rate{{service="{name}"}} {cb_metrics.get("failure_rate", 0)} {timestamp}')
+            lines.append(f'circuit_breaker_window_failure_rate{{service="{name}"}} {cb_metrics.get("window_failure_rate", 0)} {timestamp}')
             
         lines.append(f'system_error_rate {metrics.system_health.get("error_rate", 0)} {timestamp}')
         lines.append(f'system_open_circuit_breakers {metrics.system_health.get("open_circuit_breakers", 0)} {timestamp}')
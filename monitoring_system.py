@@ -5,7 +5,9 @@
 """
 
 import requests
+import asyncio
 import json
+import math
 import time
 import datetime
 import logging
@@ -46,18 +48,138 @@ class AlertConfig:
     consecutive_health_fail_critical: int = 2
     window_minutes: int = 10
 
+class LatencySketch:
+    """
+    串流分位數估計（DDSketch 風格的對數分桶直方圖）
+    
+    每個值落在相對寬度為 relative_accuracy 的對數桶中，分位數誤差不超過
+    該比例；桶數只與數值範圍有關，與樣本數無關，且可直接合併。
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value: float):
+        """加入一個正值樣本"""
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def merge(self, other: 'LatencySketch'):
+        """合併另一個相同精度的 sketch"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def quantile(self, q: float) -> float:
+        """估計分位數，空 sketch 回傳 0"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+class WindowedHealthStats:
+    """
+    以時間分桶的健康檢查統計
+    
+    每個桶（預設一分鐘）保存請求數、錯誤數與延遲 sketch，查詢時只合併
+    窗口內的桶，成本與樣本數無關。
+    """
+    
+    def __init__(self, window_minutes: int = 60, bucket_seconds: int = 60,
+                 relative_accuracy: float = 0.01):
+        self.bucket_seconds = bucket_seconds
+        self.relative_accuracy = relative_accuracy
+        self.slots = max(1, math.ceil(window_minutes * 60 / bucket_seconds))
+        self._bucket_ids = [-1] * self.slots
+        self._totals = [0] * self.slots
+        self._errors = [0] * self.slots
+        self._sketches = [LatencySketch(relative_accuracy) for _ in range(self.slots)]
+    
+    def _slot(self, bucket_id: int) -> int:
+        slot = bucket_id % self.slots
+        if self._bucket_ids[slot] != bucket_id:
+            self._bucket_ids[slot] = bucket_id
+            self._totals[slot] = 0
+            self._errors[slot] = 0
+            self._sketches[slot] = LatencySketch(self.relative_accuracy)
+        return slot
+    
+    def record(self, result: HealthCheckResult):
+        """記錄一筆健康檢查結果"""
+        slot = self._slot(int(result.timestamp.timestamp() // self.bucket_seconds))
+        self._totals[slot] += 1
+        if not result.success or result.status_code >= 400:
+            self._errors[slot] += 1
+        if result.latency_ms > 0:
+            self._sketches[slot].add(result.latency_ms)
+    
+    def _window_slots(self, window_minutes: int, now: Optional[float] = None) -> List[int]:
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        span = min(self.slots, math.ceil(window_minutes * 60 / self.bucket_seconds))
+        return [
+            slot for slot, bucket_id in enumerate(self._bucket_ids)
+            if current - span < bucket_id <= current
+        ]
+    
+    def error_rate(self, window_minutes: int, now: Optional[float] = None) -> float:
+        """窗口內錯誤率"""
+        slots = self._window_slots(window_minutes, now)
+        total = sum(self._totals[slot] for slot in slots)
+        return sum(self._errors[slot] for slot in slots) / total if total else 0.0
+    
+    def latency_sketch(self, window_minutes: int, now: Optional[float] = None) -> LatencySketch:
+        """合併窗口內的延遲 sketch"""
+        merged = LatencySketch(self.relative_accuracy)
+        for slot in self._window_slots(window_minutes, now):
+            merged.merge(self._sketches[slot])
+        return merged
+    
+    def p95_latency(self, window_minutes: int, now: Optional[float] = None) -> float:
+        """窗口內 P95 延遲（樣本不足 100 筆時取最大值，與 calculate_p95_latency 一致）"""
+        sketch = self.latency_sketch(window_minutes, now)
+        if sketch.count == 0:
+            return 0.0
+        return sketch.quantile(0.95) if sketch.count >= 100 else sketch.max
+
 class MonitoringSystem:
     """監控系統主類"""
     
-    def __init__(self, base_url: str, auth_token: str = None):
+    def __init__(self, base_url: str, auth_token: str = None,
+                 endpoints: List[str] = None, probe_timeout: float = 10.0,
+                 max_connections: int = 50):
         self.base_url = base_url.rstrip('/')
         self.auth_token = auth_token
         self.alert_config = AlertConfig()
+        self.endpoints = endpoints or ['/health', '/healthz']
+        self.probe_timeout = probe_timeout
+        self.max_connections = max_connections
+        self._session = None
+        self._session_loop = None
+        self._loop = None  # 同步介面專用、跨週期保留的事件迴圈
         
         # 使用 deque 來維護滑動窗口數據
         self.health_results = deque(maxlen=1000)
         self.error_counts = deque(maxlen=100)
         self.latency_measurements = deque(maxlen=100)
+        # 告警用的分桶統計，保留一天以支援日報窗口
+        self.window_stats = WindowedHealthStats(window_minutes=24 * 60)
         
         # 連續失敗計數器
         self.consecutive_5xx_count = 0
@@ -114,24 +236,92 @@ class MonitoringSystem:
                 success=False
             )
     
-    def run_health_checks(self) -> List[HealthCheckResult]:
-        """執行所有健康檢查"""
-        results = []
-        
-        # 檢查 /health
-        results.append(self.check_endpoint('/health'))
-        
-        # 檢查 /healthz
-        results.append(self.check_endpoint('/healthz'))
+    def record_result(self, result: HealthCheckResult):
+        """儲存結果並更新分桶統計"""
+        self.health_results.append(result)
+        self.window_stats.record(result)
+    
+    def _headers(self) -> Dict:
+        return {'Authorization': f'Bearer {self.auth_token}'} if self.auth_token else {}
+    
+    async def _get_session(self):
+        """取得共用連線池；事件迴圈改變時重建"""
+        import aiohttp
+        
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.probe_timeout),
+                headers=self._headers()
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """關閉共用連線池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def check_endpoint_async(self, endpoint: str, method: str = 'GET',
+                                   json_data: Dict = None) -> HealthCheckResult:
+        """非同步檢查單個端點，逾時或連線錯誤視為失敗"""
+        session = await self._get_session()
+        url = f"{self.base_url}{endpoint}"
+        start_time = time.perf_counter()
         
-        # 儲存結果
+        try:
+            async with session.request(method.upper(), url, json=json_data) as response:
+                await response.read()
+                latency_ms = (time.perf_counter() - start_time) * 1000
+                logger.info(f"{endpoint}: {response.status} ({latency_ms:.2f}ms)")
+                return HealthCheckResult(
+                    endpoint=endpoint,
+                    status_code=response.status,
+                    latency_ms=latency_ms,
+                    timestamp=datetime.datetime.now(),
+                    success=200 <= response.status < 400
+                )
+        except Exception as e:
+            message = str(e) or type(e).__name__
+            logger.error(f"Error checking {endpoint}: {message}")
+            return HealthCheckResult(
+                endpoint=endpoint,
+                status_code=-1,
+                latency_ms=-1,
+                timestamp=datetime.datetime.now(),
+                error_message=message,
+                success=False
+            )
+    
+    async def run_health_checks_async(self, endpoints: List[str] = None) -> List[HealthCheckResult]:
+        """並行檢查所有端點，單一端點卡住最多只耽誤 probe_timeout"""
+        results = await asyncio.gather(*(
+            self.check_endpoint_async(endpoint) for endpoint in (endpoints or self.endpoints)
+        ))
         for result in results:
-            self.health_results.append(result)
-        
-        return results
+            self.record_result(result)
+        return list(results)
+    
+    def run_health_checks(self) -> List[HealthCheckResult]:
+        """執行所有健康檢查；同步呼叫共用同一個事件迴圈與連線池"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.run_health_checks_async())
+    
+    def shutdown(self):
+        """關閉同步介面的連線池與事件迴圈"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.run_until_complete(self.close())
+        finally:
+            self._loop.close()
+            self._loop = None
     
     def calculate_error_rate(self, window_minutes: int = 10) -> float:
-        """計算指定時間窗口內的錯誤率"""
+        """計算指定時間窗口內的錯誤率（逐筆精確計算；告警使用 window_stats）"""
         cutoff_time = datetime.datetime.now() - datetime.timedelta(minutes=window_minutes)
         
         recent_results = [r for r in self.health_results if r.timestamp >= cutoff_time]
@@ -145,7 +335,7 @@ class MonitoringSystem:
         return error_count / total_count if total_count > 0 else 0.0
     
     def calculate_p95_latency(self, window_minutes: int = 10) -> float:
-        """計算指定時間窗口內的 P95 延遲"""
+        """計算指定時間窗口內的 P95 延遲（逐筆精確計算；告警使用 window_stats）"""
         cutoff_time = datetime.datetime.now() - datetime.timedelta(minutes=window_minutes)
         
         recent_results = [r for r in self.health_results 
@@ -162,7 +352,7 @@ class MonitoringSystem:
         alerts = []
         
         # 檢查錯誤率
-        error_rate = self.calculate_error_rate(self.alert_config.window_minutes)
+        error_rate = self.window_stats.error_rate(self.alert_config.window_minutes)
         
         if error_rate >= self.alert_config.error_rate_critical_threshold:
             alerts.append({
@@ -182,7 +372,7 @@ class MonitoringSystem:
             })
         
         # 檢查 P95 延遲
-        p95_latency = self.calculate_p95_latency(self.alert_config.window_minutes)
+        p95_latency = self.window_stats.p95_latency(self.alert_config.window_minutes)
         
         if p95_latency > self.alert_config.latency_warning_threshold:
             alerts.append({
@@ -329,6 +519,8 @@ def main():
         logger.info("Monitoring system stopped by user")
     except Exception as e:
         logger.error(f"Monitoring system error: {str(e)}")
+    finally:
+        monitor.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -33,6 +33,12 @@ class OpsAgentClient:
         self.agent_name = agent_name
         self.is_running = False
         
+        # Alert tool, notification service and per-severity rules live as long
+        # as the client so deduplication and batching span tasks
+        self._alert_tool = None
+        self._notification_service = None
+        self._alert_rules: Dict[str, str] = {}
+        
         self._register_event_handlers()
     
     def _register_event_handlers(self):
@@ -64,6 +70,13 @@ class OpsAgentClient:
         logger.info(f"{self.agent_name} client stopping")
         self.is_running = False
         await self.redis_queue.stop_event_listener()
+        
+        if self._alert_tool is not None:
+            await self._alert_tool.close()
+            await self._notification_service.close()
+            self._alert_tool = None
+            self._notification_service = None
+            self._alert_rules.clear()
     
     async def _process_tasks(self):
         """Process tasks from the queue"""
@@ -193,39 +206,48 @@ class OpsAgentClient:
                 )
                 await self.redis_queue.enqueue_task(alert_task)
     
+    def _get_alert_tool(self):
+        """Alert management tool shared by every alert task"""
+        if self._alert_tool is None:
+            from agents.ops_agent.tools.alert_management_tool import create_alert_management_tool
+            from agents.ops_agent.tools.notification_service import NotificationService
+            
+            self._notification_service = NotificationService(
+                mailtrap_api_token=os.getenv("MAILTRAP_API_TOKEN"),
+                slack_webhook_url=os.getenv("SLACK_WEBHOOK_URL")
+            )
+            self._alert_tool = create_alert_management_tool(
+                notification_service=self._notification_service,
+                default_email_recipient=os.getenv("ALERT_EMAIL"),
+                default_slack_channel=os.getenv("ALERT_SLACK_CHANNEL")
+            )
+        return self._alert_tool
+    
     async def _handle_alert_task(self, task: UnifiedTask):
         """Handle alert task"""
-        from agents.ops_agent.tools.alert_management_tool import create_alert_management_tool
-        from agents.ops_agent.tools.notification_service import NotificationService
-        import os
-        
-        notification_service = NotificationService(
-            mailtrap_api_token=os.getenv("MAILTRAP_API_TOKEN"),
-            slack_webhook_url=os.getenv("SLACK_WEBHOOK_URL")
-        )
-        
-        alert_tool = create_alert_management_tool(
-            notification_service=notification_service,
-            default_email_recipient=os.getenv("ALERT_EMAIL"),
-            default_slack_channel=os.getenv("ALERT_SLACK_CHANNEL")
-        )
+        alert_tool = self._get_alert_tool()
         
         severity = task.payload.get("severity", "medium")
         message = task.payload.get("message", "Alert triggered")
         
-        rule_result = await alert_tool.create_alert_rule(
-            name=f"Task {task.task_id} Alert",
-            condition=message,
-            severity=severity,
-            channels=["email", "slack"]
-        )
-        
-        if rule_result['success']:
-            await alert_tool.trigger_alert(
-                rule_id=rule_result['rule']['id'],
-                message=message,
-                metadata=task.payload
+        rule_id = self._alert_rules.get(severity)
+        if rule_id is None:
+            rule_result = await alert_tool.create_alert_rule(
+                name=f"{self.agent_name} {severity} task alerts",
+                condition="alert task",
+                severity=severity,
+                channels=["email", "slack"]
             )
+            if not rule_result['success']:
+                return
+            rule_id = rule_result['rule']['id']
+            self._alert_rules[severity] = rule_id
+        
+        await alert_tool.trigger_alert(
+            rule_id=rule_id,
+            message=message,
+            metadata=task.payload
+        )
     
     async def _handle_deploy_event(self, event):
         """Handle deploy events"""
@@ -13,8 +13,117 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 import sqlite3
 import threading
+import zlib
 from contextlib import contextmanager
 
+SCHEMA_VERSION = 3
+
+# Indexes for the columns the load/restore/cleanup queries filter and sort on.
+# Applied by schema version 2; CREATE INDEX IF NOT EXISTS keeps it idempotent.
+SCHEMA_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_beta_candidates_status_created ON beta_candidates(status, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_beta_candidates_created ON beta_candidates(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_approval_requests_status_created ON approval_requests(status, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_approval_requests_created ON approval_requests(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_approval_requests_expires ON approval_requests(expires_at)',
+    'CREATE INDEX IF NOT EXISTS idx_state_checkpoints_component_created ON state_checkpoints(component_name, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_state_checkpoints_created ON state_checkpoints(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_report_history_generated ON report_history(generated_at)',
+]
+
+# Delta checkpoint chains (schema version 3)
+CHECKPOINT_COLUMNS = [
+    ('seq', 'INTEGER'),
+    ('kind', "TEXT DEFAULT 'full'"),
+    ('base_seq', 'INTEGER'),
+    ('encoding', "TEXT DEFAULT 'json'"),
+    ('payload', 'BLOB'),
+]
+
+CHECKPOINT_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_state_checkpoints_component_seq ON state_checkpoints(component_name, seq)',
+]
+
+UPSERT_BETA_CANDIDATE = '''
+    INSERT OR REPLACE INTO beta_candidates
+    (user_id, activity_score, engagement_metrics, qualification_reason,
+     invited_at, status, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_APPROVAL_REQUEST = '''
+    INSERT OR REPLACE INTO approval_requests
+    (request_id, trace_id, title, description, context, prompt_details,
+     requester_agent, priority, status, created_at, expires_at,
+     approved_by, approved_at, approval_channel)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_USER_STORY = '''
+    INSERT OR REPLACE INTO user_stories
+    (story_id, title, description, priority, estimated_effort,
+     source_feedback, status, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_GAMIFICATION_RULE = '''
+    INSERT OR REPLACE INTO gamification_rules
+    (rule_id, name, trigger_condition, reward_type, reward_amount,
+     effectiveness_score, last_updated, active)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def _escape_pointer(key: str) -> str:
+    return key.replace('~', '~0').replace('/', '~1')
+
+
+def _unescape_pointer(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def json_diff(old: Any, new: Any, path: str = '') -> List[Dict]:
+    """
+    Compute a JSON Patch (RFC 6902 add/remove/replace ops) turning old into new
+    
+    Objects are diffed key by key; lists and scalars are replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f"{path}/{_escape_pointer(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape_pointer(key)}"
+            if key not in old:
+                ops.append({'op': 'add', 'path': child, 'value': value})
+            elif old[key] != value or type(old[key]) is not type(value):
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def apply_json_patch(document: Any, ops: List[Dict]) -> Any:
+    """Apply patch ops produced by json_diff, mutating document in place where possible"""
+    for op in ops:
+        if not op['path']:
+            document = op.get('value')
+            continue
+        tokens = [_unescape_pointer(token) for token in op['path'].split('/')[1:]]
+        target = document
+        for token in tokens[:-1]:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        key = tokens[-1]
+        if isinstance(target, list):
+            key = int(key)
+        if op['op'] == 'remove':
+            del target[key]
+        else:
+            target[key] = op['value']
+    return document
+
+
 @dataclass
 class StateCheckpoint:
     """State checkpoint for recovery"""
@@ -27,15 +136,35 @@ class StateCheckpoint:
 class PersistentStateManager:
     """Manages persistent state for all Phase 7 components"""
     
-    def __init__(self, db_path: str = "phase7_state.db"):
+    def __init__(self, db_path: str = "phase7_state.db", busy_timeout: float = 5.0,
+                 statement_cache_size: int = 128, full_snapshot_interval: int = 20,
+                 checkpoint_retention: int = 10, compress_min_bytes: int = 256):
         self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.statement_cache_size = statement_cache_size
+        self.full_snapshot_interval = full_snapshot_interval
+        self.checkpoint_retention = checkpoint_retention
+        self.compress_min_bytes = compress_min_bytes
+        # component_name -> (seq, base_seq, state) of the newest checkpoint
+        self._checkpoint_heads: Dict[str, tuple] = {}
+        self.checkpoint_stats = {'full': 0, 'delta': 0, 'bytes_written': 0, 'bytes_full_equivalent': 0}
         self.logger = logging.getLogger(__name__)
-        self._lock = threading.Lock()
+        # Serializes writers within the process; readers never take it
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._upserts = {
+            'beta_candidates': (UPSERT_BETA_CANDIDATE, self._beta_candidate_params),
+            'approval_requests': (UPSERT_APPROVAL_REQUEST, self._approval_request_params),
+            'user_stories': (UPSERT_USER_STORY, self._user_story_params),
+            'gamification_rules': (UPSERT_GAMIFICATION_RULE, self._gamification_rule_params),
+        }
         self._init_database()
         
     def _init_database(self):
-        """Initialize SQLite database with required tables"""
-        with self._get_connection() as conn:
+        """Initialize SQLite database with required tables and indexes"""
+        with self.transaction() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS beta_candidates (
                     user_id TEXT PRIMARY KEY,
@@ -101,7 +230,12 @@ class PersistentStateManager:
                     component_name TEXT NOT NULL,
                     state_data TEXT NOT NULL,
                     created_at TEXT NOT NULL,
-                    metadata TEXT
+                    metadata TEXT,
+                    seq INTEGER,
+                    kind TEXT DEFAULT 'full',
+                    base_seq INTEGER,
+                    encoding TEXT DEFAULT 'json',
+                    payload BLOB
                 )
             ''')
             
@@ -136,38 +270,184 @@ class PersistentStateManager:
                 )
             ''')
             
-            conn.commit()
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < 2:
+                for statement in SCHEMA_INDEXES:
+                    conn.execute(statement)
+            if version < 3:
+                existing = {row['name'] for row in conn.execute('PRAGMA table_info(state_checkpoints)')}
+                for column, definition in CHECKPOINT_COLUMNS:
+                    if column not in existing:
+                        conn.execute(f'ALTER TABLE state_checkpoints ADD COLUMN {column} {definition}')
+                for statement in CHECKPOINT_INDEXES:
+                    conn.execute(statement)
+            if version < SCHEMA_VERSION:
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for WAL and explicit transactions"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+        
+    def _thread_connection(self) -> sqlite3.Connection:
+        """Return this thread's pooled connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.tx_depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+        
     @contextmanager
     def _get_connection(self):
-        """Get database connection with proper cleanup"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
+        """Get this thread's pooled database connection"""
+        yield self._thread_connection()
+        
+    @contextmanager
+    def transaction(self):
+        """
+        Run several writes in one atomic transaction with a single commit
+        
+        Nested use (including the save_* methods called inside the block)
+        joins the outer transaction. Any exception rolls everything back.
+        """
+        conn = self._thread_connection()
+        if self._local.tx_depth:
+            self._local.tx_depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.tx_depth -= 1
+            return
+            
+        with self._lock:
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.tx_depth = 1
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+            finally:
+                self._local.tx_depth = 0
+                
+    def close(self):
+        """Close every pooled connection"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Failed to close state database connection: {e}")
+        self._local = threading.local()
+        
+    def save_many(self, table: str, records: List[Dict]) -> int:
+        """
+        Upsert many records into one table in a single transaction
+        
+        Args:
+            table: One of beta_candidates, approval_requests, user_stories,
+                gamification_rules
+            records: Records in the shape accepted by the matching save_* method
+            
+        Returns:
+            Number of records written (0 if the batch failed and was rolled back)
+        """
+        if table not in self._upserts:
+            raise ValueError(f"Unsupported table for save_many: {table}")
+        sql, to_params = self._upserts[table]
+        
         try:
-            yield conn
-        finally:
-            conn.close()
+            params = [to_params(record) for record in records]
+            with self.transaction() as conn:
+                conn.executemany(sql, params)
+            return len(params)
+        except Exception as e:
+            self.logger.error(f"Failed to save {table} batch: {e}")
+            return 0
+            
+    @staticmethod
+    def _beta_candidate_params(candidate_data: Dict) -> tuple:
+        now = datetime.now().isoformat()
+        return (
+            candidate_data['user_id'],
+            candidate_data['activity_score'],
+            json.dumps(candidate_data['engagement_metrics']),
+            candidate_data['qualification_reason'],
+            candidate_data.get('invited_at'),
+            candidate_data.get('status', 'pending'),
+            candidate_data.get('created_at', now),
+            now
+        )
+        
+    @staticmethod
+    def _approval_request_params(request_data: Dict) -> tuple:
+        return (
+            request_data['request_id'],
+            request_data['trace_id'],
+            request_data['title'],
+            request_data['description'],
+            json.dumps(request_data['context']),
+            request_data['prompt_details'],
+            request_data['requester_agent'],
+            request_data['priority'],
+            request_data['status'],
+            request_data['created_at'],
+            request_data['expires_at'],
+            request_data.get('approved_by'),
+            request_data.get('approved_at'),
+            request_data.get('approval_channel')
+        )
+        
+    @staticmethod
+    def _user_story_params(story_data: Dict) -> tuple:
+        now = datetime.now().isoformat()
+        return (
+            story_data['story_id'],
+            story_data['title'],
+            story_data['description'],
+            story_data['priority'],
+            story_data['estimated_effort'],
+            story_data['source_feedback'],
+            story_data.get('status', 'backlog'),
+            story_data.get('created_at', now),
+            now
+        )
+        
+    @staticmethod
+    def _gamification_rule_params(rule_data: Dict) -> tuple:
+        return (
+            rule_data['rule_id'],
+            rule_data['name'],
+            rule_data['trigger_condition'],
+            rule_data['reward_type'],
+            rule_data['reward_amount'],
+            rule_data['effectiveness_score'],
+            rule_data['last_updated'],
+            rule_data.get('active', True)
+        )
             
     def save_beta_candidate(self, candidate_data: Dict) -> bool:
         """Save Beta candidate to persistent storage"""
         try:
-            with self._lock, self._get_connection() as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO beta_candidates 
-                    (user_id, activity_score, engagement_metrics, qualification_reason, 
-                     invited_at, status, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    candidate_data['user_id'],
-                    candidate_data['activity_score'],
-                    json.dumps(candidate_data['engagement_metrics']),
-                    candidate_data['qualification_reason'],
-                    candidate_data.get('invited_at'),
-                    candidate_data.get('status', 'pending'),
-                    candidate_data.get('created_at', datetime.now().isoformat()),
-                    datetime.now().isoformat()
-                ))
-                conn.commit()
+            with self.transaction() as conn:
+                conn.execute(UPSERT_BETA_CANDIDATE, self._beta_candidate_params(candidate_data))
                 return True
         except Exception as e:
             self.logger.error(f"Failed to save Beta candidate: {e}")
@@ -201,30 +481,8 @@ class PersistentStateManager:
     def save_approval_request(self, request_data: Dict) -> bool:
         """Save approval request to persistent storage"""
         try:
-            with self._lock, self._get_connection() as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO approval_requests 
-                    (request_id, trace_id, title, description, context, prompt_details,
-                     requester_agent, priority, status, created_at, expires_at,
-                     approved_by, approved_at, approval_channel)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    request_data['request_id'],
-                    request_data['trace_id'],
-                    request_data['title'],
-                    request_data['description'],
-                    json.dumps(request_data['context']),
-                    request_data['prompt_details'],
-                    request_data['requester_agent'],
-                    request_data['priority'],
-                    request_data['status'],
-                    request_data['created_at'],
-                    request_data['expires_at'],
-                    request_data.get('approved_by'),
-                    request_data.get('approved_at'),
-                    request_data.get('approval_channel')
-                ))
-                conn.commit()
+            with self.transaction() as conn:
+                conn.execute(UPSERT_APPROVAL_REQUEST, self._approval_request_params(request_data))
                 return True
         except Exception as e:
             self.logger.error(f"Failed to save approval request: {e}")
@@ -259,24 +517,8 @@ class PersistentStateManager:
     def save_user_story(self, story_data: Dict) -> bool:
         """Save user story to persistent storage"""
         try:
-            with self._lock, self._get_connection() as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO user_stories 
-                    (story_id, title, description, priority, estimated_effort,
-                     source_feedback, status, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    story_data['story_id'],
-                    story_data['title'],
-                    story_data['description'],
-                    story_data['priority'],
-                    story_data['estimated_effort'],
-                    story_data['source_feedback'],
-                    story_data.get('status', 'backlog'),
-                    story_data.get('created_at', datetime.now().isoformat()),
-                    datetime.now().isoformat()
-                ))
-                conn.commit()
+            with self.transaction() as conn:
+                conn.execute(UPSERT_USER_STORY, self._user_story_params(story_data))
                 return True
         except Exception as e:
             self.logger.error(f"Failed to save user story: {e}")
@@ -285,88 +527,202 @@ class PersistentStateManager:
     def save_gamification_rule(self, rule_data: Dict) -> bool:
         """Save gamification rule to persistent storage"""
         try:
-            with self._lock, self._get_connection() as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO gamification_rules 
-                    (rule_id, name, trigger_condition, reward_type, reward_amount,
-                     effectiveness_score, last_updated, active)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    rule_data['rule_id'],
-                    rule_data['name'],
-                    rule_data['trigger_condition'],
-                    rule_data['reward_type'],
-                    rule_data['reward_amount'],
-                    rule_data['effectiveness_score'],
-                    rule_data['last_updated'],
-                    rule_data.get('active', True)
-                ))
-                conn.commit()
+            with self.transaction() as conn:
+                conn.execute(UPSERT_GAMIFICATION_RULE, self._gamification_rule_params(rule_data))
                 return True
         except Exception as e:
             self.logger.error(f"Failed to save gamification rule: {e}")
             return False
             
     def create_checkpoint(self, component_name: str, state_data: Dict, metadata: Dict = None) -> str:
-        """Create state checkpoint for recovery"""
-        checkpoint_id = f"{component_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        """
+        Create state checkpoint for recovery
         
+        Checkpoints form a chain per component: a full snapshot every
+        ``full_snapshot_interval`` checkpoints (or whenever a delta would not
+        be smaller, or the state is too small to be worth diffing), with
+        JSON-patch deltas against the previous checkpoint in between.
+        Payloads above ``compress_min_bytes`` are zlib-compressed.
+        Only the chains needed to restore the newest ``checkpoint_retention``
+        checkpoints are kept.
+        """
         try:
-            with self._lock, self._get_connection() as conn:
+            full_json = json.dumps(state_data)
+            state = json.loads(full_json)
+            
+            with self.transaction() as conn:
+                head = self._checkpoint_head(conn, component_name)
+                seq = head[0] + 1 if head else 1
+                
+                kind, base_seq, body = 'full', seq, full_json
+                if head and head[1] is None:
+                    self._drop_broken_chain(conn, component_name, head[0])
+                elif (head and seq - head[1] < self.full_snapshot_interval
+                        and len(full_json) >= self.compress_min_bytes):
+                    delta_json = json.dumps(json_diff(head[2], state))
+                    if len(delta_json) * 2 < len(full_json):
+                        kind, base_seq, body = 'delta', head[1], delta_json
+                        
+                encoding, payload = self._encode_checkpoint(body)
+                checkpoint_id = f"{component_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{seq}"
+                
                 conn.execute('''
                     INSERT INTO state_checkpoints 
-                    (checkpoint_id, component_name, state_data, created_at, metadata)
-                    VALUES (?, ?, ?, ?, ?)
+                    (checkpoint_id, component_name, state_data, created_at, metadata,
+                     seq, kind, base_seq, encoding, payload)
+                    VALUES (?, ?, '', ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     checkpoint_id,
                     component_name,
-                    json.dumps(state_data),
                     datetime.now().isoformat(),
-                    json.dumps(metadata) if metadata else None
+                    json.dumps(metadata) if metadata else None,
+                    seq,
+                    kind,
+                    base_seq,
+                    encoding,
+                    payload
                 ))
-                conn.commit()
                 
-                conn.execute('''
-                    DELETE FROM state_checkpoints 
-                    WHERE component_name = ? AND checkpoint_id NOT IN (
-                        SELECT checkpoint_id FROM state_checkpoints 
-                        WHERE component_name = ? 
-                        ORDER BY created_at DESC LIMIT 10
-                    )
-                ''', (component_name, component_name))
-                conn.commit()
+                self._prune_checkpoints(conn, component_name, seq)
+                self._checkpoint_heads[component_name] = (seq, base_seq, state)
+                
+                self.checkpoint_stats[kind] += 1
+                self.checkpoint_stats['bytes_written'] += len(payload)
+                self.checkpoint_stats['bytes_full_equivalent'] += len(full_json.encode('utf-8'))
                 
                 return checkpoint_id
         except Exception as e:
+            self._checkpoint_heads.pop(component_name, None)
             self.logger.error(f"Failed to create checkpoint: {e}")
             return None
             
+    def _encode_checkpoint(self, body: str) -> tuple:
+        data = body.encode('utf-8')
+        if len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data, 6)
+            if len(compressed) < len(data):
+                return 'zlib', compressed
+        return 'json', data
+        
+    @staticmethod
+    def _decode_checkpoint(row) -> Any:
+        if row['payload'] is None:
+            return json.loads(row['state_data'])
+        data = row['payload']
+        if row['encoding'] == 'zlib':
+            data = zlib.decompress(data)
+        return json.loads(data)
+        
+    def _checkpoint_head(self, conn, component_name: str) -> Optional[tuple]:
+        """
+        Return (seq, base_seq, state) of the newest chained checkpoint
+        
+        base_seq and state are None when that checkpoint's chain can no
+        longer be replayed, so the sequence still continues from it.
+        """
+        row = conn.execute(
+            'SELECT MAX(seq) AS seq FROM state_checkpoints WHERE component_name = ?',
+            (component_name,)
+        ).fetchone()
+        if row['seq'] is None:
+            return None
+            
+        cached = self._checkpoint_heads.get(component_name)
+        if cached and cached[0] == row['seq']:
+            return cached
+            
+        restored = self._replay_chain(conn, component_name, row['seq'])
+        if restored is None:
+            return row['seq'], None, None
+        head = (row['seq'], restored[0], restored[1])
+        self._checkpoint_heads[component_name] = head
+        return head
+        
+    def _replay_chain(self, conn, component_name: str, seq: int) -> Optional[tuple]:
+        """Rebuild the state at seq from its full snapshot; returns (base_seq, state)"""
+        target = conn.execute(
+            'SELECT base_seq FROM state_checkpoints WHERE component_name = ? AND seq = ?',
+            (component_name, seq)
+        ).fetchone()
+        if target is None:
+            return None
+            
+        base_seq = target['base_seq']
+        state = None
+        rows = conn.execute(
+            '''SELECT kind, state_data, encoding, payload FROM state_checkpoints
+               WHERE component_name = ? AND seq BETWEEN ? AND ? ORDER BY seq''',
+            (component_name, base_seq, seq)
+        ).fetchall()
+        if not rows or rows[0]['kind'] != 'full' or len(rows) != seq - base_seq + 1:
+            self.logger.error(f"Checkpoint chain for {component_name} is incomplete at seq {seq}")
+            return None
+            
+        for row in rows:
+            body = self._decode_checkpoint(row)
+            state = body if row['kind'] == 'full' else apply_json_patch(state, body)
+        return base_seq, state
+        
+    def _drop_broken_chain(self, conn, component_name: str, head_seq: int):
+        """Delete the rows of the chain ending at head_seq, which cannot be replayed"""
+        row = conn.execute(
+            'SELECT base_seq FROM state_checkpoints WHERE component_name = ? AND seq = ?',
+            (component_name, head_seq)
+        ).fetchone()
+        conn.execute(
+            'DELETE FROM state_checkpoints WHERE component_name = ? AND seq BETWEEN ? AND ?',
+            (component_name, row['base_seq'], head_seq)
+        )
+        
+    def _prune_checkpoints(self, conn, component_name: str, head_seq: int):
+        """Drop chains no longer needed to restore the newest checkpoints"""
+        oldest_kept = head_seq - self.checkpoint_retention + 1
+        if oldest_kept <= 1:
+            return
+        row = conn.execute(
+            'SELECT base_seq FROM state_checkpoints WHERE component_name = ? AND seq = ?',
+            (component_name, oldest_kept)
+        ).fetchone()
+        keep_from = row['base_seq'] if row else oldest_kept
+        conn.execute(
+            'DELETE FROM state_checkpoints WHERE component_name = ? AND seq < ?',
+            (component_name, keep_from)
+        )
+        
     def restore_from_checkpoint(self, component_name: str, checkpoint_id: Optional[str] = None) -> Optional[Dict]:
-        """Restore state from checkpoint"""
+        """Restore state from checkpoint, replaying delta chains as needed"""
         try:
             with self._get_connection() as conn:
                 if checkpoint_id:
-                    cursor = conn.execute(
+                    row = conn.execute(
                         'SELECT * FROM state_checkpoints WHERE checkpoint_id = ?',
                         (checkpoint_id,)
-                    )
+                    ).fetchone()
                 else:
-                    cursor = conn.execute(
-                        'SELECT * FROM state_checkpoints WHERE component_name = ? ORDER BY created_at DESC LIMIT 1',
+                    row = conn.execute(
+                        '''SELECT * FROM state_checkpoints WHERE component_name = ?
+                           ORDER BY seq DESC, created_at DESC LIMIT 1''',
                         (component_name,)
-                    )
+                    ).fetchone()
                     
-                row = cursor.fetchone()
-                if row:
-                    return {
-                        'checkpoint_id': row['checkpoint_id'],
-                        'component_name': row['component_name'],
-                        'state': json.loads(row['state_data']),
-                        'created_at': row['created_at'],
-                        'metadata': json.loads(row['metadata']) if row['metadata'] else None
-                    }
+                if not row:
+                    return None
                     
-                return None
+                if row['seq'] is None:
+                    state = json.loads(row['state_data'])
+                else:
+                    restored = self._replay_chain(conn, row['component_name'], row['seq'])
+                    if restored is None:
+                        return None
+                    state = restored[1]
+                    
+                return {
+                    'checkpoint_id': row['checkpoint_id'],
+                    'component_name': row['component_name'],
+                    'state': state,
+                    'created_at': row['created_at'],
+                    'metadata': json.loads(row['metadata']) if row['metadata'] else None
+                }
         except Exception as e:
             self.logger.error(f"Failed to restore from checkpoint: {e}")
             return None
@@ -376,7 +732,7 @@ class PersistentStateManager:
         cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
         
         try:
-            with self._lock, self._get_connection() as conn:
+            with self.transaction() as conn:
                 conn.execute(
                     'DELETE FROM approval_requests WHERE expires_at < ?',
                     (cutoff_date,)
@@ -387,7 +743,17 @@ class PersistentStateManager:
                     (cutoff_date,)
                 )
                 
-                conn.commit()
+                # Deltas whose full snapshot expired can no longer be replayed
+                conn.execute('''
+                    DELETE FROM state_checkpoints
+                    WHERE kind = 'delta' AND NOT EXISTS (
+                        SELECT 1 FROM state_checkpoints AS base
+                        WHERE base.component_name = state_checkpoints.component_name
+                          AND base.seq = state_checkpoints.base_seq
+                    )
+                ''')
+                self._checkpoint_heads.clear()
+                
                 self.logger.info(f"Cleaned up data older than {days} days")
         except Exception as e:
             self.logger.error(f"Failed to cleanup expired data: {e}")
@@ -417,13 +783,12 @@ class PersistentStateManager:
     def save_dashboard_layout(self, user_id: str, layout: Dict):
         """Save user dashboard layout configuration"""
         try:
-            with self._lock, self._get_connection() as conn:
+            with self.transaction() as conn:
                 conn.execute('''
                     INSERT OR REPLACE INTO dashboard_layouts 
                     (user_id, layout_config, updated_at)
                     VALUES (?, ?, ?)
                 ''', (user_id, json.dumps(layout), datetime.now().isoformat()))
-                conn.commit()
                 self.logger.info(f"Saved dashboard layout for user {user_id}")
         except Exception as e:
             self.logger.error(f"Failed to save dashboard layout: {e}")
@@ -448,14 +813,13 @@ class PersistentStateManager:
                            format_type: str, file_path: str = None, status: str = 'completed'):
         """Save report generation history"""
         try:
-            with self._lock, self._get_connection() as conn:
+            with self.transaction() as conn:
                 conn.execute('''
                     INSERT INTO report_history 
                     (id, name, type, format, file_path, generated_at, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (report_id, name, report_type, format_type, file_path, 
                       datetime.now().isoformat(), status))
-                conn.commit()
                 self.logger.info(f"Saved report history: {report_id}")
         except Exception as e:
             self.logger.error(f"Failed to save report history: {e}")
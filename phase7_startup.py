@@ -15,6 +15,7 @@ from ops_agent import OpsAgent
 from growth_strategist import GrowthStrategist
 from pm_agent import PMAgent
 from hitl_approval_system import HITLApprovalSystem
+from saga_orchestrator import saga_orchestrator
 
 try:
     from meta_agent_decision_hub import MetaAgentDecisionHub
@@ -172,8 +173,15 @@ class Phase7System:
             return
             
         await self.initialize()
+        await self._recover_sagas()
         self.running = True
         
+        if saga_orchestrator.event_log is not None:
+            task = asyncio.create_task(self._saga_compaction_loop())
+            self.background_tasks.append(task)
+            task = asyncio.create_task(self._saga_recovery_loop())
+            self.background_tasks.append(task)
+            
         if self.ops_agent:
             task = asyncio.create_task(self._ops_monitoring_loop())
             self.background_tasks.append(task)
@@ -208,8 +216,22 @@ class Phase7System:
         if self.background_tasks:
             await asyncio.gather(*self.background_tasks, return_exceptions=True)
             
+        await saga_orchestrator.close()
         self.logger.info("Phase 7 system stopped")
         
+    async def _recover_sagas(self):
+        """Resume or compensate unfinished sagas whose owner's lease has expired"""
+        policy = self.config.get('saga', {}).get('recovery_policy', 'resume')
+        try:
+            summary = await saga_orchestrator.recover(policy=policy)
+            if summary['resumed'] or summary['compensated'] or summary['skipped']:
+                self.logger.info(
+                    f"Saga recovery: {len(summary['resumed'])} resumed, "
+                    f"{len(summary['compensated'])} compensated, {len(summary['skipped'])} skipped"
+                )
+        except Exception as e:
+            self.logger.error(f"Saga recovery error: {e}")
+        
     async def _ops_monitoring_loop(self):
         """Background task for operations monitoring"""
         interval = self.config.get('ops_agent', {}).get('monitoring_interval', 30)
@@ -276,6 +298,29 @@ class Phase7System:
                 
             await asyncio.sleep(interval)
             
+    async def _saga_recovery_loop(self):
+        """Background task picking up sagas of workers that died after startup"""
+        interval = self.config.get('saga', {}).get('recovery_interval', 60)
+        
+        while self.running:
+            await asyncio.sleep(interval)
+            await self._recover_sagas()
+            
+    async def _saga_compaction_loop(self):
+        """Background task dropping event log entries of finished sagas"""
+        interval = self.config.get('saga', {}).get('event_log_compaction_interval', 3600)
+        
+        while self.running:
+            try:
+                removed = await saga_orchestrator.compact_event_log()
+                if removed > 0:
+                    self.logger.info(f"Compacted {removed} saga events")
+                    
+            except Exception as e:
+                self.logger.error(f"Saga event log compaction error: {e}")
+                
+            await asyncio.sleep(interval)
+            
     def get_system_status(self) -> Dict:
         """Get comprehensive Phase 7 system status"""
         status = {
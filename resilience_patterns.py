@@ -6,6 +6,7 @@ Implements anti-fragile patterns for Morning AI system components
 
 import asyncio
 import logging
+import random
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable, Any
@@ -21,10 +22,18 @@ class CircuitState(Enum):
 @dataclass
 class CircuitBreakerConfig:
     """Circuit breaker configuration"""
-    failure_threshold: int = 5
+    failure_threshold: int = 5  # consecutive failures
     recovery_timeout: int = 60  # seconds
     success_threshold: int = 3  # for half-open state
     timeout: float = 30.0  # request timeout
+    window_seconds: float = 60.0  # sliding window for rate-based tripping
+    window_buckets: int = 10
+    minimum_calls: int = 20  # rates are only evaluated above this throughput
+    failure_rate_threshold: float = 0.5
+    slow_call_duration: Optional[float] = None  # seconds; None disables slow-call tracking
+    slow_call_rate_threshold: float = 1.0
+    shared_state_ttl: float = 3600.0  # seconds a shared breaker state is kept in Redis
+    shared_sync_interval: float = 1.0  # seconds between reads of shared state
 
 @dataclass
 class CircuitBreakerMetrics:
@@ -32,35 +41,136 @@ class CircuitBreakerMetrics:
     total_requests: int = 0
     failed_requests: int = 0
     success_requests: int = 0
+    slow_requests: int = 0
+    rejected_requests: int = 0
     last_failure_time: Optional[datetime] = None
     consecutive_failures: int = 0
     consecutive_successes: int = 0
+    state_transitions: int = 0
+
+class SlidingWindowCounter:
+    """
+    Time-bucketed ring buffer of call outcomes
+    
+    The window is split into ``buckets`` slots; a slot is reset when the
+    clock moves into a new bucket that maps onto it, so recording and
+    summing are O(buckets) with no per-call allocation.
+    """
+    
+    def __init__(self, window_seconds: float = 60.0, buckets: int = 10):
+        self.buckets = buckets
+        self.bucket_width = window_seconds / buckets
+        self._bucket_ids = [-1] * buckets
+        self._calls = [0] * buckets
+        self._failures = [0] * buckets
+        self._slow = [0] * buckets
+        
+    def _slot(self, now: float) -> int:
+        bucket_id = int(now / self.bucket_width)
+        slot = bucket_id % self.buckets
+        if self._bucket_ids[slot] != bucket_id:
+            self._bucket_ids[slot] = bucket_id
+            self._calls[slot] = self._failures[slot] = self._slow[slot] = 0
+        return slot
+        
+    def record(self, failed: bool, slow: bool = False, now: Optional[float] = None):
+        slot = self._slot(time.monotonic() if now is None else now)
+        self._calls[slot] += 1
+        self._failures[slot] += failed
+        self._slow[slot] += slow
+        
+    def totals(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Calls, failures and slow calls within the window"""
+        current = int((time.monotonic() if now is None else now) / self.bucket_width)
+        totals = {'calls': 0, 'failures': 0, 'slow': 0}
+        for slot, bucket_id in enumerate(self._bucket_ids):
+            if current - self.buckets < bucket_id <= current:
+                totals['calls'] += self._calls[slot]
+                totals['failures'] += self._failures[slot]
+                totals['slow'] += self._slow[slot]
+        return totals
+        
+    def reset(self):
+        self._bucket_ids = [-1] * self.buckets
+
+class RedisCircuitBreakerState:
+    """
+    Breaker state shared by all workers through Redis
+    
+    Each breaker is a hash ``{prefix}{name}`` with its state and the wall
+    clock time it opened, so every worker opens together and moves to
+    half-open at the same moment.
+    """
+    
+    def __init__(self, redis_client, prefix: str = "circuit_breaker:"):
+        self.redis = redis_client
+        self.prefix = prefix
+        
+    @classmethod
+    def from_url(cls, redis_url: str, **kwargs) -> "RedisCircuitBreakerState":
+        """Create a shared state backed by a redis.asyncio client for the given URL"""
+        import redis.asyncio as redis_asyncio
+        return cls(redis_asyncio.from_url(redis_url, decode_responses=True), **kwargs)
+        
+    async def load(self, name: str) -> Optional[Dict]:
+        data = await self.redis.hgetall(self.prefix + name)
+        if not data:
+            return None
+        data = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in data.items()
+        }
+        return {'state': data['state'], 'opened_at': float(data.get('opened_at') or 0)}
+        
+    async def save(self, name: str, state: str, opened_at: Optional[float], ttl: float):
+        key = self.prefix + name
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(key, mapping={'state': state, 'opened_at': opened_at or 0})
+        pipe.pexpire(key, int(ttl * 1000))
+        await pipe.execute()
 
 class CircuitBreaker:
-    """Circuit breaker implementation for external service calls"""
+    """
+    Circuit breaker implementation for external service calls
+    
+    Opens after ``failure_threshold`` consecutive failures, or when the
+    failure rate (or slow-call rate) over the sliding window crosses its
+    threshold once at least ``minimum_calls`` calls were seen. With a
+    ``shared_state`` every worker follows the same open/half-open cycle.
+    """
     
-    def __init__(self, name: str, config: CircuitBreakerConfig = None):
+    def __init__(self, name: str, config: CircuitBreakerConfig = None,
+                 shared_state: Optional[RedisCircuitBreakerState] = None):
         self.name = name
         self.config = config or CircuitBreakerConfig()
         self.state = CircuitState.CLOSED
         self.metrics = CircuitBreakerMetrics()
+        self.window = SlidingWindowCounter(self.config.window_seconds, self.config.window_buckets)
+        self.shared_state = shared_state
+        self.opened_at: Optional[float] = None
+        self._state_dirty = False
+        self._last_sync = 0.0
         self.logger = logging.getLogger(f"circuit_breaker.{name}")
         
     async def call(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with circuit breaker protection"""
+        await self._sync_shared_state()
+        
         if self.state == CircuitState.OPEN:
             if self._should_attempt_reset():
-                self.state = CircuitState.HALF_OPEN
+                self._transition(CircuitState.HALF_OPEN)
                 self.logger.info(f"Circuit breaker {self.name} transitioning to HALF_OPEN")
             else:
+                self.metrics.rejected_requests += 1
                 raise CircuitBreakerOpenError(f"Circuit breaker {self.name} is OPEN")
                 
+        started = time.monotonic()
         try:
             self.metrics.total_requests += 1
             
             result = await asyncio.wait_for(func(*args, **kwargs), timeout=self.config.timeout)
             
-            self._on_success()
+            self._on_success(time.monotonic() - started)
             return result
             
         except asyncio.TimeoutError:
@@ -69,17 +179,42 @@ class CircuitBreaker:
         except Exception as e:
             self._on_failure()
             raise
+        finally:
+            await self._publish_shared_state()
+            
+    def _transition(self, state: CircuitState):
+        self.state = state
+        self.metrics.state_transitions += 1
+        self._state_dirty = True
+        if state != CircuitState.CLOSED:
+            # Half-open probes must earn success_threshold successes from scratch
+            self._reset_streaks()
+        if state == CircuitState.OPEN:
+            self.opened_at = time.time()
+        elif state == CircuitState.CLOSED:
+            self.opened_at = None
+            self.window.reset()
             
-    def _on_success(self):
+    def _reset_streaks(self):
+        self.metrics.consecutive_failures = 0
+        self.metrics.consecutive_successes = 0
+        
+    def _on_success(self, duration: float = 0.0):
         """Handle successful request"""
+        slow = self.config.slow_call_duration is not None and duration >= self.config.slow_call_duration
         self.metrics.success_requests += 1
+        self.metrics.slow_requests += slow
         self.metrics.consecutive_failures = 0
         self.metrics.consecutive_successes += 1
+        self.window.record(failed=False, slow=slow)
         
         if self.state == CircuitState.HALF_OPEN:
             if self.metrics.consecutive_successes >= self.config.success_threshold:
-                self.state = CircuitState.CLOSED
+                self._transition(CircuitState.CLOSED)
                 self.logger.info(f"Circuit breaker {self.name} reset to CLOSED")
+        elif self.state == CircuitState.CLOSED and self._window_tripped():
+            self._transition(CircuitState.OPEN)
+            self.logger.warning(f"Circuit breaker {self.name} opened due to failure or slow-call rate")
                 
     def _on_failure(self):
         """Handle failed request"""
@@ -87,30 +222,99 @@ class CircuitBreaker:
         self.metrics.consecutive_failures += 1
         self.metrics.consecutive_successes = 0
         self.metrics.last_failure_time = datetime.now()
+        self.window.record(failed=True)
         
-        if (self.state == CircuitState.CLOSED and 
-            self.metrics.consecutive_failures >= self.config.failure_threshold):
-            self.state = CircuitState.OPEN
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            self.logger.warning(f"Circuit breaker {self.name} re-opened after failed probe")
+        elif self.state == CircuitState.CLOSED and (
+            self.metrics.consecutive_failures >= self.config.failure_threshold or self._window_tripped()
+        ):
+            self._transition(CircuitState.OPEN)
             self.logger.warning(f"Circuit breaker {self.name} opened due to failures")
             
+    def _window_tripped(self) -> bool:
+        totals = self.window.totals()
+        if totals['calls'] < self.config.minimum_calls:
+            return False
+        return (
+            totals['failures'] / totals['calls'] >= self.config.failure_rate_threshold or
+            (self.config.slow_call_duration is not None and
+             totals['slow'] / totals['calls'] >= self.config.slow_call_rate_threshold)
+        )
+            
     def _should_attempt_reset(self) -> bool:
         """Check if circuit breaker should attempt reset"""
+        if self.opened_at is not None:
+            return time.time() - self.opened_at >= self.config.recovery_timeout
         if not self.metrics.last_failure_time:
             return True
             
         time_since_failure = datetime.now() - self.metrics.last_failure_time
         return time_since_failure.total_seconds() >= self.config.recovery_timeout
         
+    async def _sync_shared_state(self):
+        """Adopt the state other workers published, at most every shared_sync_interval"""
+        if self.shared_state is None:
+            return
+        now = time.monotonic()
+        if now - self._last_sync < self.config.shared_sync_interval:
+            return
+        self._last_sync = now
+        try:
+            shared = await self.shared_state.load(self.name)
+        except Exception as e:
+            self.logger.warning(f"Failed to read shared state for {self.name}: {e}")
+            return
+        if shared is None:
+            return
+        state = CircuitState(shared['state'])
+        newer = shared['opened_at'] > (self.opened_at or 0)
+        if state == CircuitState.OPEN and (self.state == CircuitState.CLOSED or newer):
+            self.state = CircuitState.OPEN
+            self.opened_at = shared['opened_at']
+            self._reset_streaks()
+            self.logger.warning(f"Circuit breaker {self.name} opened by another worker")
+        elif state == CircuitState.CLOSED and self.state != CircuitState.CLOSED:
+            self.state = CircuitState.CLOSED
+            self.opened_at = None
+            self.metrics.consecutive_failures = 0
+            self.window.reset()
+            self.logger.info(f"Circuit breaker {self.name} closed by another worker")
+            
+    async def _publish_shared_state(self):
+        if self.shared_state is None or not self._state_dirty:
+            return
+        self._state_dirty = False
+        # Half-open is derived locally from opened_at, so only open/closed are shared
+        if self.state == CircuitState.HALF_OPEN:
+            return
+        try:
+            await self.shared_state.save(
+                self.name, self.state.value, self.opened_at, self.config.shared_state_ttl
+            )
+            self._last_sync = time.monotonic()
+        except Exception as e:
+            self.logger.warning(f"Failed to publish shared state for {self.name}: {e}")
+        
     def get_metrics(self) -> Dict:
         """Get circuit breaker metrics"""
+        window = self.window.totals()
         return {
             'name': self.name,
             'state': self.state.value,
             'total_requests': self.metrics.total_requests,
             'failed_requests': self.metrics.failed_requests,
             'success_requests': self.metrics.success_requests,
+            'slow_requests': self.metrics.slow_requests,
+            'rejected_requests': self.metrics.rejected_requests,
             'failure_rate': self.metrics.failed_requests / max(self.metrics.total_requests, 1),
+            'window_calls': window['calls'],
+            'window_failure_rate': window['failures'] / max(window['calls'], 1),
+            'window_slow_rate': window['slow'] / max(window['calls'], 1),
             'consecutive_failures': self.metrics.consecutive_failures,
+            'state_transitions': self.metrics.state_transitions,
+            'shared': self.shared_state is not None,
             'last_failure_time': self.metrics.last_failure_time.isoformat() if self.metrics.last_failure_time else None
         }
 
@@ -119,33 +323,41 @@ class BulkheadPool:
     
     def __init__(self, name: str, max_concurrent: int = 10):
         self.name = name
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
         self.active_requests = 0
         self.total_requests = 0
         self.rejected_requests = 0
         self.logger = logging.getLogger(f"bulkhead.{name}")
         
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit"""
+        return self.max_concurrent
+        
     async def execute(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with bulkhead protection"""
         self.total_requests += 1
         
-        try:
-            if self.semaphore.locked() and self.semaphore._value == 0:
-                self.rejected_requests += 1
-                raise BulkheadRejectionError(f"Bulkhead {self.name} at capacity")
+        # Fail fast instead of queueing: a full bulkhead means the dependency is saturated
+        if self.active_requests >= self.limit:
+            self.rejected_requests += 1
+            raise BulkheadRejectionError(f"Bulkhead {self.name} at capacity")
             
-            await self.semaphore.acquire()
-                
-            self.active_requests += 1
-            try:
-                return await func(*args, **kwargs)
-            finally:
-                self.active_requests -= 1
-                self.semaphore.release()
-                
+        self.active_requests += 1
+        started = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
         except Exception as e:
+            self._on_complete(time.monotonic() - started, e)
             self.logger.error(f"Bulkhead {self.name} execution failed: {e}")
             raise
+        finally:
+            self.active_requests -= 1
+        self._on_complete(time.monotonic() - started, None)
+        return result
+        
+    def _on_complete(self, latency: float, error: Optional[Exception]):
+        """Hook for subclasses that adapt to observed latency"""
             
     def get_metrics(self) -> Dict:
         """Get bulkhead metrics"""
@@ -155,66 +367,303 @@ class BulkheadPool:
             'total_requests': self.total_requests,
             'rejected_requests': self.rejected_requests,
             'rejection_rate': self.rejected_requests / max(self.total_requests, 1),
-            'available_capacity': self.semaphore._value
+            'available_capacity': max(self.limit - self.active_requests, 0)
         }
 
+class AdaptiveConcurrencyLimiter(BulkheadPool):
+    """
+    Bulkhead whose limit adapts to the downstream service (AIMD)
+    
+    The limit grows by roughly one per limit's worth of fast completions
+    while the pool is actually being used, and is cut by ``backoff_ratio``
+    when a call times out or its latency exceeds ``latency_tolerance`` times
+    the baseline. The baseline is an exponentially weighted average of
+    successful latencies (weight ``baseline_smoothing`` per sample), so
+    ordinary jitter stays within tolerance while the baseline still follows
+    the service as it changes. Latency is not judged until ``min_samples``
+    calls have succeeded.
+    """
+    
+    def __init__(self, name: str, initial_limit: int = 10, min_limit: int = 1,
+                 max_limit: int = 200, backoff_ratio: float = 0.9,
+                 latency_tolerance: float = 2.0, baseline_smoothing: float = 0.05,
+                 min_samples: int = 10):
+        super().__init__(name, max_concurrent=initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.baseline_smoothing = baseline_smoothing
+        self.min_samples = min_samples
+        self.estimated_limit = float(initial_limit)
+        self.baseline_latency: Optional[float] = None
+        self._baseline_samples = 0
+        self.limit_decreases = 0
+        
+    @property
+    def limit(self) -> int:
+        return int(self.estimated_limit)
+        
+    def _on_complete(self, latency: float, error: Optional[Exception]):
+        if error is not None and not isinstance(error, (asyncio.TimeoutError, CircuitBreakerTimeoutError)):
+            # Application errors say nothing about load
+            return
+            
+        overloaded = error is not None or (
+            self._baseline_samples >= self.min_samples
+            and latency > self.baseline_latency * self.latency_tolerance
+        )
+        if error is None:
+            self._record_baseline(latency)
+            
+        if overloaded:
+            self.estimated_limit = max(self.min_limit, self.estimated_limit * self.backoff_ratio)
+            self.limit_decreases += 1
+        elif self.active_requests + 1 >= self.estimated_limit / 2:
+            # Only probe upwards when the current limit is being used
+            self.estimated_limit = min(self.max_limit, self.estimated_limit + 1 / self.estimated_limit)
+            
+    def _record_baseline(self, latency: float):
+        # A plain running mean until there are enough samples for the smoothing weight
+        self._baseline_samples += 1
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+        else:
+            weight = max(self.baseline_smoothing, 1 / self._baseline_samples)
+            self.baseline_latency += weight * (latency - self.baseline_latency)
+            
+    def get_metrics(self) -> Dict:
+        metrics = super().get_metrics()
+        metrics.update({
+            'limit': self.limit,
+            'baseline_latency_ms': self.baseline_latency * 1000 if self.baseline_latency is not None else None,
+            'limit_decreases': self.limit_decreases
+        })
+        return metrics
+
+class RetryBudget:
+    """
+    Token bucket that caps retries to a fraction of traffic
+    
+    Every first attempt deposits ``ratio`` tokens and every retry or hedge
+    withdraws one, so retries stay below ``ratio`` of requests when a
+    dependency is failing. ``min_per_second`` tokens are refilled over time
+    so low-traffic callers can still retry.
+    """
+    
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, capacity: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._refilled_at = time.monotonic()
+        self.exhausted = 0
+        
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+        
+    def deposit(self):
+        """Record a first attempt"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+        
+    def try_withdraw(self) -> bool:
+        """Take a token for a retry or hedge, if the budget allows one"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+        
+    def get_metrics(self) -> Dict:
+        self._refill()
+        return {'tokens': self.tokens, 'exhausted': self.exhausted}
+
 class RetryPolicy:
-    """Retry policy with exponential backoff"""
+    """Retry policy with exponential backoff, full jitter and an optional retry budget"""
     
-    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 60.0,
+                 jitter: bool = True, budget: Optional[RetryBudget] = None,
+                 non_retryable: tuple = ()):
         self.max_attempts = max_attempts
         self.base_delay = base_delay
         self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+        self.non_retryable = non_retryable
+        
+    def backoff(self, attempt: int) -> float:
+        """Delay before the retry following the given (zero-based) attempt"""
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return random.uniform(0, delay) if self.jitter else delay
         
     async def execute(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with retry policy"""
         last_exception = None
+        if self.budget:
+            self.budget.deposit()
         
         for attempt in range(self.max_attempts):
             try:
                 return await func(*args, **kwargs)
+            except self.non_retryable:
+                raise
             except Exception as e:
                 last_exception = e
                 
                 if attempt == self.max_attempts - 1:
                     break
+                if self.budget and not self.budget.try_withdraw():
+                    break
                     
-                delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                await asyncio.sleep(delay)
+                await asyncio.sleep(self.backoff(attempt))
                 
         raise last_exception
 
+class HedgePolicy:
+    """
+    Hedged requests for tail latency
+    
+    If a call has not finished after ``delay`` seconds, another copy is
+    started (up to ``max_hedges``); the first success wins and the others
+    are cancelled. Only use for idempotent calls. Hedges draw from the
+    retry budget when one is given.
+    """
+    
+    def __init__(self, delay: float, max_hedges: int = 1, budget: Optional[RetryBudget] = None):
+        self.delay = delay
+        self.max_hedges = max_hedges
+        self.budget = budget
+        self.hedges_started = 0
+        self.hedges_won = 0
+        
+    async def execute(self, func: Callable, *args, **kwargs) -> Any:
+        """Execute function, hedging slow attempts"""
+        first = asyncio.ensure_future(func(*args, **kwargs))
+        tasks = [first]
+        last_exception = None
+        hedges = 0
+        hedging = True
+        try:
+            while tasks:
+                timeout = self.delay if hedging and hedges < self.max_hedges else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self.budget is None or self.budget.try_withdraw():
+                        hedges += 1
+                        self.hedges_started += 1
+                        tasks.append(asyncio.ensure_future(func(*args, **kwargs)))
+                    else:
+                        hedging = False
+                    continue
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedges_won += 1
+                        return task.result()
+                    last_exception = task.exception()
+            raise last_exception
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+class ResilienceConfig:
+    """
+    Per-service resilience settings used by ResilienceManager.protected_call
+    
+    ``adaptive`` swaps the fixed bulkhead for an AdaptiveConcurrencyLimiter
+    starting at ``max_concurrent``; it is opt-in because the limiter sheds
+    load as soon as latency degrades.
+    """
+    
+    def __init__(self, adaptive: bool = False, max_concurrent: int = 10,
+                 retry_attempts: int = 3, retry_base_delay: float = 1.0,
+                 retry_budget_ratio: float = 0.1, hedge_delay: Optional[float] = None):
+        self.adaptive = adaptive
+        self.max_concurrent = max_concurrent
+        self.retry_attempts = retry_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_budget_ratio = retry_budget_ratio
+        self.hedge_delay = hedge_delay
+
 class ResilienceManager:
     """Central manager for all resilience patterns"""
     
-    def __init__(self):
+    def __init__(self, shared_state: Optional[RedisCircuitBreakerState] = None):
+        self.shared_state = shared_state
         self.circuit_breakers: Dict[str, CircuitBreaker] = {}
         self.bulkheads: Dict[str, BulkheadPool] = {}
+        self.service_configs: Dict[str, ResilienceConfig] = {}
+        self.retry_policies: Dict[str, RetryPolicy] = {}
+        self.hedge_policies: Dict[str, HedgePolicy] = {}
         self.logger = logging.getLogger(__name__)
         
     def get_circuit_breaker(self, name: str, config: CircuitBreakerConfig = None) -> CircuitBreaker:
         """Get or create circuit breaker"""
         if name not in self.circuit_breakers:
-            self.circuit_breakers[name] = CircuitBreaker(name, config)
+            self.circuit_breakers[name] = CircuitBreaker(name, config, shared_state=self.shared_state)
         return self.circuit_breakers[name]
         
+    def set_shared_state(self, shared_state: Optional[RedisCircuitBreakerState]):
+        """Share breaker state across workers (applies to existing and future breakers)"""
+        self.shared_state = shared_state
+        for breaker in self.circuit_breakers.values():
+            breaker.shared_state = shared_state
+        
     def get_bulkhead(self, name: str, max_concurrent: int = 10) -> BulkheadPool:
         """Get or create bulkhead pool"""
         if name not in self.bulkheads:
             self.bulkheads[name] = BulkheadPool(name, max_concurrent)
         return self.bulkheads[name]
         
+    def get_adaptive_limiter(self, name: str, initial_limit: int = 10, **kwargs) -> BulkheadPool:
+        """Get or create an adaptive concurrency limiter (shares the bulkhead registry)"""
+        if name not in self.bulkheads:
+            self.bulkheads[name] = AdaptiveConcurrencyLimiter(name, initial_limit=initial_limit, **kwargs)
+        return self.bulkheads[name]
+        
+    def configure_service(self, service_name: str, config: ResilienceConfig):
+        """Set resilience settings for a service before its first protected call"""
+        self.service_configs[service_name] = config
+        self.retry_policies.pop(service_name, None)
+        self.hedge_policies.pop(service_name, None)
+        
+    def _policies(self, service_name: str):
+        config = self.service_configs.setdefault(service_name, ResilienceConfig())
+        if service_name not in self.retry_policies:
+            budget = RetryBudget(ratio=config.retry_budget_ratio)
+            self.retry_policies[service_name] = RetryPolicy(
+                max_attempts=config.retry_attempts,
+                base_delay=config.retry_base_delay,
+                budget=budget,
+                non_retryable=(CircuitBreakerOpenError, BulkheadRejectionError)
+            )
+            if config.hedge_delay is not None:
+                self.hedge_policies[service_name] = HedgePolicy(config.hedge_delay, budget=budget)
+        if config.adaptive:
+            limiter = self.get_adaptive_limiter(service_name, config.max_concurrent)
+        else:
+            limiter = self.get_bulkhead(service_name, config.max_concurrent)
+        return limiter, self.retry_policies[service_name], self.hedge_policies.get(service_name)
+        
     async def protected_call(self, service_name: str, func: Callable, *args, **kwargs) -> Any:
-        """Make a protected call with circuit breaker and bulkhead"""
+        """Make a protected call with circuit breaker, concurrency limit, retries and optional hedging"""
         circuit_breaker = self.get_circuit_breaker(service_name)
-        bulkhead = self.get_bulkhead(service_name)
-        retry_policy = RetryPolicy()
+        bulkhead, retry_policy, hedge_policy = self._policies(service_name)
         
         async def protected_func():
             return await bulkhead.execute(
                 lambda: circuit_breaker.call(func, *args, **kwargs)
             )
             
+        if hedge_policy:
+            return await retry_policy.execute(hedge_policy.execute, protected_func)
         return await retry_policy.execute(protected_func)
         
     def get_all_metrics(self) -> Dict:
@@ -222,8 +671,33 @@ class ResilienceManager:
         return {
             'circuit_breakers': {name: cb.get_metrics() for name, cb in self.circuit_breakers.items()},
             'bulkheads': {name: bh.get_metrics() for name, bh in self.bulkheads.items()},
+            'retry_budgets': {
+                name: policy.budget.get_metrics()
+                for name, policy in self.retry_policies.items() if policy.budget
+            },
             'timestamp': datetime.now().isoformat()
         }
+        
+    def export_prometheus(self) -> str:
+        """Render breaker and bulkhead counters in Prometheus text format without collecting history"""
+        states = [state.value for state in CircuitState]
+        lines = []
+        for name, cb in self.circuit_breakers.items():
+            m = cb.get_metrics()
+            labels = f'service="{name}"'
+            for state in states:
+                lines.append(f'circuit_breaker_state{{{labels},state="{state}"}} {int(m["state"] == state)}')
+            for key in ('total_requests', 'failed_requests', 'slow_requests', 'rejected_requests', 'state_transitions'):
+                lines.append(f'circuit_breaker_{key}_total{{{labels}}} {m[key]}')
+            lines.append(f'circuit_breaker_window_failure_rate{{{labels}}} {m["window_failure_rate"]}')
+            lines.append(f'circuit_breaker_window_slow_rate{{{labels}}} {m["window_slow_rate"]}')
+        for name, bh in self.bulkheads.items():
+            m = bh.get_metrics()
+            labels = f'service="{name}"'
+            lines.append(f'bulkhead_active_requests{{{labels}}} {m["active_requests"]}')
+            lines.append(f'bulkhead_limit{{{labels}}} {bh.limit}')
+            lines.append(f'bulkhead_rejected_requests_total{{{labels}}} {m["rejected_requests"]}')
+        return '\n'.join(lines) + '\n'
 
 class CircuitBreakerOpenError(Exception):
     pass
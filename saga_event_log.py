@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Saga Event Log - Append-only, group-committed log of saga execution events
+Lets the SagaOrchestrator resume or compensate sagas interrupted by a restart
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SAGA_STARTED = "saga_started"
+STEP_STARTED = "step_started"
+STEP_COMPLETED = "step_completed"
+STEP_FAILED = "step_failed"
+SAGA_COMPENSATING = "saga_compensating"
+STEP_COMPENSATED = "step_compensated"
+SAGA_COMPLETED = "saga_completed"
+SAGA_COMPENSATED = "saga_compensated"
+
+TERMINAL_EVENTS = (SAGA_COMPLETED, SAGA_COMPENSATED)
+
+
+@dataclass
+class SagaEvent:
+    """Single entry in the saga event log"""
+    saga_id: str
+    event_type: str
+    step_index: Optional[int] = None
+    payload: Dict = field(default_factory=dict)
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    event_id: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(self.payload, default=str)
+
+
+class SagaEventLog(abc.ABC):
+    """
+    Base class for saga event logs with group commit
+
+    ``append`` returns once the event is durable. Events appended while a
+    commit is in flight (or within ``commit_interval`` of each other) are
+    written together in one batch, so concurrent sagas share a single
+    transaction or round trip.
+
+    The log also holds an expiring lease per saga naming the orchestrator
+    that runs it. Several processes can share one log; a saga is only
+    recovered by another owner once its lease has lapsed.
+    """
+
+    def __init__(self, commit_interval: float = 0.002, max_batch_size: int = 256):
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
+        self.logger = logging.getLogger(f"{__name__}.{type(self).__name__}")
+
+        self._buffer: List[Tuple[SagaEvent, asyncio.Future]] = []
+        self._pending: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+
+        self.events_written = 0
+        self.batches_written = 0
+
+    async def append(self, event: SagaEvent):
+        """Append an event and wait until it has been committed"""
+        loop = asyncio.get_running_loop()
+        self._ensure_flusher(loop)
+        future = loop.create_future()
+        self._buffer.append((event, future))
+        self._pending.set()
+        await future
+
+    async def flush(self):
+        """Commit everything buffered right away"""
+        while self._buffer:
+            await self._commit(self._take_batch())
+
+    async def close(self):
+        """Stop the background committer after its current batch and flush remaining events"""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None and not flusher.done():
+            if self._loop is asyncio.get_running_loop():
+                self._closing = True
+                self._pending.set()
+                try:
+                    await flusher
+                finally:
+                    self._closing = False
+            else:
+                flusher.cancel()
+        await self.flush()
+
+    @abc.abstractmethod
+    async def load_unfinished(self) -> Dict[str, List[SagaEvent]]:
+        """Return events of sagas without a terminal event, keyed by saga id in log order"""
+
+    @abc.abstractmethod
+    async def compact(self) -> int:
+        """Drop events of finished sagas, returning how many were removed"""
+
+    @abc.abstractmethod
+    async def acquire_lease(self, saga_id: str, owner: str, lease_seconds: float) -> bool:
+        """Take (or extend) the lease on a saga unless another owner holds an unexpired one"""
+
+    @abc.abstractmethod
+    async def renew_leases(self, saga_ids: Iterable[str], owner: str, lease_seconds: float):
+        """Extend the leases this owner still holds"""
+
+    @abc.abstractmethod
+    async def release_lease(self, saga_id: str, owner: str):
+        """Drop the lease on a saga if this owner holds it"""
+
+    @abc.abstractmethod
+    async def _write_batch(self, events: List[SagaEvent]):
+        """Durably write a batch of events in order"""
+
+    def _ensure_flusher(self, loop: asyncio.AbstractEventLoop):
+        if self._loop is not loop or self._flusher is None or self._flusher.done():
+            self._loop = loop
+            self._pending = asyncio.Event()
+            if self._buffer:
+                self._pending.set()
+            self._flusher = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            await self._pending.wait()
+            if self._closing:
+                return
+            if len(self._buffer) < self.max_batch_size and self.commit_interval > 0:
+                await asyncio.sleep(self.commit_interval)
+            await self._commit(self._take_batch())
+
+    def _take_batch(self) -> List[Tuple[SagaEvent, asyncio.Future]]:
+        batch = self._buffer[:self.max_batch_size]
+        del self._buffer[:self.max_batch_size]
+        if not self._buffer and self._pending is not None:
+            self._pending.clear()
+        return batch
+
+    async def _commit(self, batch: List[Tuple[SagaEvent, asyncio.Future]]):
+        if not batch:
+            return
+        write = asyncio.ensure_future(self._write_batch([event for event, _ in batch]))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # The write carries on; its waiters are resolved when it finishes
+            write.add_done_callback(lambda _: self._settle(batch, write))
+            raise
+        except Exception:
+            pass
+        self._settle(batch, write)
+
+    def _settle(self, batch: List[Tuple[SagaEvent, asyncio.Future]], write: asyncio.Future):
+        """Resolve the waiters of a batch with the outcome of its write"""
+        if write.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+        error = write.exception()
+        if error is None:
+            self.events_written += len(batch)
+            self.batches_written += 1
+        else:
+            self.logger.error(f"Failed to commit {len(batch)} saga events: {error!r}")
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+
+class SQLiteSagaEventLog(SagaEventLog):
+    """Saga event log stored in the PersistentStateManager SQLite database"""
+
+    def __init__(self, state_manager, commit_interval: float = 0.002, max_batch_size: int = 256):
+        super().__init__(commit_interval=commit_interval, max_batch_size=max_batch_size)
+        self.state_manager = state_manager
+        with state_manager.transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS saga_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    saga_id TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    step_index INTEGER,
+                    payload TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_saga_events_saga ON saga_events(saga_id, seq)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_saga_events_type ON saga_events(event_type)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS saga_leases (
+                    saga_id TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+
+    async def _write_batch(self, events: List[SagaEvent]):
+        rows = [
+            (event.saga_id, event.event_type, event.step_index, event.to_json(), event.timestamp)
+            for event in events
+        ]
+        await asyncio.to_thread(self._insert_rows, rows)
+
+    def _insert_rows(self, rows: List[tuple]):
+        with self.state_manager.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO saga_events (saga_id, event_type, step_index, payload, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    async def load_unfinished(self) -> Dict[str, List[SagaEvent]]:
+        return await asyncio.to_thread(self._load_unfinished)
+
+    def _load_unfinished(self) -> Dict[str, List[SagaEvent]]:
+        placeholders = ', '.join('?' for _ in TERMINAL_EVENTS)
+        with self.state_manager._get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT seq, saga_id, event_type, step_index, payload, created_at
+                FROM saga_events
+                WHERE saga_id NOT IN (
+                    SELECT saga_id FROM saga_events WHERE event_type IN ({placeholders})
+                )
+                ORDER BY seq
+            ''', TERMINAL_EVENTS).fetchall()
+
+        sagas: Dict[str, List[SagaEvent]] = {}
+        for row in rows:
+            sagas.setdefault(row['saga_id'], []).append(SagaEvent(
+                saga_id=row['saga_id'],
+                event_type=row['event_type'],
+                step_index=row['step_index'],
+                payload=json.loads(row['payload']),
+                timestamp=row['created_at'],
+                event_id=str(row['seq'])
+            ))
+        return sagas
+
+    async def compact(self) -> int:
+        return await asyncio.to_thread(self._compact)
+
+    def _compact(self) -> int:
+        placeholders = ', '.join('?' for _ in TERMINAL_EVENTS)
+        with self.state_manager.transaction() as conn:
+            cursor = conn.execute(f'''
+                DELETE FROM saga_events WHERE saga_id IN (
+                    SELECT saga_id FROM saga_events WHERE event_type IN ({placeholders})
+                )
+            ''', TERMINAL_EVENTS)
+            conn.execute('DELETE FROM saga_leases WHERE saga_id NOT IN (SELECT saga_id FROM saga_events)')
+            return cursor.rowcount
+
+    async def acquire_lease(self, saga_id: str, owner: str, lease_seconds: float) -> bool:
+        return await asyncio.to_thread(self._acquire_lease, saga_id, owner, lease_seconds)
+
+    def _acquire_lease(self, saga_id: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self.state_manager.transaction() as conn:
+            cursor = conn.execute('''
+                INSERT INTO saga_leases (saga_id, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(saga_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE saga_leases.owner = excluded.owner OR saga_leases.expires_at <= ?
+            ''', (saga_id, owner, now + lease_seconds, now))
+            return cursor.rowcount == 1
+
+    async def renew_leases(self, saga_ids: Iterable[str], owner: str, lease_seconds: float):
+        rows = [(time.time() + lease_seconds, saga_id, owner) for saga_id in saga_ids]
+        await asyncio.to_thread(self._renew_leases, rows)
+
+    def _renew_leases(self, rows: List[tuple]):
+        with self.state_manager.transaction() as conn:
+            conn.executemany('UPDATE saga_leases SET expires_at = ? WHERE saga_id = ? AND owner = ?', rows)
+
+    async def release_lease(self, saga_id: str, owner: str):
+        await asyncio.to_thread(self._release_lease, saga_id, owner)
+
+    def _release_lease(self, saga_id: str, owner: str):
+        with self.state_manager.transaction() as conn:
+            conn.execute('DELETE FROM saga_leases WHERE saga_id = ? AND owner = ?', (saga_id, owner))
+
+
+class RedisStreamSagaEventLog(SagaEventLog):
+    """
+    Saga event log stored in a Redis Stream (one XADD pipeline per batch)
+
+    Leases are ``<stream>:lease:<saga_id>`` keys holding the owner with a
+    TTL. Lua scripts compare the owner before changing a key, so a lease is
+    only taken over once it has expired.
+    """
+
+    ACQUIRE_SCRIPT = """
+        local owner = redis.call('GET', KEYS[1])
+        if owner and owner ~= ARGV[1] then
+            return 0
+        end
+        redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+        return 1
+    """
+    RENEW_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    RELEASE_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, redis_client, stream: str = "saga:events",
+                 commit_interval: float = 0.002, max_batch_size: int = 256,
+                 read_chunk_size: int = 1000):
+        super().__init__(commit_interval=commit_interval, max_batch_size=max_batch_size)
+        self.redis = redis_client
+        self.stream = stream
+        self.read_chunk_size = read_chunk_size
+
+    @classmethod
+    def from_url(cls, redis_url: str, **kwargs) -> "RedisStreamSagaEventLog":
+        """Create a log backed by a redis.asyncio client for the given URL"""
+        import redis.asyncio as redis_asyncio
+        return cls(redis_asyncio.from_url(redis_url, decode_responses=True), **kwargs)
+
+    async def _write_batch(self, events: List[SagaEvent]):
+        pipe = self.redis.pipeline(transaction=True)
+        for event in events:
+            pipe.xadd(self.stream, {
+                'saga_id': event.saga_id,
+                'event_type': event.event_type,
+                'step_index': '' if event.step_index is None else str(event.step_index),
+                'payload': event.to_json(),
+                'created_at': event.timestamp,
+            })
+        await pipe.execute()
+
+    async def _read_all(self) -> List[SagaEvent]:
+        events = []
+        start = '-'
+        while True:
+            entries = await self.redis.xrange(self.stream, min=start, max='+', count=self.read_chunk_size)
+            for entry_id, fields in entries:
+                fields = {self._text(k): self._text(v) for k, v in fields.items()}
+                events.append(SagaEvent(
+                    saga_id=fields['saga_id'],
+                    event_type=fields['event_type'],
+                    step_index=int(fields['step_index']) if fields.get('step_index') else None,
+                    payload=json.loads(fields['payload']),
+                    timestamp=fields['created_at'],
+                    event_id=self._text(entry_id)
+                ))
+            if len(entries) < self.read_chunk_size:
+                return events
+            start = '(' + self._text(entries[-1][0])
+
+    async def load_unfinished(self) -> Dict[str, List[SagaEvent]]:
+        sagas: Dict[str, List[SagaEvent]] = {}
+        finished = set()
+        for event in await self._read_all():
+            if event.event_type in TERMINAL_EVENTS:
+                finished.add(event.saga_id)
+            sagas.setdefault(event.saga_id, []).append(event)
+        return {saga_id: events for saga_id, events in sagas.items() if saga_id not in finished}
+
+    async def compact(self) -> int:
+        events = await self._read_all()
+        finished = {event.saga_id for event in events if event.event_type in TERMINAL_EVENTS}
+        stale = [event.event_id for event in events if event.saga_id in finished]
+        removed = 0
+        for i in range(0, len(stale), self.read_chunk_size):
+            removed += await self.redis.xdel(self.stream, *stale[i:i + self.read_chunk_size])
+        return removed
+
+    async def acquire_lease(self, saga_id: str, owner: str, lease_seconds: float) -> bool:
+        acquired = await self.redis.eval(
+            self.ACQUIRE_SCRIPT, 1, self._lease_key(saga_id), owner, int(lease_seconds * 1000)
+        )
+        return bool(acquired)
+
+    async def renew_leases(self, saga_ids: Iterable[str], owner: str, lease_seconds: float):
+        pipe = self.redis.pipeline(transaction=False)
+        for saga_id in saga_ids:
+            pipe.eval(self.RENEW_SCRIPT, 1, self._lease_key(saga_id), owner, int(lease_seconds * 1000))
+        await pipe.execute()
+
+    async def release_lease(self, saga_id: str, owner: str):
+        await self.redis.eval(self.RELEASE_SCRIPT, 1, self._lease_key(saga_id), owner)
+
+    def _lease_key(self, saga_id: str) -> str:
+        return f"{self.stream}:lease:{saga_id}"
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+
+def create_saga_event_log(backend: Optional[str] = None, state_manager=None,
+                          redis_url: Optional[str] = None, **kwargs) -> SagaEventLog:
+    """
+    Create a saga event log for the configured backend
+
+    Args:
+        backend: "sqlite" or "redis" (defaults to SAGA_EVENT_LOG_BACKEND, then "sqlite")
+        state_manager: PersistentStateManager for the SQLite backend
+        redis_url: Redis URL for the Redis backend (defaults to REDIS_URL)
+    """
+    backend = (backend or os.getenv('SAGA_EVENT_LOG_BACKEND', 'sqlite')).lower()
+    if backend == 'redis':
+        url = redis_url or os.getenv('REDIS_URL')
+        if not url:
+            raise ValueError("REDIS_URL is required for the redis saga event log")
+        return RedisStreamSagaEventLog.from_url(url, **kwargs)
+    if backend == 'sqlite':
+        if state_manager is None:
+            from persistent_state_manager import persistent_state_manager as state_manager
+        return SQLiteSagaEventLog(state_manager, **kwargs)
+    raise ValueError(f"Unknown saga event log backend: {backend}")
@@ -7,12 +7,30 @@ Provides idempotency and compensation mechanisms for complex workflows
 import asyncio
 import logging
 import json
+import os
+import socket
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Awaitable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import hashlib
+from collections import OrderedDict
+
+from idempotency_store import IdempotencyStore, InMemoryIdempotencyStore
+from saga_event_log import (
+    SagaEvent,
+    SagaEventLog,
+    create_saga_event_log,
+    SAGA_STARTED,
+    STEP_STARTED,
+    STEP_COMPLETED,
+    STEP_FAILED,
+    SAGA_COMPENSATING,
+    STEP_COMPENSATED,
+    SAGA_COMPLETED,
+    SAGA_COMPENSATED,
+)
 
 class SagaStepStatus(Enum):
     PENDING = "pending"
@@ -45,6 +63,8 @@ class SagaStep:
     retry_count: int = 0
     max_retries: int = 3
     idempotency_key: Optional[str] = None
+    # Indices of steps that must complete first; None means "the previous step"
+    depends_on: Optional[List[int]] = None
 
 @dataclass
 class SagaTransaction:
@@ -60,47 +80,182 @@ class SagaTransaction:
     current_step_index: int = 0
 
 class IdempotencyManager:
-    """Manages idempotency keys to prevent duplicate operations"""
+    """
+    Manages idempotency keys to prevent duplicate operations
+    
+    Results live in a pluggable store (in-memory LRU+TTL by default, or
+    Redis to share them across workers). ``run_once`` adds single-flight
+    semantics: concurrent callers with the same key await the first
+    execution instead of running the operation again, and with a shared
+    store only one worker at a time holds the execution lease for a key.
+    The lease is renewed every third of ``lease_seconds`` while the
+    operation runs, so retries and backoff can outlast it safely.
+    """
     
-    def __init__(self):
-        self.processed_keys: Dict[str, Any] = {}
+    def __init__(self, store: Optional[IdempotencyStore] = None,
+                 lease_seconds: float = 30.0, poll_interval: float = 0.05,
+                 max_poll_interval: float = 1.0):
+        self.store = store if store is not None else InMemoryIdempotencyStore()
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {'hits': 0, 'executions': 0, 'coalesced': 0, 'remote_waits': 0}
         self.logger = logging.getLogger(f"{__name__}.idempotency")
         
+    @property
+    def processed_keys(self) -> Dict[str, Any]:
+        """Unexpired results known to this process, keyed by idempotency key"""
+        return self.store.items()
+        
     def generate_key(self, operation: str, params: Dict) -> str:
         """Generate idempotency key from operation and parameters"""
         content = f"{operation}:{json.dumps(params, sort_keys=True)}"
         return hashlib.sha256(content.encode()).hexdigest()[:16]
         
     def is_processed(self, key: str) -> bool:
-        """Check if operation was already processed"""
-        return key in self.processed_keys
+        """Check if operation was already processed (local results only)"""
+        return self.store.get_nowait(key)[0]
         
     def get_result(self, key: str) -> Any:
-        """Get result of previously processed operation"""
-        return self.processed_keys.get(key)
+        """Get result of previously processed operation (local results only)"""
+        return self.store.get_nowait(key)[1]
         
     def mark_processed(self, key: str, result: Any):
-        """Mark operation as processed with result"""
-        self.processed_keys[key] = result
+        """Mark operation as processed with result (local results only)"""
+        self.store.set_nowait(key, result)
         self.logger.debug(f"Marked operation {key} as processed")
         
+    async def lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, result) from the store, including shared results"""
+        return await self.store.get(key)
+        
+    async def run_once(self, key: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the stored result for key, or run operation exactly once
+        
+        Failures are not stored, so a later call retries; callers that were
+        waiting on a failed execution receive the same exception.
+        """
+        found, result = await self.store.get(key)
+        if found:
+            self.stats['hits'] += 1
+            return result
+            
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(inflight)
+            
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._run_with_lease(key, operation)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+            
+    async def _run_with_lease(self, key: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self.poll_interval
+        while not await self.store.claim(key, self.lease_seconds):
+            self.stats['remote_waits'] += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+            found, result = await self.store.get(key)
+            if found:
+                return result
+                
+        renewal = asyncio.ensure_future(self._renew_lease(key))
+        try:
+            found, result = await self.store.get(key)
+            if found:
+                return result
+            self.stats['executions'] += 1
+            result = await operation()
+            await self.store.set(key, result)
+            return result
+        finally:
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+            await self.store.release(key)
+            
+    async def _renew_lease(self, key: str):
+        """Keep the execution lease for key alive until cancelled or lost"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.store.renew(key, self.lease_seconds):
+                    self.logger.warning(f"Lost execution lease for {key}; another worker may run it")
+                    return
+            except Exception as e:
+                self.logger.error(f"Failed to renew execution lease for {key}: {e}")
+        
     def cleanup_old_keys(self, max_age_hours: int = 24):
-        """Clean up old idempotency keys"""
-        if len(self.processed_keys) > 10000:
-            keys_to_remove = list(self.processed_keys.keys())[:-5000]
-            for key in keys_to_remove:
-                del self.processed_keys[key]
+        """Clean up idempotency keys older than max_age_hours"""
+        removed = self.store.cleanup(max_age_hours * 3600)
+        if removed:
+            self.logger.debug(f"Removed {removed} idempotency keys older than {max_age_hours}h")
 
 class SagaOrchestrator:
-    """Orchestrates Saga transactions with compensation and idempotency"""
+    """
+    Orchestrates Saga transactions with compensation and idempotency
+    
+    With an event log, every saga this orchestrator runs is leased to its
+    ``owner_id`` for ``lease_seconds`` and the leases are renewed in the
+    background, so orchestrators in other processes sharing the log leave
+    it alone. ``event_log_factory`` defers creating the log until first use.
     
-    def __init__(self, persistent_state_manager=None):
+    With a persistent state manager, each completion checkpoints the
+    summaries of the last ``checkpoint_history`` finished sagas. Consecutive
+    checkpoints differ by one or two sagas, so they are stored as deltas.
+    """
+    
+    def __init__(self, persistent_state_manager=None, event_log: Optional[SagaEventLog] = None,
+                 max_step_concurrency: int = 8,
+                 idempotency_store: Optional[IdempotencyStore] = None,
+                 owner_id: Optional[str] = None, lease_seconds: float = 30.0,
+                 event_log_factory: Optional[Callable[[], Optional[SagaEventLog]]] = None,
+                 checkpoint_history: int = 100):
+        self.max_step_concurrency = max(1, max_step_concurrency)
         self.active_sagas: Dict[str, SagaTransaction] = {}
         self.completed_sagas: List[SagaTransaction] = []
-        self.idempotency_manager = IdempotencyManager()
+        self.idempotency_manager = IdempotencyManager(store=idempotency_store)
         self.persistent_state_manager = persistent_state_manager
+        self.checkpoint_history = checkpoint_history
+        self._checkpointed_sagas: "OrderedDict[str, Dict]" = OrderedDict()
+        self._event_log = event_log
+        self._event_log_factory = event_log_factory
+        self.owner_id = owner_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self._leases: set = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        # step name -> (action, compensate), used to rebuild sagas on recovery
+        self.step_registry: Dict[str, tuple] = {}
         self.logger = logging.getLogger(__name__)
         
+    @property
+    def event_log(self) -> Optional[SagaEventLog]:
+        """The saga event log, created by ``event_log_factory`` on first access"""
+        if self._event_log_factory is not None:
+            factory, self._event_log_factory = self._event_log_factory, None
+            self._event_log = factory()
+        return self._event_log
+        
+    @event_log.setter
+    def event_log(self, event_log: Optional[SagaEventLog]):
+        self._event_log_factory = None
+        self._event_log = event_log
+        
+    def register_step(self, name: str, action: Callable, compensate: Callable = None):
+        """Register a step implementation so logged sagas using it can be recovered"""
+        self.step_registry[name] = (action, compensate)
+        
     def create_saga(self, name: str, context: Dict = None) -> SagaTransaction:
         """Create new Saga transaction"""
         saga_id = str(uuid.uuid4())
@@ -116,8 +271,17 @@ class SagaOrchestrator:
         return saga
         
     def add_step(self, saga: SagaTransaction, name: str, action: Callable, 
-                 compensate: Callable = None, max_retries: int = 3) -> SagaStep:
-        """Add step to Saga transaction"""
+                 compensate: Callable = None, max_retries: int = 3,
+                 depends_on: Optional[List[Any]] = None,
+                 idempotency_key: Optional[str] = None) -> SagaStep:
+        """
+        Add step to Saga transaction
+        
+        By default a step runs after the previously added one. Passing
+        ``depends_on`` (earlier steps or their names; ``[]`` for none) lets
+        independent steps run concurrently as a DAG. Without an explicit
+        ``idempotency_key`` one is derived from the step name and context.
+        """
         step_id = f"{saga.saga_id}_{len(saga.steps)}"
         
         step = SagaStep(
@@ -125,29 +289,79 @@ class SagaOrchestrator:
             name=name,
             action=action,
             compensate=compensate,
-            max_retries=max_retries
+            max_retries=max_retries,
+            idempotency_key=idempotency_key,
+            depends_on=self._resolve_dependencies(saga, depends_on)
         )
-        
         saga.steps.append(step)
         self.logger.debug(f"Added step {name} to Saga {saga.saga_id}")
         
         return step
         
+    @staticmethod
+    def _resolve_dependencies(saga: SagaTransaction, depends_on: Optional[List[Any]]) -> Optional[List[int]]:
+        if depends_on is None:
+            return None
+        indices = []
+        for dependency in depends_on:
+            name = dependency.name if isinstance(dependency, SagaStep) else dependency
+            index = next(
+                (i for i in range(len(saga.steps) - 1, -1, -1) if saga.steps[i].name == name),
+                None
+            )
+            if index is None:
+                raise ValueError(f"Unknown dependency '{name}': steps may only depend on earlier steps")
+            indices.append(index)
+        return sorted(set(indices))
+        
+    @staticmethod
+    def _step_dependencies(saga: SagaTransaction) -> List[List[int]]:
+        return [
+            step.depends_on if step.depends_on is not None else ([i - 1] if i else [])
+            for i, step in enumerate(saga.steps)
+        ]
+        
     async def execute_saga(self, saga: SagaTransaction) -> bool:
         """Execute Saga transaction with compensation on failure"""
+        if saga.started_at is None:
+            try:
+                await self._acquire_lease(saga.saga_id)
+                await self._log(saga, SAGA_STARTED, payload={
+                    'name': saga.name,
+                    'context': saga.context,
+                    'created_at': saga.created_at.isoformat(),
+                    'steps': [
+                        {'name': step.name, 'max_retries': step.max_retries, 'depends_on': step.depends_on}
+                        for step in saga.steps
+                    ]
+                })
+            except Exception as e:
+                self.logger.error(f"Saga {saga.saga_id} not started: {e}")
+                saga.status = SagaStatus.FAILED
+                await self._release_lease(saga.saga_id)
+                self._move_to_completed(saga)
+                return False
+            saga.started_at = datetime.now()
         saga.status = SagaStatus.RUNNING
-        saga.started_at = datetime.now()
         
         try:
-            for i, step in enumerate(saga.steps):
-                saga.current_step_index = i
-                
-                if not await self._execute_step(step, saga.context):
-                    await self._compensate_saga(saga, i)
-                    return False
+            dependencies = self._step_dependencies(saga)
+            pending = [i for i, step in enumerate(saga.steps) if step.status != SagaStepStatus.COMPLETED]
+            failed_index = await self._run_graph(
+                saga,
+                pending,
+                {i: set(dependencies[i]) for i in pending},
+                self._run_step,
+                stop_on_failure=True
+            )
+            if failed_index is not None:
+                await self._compensate_saga(saga, failed_index)
+                return False
                     
             saga.status = SagaStatus.COMPLETED
             saga.completed_at = datetime.now()
+            await self._log(saga, SAGA_COMPLETED, best_effort=True)
+            await self._release_lease(saga.saga_id)
             
             self._move_to_completed(saga)
             self.logger.info(f"Saga {saga.saga_id} completed successfully")
@@ -160,6 +374,62 @@ class SagaOrchestrator:
             await self._compensate_saga(saga, saga.current_step_index)
             return False
             
+    async def _run_graph(self, saga: SagaTransaction, indices: List[int],
+                         blockers: Dict[int, set], run: Callable, stop_on_failure: bool) -> Optional[int]:
+        """
+        Run steps once their blockers have finished, at most
+        max_step_concurrency at a time; returns the first failed index
+        
+        A plain chain of steps runs one at a time in order, exactly as a
+        sequential loop would.
+        """
+        remaining = set(indices)
+        blockers = {i: blockers[i] & remaining for i in remaining}
+        running: Dict[asyncio.Future, int] = {}
+        failed_index = None
+        
+        try:
+            while remaining or running:
+                if failed_index is None or not stop_on_failure:
+                    ready = sorted(i for i in remaining if not blockers[i])
+                    for i in ready[:self.max_step_concurrency - len(running)]:
+                        remaining.discard(i)
+                        running[asyncio.ensure_future(run(saga, i))] = i
+                if not running:
+                    break
+                    
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=running.get):
+                    i = running.pop(task)
+                    if not task.result():
+                        failed_index = i if failed_index is None else failed_index
+                        if stop_on_failure:
+                            continue
+                    for j in remaining:
+                        blockers[j].discard(i)
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+            
+        return failed_index
+        
+    async def _run_step(self, saga: SagaTransaction, i: int) -> bool:
+        """Run one step with its log events"""
+        step = saga.steps[i]
+        saga.current_step_index = i
+        await self._log(saga, STEP_STARTED, i)
+        if not await self._execute_step(step, saga.context):
+            await self._log(saga, STEP_FAILED, i, {'error': step.error})
+            return False
+        await self._log(saga, STEP_COMPLETED, i, {
+            'result': step.result,
+            'idempotency_key': step.idempotency_key,
+            'context': saga.context
+        })
+        return True
+        
     async def _execute_step(self, step: SagaStep, context: Dict) -> bool:
         """Execute individual Saga step with idempotency"""
         step.status = SagaStepStatus.RUNNING
@@ -170,54 +440,79 @@ class SagaOrchestrator:
                 step.name, context
             )
             
-        if self.idempotency_manager.is_processed(step.idempotency_key):
-            step.result = self.idempotency_manager.get_result(step.idempotency_key)
-            step.status = SagaStepStatus.COMPLETED
-            step.completed_at = datetime.now()
-            self.logger.info(f"Step {step.name} already processed (idempotent)")
-            return True
+        try:
+            step.result = await self.idempotency_manager.run_once(
+                step.idempotency_key, lambda: self._attempt_step(step, context)
+            )
+        except Exception as e:
+            step.error = str(e)
+            step.status = SagaStepStatus.FAILED
+            return False
             
+        step.status = SagaStepStatus.COMPLETED
+        step.completed_at = datetime.now()
+        self.logger.info(f"Step {step.name} completed successfully")
+        return True
+        
+    async def _attempt_step(self, step: SagaStep, context: Dict) -> Any:
+        """Run a step's action with retries, raising the last error if all attempts fail"""
         for attempt in range(step.max_retries + 1):
             try:
                 step.retry_count = attempt
-                result = await step.action(context)
-                
-                step.result = result
-                step.status = SagaStepStatus.COMPLETED
-                step.completed_at = datetime.now()
-                
-                self.idempotency_manager.mark_processed(step.idempotency_key, result)
-                
-                self.logger.info(f"Step {step.name} completed successfully")
-                return True
-                
+                return await step.action(context)
             except Exception as e:
                 step.error = str(e)
                 self.logger.warning(f"Step {step.name} attempt {attempt + 1} failed: {e}")
-                
-                if attempt < step.max_retries:
-                    delay = 2 ** attempt
-                    await asyncio.sleep(delay)
-                else:
-                    step.status = SagaStepStatus.FAILED
-                    return False
-                    
-        return False
+                if attempt >= step.max_retries:
+                    raise
+                await asyncio.sleep(2 ** attempt)
         
     async def _compensate_saga(self, saga: SagaTransaction, failed_step_index: int):
-        """Compensate Saga by running compensation actions in reverse order"""
+        """
+        Compensate Saga by undoing completed steps in reverse dependency order
+        
+        A step is compensated only after every completed step that depends
+        on it (directly or transitively) has been compensated; unrelated
+        branches are compensated concurrently.
+        """
         saga.status = SagaStatus.COMPENSATING
         self.logger.info(f"Starting compensation for Saga {saga.saga_id}")
+        await self._log(saga, SAGA_COMPENSATING, payload={'failed_step_index': failed_step_index},
+                        best_effort=True)
         
-        for i in range(failed_step_index - 1, -1, -1):
-            step = saga.steps[i]
+        dependencies = self._step_dependencies(saga)
+        ancestors: List[set] = []
+        for deps in dependencies:
+            closure = set(deps)
+            for d in deps:
+                closure |= ancestors[d]
+            ancestors.append(closure)
             
-            if step.status == SagaStepStatus.COMPLETED and step.compensate:
-                await self._compensate_step(step, saga.context)
+        to_undo = [
+            i for i, step in enumerate(saga.steps)
+            if step.status == SagaStepStatus.COMPLETED and step.compensate
+        ]
+        await self._run_graph(
+            saga,
+            to_undo,
+            {i: {j for j in to_undo if i in ancestors[j]} for i in to_undo},
+            self._undo_step,
+            stop_on_failure=False
+        )
                 
         saga.status = SagaStatus.COMPENSATED
+        await self._log(saga, SAGA_COMPENSATED, best_effort=True)
+        await self._release_lease(saga.saga_id)
         self._move_to_completed(saga)
         
+    async def _undo_step(self, saga: SagaTransaction, i: int) -> bool:
+        """Compensate one step and log it"""
+        step = saga.steps[i]
+        await self._compensate_step(step, saga.context)
+        if step.status == SagaStepStatus.COMPENSATED:
+            await self._log(saga, STEP_COMPENSATED, i, best_effort=True)
+        return True
+        
     async def _compensate_step(self, step: SagaStep, context: Dict):
         """Compensate individual step"""
         step.status = SagaStepStatus.COMPENSATING
@@ -230,6 +525,187 @@ class SagaOrchestrator:
         except Exception as e:
             self.logger.error(f"Failed to compensate step {step.name}: {e}")
             
+    async def _log(self, saga: SagaTransaction, event_type: str,
+                   step_index: Optional[int] = None, payload: Dict = None,
+                   best_effort: bool = False):
+        """
+        Append an event to the saga log, if one is configured
+        
+        Events are written ahead of the work they describe, so a failed
+        append raises and the saga stops (and compensates) instead of running
+        steps recovery would not know about. Compensation and terminal
+        events pass ``best_effort``: losing one only means recovery repeats
+        an idempotent compensation or re-confirms a finished saga.
+        """
+        if self.event_log is None:
+            return
+        try:
+            await self.event_log.append(SagaEvent(
+                saga_id=saga.saga_id,
+                event_type=event_type,
+                step_index=step_index,
+                payload=payload or {}
+            ))
+        except Exception as e:
+            self.logger.error(f"Failed to log {event_type} for Saga {saga.saga_id}: {e}")
+            if not best_effort:
+                raise
+                
+    async def _acquire_lease(self, saga_id: str) -> bool:
+        """Lease a saga to this orchestrator and keep it renewed until released"""
+        if self.event_log is None:
+            return True
+        if not await self.event_log.acquire_lease(saga_id, self.owner_id, self.lease_seconds):
+            return False
+        self._leases.add(saga_id)
+        loop = asyncio.get_running_loop()
+        if self._heartbeat is None or self._heartbeat.done() or self._heartbeat.get_loop() is not loop:
+            self._heartbeat = loop.create_task(self._renew_leases())
+        return True
+        
+    async def _release_lease(self, saga_id: str):
+        """Hand back the lease of a finished saga (best effort; it expires anyway)"""
+        if saga_id not in self._leases:
+            return
+        self._leases.discard(saga_id)
+        try:
+            await self.event_log.release_lease(saga_id, self.owner_id)
+        except Exception as e:
+            self.logger.warning(f"Failed to release lease on Saga {saga_id}: {e}")
+            
+    async def _renew_leases(self):
+        """Heartbeat extending the leases of running sagas, every third of the lease"""
+        while self._leases:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.event_log.renew_leases(list(self._leases), self.owner_id, self.lease_seconds)
+            except Exception as e:
+                self.logger.error(f"Failed to renew saga leases: {e}")
+                
+    async def recover(self, policy: str = "resume") -> Dict[str, List[str]]:
+        """
+        Resume or compensate sagas left unfinished by a previous process
+        
+        Only sagas whose lease has expired are touched, so sagas still being
+        run by a live orchestrator sharing the log are left to it; recovery
+        takes over the lease first. Sagas are rebuilt from the event log using the step registry. With
+        policy "resume", a running saga continues from its first step that
+        has not completed (an in-flight step is re-run under its
+        idempotency key); with "compensate" its completed steps are undone.
+        Sagas that were already compensating always finish compensating.
+        
+        Returns:
+            Saga ids grouped into resumed, compensated, skipped (steps not
+            registered) and leased (still owned by another orchestrator)
+        """
+        if policy not in ("resume", "compensate"):
+            raise ValueError(f"Unknown recovery policy: {policy}")
+            
+        summary = {'resumed': [], 'compensated': [], 'skipped': [], 'leased': []}
+        if self.event_log is None:
+            return summary
+            
+        unfinished = await self.event_log.load_unfinished()
+        for saga_id, events in unfinished.items():
+            if saga_id in self.active_sagas:
+                continue
+            if not await self._acquire_lease(saga_id):
+                summary['leased'].append(saga_id)
+                continue
+            saga, failed_step_index = self._rebuild_saga(saga_id, events)
+            if saga is None:
+                await self._release_lease(saga_id)
+                summary['skipped'].append(saga_id)
+                continue
+                
+            self.active_sagas[saga_id] = saga
+            if saga.status == SagaStatus.COMPENSATING or policy == "compensate":
+                if failed_step_index is None:
+                    failed_step_index = saga.current_step_index
+                self.logger.info(f"Recovering Saga {saga_id} by compensation")
+                await self._compensate_saga(saga, failed_step_index)
+                summary['compensated'].append(saga_id)
+            else:
+                self.logger.info(f"Resuming Saga {saga_id} from step {saga.current_step_index}")
+                if await self.execute_saga(saga):
+                    summary['resumed'].append(saga_id)
+                else:
+                    summary['compensated'].append(saga_id)
+                    
+        return summary
+        
+    async def compact_event_log(self) -> int:
+        """Drop logged events of finished sagas, returning how many were removed"""
+        if self.event_log is None:
+            return 0
+        return await self.event_log.compact()
+        
+    async def close(self):
+        """Stop renewing leases, then flush and stop the event log"""
+        heartbeat, self._heartbeat = self._heartbeat, None
+        if heartbeat is not None and not heartbeat.done():
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        if self.event_log is not None:
+            await self.event_log.close()
+            
+    def _rebuild_saga(self, saga_id: str, events: List[SagaEvent]):
+        """Rebuild a SagaTransaction from its logged events; returns (saga, failed_step_index)"""
+        started = next((e for e in events if e.event_type == SAGA_STARTED), None)
+        if started is None:
+            self.logger.error(f"Saga {saga_id} has no start event, skipping recovery")
+            return None, None
+            
+        missing = [s['name'] for s in started.payload['steps'] if s['name'] not in self.step_registry]
+        if missing:
+            self.logger.error(f"Cannot recover Saga {saga_id}: unregistered steps {missing}")
+            return None, None
+            
+        saga = SagaTransaction(
+            saga_id=saga_id,
+            name=started.payload['name'],
+            context=started.payload.get('context') or {},
+            status=SagaStatus.RUNNING,
+            created_at=datetime.fromisoformat(started.payload['created_at']),
+            started_at=datetime.fromisoformat(started.timestamp)
+        )
+        for index, step_def in enumerate(started.payload['steps']):
+            action, compensate = self.step_registry[step_def['name']]
+            saga.steps.append(SagaStep(
+                step_id=f"{saga_id}_{index}",
+                name=step_def['name'],
+                action=action,
+                compensate=compensate,
+                max_retries=step_def.get('max_retries', 3),
+                depends_on=step_def.get('depends_on')
+            ))
+            
+        failed_step_index = None
+        for event in events:
+            step = saga.steps[event.step_index] if event.step_index is not None else None
+            if event.event_type == STEP_STARTED:
+                saga.current_step_index = event.step_index
+                step.status = SagaStepStatus.RUNNING
+                step.started_at = datetime.fromisoformat(event.timestamp)
+            elif event.event_type == STEP_COMPLETED:
+                step.status = SagaStepStatus.COMPLETED
+                step.result = event.payload.get('result')
+                step.idempotency_key = event.payload.get('idempotency_key')
+                step.completed_at = datetime.fromisoformat(event.timestamp)
+                saga.context = event.payload.get('context', saga.context)
+                if step.idempotency_key:
+                    self.idempotency_manager.mark_processed(step.idempotency_key, step.result)
+            elif event.event_type == STEP_FAILED:
+                step.status = SagaStepStatus.FAILED
+                step.error = event.payload.get('error')
+            elif event.event_type == SAGA_COMPENSATING:
+                saga.status = SagaStatus.COMPENSATING
+                failed_step_index = event.payload.get('failed_step_index')
+            elif event.event_type == STEP_COMPENSATED:
+                step.status = SagaStepStatus.COMPENSATED
+                
+        return saga, failed_step_index
+        
     def _move_to_completed(self, saga: SagaTransaction):
         """Move Saga from active to completed"""
         if saga.saga_id in self.active_sagas:
@@ -241,12 +717,26 @@ class SagaOrchestrator:
             self.completed_sagas = self.completed_sagas[-500:]
             
         if self.persistent_state_manager:
+            completed_at = saga.completed_at.isoformat() if saga.completed_at else None
+            self._checkpointed_sagas[saga.saga_id] = {
+                'name': saga.name,
+                'status': saga.status.value,
+                'created_at': saga.created_at.isoformat(),
+                'completed_at': completed_at,
+                'steps': [
+                    {'name': step.name, 'status': step.status.value, 'retry_count': step.retry_count}
+                    for step in saga.steps
+                ]
+            }
+            while len(self._checkpointed_sagas) > self.checkpoint_history:
+                self._checkpointed_sagas.popitem(last=False)
             self.persistent_state_manager.create_checkpoint(
                 'saga_orchestrator',
                 {
                     'saga_id': saga.saga_id,
                     'status': saga.status.value,
-                    'completed_at': saga.completed_at.isoformat() if saga.completed_at else None
+                    'completed_at': completed_at,
+                    'recent': dict(self._checkpointed_sagas)
                 }
             )
             
@@ -281,15 +771,9 @@ class SagaOrchestrator:
         }
         
     async def execute_with_idempotency(self, idempotency_key: str, operation: Callable) -> Any:
-        """Execute operation with idempotency guarantee"""
-        if self.idempotency_manager.is_processed(idempotency_key):
-            self.logger.info(f"Returning cached result for idempotency key: {idempotency_key}")
-            return self.idempotency_manager.get_result(idempotency_key)
-        
+        """Execute operation with idempotency guarantee; concurrent callers share one execution"""
         try:
-            result = await operation()
-            self.idempotency_manager.mark_processed(idempotency_key, result)
-            return result
+            return await self.idempotency_manager.run_once(idempotency_key, operation)
         except Exception as e:
             self.logger.error(f"Operation failed for idempotency key {idempotency_key}: {e}")
             raise
@@ -305,7 +789,18 @@ class SagaOrchestrator:
             'active_sagas': len(self.active_sagas),
             'completed_sagas': len(self.completed_sagas),
             'processed_idempotency_keys': len(self.idempotency_manager.processed_keys),
+            'idempotency': dict(self.idempotency_manager.stats),
             'saga_statuses': saga_status_counts
         }
 
-saga_orchestrator = SagaOrchestrator()
+def _default_event_log() -> Optional[SagaEventLog]:
+    """Event log of the shared orchestrator; SAGA_EVENT_LOG_BACKEND=none disables it"""
+    if os.getenv('SAGA_EVENT_LOG_BACKEND', '').lower() == 'none':
+        return None
+    try:
+        return create_saga_event_log()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Saga event log unavailable, sagas will not be recoverable: {e}")
+        return None
+
+saga_orchestrator = SagaOrchestrator(event_log_factory=_default_event_log)
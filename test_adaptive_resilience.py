@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive concurrency limiting, jittered retries, retry budgets and hedging
+"""
+
+import asyncio
+
+import pytest
+
+from resilience_patterns import (
+    AdaptiveConcurrencyLimiter,
+    BulkheadPool,
+    BulkheadRejectionError,
+    CircuitBreakerOpenError,
+    HedgePolicy,
+    ResilienceConfig,
+    ResilienceManager,
+    RetryBudget,
+    RetryPolicy,
+)
+
+
+def service(delay):
+    async def call():
+        await asyncio.sleep(delay)
+        return 'ok'
+    return call
+
+
+class Flaky:
+    """Fails a given number of times, then succeeds"""
+
+    def __init__(self, failures, error=RuntimeError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('unavailable')
+        return 'ok'
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test AIMD limit adjustment"""
+
+    @pytest.mark.asyncio
+    async def test_limit_grows_while_latency_is_stable(self):
+        """Test a saturated, healthy service gets a higher limit"""
+        limiter = AdaptiveConcurrencyLimiter('svc', initial_limit=4, max_limit=50)
+
+        for _ in range(20):
+            await asyncio.gather(
+                *(limiter.execute(service(0.002)) for _ in range(limiter.limit)),
+                return_exceptions=True
+            )
+
+        assert limiter.limit > 4
+
+    @pytest.mark.asyncio
+    async def test_limit_shrinks_when_latency_rises(self):
+        """Test calls much slower than the baseline cut the limit"""
+        limiter = AdaptiveConcurrencyLimiter('svc', initial_limit=20)
+        for _ in range(10):
+            await limiter.execute(service(0.001))
+
+        for _ in range(5):
+            await limiter.execute(service(0.02))
+
+        assert limiter.limit < 20
+        assert limiter.limit_decreases == 5
+
+    @pytest.mark.asyncio
+    async def test_limit_holds_under_jittered_latency(self):
+        """Test normal latency spread around the average does not cut the limit"""
+        limiter = AdaptiveConcurrencyLimiter('svc', initial_limit=10)
+        latencies = [0.004, 0.006, 0.008, 0.010, 0.012]
+
+        results = []
+        for round_index in range(15):
+            results += await asyncio.gather(
+                *(limiter.execute(service(latencies[(round_index + i) % len(latencies)])) for i in range(10)),
+                return_exceptions=True
+            )
+
+        assert not any(isinstance(r, BulkheadRejectionError) for r in results)
+        assert limiter.limit >= 10
+
+    @pytest.mark.asyncio
+    async def test_timeouts_shrink_and_errors_do_not(self):
+        """Test timeouts count as overload while application errors are ignored"""
+        limiter = AdaptiveConcurrencyLimiter('svc', initial_limit=10)
+
+        with pytest.raises(RuntimeError):
+            await limiter.execute(Flaky(1))
+        assert limiter.limit == 10
+
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.execute(Flaky(1, error=asyncio.TimeoutError))
+        assert limiter.limit == 9
+
+    @pytest.mark.asyncio
+    async def test_rejects_beyond_limit(self):
+        """Test calls beyond the current limit are shed immediately"""
+        limiter = AdaptiveConcurrencyLimiter('svc', initial_limit=2, min_limit=2)
+
+        results = await asyncio.gather(
+            *(limiter.execute(service(0.01)) for _ in range(3)), return_exceptions=True
+        )
+
+        assert sum(isinstance(r, BulkheadRejectionError) for r in results) == 1
+        assert limiter.get_metrics()['rejected_requests'] == 1
+
+    def test_fixed_bulkhead_reports_capacity(self):
+        """Test the fixed bulkhead exposes capacity without semaphore internals"""
+        assert BulkheadPool('svc', max_concurrent=5).get_metrics()['available_capacity'] == 5
+
+
+class TestRetries:
+    """Test jitter and the retry budget"""
+
+    def test_full_jitter_stays_within_backoff(self):
+        """Test jittered delays are spread between zero and the exponential cap"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+        delays = [policy.backoff(3) for _ in range(200)]
+
+        assert all(0 <= d <= 4.0 for d in delays)
+        assert max(delays) - min(delays) > 1.0
+
+    @pytest.mark.asyncio
+    async def test_budget_caps_retries(self):
+        """Test an exhausted budget stops retries"""
+        budget = RetryBudget(ratio=0.1, min_per_second=0, capacity=2)
+        policy = RetryPolicy(max_attempts=5, base_delay=0, budget=budget)
+        flaky = Flaky(10)
+
+        with pytest.raises(RuntimeError):
+            await policy.execute(flaky)
+
+        assert flaky.calls == 3
+        assert budget.exhausted == 1
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_errors_raise_immediately(self):
+        """Test errors marked non-retryable skip the remaining attempts"""
+        policy = RetryPolicy(max_attempts=3, base_delay=0, non_retryable=(CircuitBreakerOpenError,))
+        flaky = Flaky(5, error=CircuitBreakerOpenError)
+
+        with pytest.raises(CircuitBreakerOpenError):
+            await policy.execute(flaky)
+        assert flaky.calls == 1
+
+
+class TestHedging:
+    """Test hedged requests"""
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_over_slow_attempt(self):
+        """Test a slow first attempt is raced by a hedge and cancelled"""
+        delays = [0.5, 0.01]
+        cancelled = []
+
+        async def call():
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        hedge = HedgePolicy(delay=0.02)
+        assert await hedge.execute(call) == 0.01
+        await asyncio.sleep(0)
+
+        assert hedge.hedges_started == 1
+        assert hedge.hedges_won == 1
+        assert cancelled == [0.5]
+
+    @pytest.mark.asyncio
+    async def test_failed_attempts_do_not_free_hedge_slots(self):
+        """Test no more than max_hedges copies start even when attempts fail"""
+        outcomes = [('fail', 0.03), ('slow', 0.2), ('slow', 0.2), ('slow', 0.2)]
+        started = []
+
+        async def call():
+            kind, delay = outcomes[len(started)]
+            started.append(kind)
+            await asyncio.sleep(delay)
+            if kind == 'fail':
+                raise RuntimeError('unavailable')
+            return kind
+
+        hedge = HedgePolicy(delay=0.01, max_hedges=1)
+        assert await hedge.execute(call) == 'slow'
+
+        assert hedge.hedges_started == 1
+        assert len(started) == 2
+
+    @pytest.mark.asyncio
+    async def test_losing_attempts_are_awaited(self):
+        """Test cancelled attempts have finished by the time execute returns"""
+        delays = [0.5, 0.01]
+        finished = []
+
+        async def call():
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+                return delay
+            finally:
+                finished.append(delay)
+
+        assert await HedgePolicy(delay=0.02).execute(call) == 0.01
+        assert sorted(finished) == [0.01, 0.5]
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_for_fast_calls(self):
+        """Test calls faster than the hedge delay are not duplicated"""
+        hedge = HedgePolicy(delay=0.05)
+        assert await hedge.execute(service(0.001)) == 'ok'
+        assert hedge.hedges_started == 0
+
+
+class TestResilienceManager:
+    """Test per-service wiring in protected_call"""
+
+    @pytest.mark.asyncio
+    async def test_protected_call_reuses_policies(self):
+        """Test retries use the service's policy and the adaptive limiter is registered"""
+        manager = ResilienceManager()
+        manager.configure_service('api', ResilienceConfig(adaptive=True, retry_base_delay=0, hedge_delay=0.05))
+        flaky = Flaky(1)
+
+        assert await manager.protected_call('api', flaky) == 'ok'
+        assert await manager.protected_call('api', flaky) == 'ok'
+
+        assert flaky.calls == 3
+        assert isinstance(manager.bulkheads['api'], AdaptiveConcurrencyLimiter)
+        metrics = manager.get_all_metrics()
+        assert 'limit' in metrics['bulkheads']['api']
+        assert 'api' in metrics['retry_budgets']
+
+    @pytest.mark.asyncio
+    async def test_fixed_bulkhead_by_default(self):
+        """Test services use a fixed bulkhead unless adaptive limiting is configured"""
+        manager = ResilienceManager()
+
+        assert await manager.protected_call('api', service(0.001)) == 'ok'
+
+        assert type(manager.bulkheads['api']) is BulkheadPool
+        assert manager.bulkheads['api'].limit == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled per-tenant governance rules
+"""
+
+import random
+import time
+
+import pytest
+
+from ai_governance_module import (
+    DomainSuffixIndex, GovernanceRuleManager, GovernanceRuleType, KeywordMasker
+)
+
+
+def naive_mask(keywords, content):
+    """Mask every occurrence of every keyword, overlaps included"""
+    masked = [False] * len(content)
+    for keyword in filter(None, keywords):
+        start = content.find(keyword)
+        while start != -1:
+            for i in range(start, start + len(keyword)):
+                masked[i] = True
+            start = content.find(keyword, start + 1)
+    return ''.join('*' if m else ch for ch, m in zip(content, masked))
+
+
+class TestKeywordMasker:
+    """Test Aho-Corasick keyword masking"""
+
+    def test_masks_like_replace_for_disjoint_keywords(self):
+        """Test the common case matches str.replace"""
+        masker = KeywordMasker(['password', 'secret', ''])
+
+        assert masker.mask('my password is secret') == 'my ******** is ******'
+        assert masker.mask('nothing here') == 'nothing here'
+
+    def test_overlapping_and_nested_matches(self):
+        """Test overlapping hits are merged into one masked span"""
+        masker = KeywordMasker(['he', 'she', 'his', 'hers', 'b', 'd', 'abcde'])
+
+        assert masker.mask('ushers') == 'u*****'
+        assert masker.mask('abcdef') == '*****f'
+
+    def test_matches_naive_masking(self):
+        """Test random keyword sets against a brute-force masker"""
+        rng = random.Random(3)
+        for _ in range(300):
+            keywords = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+            content = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 30)))
+
+            assert KeywordMasker(keywords).mask(content) == naive_mask(keywords, content)
+
+
+class TestDomainSuffixIndex:
+    """Test domain suffix lookups"""
+
+    def test_subdomains_match_lookalikes_do_not(self):
+        """Test suffix matching on label boundaries"""
+        index = DomainSuffixIndex()
+        index.add('facebook.com', 0)
+        index.add('https://Twitter.com/home', 1)
+
+        assert index.lookup('https://m.facebook.com/feed') == {0}
+        assert index.lookup('facebook.com') == {0}
+        assert index.lookup('https://notfacebook.com') == set()
+        assert index.lookup('twitter.com:443/x') == {1}
+        assert index.lookup('http://[broken') == set()
+
+
+class TestCompiledRules:
+    """Test GovernanceRuleManager on compiled rule sets"""
+
+    def _manager(self):
+        manager = GovernanceRuleManager()
+        manager.create_rule('t1', GovernanceRuleType.BLACKLIST, 'social', '', {'domains': ['facebook.com']})
+        manager.create_rule('t1', GovernanceRuleType.CONTENT_FILTER, 'words', '', {'keywords': ['secret']})
+        manager.create_rule('t1', GovernanceRuleType.USAGE_LIMIT, 'tokens', '', {'max_tokens': 100})
+        return manager
+
+    def test_apply_rules(self):
+        """Test blocking order, masking and the untouched original request"""
+        manager = self._manager()
+        request_data = {'url': 'https://www.facebook.com', 'content': 'a secret', 'estimated_tokens': 500}
+
+        result = manager.apply_rules('t1', request_data)
+
+        assert result['allowed'] is False
+        assert result['blocked_by'] == ['social', 'tokens']
+        assert result['modified_request']['content'] == 'a ******'
+        assert request_data['content'] == 'a secret'
+
+    def test_whitelist_blocks_unlisted_hosts(self):
+        """Test a whitelist rule blocks hosts outside its domains"""
+        manager = GovernanceRuleManager()
+        manager.create_rule('t1', GovernanceRuleType.WHITELIST, 'allowed', '', {'domains': ['example.com']})
+
+        assert manager.apply_rules('t1', {'url': 'https://api.example.com/v1'})['allowed'] is True
+        assert manager.apply_rules('t1', {'url': 'https://example.org'})['blocked_by'] == ['allowed']
+
+    def test_compiled_rules_are_cached_and_invalidated(self):
+        """Test create/update/delete drop the tenant's compiled rules"""
+        manager = self._manager()
+        compiled = manager.get_compiled_rules('t1')
+        assert manager.get_compiled_rules('t1') is compiled
+
+        rule = manager.create_rule('t1', GovernanceRuleType.CONTENT_FILTER, 'more', '', {'keywords': ['token']})
+        assert manager.apply_rules('t1', {'content': 'token'})['modified_request']['content'] == '*****'
+
+        manager.update_rule(rule.rule_id, {'enabled': False})
+        assert manager.apply_rules('t1', {'content': 'token'})['modified_request']['content'] == 'token'
+
+        manager.update_rule(rule.rule_id, {'enabled': True})
+        manager.delete_rule(rule.rule_id)
+        assert manager.apply_rules('t1', {'content': 'token'})['modified_request']['content'] == 'token'
+
+    def test_other_tenants_keep_their_compiled_rules(self):
+        """Test invalidation is per tenant"""
+        manager = self._manager()
+        manager.create_rule('t2', GovernanceRuleType.USAGE_LIMIT, 'tokens', '', {'max_tokens': 1})
+        compiled = manager.get_compiled_rules('t1')
+
+        manager.create_rule('t2', GovernanceRuleType.USAGE_LIMIT, 'tokens', '', {'max_tokens': 2})
+
+        assert manager.get_compiled_rules('t1') is compiled
+
+
+@pytest.mark.benchmark
+class TestRuleEngineScaling:
+    """Per-request cost as tenants add keywords"""
+
+    def _per_request(self, keyword_count):
+        rng = random.Random(keyword_count)
+        manager = GovernanceRuleManager()
+        keywords = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(8)) for _ in range(keyword_count)]
+        manager.create_rule('t1', GovernanceRuleType.CONTENT_FILTER, 'words', '', {'keywords': keywords})
+        manager.create_rule('t1', GovernanceRuleType.BLACKLIST, 'domains', '',
+                            {'domains': [f'{k}.com' for k in keywords]})
+        request_data = {'url': 'https://docs.example.com/page', 'content': 'lorem ipsum dolor sit amet ' * 40}
+        manager.apply_rules('t1', request_data)
+
+        started = time.perf_counter()
+        for _ in range(200):
+            manager.apply_rules('t1', request_data)
+        return (time.perf_counter() - started) / 200
+
+    def test_cost_is_flat_in_keyword_count(self):
+        """Test 5000 keywords cost about the same per request as 10"""
+        small, large = self._per_request(10), self._per_request(5000)
+        print(f"\n10 keywords: {small * 1e6:.0f}us/request, 5000 keywords: {large * 1e6:.0f}us/request")
+
+        assert large < small * 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
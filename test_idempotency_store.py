@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for idempotency stores and single-flight execution
+"""
+
+import asyncio
+
+import pytest
+
+import idempotency_store
+from idempotency_store import IdempotencyStore, InMemoryIdempotencyStore, RedisIdempotencyStore
+from saga_orchestrator import IdempotencyManager, SagaOrchestrator
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(idempotency_store.time, 'monotonic', fake)
+    return fake
+
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it to run the lease scripts
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+class SlowOperation:
+    """Operation that counts calls and can be made to fail"""
+
+    def __init__(self, result='ok', delay=0.02, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class TestInMemoryStore:
+    """Test TTL and LRU bounds of the in-memory store"""
+
+    def test_entries_expire_after_ttl(self, clock):
+        """Test results are forgotten once the TTL has passed"""
+        store = InMemoryIdempotencyStore(ttl_seconds=60)
+        store.set_nowait('k', 'v')
+
+        clock.now += 59
+        assert store.get_nowait('k') == (True, 'v')
+        clock.now += 2
+        assert store.get_nowait('k') == (False, None)
+        assert len(store) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the store stays within max_entries, evicting the LRU entry"""
+        store = InMemoryIdempotencyStore(max_entries=2)
+        store.set_nowait('a', 1)
+        store.set_nowait('b', 2)
+        store.get_nowait('a')
+        store.set_nowait('c', 3)
+
+        assert set(store.items()) == {'a', 'c'}
+
+    def test_cleanup_honours_max_age(self, clock):
+        """Test cleanup_old_keys removes only keys older than max_age_hours"""
+        manager = IdempotencyManager()
+        manager.mark_processed('old', 1)
+        clock.now += 2 * 3600
+        manager.mark_processed('new', 2)
+
+        manager.cleanup_old_keys(max_age_hours=1)
+
+        assert manager.is_processed('new')
+        assert not manager.is_processed('old')
+
+
+    def test_store_interface_is_abstract(self):
+        """Test stores must implement the whole interface"""
+        with pytest.raises(TypeError):
+            IdempotencyStore()
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent executions"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_execution(self):
+        """Test concurrent calls with the same key run the operation once"""
+        orchestrator = SagaOrchestrator()
+        operation = SlowOperation()
+
+        results = await asyncio.gather(*(
+            orchestrator.execute_with_idempotency('key', operation) for _ in range(10)
+        ))
+
+        assert results == ['ok'] * 10
+        assert operation.calls == 1
+        stats = orchestrator.idempotency_manager.stats
+        assert stats['executions'] == 1
+        assert stats['coalesced'] == 9
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_all_waiters_and_are_not_cached(self):
+        """Test a failure is raised to every waiter and the next call retries"""
+        manager = IdempotencyManager()
+        failing = SlowOperation(error=RuntimeError('boom'))
+
+        results = await asyncio.gather(
+            *(manager.run_once('key', failing) for _ in range(3)), return_exceptions=True
+        )
+
+        assert failing.calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await manager.run_once('key', SlowOperation(result='retry')) == 'retry'
+
+    @pytest.mark.asyncio
+    async def test_saga_steps_use_store(self):
+        """Test a step whose key already has a result is not executed again"""
+        orchestrator = SagaOrchestrator()
+        operation = SlowOperation(delay=0)
+        first = orchestrator.create_saga('s1')
+        orchestrator.add_step(first, 'charge', lambda ctx: operation(), idempotency_key='charge-1')
+        second = orchestrator.create_saga('s2')
+        orchestrator.add_step(second, 'charge', lambda ctx: operation(), idempotency_key='charge-1')
+
+        assert await orchestrator.execute_saga(first)
+        assert await orchestrator.execute_saga(second)
+        assert operation.calls == 1
+        assert second.steps[0].result == 'ok'
+
+
+class TestRedisStore:
+    """Test sharing results and leases across workers through Redis"""
+
+    @pytest.mark.asyncio
+    async def test_workers_share_results(self, redis_client):
+        """Test a second worker waits on the lease and reuses the first worker's result"""
+        workers = [
+            IdempotencyManager(store=RedisIdempotencyStore(redis_client), poll_interval=0.005)
+            for _ in range(2)
+        ]
+        operation = SlowOperation(result={'charge_id': 'c1'})
+
+        results = await asyncio.gather(*(w.run_once('key', operation) for w in workers))
+
+        assert results == [{'charge_id': 'c1'}] * 2
+        assert operation.calls == 1
+        assert await redis_client.exists('idempotency:key:lease') == 0
+        assert await redis_client.pttl('idempotency:key') > 0
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_taken_over(self, redis_client):
+        """Test a lease left by a dead worker expires and another worker executes"""
+        await redis_client.set('idempotency:key:lease', 'dead-worker', px=20)
+        manager = IdempotencyManager(store=RedisIdempotencyStore(redis_client), poll_interval=0.005)
+
+        assert await manager.run_once('key', SlowOperation(delay=0)) == 'ok'
+        assert manager.stats['remote_waits'] > 0
+
+    @pytest.mark.asyncio
+    async def test_lease_renewed_while_operation_runs(self, redis_client):
+        """Test an operation outlasting the lease is not run again by another worker"""
+        workers = [
+            IdempotencyManager(store=RedisIdempotencyStore(redis_client), lease_seconds=0.05,
+                               poll_interval=0.005, max_poll_interval=0.01)
+            for _ in range(2)
+        ]
+        operation = SlowOperation(delay=0.25)
+
+        results = await asyncio.gather(*(w.run_once('key', operation) for w in workers))
+
+        assert results == ['ok', 'ok']
+        assert operation.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_lease_taken_over_is_not_touched(self, redis_client):
+        """Test a worker whose lease expired neither renews nor releases its successor's lease"""
+        store = RedisIdempotencyStore(redis_client)
+        assert await store.claim('key', 0.02) is True
+        await asyncio.sleep(0.05)
+        successor = RedisIdempotencyStore(redis_client)
+        assert await successor.claim('key', 10) is True
+
+        assert await store.renew('key', 10) is False
+        await store.release('key')
+
+        assert await redis_client.get('idempotency:key:lease') == successor._lease_tokens['key']
+        assert await redis_client.pttl('idempotency:key:lease') > 5000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming statistics, async observation and concurrent actions in the OODA loop
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from meta_agent_decision_hub import DecisionResult, MetricStats, OODALoop, SystemMetrics
+
+METRICS_KEY = "system:metrics:current"
+
+
+def metrics_hash(latency=200, error_rate=0.001):
+    return {
+        'api_latency_p95': str(latency),
+        'api_error_rate': str(error_rate),
+        'db_pool_usage': '0.3',
+        'redis_hit_rate': '0.95',
+        'cpu_usage': '0.4',
+        'memory_usage': '0.5',
+        'active_users': '100',
+        'revenue_mrr': '10000'
+    }
+
+
+def decision(actions):
+    return DecisionResult(
+        decision_id='decision_test',
+        strategy='test',
+        actions=actions,
+        expected_outcome='',
+        risk_assessment=0.1,
+        confidence=0.9,
+        execution_timeline='immediate'
+    )
+
+
+class TestMetricStats:
+    """Test O(1) streaming statistics"""
+
+    def test_welford_matches_statistics_module(self):
+        """Test the all-time mean and variance are exact"""
+        rng = random.Random(5)
+        values = [rng.gauss(200, 30) for _ in range(500)]
+        stats = MetricStats()
+        for value in values:
+            stats.update(value)
+
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.variance == pytest.approx(statistics.variance(values))
+
+    def test_ewma_and_baseline(self):
+        """Test the EWMA recursion and the pre-update baseline"""
+        stats = MetricStats(span=3)
+        expected = None
+        for value in (10.0, 20.0, 30.0):
+            previous = expected
+            expected = value if expected is None else expected + 0.5 * (value - expected)
+            stats.update(value)
+
+        assert stats.ewma == pytest.approx(expected)
+        assert stats.baseline == pytest.approx(previous)
+        assert list(stats.recent) == [10.0, 20.0, 30.0]
+
+
+class TestAsyncObservation:
+    """Test observation through async and sync Redis clients"""
+
+    @pytest.mark.asyncio
+    async def test_observe_reads_async_redis(self):
+        """Test metrics come from an async client"""
+        client = FakeAsyncRedis(decode_responses=True)
+        await client.hset(METRICS_KEY, mapping=metrics_hash(latency=321))
+        loop = OODALoop(client, None)
+
+        metrics = await loop.observe()
+
+        assert metrics.api_latency_p95 == 321.0
+        assert loop.metric_stats['api_latency_p95'].count == 1
+
+    @pytest.mark.asyncio
+    async def test_sync_client_does_not_block_event_loop(self):
+        """Test a blocking client is called off the event loop and bytes are decoded"""
+        client = Mock()
+
+        def slow_hgetall(key):
+            time.sleep(0.1)
+            return {k.encode(): v.encode() for k, v in metrics_hash(latency=250).items()}
+
+        client.hgetall = slow_hgetall
+        loop = OODALoop(client, None)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        metrics = await loop.observe()
+        task.cancel()
+
+        assert metrics.api_latency_p95 == 250.0
+        assert ticks >= 5
+
+
+class TestStreamingOrientation:
+    """Test anomaly and trend detection on shared streaming state"""
+
+    @pytest.mark.asyncio
+    async def test_latency_spike_detected(self):
+        """Test a spike against the EWMA baseline is reported"""
+        client = FakeAsyncRedis(decode_responses=True)
+        loop = OODALoop(client, None)
+        for _ in range(10):
+            await client.hset(METRICS_KEY, mapping=metrics_hash(latency=200))
+            await loop.observe()
+
+        await client.hset(METRICS_KEY, mapping=metrics_hash(latency=900, error_rate=0.01))
+        current = await loop.observe()
+        anomalies = loop._detect_anomalies(current)
+
+        assert any('API latency spike' in a for a in anomalies)
+        assert any('Error rate spike' in a for a in anomalies)
+
+    @pytest.mark.asyncio
+    async def test_trend_uses_recorded_health_scores(self):
+        """Test trends come from the ring of recorded scores, not recomputation"""
+        client = FakeAsyncRedis(decode_responses=True)
+        loop = OODALoop(client, None)
+        for latency in (100, 150, 200, 250, 300, 350):
+            await client.hset(METRICS_KEY, mapping=metrics_hash(latency=latency))
+            await loop.observe()
+
+        with patch.object(SystemMetrics, 'health_score', side_effect=AssertionError):
+            trends = loop._analyze_trends()
+
+        assert trends['trend'] == 'degrading'
+        assert len(trends['recent_scores']) == 5
+
+    def test_orient_without_observations(self):
+        """Test orient works on metrics that were never observed"""
+        loop = OODALoop(Mock(), None)
+        metrics = SystemMetrics(datetime.now(), 200, 0.001, 0.3, 0.95, 0.4, 0.5, 100, 10000)
+
+        orientation = loop.orient(metrics, 'routine_check')
+
+        assert orientation['anomalies'] == []
+        assert orientation['trends'] == {'trend': 'insufficient_data'}
+
+
+class TestConcurrentActions:
+    """Test dependency-aware concurrent act()"""
+
+    def _loop(self, log):
+        loop = OODALoop(Mock(), None)
+
+        async def scale(parameters):
+            log.append(('start', parameters['service']))
+            await asyncio.sleep(0.1)
+            log.append(('end', parameters['service']))
+            return True
+
+        async def notify(parameters):
+            log.append(('notify', parameters['message']))
+            return True
+
+        loop._scale_resources = scale
+        loop._send_notification = notify
+        return loop
+
+    @pytest.mark.asyncio
+    async def test_independent_actions_overlap(self):
+        """Test actions on different services run concurrently and the notification waits"""
+        log = []
+        loop = self._loop(log)
+        actions = [
+            {'type': 'scale_resources', 'parameters': {'service': 'api', 'replicas': 5}},
+            {'type': 'scale_resources', 'parameters': {'service': 'worker', 'replicas': 3}},
+            {'type': 'send_notification', 'parameters': {'channel': 'slack', 'message': 'done'}},
+        ]
+
+        started = time.perf_counter()
+        assert await loop.act(decision(actions)) is True
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.18
+        assert log[-1] == ('notify', 'done')
+        assert loop.actions[-1]['results'] == [True, True, True]
+
+    @pytest.mark.asyncio
+    async def test_same_service_and_explicit_dependencies(self):
+        """Test actions on one service are serialized and depends_on overrides the defaults"""
+        log = []
+        loop = self._loop(log)
+        actions = [
+            {'type': 'scale_resources', 'parameters': {'service': 'api', 'replicas': 5}},
+            {'type': 'send_notification', 'parameters': {'message': 'starting'}, 'depends_on': []},
+            {'type': 'scale_resources', 'parameters': {'service': 'api', 'replicas': 2}},
+        ]
+
+        await loop.act(decision(actions))
+
+        assert log[:2] == [('start', 'api'), ('notify', 'starting')]
+        assert log[2:] == [('end', 'api'), ('start', 'api'), ('end', 'api')]
+
+    @pytest.mark.asyncio
+    async def test_failed_action_reported(self):
+        """Test one failing action fails the decision without stopping the others"""
+        loop = self._loop([])
+        actions = [
+            {'type': 'unknown_action'},
+            {'type': 'send_notification', 'parameters': {'message': 'after'}},
+        ]
+
+        assert await loop.act(decision(actions)) is False
+        assert loop.actions[-1]['results'] == [False, True]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
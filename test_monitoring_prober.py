@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent health probing and streaming latency statistics
+"""
+
+import asyncio
+import random
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from monitoring_system import HealthCheckResult, LatencySketch, MonitoringSystem, WindowedHealthStats
+
+
+def result(latency_ms, status_code=200, timestamp=None):
+    return HealthCheckResult(
+        endpoint='/health',
+        status_code=status_code,
+        latency_ms=latency_ms,
+        timestamp=timestamp or datetime.now(),
+        success=200 <= status_code < 400
+    )
+
+
+class TestLatencySketch:
+    """Test quantile accuracy of the sketch"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Test P50/P95/P99 stay within 1% of the exact values"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(4, 0.8) for _ in range(20000)]
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        exact = statistics.quantiles(values, n=100, method='inclusive')
+        for q in (50, 95, 99):
+            assert sketch.quantile(q / 100) == pytest.approx(exact[q - 1], rel=0.02)
+        assert len(sketch.buckets) < 1000
+
+    def test_merge_matches_single_sketch(self):
+        """Test merged sketches answer like one sketch over all values"""
+        left, right, combined = LatencySketch(), LatencySketch(), LatencySketch()
+        for i in range(1, 1001):
+            (left if i % 2 else right).add(float(i))
+            combined.add(float(i))
+
+        left.merge(right)
+        assert left.quantile(0.95) == combined.quantile(0.95)
+        assert left.count == 1000
+
+
+class TestWindowedHealthStats:
+    """Test time-bucketed counters"""
+
+    def test_old_buckets_leave_the_window(self):
+        """Test results older than the window are not counted"""
+        stats = WindowedHealthStats(window_minutes=60)
+        now = datetime.now()
+        stats.record(result(100, status_code=500, timestamp=now - timedelta(minutes=30)))
+        stats.record(result(100, timestamp=now))
+
+        assert stats.error_rate(60) == 0.5
+        assert stats.error_rate(10) == 0.0
+
+    def test_p95_matches_exact_calculation_for_small_samples(self):
+        """Test small windows fall back to the maximum like calculate_p95_latency"""
+        monitor = MonitoringSystem('http://test.invalid')
+        for i in range(10):
+            monitor.record_result(result(float(i * 10 + 10)))
+
+        assert monitor.window_stats.p95_latency(10) == monitor.calculate_p95_latency(10) == 100.0
+
+    def test_alerts_use_window_stats(self):
+        """Test check_alerts reports error rate and latency from recorded results"""
+        monitor = MonitoringSystem('http://test.invalid')
+        for i in range(200):
+            monitor.record_result(result(900.0, status_code=500 if i % 10 == 0 else 200))
+
+        alerts = {alert['type']: alert for alert in monitor.check_alerts()}
+
+        assert alerts['ERROR_RATE']['level'] == 'CRITICAL'
+        assert alerts['ERROR_RATE']['value'] == pytest.approx(0.1)
+        assert alerts['LATENCY']['value'] == pytest.approx(900.0, rel=0.01)
+
+
+class TestAsyncProber:
+    """Test concurrent probing through a shared session"""
+
+    @pytest.fixture
+    async def server(self):
+        async def ok(request):
+            return web.Response(text='ok')
+
+        async def broken(request):
+            return web.Response(status=503)
+
+        async def hung(request):
+            await asyncio.sleep(5)
+            return web.Response(text='late')
+
+        app = web.Application()
+        app.router.add_get('/health', ok)
+        app.router.add_get('/broken', broken)
+        app.router.add_get('/hung', hung)
+        async with TestServer(app) as server:
+            yield server
+
+    @pytest.mark.asyncio
+    async def test_hung_endpoint_does_not_stall_cycle(self, server):
+        """Test endpoints are probed concurrently and a hang costs only the probe timeout"""
+        monitor = MonitoringSystem(
+            str(server.make_url('')), probe_timeout=0.3,
+            endpoints=['/health', '/broken', '/hung'] + ['/health'] * 20
+        )
+
+        started = time.perf_counter()
+        results = await monitor.run_health_checks_async()
+        elapsed = time.perf_counter() - started
+        await monitor.close()
+
+        assert elapsed < 1.0
+        by_endpoint = {r.endpoint: r for r in results}
+        assert by_endpoint['/health'].success
+        assert by_endpoint['/broken'].status_code == 503
+        assert not by_endpoint['/hung'].success
+        assert by_endpoint['/hung'].error_message
+        assert len(monitor.health_results) == 23
+        assert monitor.window_stats.error_rate(10) == pytest.approx(2 / 23)
+
+    @pytest.mark.asyncio
+    async def test_session_is_reused(self, server):
+        """Test consecutive cycles share one connection pool"""
+        monitor = MonitoringSystem(str(server.make_url('')))
+        await monitor.run_health_checks_async(['/health'])
+        session = monitor._session
+        await monitor.run_health_checks_async(['/health'])
+
+        assert monitor._session is session
+        await monitor.close()
+
+
+class TestSyncProber:
+    """Test the blocking interface used by main()"""
+
+    @pytest.fixture
+    def server(self):
+        peers = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                peers.add(self.client_address)
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        yield f'http://127.0.0.1:{httpd.server_port}', peers
+        httpd.shutdown()
+        httpd.server_close()
+
+    def test_connections_are_reused_across_cycles(self, server):
+        """Test consecutive blocking cycles share one loop, session and connection"""
+        base_url, peers = server
+        monitor = MonitoringSystem(base_url, endpoints=['/health'])
+
+        assert monitor.run_health_checks()[0].success
+        session = monitor._session
+        assert monitor.run_health_checks()[0].success
+
+        assert monitor._session is session
+        assert len(peers) == 1
+        monitor.shutdown()
+        assert session.closed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled WAL-mode PersistentStateManager
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from persistent_state_manager import (
+    PersistentStateManager,
+    SCHEMA_VERSION,
+    apply_json_patch,
+    json_diff,
+)
+
+
+def make_candidate(user_id, status='pending'):
+    return {
+        'user_id': user_id,
+        'activity_score': 80.0,
+        'engagement_metrics': {'logins': 3},
+        'qualification_reason': 'active',
+        'status': status
+    }
+
+
+def make_request(request_id, status='pending'):
+    now = datetime.now()
+    return {
+        'request_id': request_id,
+        'trace_id': f'trace_{request_id}',
+        'title': 'Deploy',
+        'description': 'Deploy to production',
+        'context': {'env': 'prod'},
+        'prompt_details': 'details',
+        'requester_agent': 'ops',
+        'priority': 'high',
+        'status': status,
+        'created_at': now.isoformat(),
+        'expires_at': (now + timedelta(hours=1)).isoformat()
+    }
+
+
+@pytest.fixture
+def manager():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_manager = PersistentStateManager(os.path.join(tmp_dir, 'state.db'))
+        yield state_manager
+        state_manager.close()
+
+
+class TestConnectionPool:
+    """Test per-thread pooled connections"""
+
+    def test_wal_mode_and_synchronous(self, manager):
+        """Test connections are configured for WAL with synchronous=NORMAL"""
+        with manager._get_connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+
+    def test_connection_reused_within_thread(self, manager):
+        """Test the same connection is returned for one thread"""
+        with manager._get_connection() as first, manager._get_connection() as second:
+            assert first is second
+
+        manager.save_beta_candidate(make_candidate('u1'))
+        assert len(manager._connections) == 1
+
+    def test_separate_connection_per_thread(self, manager):
+        """Test each thread gets its own connection"""
+        seen = []
+
+        def worker():
+            with manager._get_connection() as conn:
+                seen.append(conn)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        with manager._get_connection() as conn:
+            assert seen[0] is not conn
+        assert len(manager._connections) == 2
+
+    def test_reads_not_blocked_by_open_write(self, manager):
+        """Test readers see committed data while a write transaction is open"""
+        manager.save_beta_candidate(make_candidate('committed'))
+        results = []
+
+        with manager.transaction() as conn:
+            conn.execute(
+                "UPDATE beta_candidates SET status = 'invited' WHERE user_id = ?",
+                ('committed',)
+            )
+
+            reader = threading.Thread(
+                target=lambda: results.append(manager.load_beta_candidates())
+            )
+            reader.start()
+            reader.join(timeout=2)
+
+            assert not reader.is_alive()
+
+        assert [c['status'] for c in results[0]] == ['pending']
+        assert manager.load_beta_candidates()[0]['status'] == 'invited'
+
+    def test_close_releases_connections(self, manager):
+        """Test close drops the pool and later calls reconnect"""
+        manager.close()
+
+        assert manager._connections == []
+        assert manager.load_beta_candidates() == []
+
+
+class TestSchema:
+    """Test schema-managed indexes"""
+
+    def test_indexes_created(self, manager):
+        """Test filter columns are indexed"""
+        with manager._get_connection() as conn:
+            indexes = {
+                row['name'] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+
+        assert 'idx_approval_requests_status_created' in indexes
+        assert 'idx_approval_requests_expires' in indexes
+        assert 'idx_state_checkpoints_component_created' in indexes
+        assert version == SCHEMA_VERSION
+
+    def test_status_query_uses_index(self, manager):
+        """Test load_approval_requests' filter is served by an index"""
+        with manager._get_connection() as conn:
+            plan = ' '.join(
+                row[3] for row in conn.execute(
+                    'EXPLAIN QUERY PLAN SELECT * FROM approval_requests '
+                    'WHERE status = ? ORDER BY created_at DESC LIMIT ?',
+                    ('pending', 10)
+                )
+            )
+
+        assert 'idx_approval_requests_status_created' in plan
+
+    def test_upgrade_existing_database(self):
+        """Test indexes are added to a database created before versioning"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'legacy.db')
+            legacy = sqlite3.connect(db_path)
+            legacy.execute(
+                'CREATE TABLE state_checkpoints (checkpoint_id TEXT PRIMARY KEY, '
+                'component_name TEXT NOT NULL, state_data TEXT NOT NULL, '
+                'created_at TEXT NOT NULL, metadata TEXT)'
+            )
+            legacy.commit()
+            legacy.close()
+
+            state_manager = PersistentStateManager(db_path)
+            with state_manager._get_connection() as conn:
+                names = [row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE name = 'idx_state_checkpoints_created'"
+                )]
+            state_manager.close()
+
+            assert names == ['idx_state_checkpoints_created']
+
+
+class TestBatchedWrites:
+    """Test save_many and the transaction API"""
+
+    def test_save_many(self, manager):
+        """Test batched upserts in one transaction"""
+        written = manager.save_many(
+            'approval_requests',
+            [make_request(f'req_{i}') for i in range(50)]
+        )
+
+        assert written == 50
+        loaded = manager.load_approval_requests(status='pending', limit=100)
+        assert len(loaded) == 50
+        assert loaded[0]['context'] == {'env': 'prod'}
+
+    def test_save_many_rolls_back_on_bad_record(self, manager):
+        """Test an invalid record aborts the whole batch"""
+        records = [make_candidate('ok_1'), {'user_id': 'missing_fields'}, make_candidate('ok_2')]
+
+        assert manager.save_many('beta_candidates', records) == 0
+        assert manager.load_beta_candidates() == []
+
+    def test_save_many_unknown_table(self, manager):
+        """Test unsupported tables are rejected"""
+        with pytest.raises(ValueError):
+            manager.save_many('sqlite_master', [])
+
+    def test_transaction_groups_save_calls(self, manager):
+        """Test save_* calls inside a transaction commit together"""
+        with manager.transaction():
+            assert manager.save_beta_candidate(make_candidate('a'))
+            assert manager.save_approval_request(make_request('r1'))
+
+        assert len(manager.load_beta_candidates()) == 1
+        assert len(manager.load_approval_requests()) == 1
+
+    def test_transaction_rollback(self, manager):
+        """Test an exception rolls back every write in the block"""
+        with pytest.raises(RuntimeError):
+            with manager.transaction():
+                manager.save_beta_candidate(make_candidate('a'))
+                manager.save_beta_candidate(make_candidate('b'))
+                raise RuntimeError("abort")
+
+        assert manager.load_beta_candidates() == []
+
+    def test_concurrent_writers(self, manager):
+        """Test writers on several threads all land"""
+        def worker(offset):
+            for i in range(20):
+                manager.save_beta_candidate(make_candidate(f'user_{offset}_{i}'))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(manager.load_beta_candidates()) == 80
+
+
+
+class TestJsonPatch:
+    """Test the JSON patch helpers used by delta checkpoints"""
+
+    def test_diff_round_trip(self):
+        """Test applying a diff reproduces the new document"""
+        old = {'a': 1, 'b': {'c': [1, 2], 'd': 'x'}, 'gone': True, 'sl/ash': 1}
+        new = {'a': 2, 'b': {'c': [1, 2, 3], 'd': 'x', 'e': None}, 'sl/ash': 2, 'new': {'k': 'v'}}
+
+        ops = json_diff(old, new)
+
+        assert apply_json_patch(json.loads(json.dumps(old)), ops) == new
+        assert {'op': 'remove', 'path': '/gone'} in ops
+        assert {'op': 'replace', 'path': '/sl~1ash', 'value': 2} in ops
+
+    def test_diff_of_equal_documents_is_empty(self):
+        """Test unchanged state produces no ops"""
+        assert json_diff({'a': {'b': [1]}}, {'a': {'b': [1]}}) == []
+
+    def test_type_change_is_replaced(self):
+        """Test values equal in Python but different in JSON are replaced"""
+        assert json_diff({'a': 1}, {'a': True}) == [{'op': 'replace', 'path': '/a', 'value': True}]
+
+
+class TestDeltaCheckpoints:
+    """Test checkpoint chains of full snapshots and deltas"""
+
+    def _rows(self, manager, component):
+        with manager._get_connection() as conn:
+            return conn.execute(
+                'SELECT seq, kind, base_seq, encoding FROM state_checkpoints '
+                'WHERE component_name = ? ORDER BY seq',
+                (component,)
+            ).fetchall()
+
+    def test_restore_replays_chain(self, manager):
+        """Test every checkpoint in a chain restores to the state it was created with"""
+        state = {'items': {f'seed_{i}': 'x' * 50 for i in range(10)}}
+        created = []
+        for i in range(8):
+            state['items'][f'item_{i}'] = {'value': i, 'payload': 'x' * 50}
+            created.append((manager.create_checkpoint('comp', state), json.loads(json.dumps(state))))
+
+        kinds = [row['kind'] for row in self._rows(manager, 'comp')]
+        assert kinds[0] == 'full'
+        assert set(kinds[1:]) == {'delta'}
+
+        for checkpoint_id, expected in created:
+            assert manager.restore_from_checkpoint('comp', checkpoint_id)['state'] == expected
+        assert manager.restore_from_checkpoint('comp')['state'] == state
+
+    def test_full_snapshot_interval(self):
+        """Test a new full snapshot starts every full_snapshot_interval checkpoints"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager = PersistentStateManager(
+                os.path.join(tmp_dir, 'state.db'),
+                full_snapshot_interval=4,
+                checkpoint_retention=100
+            )
+            state = {'counter': 0, 'blob': 'y' * 500}
+            for i in range(9):
+                state['counter'] = i
+                manager.create_checkpoint('comp', state)
+
+            rows = self._rows(manager, 'comp')
+            manager.close()
+
+        assert [row['kind'] for row in rows] == [
+            'full', 'delta', 'delta', 'delta',
+            'full', 'delta', 'delta', 'delta',
+            'full'
+        ]
+        assert [row['base_seq'] for row in rows] == [1, 1, 1, 1, 5, 5, 5, 5, 9]
+
+    def test_retention_prunes_whole_chains(self):
+        """Test only chains needed for the newest checkpoints are kept"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager = PersistentStateManager(
+                os.path.join(tmp_dir, 'state.db'),
+                full_snapshot_interval=5,
+                checkpoint_retention=3
+            )
+            state = {'counter': 0, 'blob': 'z' * 500}
+            for i in range(12):
+                state['counter'] = i
+                manager.create_checkpoint('comp', state)
+
+            seqs = [row['seq'] for row in self._rows(manager, 'comp')]
+            restored = manager.restore_from_checkpoint('comp')
+            manager.close()
+
+        # Newest three are 10-12; 10 depends on the full snapshot at 6
+        assert seqs == [6, 7, 8, 9, 10, 11, 12]
+        assert restored['state']['counter'] == 11
+
+    def test_large_payloads_are_compressed(self, manager):
+        """Test payloads above the threshold are stored compressed"""
+        manager.create_checkpoint('comp', {'blob': 'a' * 5000})
+
+        row = self._rows(manager, 'comp')[0]
+        assert row['encoding'] == 'zlib'
+        assert manager.checkpoint_stats['bytes_written'] < 200
+
+    def test_chain_continues_after_restart(self):
+        """Test a new manager resumes the chain from the database"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'state.db')
+            state = {'items': {str(i): i for i in range(50)}}
+            first = PersistentStateManager(db_path)
+            first.create_checkpoint('comp', state)
+            first.close()
+
+            state['items']['50'] = 50
+            second = PersistentStateManager(db_path)
+            second.create_checkpoint('comp', state)
+            rows = self._rows(second, 'comp')
+            restored = second.restore_from_checkpoint('comp')
+            second.close()
+
+        assert [row['kind'] for row in rows] == ['full', 'delta']
+        assert restored['state'] == state
+
+    def test_legacy_checkpoints_still_restore(self):
+        """Test checkpoints written before chaining are readable and superseded"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'legacy.db')
+            legacy = sqlite3.connect(db_path)
+            legacy.execute(
+                'CREATE TABLE state_checkpoints (checkpoint_id TEXT PRIMARY KEY, '
+                'component_name TEXT NOT NULL, state_data TEXT NOT NULL, '
+                'created_at TEXT NOT NULL, metadata TEXT)'
+            )
+            legacy.execute(
+                'INSERT INTO state_checkpoints VALUES (?, ?, ?, ?, ?)',
+                ('comp_old', 'comp', json.dumps({'v': 1}), datetime.now().isoformat(), None)
+            )
+            legacy.commit()
+            legacy.close()
+
+            manager = PersistentStateManager(db_path)
+            before = manager.restore_from_checkpoint('comp')
+            manager.create_checkpoint('comp', {'v': 2})
+            after = manager.restore_from_checkpoint('comp')
+            manager.close()
+
+        assert before['state'] == {'v': 1}
+        assert after['state'] == {'v': 2}
+
+    def test_cleanup_removes_orphaned_deltas(self, manager):
+        """Test expiring a full snapshot also drops deltas that depended on it"""
+        state = {'items': {str(i): 'v' * 20 for i in range(20)}}
+        manager.create_checkpoint('comp', state)
+        state['items']['new'] = 'v'
+        manager.create_checkpoint('comp', state)
+        with manager.transaction() as conn:
+            conn.execute(
+                "UPDATE state_checkpoints SET created_at = '2000-01-01' WHERE kind = 'full'"
+            )
+
+        manager.cleanup_expired_data(days=1)
+
+        assert self._rows(manager, 'comp') == []
+        assert manager.restore_from_checkpoint('comp') is None
+        assert manager.create_checkpoint('comp', state) is not None
+        assert manager.restore_from_checkpoint('comp')['state'] == state
+
+    def test_saga_checkpoint_write_volume(self, manager):
+        """Test saga completion checkpoints write at least 10x less than full snapshots"""
+        from saga_orchestrator import SagaOrchestrator, SagaStatus, SagaStepStatus
+
+        orchestrator = SagaOrchestrator(persistent_state_manager=manager)
+        for i in range(500):
+            saga = orchestrator.create_saga('order', {'order_id': f'o{i}'})
+            for name in ('reserve', 'charge', 'ship'):
+                step = orchestrator.add_step(saga, name, None)
+                step.status = SagaStepStatus.COMPLETED
+            saga.status = SagaStatus.COMPLETED
+            saga.completed_at = datetime.now()
+            orchestrator._move_to_completed(saga)
+
+        stats = manager.checkpoint_stats
+        assert stats['delta'] > stats['full']
+        assert stats['bytes_written'] * 10 <= stats['bytes_full_equivalent']
+
+        restored = manager.restore_from_checkpoint('saga_orchestrator')['state']
+        assert restored['saga_id'] == saga.saga_id
+        assert len(restored['recent']) == orchestrator.checkpoint_history
+        assert restored['recent'][saga.saga_id]['steps'][2] == {
+            'name': 'ship', 'status': 'completed', 'retry_count': 0
+        }
+
+    def test_broken_chain_continues_sequence(self, manager):
+        """Test a head chain that cannot be replayed is replaced, not restarted at seq 1"""
+        state = {'items': {str(i): 'v' * 20 for i in range(20)}}
+        for i in range(4):
+            state['counter'] = i
+            manager.create_checkpoint('comp', state)
+        with manager.transaction() as conn:
+            conn.execute("DELETE FROM state_checkpoints WHERE component_name = 'comp' AND seq = 2")
+        manager._checkpoint_heads.clear()
+
+        state['counter'] = 4
+        manager.create_checkpoint('comp', state)
+
+        rows = self._rows(manager, 'comp')
+        assert [(row['seq'], row['kind']) for row in rows] == [(5, 'full')]
+        assert manager.restore_from_checkpoint('comp')['state'] == state
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Tests for DAG-parallel saga execution and compensation
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from saga_orchestrator import SagaOrchestrator, SagaStatus, SagaStepStatus
+
+STEP_DELAY = 0.05
+
+
+class Recorder:
+    """Step implementations that record start/finish order and overlap"""
+
+    def __init__(self, fail_on=None, delay=STEP_DELAY):
+        self.fail_on = fail_on
+        self.delay = delay
+        self.events = []
+        self.active = 0
+        self.max_active = 0
+
+    def action(self, name):
+        async def run(context):
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.events.append(('start', name))
+            try:
+                await asyncio.sleep(self.delay)
+                if name == self.fail_on:
+                    raise RuntimeError(f"{name} failed")
+                return name
+            finally:
+                self.active -= 1
+                self.events.append(('end', name))
+        return run
+
+    def compensate(self, name):
+        async def undo(context, result):
+            self.events.append(('undo_start', name))
+            await asyncio.sleep(self.delay / 5)
+            self.events.append(('undo_end', name))
+        return undo
+
+    def position(self, kind, name):
+        return self.events.index((kind, name))
+
+
+def add(orchestrator, saga, recorder, name, depends_on=None):
+    return orchestrator.add_step(
+        saga, name, recorder.action(name), recorder.compensate(name),
+        max_retries=0, depends_on=depends_on
+    )
+
+
+def build_branched_saga(orchestrator, recorder, parallel=True):
+    """10 steps: setup, three independent branches of 3/3/2 steps, then a join"""
+    saga = orchestrator.create_saga('provision')
+    deps = (lambda names: names) if parallel else (lambda names: None)
+
+    add(orchestrator, saga, recorder, 'setup', deps([]))
+    for branch, length in (('db', 3), ('cache', 3), ('dns', 2)):
+        previous = 'setup'
+        for i in range(length):
+            name = f'{branch}_{i}'
+            add(orchestrator, saga, recorder, name, deps([previous]))
+            previous = name
+    add(orchestrator, saga, recorder, 'notify', deps(['db_2', 'cache_2', 'dns_1']))
+    return saga
+
+
+class TestDependencies:
+    """Test dependency declarations"""
+
+    def test_unknown_dependency_rejected(self):
+        """Test depending on a step that was not added first"""
+        orchestrator = SagaOrchestrator()
+        saga = orchestrator.create_saga('s')
+        recorder = Recorder()
+
+        with pytest.raises(ValueError):
+            add(orchestrator, saga, recorder, 'a', ['missing'])
+
+    def test_dependencies_accept_steps_and_names(self):
+        """Test dependencies may be given as step objects or names"""
+        orchestrator = SagaOrchestrator()
+        saga = orchestrator.create_saga('s')
+        recorder = Recorder()
+        first = add(orchestrator, saga, recorder, 'a', [])
+        add(orchestrator, saga, recorder, 'b', [])
+        third = add(orchestrator, saga, recorder, 'c', [first, 'b'])
+
+        assert third.depends_on == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_default_is_sequential(self):
+        """Test steps without declared dependencies run strictly in order"""
+        orchestrator = SagaOrchestrator()
+        saga = orchestrator.create_saga('s')
+        recorder = Recorder(delay=0.01)
+        for name in ('a', 'b', 'c'):
+            add(orchestrator, saga, recorder, name)
+
+        assert await orchestrator.execute_saga(saga) is True
+        assert recorder.max_active == 1
+        assert [e for e in recorder.events if e[0] == 'start'] == [
+            ('start', 'a'), ('start', 'b'), ('start', 'c')
+        ]
+
+
+class TestDagExecution:
+    """Test parallel execution and compensation"""
+
+    @pytest.mark.asyncio
+    async def test_branches_run_concurrently_and_respect_order(self):
+        """Test independent branches overlap while dependencies are honoured"""
+        orchestrator = SagaOrchestrator()
+        recorder = Recorder()
+        saga = build_branched_saga(orchestrator, recorder)
+
+        assert await orchestrator.execute_saga(saga) is True
+
+        assert recorder.max_active == 3
+        assert recorder.position('end', 'setup') < recorder.position('start', 'db_0')
+        assert recorder.position('end', 'db_0') < recorder.position('start', 'db_1')
+        for last in ('db_2', 'cache_2', 'dns_1'):
+            assert recorder.position('end', last) < recorder.position('start', 'notify')
+        assert all(step.status == SagaStepStatus.COMPLETED for step in saga.steps)
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test no more than max_step_concurrency steps run at once"""
+        orchestrator = SagaOrchestrator(max_step_concurrency=2)
+        recorder = Recorder(delay=0.01)
+        saga = orchestrator.create_saga('fanout')
+        for i in range(6):
+            add(orchestrator, saga, recorder, f'notify_{i}', [])
+
+        assert await orchestrator.execute_saga(saga) is True
+        assert recorder.max_active == 2
+
+    @pytest.mark.asyncio
+    async def test_failure_compensates_in_reverse_topological_order(self):
+        """Test a failure stops new steps and undoes completed ones dependents-first"""
+        orchestrator = SagaOrchestrator()
+        recorder = Recorder(fail_on='cache_1')
+        saga = build_branched_saga(orchestrator, recorder)
+
+        assert await orchestrator.execute_saga(saga) is False
+        assert saga.status == SagaStatus.COMPENSATED
+
+        undone = [e[1] for e in recorder.events if e[0] == 'undo_start']
+        assert 'notify' not in undone
+        assert 'cache_1' not in undone
+        assert {'setup', 'cache_0', 'db_0', 'dns_0'} <= set(undone)
+        assert ('start', 'notify') not in recorder.events
+        for child in ('db_0', 'cache_0', 'dns_0'):
+            assert recorder.position('undo_end', child) < recorder.position('undo_start', 'setup')
+        assert recorder.position('undo_end', 'db_1') < recorder.position('undo_start', 'db_0')
+
+    @pytest.mark.asyncio
+    async def test_independent_compensations_overlap(self):
+        """Test compensations of unrelated branches run concurrently"""
+        orchestrator = SagaOrchestrator()
+        recorder = Recorder(fail_on='last', delay=0.01)
+        saga = orchestrator.create_saga('s')
+        for name in ('a', 'b', 'c'):
+            add(orchestrator, saga, recorder, name, [])
+        add(orchestrator, saga, recorder, 'last', ['a', 'b', 'c'])
+
+        assert await orchestrator.execute_saga(saga) is False
+
+        undo_events = [e for e in recorder.events if e[0].startswith('undo')]
+        assert [e[0] for e in undo_events[:3]] == ['undo_start'] * 3
+
+
+@pytest.mark.benchmark
+class TestDagBenchmark:
+    """Wall-clock comparison of sequential and DAG execution"""
+
+    @pytest.mark.asyncio
+    async def test_branched_saga_wall_clock(self):
+        """Test a 10-step saga with 3 independent branches finishes markedly faster as a DAG"""
+        timings = {}
+        for mode, parallel in (('sequential', False), ('dag', True)):
+            orchestrator = SagaOrchestrator()
+            saga = build_branched_saga(orchestrator, Recorder(), parallel=parallel)
+            started = time.perf_counter()
+            assert await orchestrator.execute_saga(saga) is True
+            timings[mode] = time.perf_counter() - started
+
+        print(
+            f"\n10-step saga: sequential {timings['sequential']:.3f}s, "
+            f"dag {timings['dag']:.3f}s ({timings['sequential'] / timings['dag']:.1f}x)"
+        )
+        # Critical path is 5 of 10 steps
+        assert timings['dag'] < timings['sequential'] * 0.65
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
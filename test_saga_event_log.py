@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Tests for the saga event log and saga crash recovery
+"""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from persistent_state_manager import PersistentStateManager
+from saga_event_log import (
+    RedisStreamSagaEventLog,
+    SQLiteSagaEventLog,
+    SagaEvent,
+    SagaEventLog,
+    SAGA_COMPLETED,
+    SAGA_STARTED,
+    STEP_STARTED,
+    create_saga_event_log,
+)
+from saga_orchestrator import SagaOrchestrator, SagaStatus, SagaStepStatus
+
+
+class Crash(BaseException):
+    """Simulates the process dying mid-step"""
+
+
+@pytest.fixture
+def state_manager():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = PersistentStateManager(os.path.join(tmp_dir, 'state.db'))
+        yield manager
+        manager.close()
+
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it to run the lease scripts
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+class StepCalls:
+    """Step implementations that record their side effects"""
+
+    def __init__(self, crash_on=None, fail_on=None, crash_on_undo=None):
+        self.crash_on = crash_on
+        self.fail_on = fail_on
+        self.crash_on_undo = crash_on_undo
+        self.calls = []
+
+    def action(self, name):
+        async def run(context):
+            self.calls.append(('run', name))
+            if name == self.crash_on:
+                raise Crash()
+            if name == self.fail_on:
+                raise RuntimeError(f"{name} failed")
+            context[name] = 'done'
+            return f'{name}_result'
+        return run
+
+    def compensate(self, name):
+        async def undo(context, result):
+            self.calls.append(('undo', name, result))
+            if name == self.crash_on_undo:
+                raise Crash()
+        return undo
+
+    def register(self, orchestrator):
+        for name in ('reserve', 'charge', 'ship'):
+            orchestrator.register_step(name, self.action(name), self.compensate(name))
+
+
+class SlowSQLiteSagaEventLog(SQLiteSagaEventLog):
+    """SQLite log whose commits take a while"""
+
+    async def _write_batch(self, events):
+        await asyncio.sleep(0.05)
+        await super()._write_batch(events)
+
+
+class FailingEventLog(SQLiteSagaEventLog):
+    """SQLite log that cannot write one event type"""
+
+    def __init__(self, state_manager, fail_on):
+        super().__init__(state_manager)
+        self.fail_on = fail_on
+
+    async def _write_batch(self, events):
+        if any(event.event_type == self.fail_on for event in events):
+            raise OSError("disk full")
+        await super()._write_batch(events)
+
+
+def build_saga(orchestrator, steps):
+    saga = orchestrator.create_saga('order', {'order_id': 'o1'})
+    for name in ('reserve', 'charge', 'ship'):
+        orchestrator.add_step(saga, name, steps.action(name), steps.compensate(name), max_retries=0)
+    return saga
+
+
+LEASE_SECONDS = 0.05
+
+
+async def crash_midway(event_log, crash_on='charge'):
+    """Run a saga until a step crashes, then stop its orchestrator and let the lease lapse"""
+    steps = StepCalls(crash_on=crash_on)
+    orchestrator = SagaOrchestrator(event_log=event_log, lease_seconds=LEASE_SECONDS)
+    saga = build_saga(orchestrator, steps)
+    with pytest.raises(Crash):
+        await orchestrator.execute_saga(saga)
+    await orchestrator.close()
+    await asyncio.sleep(LEASE_SECONDS * 2)
+    return saga.saga_id
+
+
+class TestGroupCommit:
+    """Test batching of concurrent appends"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_appends_share_commits(self, state_manager):
+        """Test many concurrent appends are committed in few batches"""
+        log = SQLiteSagaEventLog(state_manager)
+
+        await asyncio.gather(*(
+            log.append(SagaEvent(saga_id=f'saga_{i}', event_type=SAGA_STARTED, payload={'i': i}))
+            for i in range(100)
+        ))
+
+        assert log.events_written == 100
+        assert log.batches_written < 10
+        assert len(await log.load_unfinished()) == 100
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_raises_to_appenders(self, state_manager):
+        """Test appenders see the error when a batch cannot be written"""
+        log = SQLiteSagaEventLog(state_manager)
+        state_manager.close()
+        with state_manager.transaction() as conn:
+            conn.execute('DROP TABLE saga_events')
+
+        with pytest.raises(Exception):
+            await log.append(SagaEvent(saga_id='s', event_type=SAGA_STARTED))
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_close_waits_for_in_flight_commit(self, state_manager):
+        """Test closing while a batch is being written still commits it"""
+        log = SlowSQLiteSagaEventLog(state_manager)
+        append = asyncio.ensure_future(log.append(SagaEvent(saga_id='s', event_type=SAGA_STARTED)))
+        await asyncio.sleep(0.02)
+
+        await log.close()
+
+        await asyncio.wait_for(append, timeout=1)
+        assert log.events_written == 1
+        assert list(await log.load_unfinished()) == ['s']
+
+    @pytest.mark.asyncio
+    async def test_cancelled_committer_resolves_waiters(self, state_manager):
+        """Test waiters of a batch in flight are resolved when the committer is cancelled"""
+        log = SlowSQLiteSagaEventLog(state_manager)
+        append = asyncio.ensure_future(log.append(SagaEvent(saga_id='s', event_type=SAGA_STARTED)))
+        await asyncio.sleep(0.02)
+
+        log._flusher.cancel()
+
+        await asyncio.wait_for(append, timeout=1)
+        assert log.events_written == 1
+
+
+class TestSQLiteEventLog:
+    """Test the SQLite backend"""
+
+    @pytest.mark.asyncio
+    async def test_unfinished_and_compact(self, state_manager):
+        """Test finished sagas are excluded from recovery and compacted"""
+        log = SQLiteSagaEventLog(state_manager)
+        await log.append(SagaEvent(saga_id='done', event_type=SAGA_STARTED))
+        await log.append(SagaEvent(saga_id='open', event_type=SAGA_STARTED))
+        await log.append(SagaEvent(saga_id='done', event_type=SAGA_COMPLETED))
+
+        assert list(await log.load_unfinished()) == ['open']
+        assert await log.compact() == 2
+        assert list(await log.load_unfinished()) == ['open']
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_leases(self, state_manager):
+        """Test a lease is exclusive until it expires and only its owner renews or releases it"""
+        log = SQLiteSagaEventLog(state_manager)
+
+        assert await log.acquire_lease('s', 'a', 0.05) is True
+        assert await log.acquire_lease('s', 'b', 0.05) is False
+        await log.renew_leases(['s'], 'b', 10)
+        await log.release_lease('s', 'b')
+        assert await log.acquire_lease('s', 'b', 0.05) is False
+
+        await asyncio.sleep(0.1)
+        assert await log.acquire_lease('s', 'b', 0.05) is True
+        await log.release_lease('s', 'b')
+        assert await log.acquire_lease('s', 'a', 0.05) is True
+
+    def test_base_class_is_abstract(self):
+        """Test backends must implement the storage methods"""
+        with pytest.raises(TypeError):
+            SagaEventLog()
+
+    def test_factory_selects_backend(self, state_manager):
+        """Test the factory builds the configured backend"""
+        assert isinstance(create_saga_event_log('sqlite', state_manager=state_manager), SQLiteSagaEventLog)
+        with pytest.raises(ValueError):
+            create_saga_event_log('kafka')
+
+
+class TestSagaRecovery:
+    """Test resuming and compensating sagas after a crash"""
+
+    @pytest.mark.asyncio
+    async def test_execution_is_logged(self, state_manager):
+        """Test a successful saga writes a terminal event"""
+        log = SQLiteSagaEventLog(state_manager)
+        steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+
+        assert await orchestrator.execute_saga(build_saga(orchestrator, steps)) is True
+        assert await log.load_unfinished() == {}
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_resume_after_crash(self, state_manager):
+        """Test a restarted orchestrator resumes from the in-flight step"""
+        saga_id = await crash_midway(SQLiteSagaEventLog(state_manager))
+
+        log = SQLiteSagaEventLog(state_manager)
+        steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+        steps.register(orchestrator)
+
+        summary = await orchestrator.recover()
+
+        assert summary['resumed'] == [saga_id]
+        assert steps.calls == [('run', 'charge'), ('run', 'ship')]
+        status = orchestrator.get_saga_status(saga_id)
+        assert status['status'] == SagaStatus.COMPLETED.value
+        assert await log.load_unfinished() == {}
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_compensate_after_crash(self, state_manager):
+        """Test the compensate policy undoes completed steps with their logged results"""
+        saga_id = await crash_midway(SQLiteSagaEventLog(state_manager))
+
+        log = SQLiteSagaEventLog(state_manager)
+        steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+        steps.register(orchestrator)
+
+        summary = await orchestrator.recover(policy="compensate")
+
+        assert summary['compensated'] == [saga_id]
+        assert steps.calls == [('undo', 'reserve', 'reserve_result')]
+        assert orchestrator.get_saga_status(saga_id)['status'] == SagaStatus.COMPENSATED.value
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_compensation_is_finished(self, state_manager):
+        """Test a crash during compensation resumes compensation, skipping undone steps"""
+        log = SQLiteSagaEventLog(state_manager)
+        steps = StepCalls(fail_on='ship', crash_on_undo='reserve')
+        orchestrator = SagaOrchestrator(event_log=log, lease_seconds=LEASE_SECONDS)
+        saga = build_saga(orchestrator, steps)
+        with pytest.raises(Crash):
+            await orchestrator.execute_saga(saga)
+        await orchestrator.close()
+        await asyncio.sleep(LEASE_SECONDS * 2)
+        assert ('undo', 'charge', 'charge_result') in steps.calls
+
+        log = SQLiteSagaEventLog(state_manager)
+        recovered_steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+        recovered_steps.register(orchestrator)
+
+        summary = await orchestrator.recover()
+
+        assert summary['compensated'] == [saga.saga_id]
+        assert recovered_steps.calls == [('undo', 'reserve', 'reserve_result')]
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_idempotency_keys_restored(self, state_manager):
+        """Test completed step results are back in the idempotency cache"""
+        await crash_midway(SQLiteSagaEventLog(state_manager), crash_on='ship')
+
+        log = SQLiteSagaEventLog(state_manager)
+        orchestrator = SagaOrchestrator(event_log=log)
+        StepCalls().register(orchestrator)
+        await orchestrator.recover()
+
+        results = set(orchestrator.idempotency_manager.processed_keys.values())
+        assert {'reserve_result', 'charge_result', 'ship_result'} <= results
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_step_does_not_run_unlogged(self, state_manager):
+        """Test a step is not run when its start cannot be logged"""
+        log = FailingEventLog(state_manager, fail_on=STEP_STARTED)
+        steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+        saga = build_saga(orchestrator, steps)
+
+        assert await orchestrator.execute_saga(saga) is False
+        assert steps.calls == []
+        assert orchestrator.get_saga_status(saga.saga_id)['status'] == SagaStatus.COMPENSATED.value
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_saga_not_started_unlogged(self, state_manager):
+        """Test a saga whose start cannot be logged fails without running"""
+        log = FailingEventLog(state_manager, fail_on=SAGA_STARTED)
+        steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+        saga = build_saga(orchestrator, steps)
+
+        assert await orchestrator.execute_saga(saga) is False
+        assert steps.calls == []
+        assert orchestrator.get_saga_status(saga.saga_id)['status'] == SagaStatus.FAILED.value
+        await log.close()
+
+    def test_add_step_does_not_register(self):
+        """Test per-saga step closures are not kept in the recovery registry"""
+        orchestrator = SagaOrchestrator()
+        build_saga(orchestrator, StepCalls())
+
+        assert orchestrator.step_registry == {}
+
+    @pytest.mark.asyncio
+    async def test_unregistered_steps_are_skipped(self, state_manager):
+        """Test sagas whose steps are not registered are left in the log"""
+        saga_id = await crash_midway(SQLiteSagaEventLog(state_manager))
+
+        log = SQLiteSagaEventLog(state_manager)
+        orchestrator = SagaOrchestrator(event_log=log)
+
+        summary = await orchestrator.recover()
+
+        assert summary['skipped'] == [saga_id]
+        assert saga_id in await log.load_unfinished()
+        await log.close()
+
+
+    @pytest.mark.asyncio
+    async def test_live_saga_not_recovered(self, state_manager):
+        """Test recovery leaves a saga another orchestrator is still running"""
+        release = asyncio.Event()
+        steps = StepCalls()
+
+        async def slow_charge(context):
+            await release.wait()
+            return 'charge_result'
+
+        owner = SagaOrchestrator(event_log=SQLiteSagaEventLog(state_manager), lease_seconds=LEASE_SECONDS)
+        saga = owner.create_saga('order', {'order_id': 'o1'})
+        owner.add_step(saga, 'reserve', steps.action('reserve'), steps.compensate('reserve'), max_retries=0)
+        owner.add_step(saga, 'charge', slow_charge, max_retries=0)
+        running = asyncio.ensure_future(owner.execute_saga(saga))
+        await asyncio.sleep(LEASE_SECONDS * 4)
+
+        log = SQLiteSagaEventLog(state_manager)
+        other = SagaOrchestrator(event_log=log, lease_seconds=LEASE_SECONDS)
+        other_steps = StepCalls()
+        other_steps.register(other)
+        other.register_step('charge', slow_charge)
+
+        summary = await other.recover()
+
+        assert summary['leased'] == [saga.saga_id]
+        assert other.get_saga_status(saga.saga_id) is None
+        release.set()
+        assert await running is True
+        assert await log.load_unfinished() == {}
+        await owner.close()
+        await other.close()
+
+    def test_event_log_created_on_first_use(self):
+        """Test an orchestrator with a log factory does not build the log up front"""
+        built = []
+        orchestrator = SagaOrchestrator(event_log_factory=lambda: built.append(1))
+
+        assert built == []
+        assert orchestrator.event_log is None
+        assert orchestrator.event_log is None
+        assert built == [1]
+
+
+class TestRedisStreamEventLog:
+    """Test the Redis Streams backend"""
+
+    @pytest.mark.asyncio
+    async def test_resume_after_crash(self, redis_client):
+        """Test crash recovery through a Redis stream"""
+        saga_id = await crash_midway(RedisStreamSagaEventLog(redis_client, stream='test:saga'))
+
+        log = RedisStreamSagaEventLog(redis_client, stream='test:saga', read_chunk_size=2)
+        steps = StepCalls()
+        orchestrator = SagaOrchestrator(event_log=log)
+        steps.register(orchestrator)
+
+        summary = await orchestrator.recover()
+
+        assert summary['resumed'] == [saga_id]
+        assert orchestrator.get_saga_status(saga_id)['steps'][2]['status'] == SagaStepStatus.COMPLETED.value
+        assert await log.load_unfinished() == {}
+        assert await log.compact() > 0
+        assert await redis_client.xlen('test:saga') == 0
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_leases(self, redis_client):
+        """Test Redis leases are exclusive until they expire and only the owner releases them"""
+        log = RedisStreamSagaEventLog(redis_client, stream='test:saga')
+
+        assert await log.acquire_lease('s', 'a', 10) is True
+        assert await log.acquire_lease('s', 'b', 10) is False
+        await log.release_lease('s', 'b')
+        assert await redis_client.get('test:saga:lease:s') == 'a'
+
+        await log.renew_leases(['s'], 'a', 0.05)
+        await asyncio.sleep(0.1)
+        assert await log.acquire_lease('s', 'b', 10) is True
+        await log.release_lease('s', 'b')
+        assert await redis_client.exists('test:saga:lease:s') == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for the sliding-window circuit breaker and shared breaker state
+"""
+
+import asyncio
+
+import pytest
+
+from resilience_patterns import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerOpenError,
+    CircuitState,
+    RedisCircuitBreakerState,
+    ResilienceManager,
+    SlidingWindowCounter,
+)
+
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def ok():
+    return 'ok'
+
+
+async def fail():
+    raise RuntimeError('unavailable')
+
+
+async def slow():
+    await asyncio.sleep(0.02)
+    return 'ok'
+
+
+async def drive(breaker, pattern):
+    """Run calls per pattern ('s' success, 'f' failure, 'l' slow) and swallow errors"""
+    calls = {'s': ok, 'f': fail, 'l': slow}
+    for kind in pattern:
+        try:
+            await breaker.call(calls[kind])
+        except (RuntimeError, CircuitBreakerOpenError):
+            pass
+
+
+class TestSlidingWindowCounter:
+    """Test the bucketed ring buffer"""
+
+    def test_old_buckets_fall_out_of_window(self):
+        """Test outcomes older than the window are not counted"""
+        window = SlidingWindowCounter(window_seconds=10, buckets=5)
+        window.record(failed=True, now=100.0)
+        window.record(failed=False, now=105.0)
+
+        assert window.totals(now=108.0) == {'calls': 2, 'failures': 1, 'slow': 0}
+        assert window.totals(now=111.0) == {'calls': 1, 'failures': 0, 'slow': 0}
+
+    def test_reused_slot_is_reset(self):
+        """Test a slot from a previous lap of the ring starts from zero"""
+        window = SlidingWindowCounter(window_seconds=10, buckets=5)
+        window.record(failed=True, now=100.0)
+        window.record(failed=False, now=110.0)
+
+        assert window.totals(now=110.0) == {'calls': 1, 'failures': 0, 'slow': 0}
+
+
+class TestSlidingWindowBreaker:
+    """Test rate-based tripping"""
+
+    @pytest.mark.asyncio
+    async def test_alternating_failures_open_the_breaker(self):
+        """Test a 50% failure rate opens the breaker even without consecutive failures"""
+        breaker = CircuitBreaker('svc', CircuitBreakerConfig(minimum_calls=10, failure_rate_threshold=0.5))
+
+        await drive(breaker, 'sf' * 5)
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.metrics.consecutive_failures == 0
+
+    @pytest.mark.asyncio
+    async def test_minimum_throughput_is_required(self):
+        """Test a high failure rate over few calls does not trip"""
+        breaker = CircuitBreaker('svc', CircuitBreakerConfig(minimum_calls=10))
+
+        await drive(breaker, 'fsfsf')
+
+        assert breaker.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_slow_calls_open_the_breaker(self):
+        """Test a high slow-call rate opens the breaker"""
+        breaker = CircuitBreaker('svc', CircuitBreakerConfig(
+            minimum_calls=4, slow_call_duration=0.01, slow_call_rate_threshold=0.5
+        ))
+
+        await drive(breaker, 'ssll')
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.get_metrics()['window_slow_rate'] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_half_open_needs_fresh_successes_after_slow_open(self):
+        """Test successes counted before a slow-call trip do not close the breaker"""
+        breaker = CircuitBreaker('svc', CircuitBreakerConfig(
+            minimum_calls=5, slow_call_duration=0.01, slow_call_rate_threshold=1.0,
+            recovery_timeout=0, success_threshold=3
+        ))
+        await drive(breaker, 'lllll')
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.metrics.consecutive_successes == 0
+
+        await drive(breaker, 's')
+        assert breaker.state == CircuitState.HALF_OPEN
+
+        await drive(breaker, 'ss')
+        assert breaker.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens(self):
+        """Test a failure while half-open re-opens the breaker"""
+        breaker = CircuitBreaker('svc', CircuitBreakerConfig(failure_threshold=1, recovery_timeout=0))
+        await drive(breaker, 'f')
+        assert breaker.state == CircuitState.OPEN
+
+        await drive(breaker, 'f')
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.metrics.state_transitions == 3
+
+
+class TestSharedState:
+    """Test breaker state shared between workers"""
+
+    @pytest.mark.asyncio
+    async def test_workers_open_and_close_together(self, redis_client):
+        """Test a breaker opened by one worker rejects calls in another"""
+        config = CircuitBreakerConfig(failure_threshold=2, recovery_timeout=60, shared_sync_interval=0)
+        shared = RedisCircuitBreakerState(redis_client)
+        worker_a = CircuitBreaker('payments', config, shared_state=shared)
+        worker_b = CircuitBreaker('payments', config, shared_state=shared)
+
+        await drive(worker_b, 'sss')
+        await drive(worker_a, 'ff')
+        assert worker_a.state == CircuitState.OPEN
+
+        with pytest.raises(CircuitBreakerOpenError):
+            await worker_b.call(ok)
+        assert worker_b.opened_at == pytest.approx(worker_a.opened_at)
+        assert worker_b.metrics.consecutive_successes == 0
+
+        worker_a._transition(CircuitState.CLOSED)
+        await worker_a._publish_shared_state()
+        assert await worker_b.call(ok) == 'ok'
+        assert worker_b.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_local_state(self):
+        """Test an unreachable Redis does not break calls"""
+        class Broken:
+            async def load(self, name):
+                raise ConnectionError('down')
+
+            async def save(self, *args):
+                raise ConnectionError('down')
+
+        breaker = CircuitBreaker('svc', CircuitBreakerConfig(failure_threshold=1, shared_sync_interval=0),
+                                 shared_state=Broken())
+
+        assert await breaker.call(ok) == 'ok'
+        await drive(breaker, 'f')
+        assert breaker.state == CircuitState.OPEN
+
+
+class TestMetricsExport:
+    """Test the scrape-friendly export"""
+
+    @pytest.mark.asyncio
+    async def test_prometheus_export(self):
+        """Test breaker state and window rates are exported as Prometheus text"""
+        manager = ResilienceManager()
+        breaker = manager.get_circuit_breaker('search', CircuitBreakerConfig(failure_threshold=1))
+        await drive(breaker, 'sf')
+
+        text = manager.export_prometheus()
+
+        assert 'circuit_breaker_state{service="search",state="open"} 1' in text
+        assert 'circuit_breaker_failed_requests_total{service="search"} 1' in text
+        assert 'circuit_breaker_window_failure_rate{service="search"} 0.5' in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
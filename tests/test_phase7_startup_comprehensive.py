@@ -64,7 +64,12 @@ def mock_agents():
     with patch('phase7_startup.OpsAgent') as ops, \
          patch('phase7_startup.GrowthStrategist') as growth, \
          patch('phase7_startup.PMAgent') as pm, \
-         patch('phase7_startup.HITLApprovalSystem') as hitl:
+         patch('phase7_startup.HITLApprovalSystem') as hitl, \
+         patch('phase7_startup.saga_orchestrator') as saga:
+        
+        saga.recover = AsyncMock(return_value={'resumed': [], 'compensated': [], 'skipped': []})
+        saga.compact_event_log = AsyncMock(return_value=0)
+        saga.close = AsyncMock()
         
         ops_instance = Mock()
         ops_instance.analyze_system_capacity = AsyncMock(return_value=Mock(current_load=0.5, estimated_headroom=0.5))
@@ -93,7 +98,8 @@ def mock_agents():
             'ops': ops,
             'growth': growth,
             'pm': pm,
-            'hitl': hitl
+            'hitl': hitl,
+            'saga': saga
         }
 
 
@@ -382,10 +388,13 @@ class TestSystemLifecycle:
             await asyncio.sleep(0.1)  # Let it initialize
             
             assert system.running is True
-            assert len(system.background_tasks) == 4  # ops, growth, pm, hitl
+            assert len(system.background_tasks) == 6  # ops, growth, pm, hitl, saga compaction and recovery
+            mock_agents['saga'].recover.assert_awaited_once_with(policy='resume')
+            mock_agents['saga'].compact_event_log.assert_awaited()
             
             await system.stop()
             await start_task
+            mock_agents['saga'].close.assert_awaited_once()
     
     @pytest.mark.asyncio
     async def test_start_disabled_system(self, mock_config, mock_agents):